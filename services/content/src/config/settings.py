@@ -28,6 +28,10 @@ class Settings(BaseSettings):
     cache_ttl: int = int(os.getenv("CACHE_TTL", 3600))  # 1 hora
     redis_url: Optional[str] = os.getenv("REDIS_URL")
     
+    # Índices em memória: reconstruídos a partir do Firestore após este
+    # intervalo, para incluir escritas feitas por outras instâncias
+    search_index_ttl: int = int(os.getenv("SEARCH_INDEX_TTL", 300))  # 5 minutos
+    
     # Configurações de logging
     log_level: str = os.getenv("LOG_LEVEL", "INFO")
     
@@ -116,10 +116,11 @@ class Exercise(BaseModel):
 class ExerciseSearchResponse(BaseModel):
     """Resposta da busca de exercícios"""
     exercises: List[Exercise] = Field(..., description="Lista de exercícios encontrados")
-    total: int = Field(..., description="Total de resultados disponíveis")
+    total: Optional[int] = Field(None, description="Total de resultados disponíveis (None se não contado)")
     limit: int = Field(..., description="Limite aplicado na busca")
     offset: int = Field(..., description="Offset aplicado na busca")
     has_more: bool = Field(..., description="Se há mais resultados disponíveis")
+    next_cursor: Optional[str] = Field(None, description="Cursor da próxima página (None se não há mais resultados)")
 
 class METValue(BaseModel):
     """Valor MET para cálculo de gasto calórico"""
@@ -68,10 +68,11 @@ class Food(BaseModel):
 class FoodSearchResponse(BaseModel):
     """Resposta da busca de alimentos"""
     foods: List[Food] = Field(..., description="Lista de alimentos encontrados")
-    total: int = Field(..., description="Total de resultados disponíveis")
+    total: Optional[int] = Field(None, description="Total de resultados disponíveis (None se não contado)")
     limit: int = Field(..., description="Limite aplicado na busca")
     offset: int = Field(..., description="Offset aplicado na busca")
     has_more: bool = Field(..., description="Se há mais resultados disponíveis")
+    next_cursor: Optional[str] = Field(None, description="Cursor da próxima página (None se não há mais resultados)")
     
 class FoodCreateRequest(BaseModel):
     """Request para criar um novo alimento"""
@@ -2,11 +2,19 @@
 Serviço de lógica de negócio para conteúdo (alimentos e exercícios)
 """
 
-from typing import List, Dict, Any, Optional
+import asyncio
+import base64
+import bisect
+import json
+import time
+from typing import List, Dict, Any, Optional, Callable
 import structlog
 from datetime import datetime
 
+from ..config.settings import get_settings
 from .firebase_service import FirebaseService
+from .search_index import SearchIndex, normalize
+from .facet_index import FacetIndex
 from ..models.food import Food, FoodSearchResponse, NutritionalInfo, ServingSize
 from ..models.exercise import (
     Exercise, ExerciseSearchResponse, METValue, 
@@ -25,16 +33,193 @@ class ContentService:
         self.FOODS_COLLECTION = "foods"
         self.EXERCISES_COLLECTION = "exercises"
         self.MET_VALUES_COLLECTION = "met_values"
+        
+        # Índices de busca textual em memória (snapshot do catálogo, mantidos
+        # incrementalmente pelas escritas feitas via FirebaseService e
+        # reconstruídos após search_index_ttl para incluir as de outras instâncias)
+        self.food_index = SearchIndex(self.FOODS_COLLECTION, filter_fields=("nutritional_info",))
+        self.exercise_index = SearchIndex(
+            self.EXERCISES_COLLECTION,
+            filter_fields=("primary_muscle_group", "equipment", "difficulty", "exercise_type")
+        )
+        self._indexes = {index.name: index for index in (self.food_index, self.exercise_index)}
+        
+        # Facetas (valores distintos e contagens), construídas e reconstruídas
+        # junto com o índice de busca a partir do mesmo snapshot
+        self._facets = {
+            self.FOODS_COLLECTION: FacetIndex(self.FOODS_COLLECTION, ("category",)),
+            self.EXERCISES_COLLECTION: FacetIndex(
+                self.EXERCISES_COLLECTION,
+                ("primary_muscle_group", "equipment", "difficulty", "exercise_type")
+            ),
+        }
+        self._index_lock = asyncio.Lock()
+        self.index_ttl = get_settings().search_index_ttl
+        self._refresh_tasks: Dict[str, asyncio.Task] = {}
+        # Alterações recebidas durante uma reconstrução, reaplicadas ao final
+        self._pending_changes: Dict[str, List[tuple]] = {}
+        self.firebase.add_change_listener(self._on_document_change)
+    
+    async def build_search_indexes(self):
+        """Construir os índices de busca e de facetas a partir de um snapshot do catálogo"""
+        async with self._index_lock:
+            for index in self._indexes.values():
+                await self._build_catalog_index(index)
+    
+    async def _ensure_index(self, index: SearchIndex) -> bool:
+        """
+        Garantir que o índice (e suas facetas) foi construído; False se não foi possível
+        
+        Um índice mais antigo que index_ttl continua atendendo enquanto é
+        reconstruído em segundo plano.
+        """
+        if index.ready:
+            if self._is_stale(index):
+                self._schedule_refresh(index)
+            return True
+        try:
+            async with self._index_lock:
+                if not index.ready:
+                    await self._build_catalog_index(index)
+            return True
+        except Exception as e:
+            logger.warning("Índice de busca indisponível, usando Firestore", index=index.name, error=str(e))
+            return False
+    
+    def _is_stale(self, index: SearchIndex) -> bool:
+        """Índice de busca ou suas facetas mais antigos que index_ttl"""
+        built_at = min(index.built_at, self._facets[index.name].built_at)
+        return time.monotonic() - built_at >= self.index_ttl
+    
+    def _schedule_refresh(self, index: SearchIndex):
+        """Disparar a reconstrução em segundo plano (uma por índice)"""
+        task = self._refresh_tasks.get(index.name)
+        if task is None or task.done():
+            self._refresh_tasks[index.name] = asyncio.create_task(self._refresh_index(index))
+    
+    async def _refresh_index(self, index: SearchIndex):
+        """Reconstruir um índice expirado; em caso de erro mantém o snapshot atual"""
+        try:
+            async with self._index_lock:
+                if self._is_stale(index):
+                    await self._build_catalog_index(index)
+        except Exception as e:
+            logger.warning("Erro ao atualizar índice de busca, mantendo o anterior", index=index.name, error=str(e))
+    
+    async def _build_catalog_index(self, index: SearchIndex):
+        """Ler o snapshot (apenas os campos indexados) e construir busca e facetas"""
+        facets = self._facets[index.name]
+        fields = dict.fromkeys(["name", "tags", "category", *index.filter_fields, *facets.fields])
+        
+        # Escritas deste processo durante a leitura podem não estar no snapshot
+        self._pending_changes[index.name] = []
+        try:
+            docs = await self.firebase.stream_collection(index.name, fields=list(fields))
+            index.build(docs)
+            facets.build(docs)
+            for doc_id, data in self._pending_changes[index.name]:
+                self._apply_change(index, doc_id, data)
+        finally:
+            del self._pending_changes[index.name]
+    
+    def _on_document_change(self, collection: str, doc_id: str, data: Optional[Dict[str, Any]]):
+        """Aplicar aos índices uma criação, atualização (data parcial) ou exclusão (data None)"""
+        index = self._indexes.get(collection)
+        if index is None:
+            return
+        if collection in self._pending_changes:
+            self._pending_changes[collection].append((doc_id, data))
+        if index.ready:
+            self._apply_change(index, doc_id, data)
+    
+    def _apply_change(self, index: SearchIndex, doc_id: str, data: Optional[Dict[str, Any]]):
+        for target in (index, self._facets[index.name]):
+            if data is None:
+                target.remove(doc_id)
+            else:
+                target.upsert(doc_id, data)
+    
+    async def _search_index(
+        self,
+        index: SearchIndex,
+        search_term: str,
+        predicates: Dict[str, Callable[[Any], bool]],
+        limit: int,
+        offset: int,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Busca textual no índice em memória
+        
+        O ranking e os filtros são resolvidos no índice; do Firestore vêm
+        apenas os documentos da página (via cache do FirebaseService). O
+        cursor guarda a chave de ordenação do último resultado, de modo que
+        a página seguinte continua do mesmo ponto mesmo após alterações no
+        catálogo.
+        """
+        ranked = index.search(search_term, predicates)
+        
+        start = offset
+        if cursor:
+            keys = [index.sort_key(doc_id, score) for doc_id, score in ranked]
+            start = bisect.bisect_right(keys, self._decode_index_cursor(cursor))
+        page = ranked[start:start + limit]
+        has_more = start + limit < len(ranked)
+        
+        docs = await self.firebase.get_documents(index.name, [doc_id for doc_id, _ in page])
+        
+        return {
+            "documents": [docs[doc_id] for doc_id, _ in page if doc_id in docs],
+            "total": len(ranked),
+            "has_more": has_more,
+            "next_cursor": self._encode_index_cursor(index.sort_key(*page[-1])) if has_more else None
+        }
+    
+    @staticmethod
+    def _encode_index_cursor(sort_key: tuple) -> str:
+        """Cursor opaco de uma busca no índice"""
+        payload = {"index": list(sort_key)}
+        return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")
+    
+    @staticmethod
+    def _decode_index_cursor(cursor: str) -> tuple:
+        """Chave de ordenação codificada em um cursor do índice"""
+        try:
+            score, name, doc_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))["index"]
+            return (float(score), str(name), str(doc_id))
+        except Exception as e:
+            raise ValueError(f"Cursor inválido: {cursor}") from e
     
     async def search_foods(
         self,
         search_term: Optional[str] = None,
         filters: Optional[Dict[str, Any]] = None,
         limit: int = 20,
-        offset: int = 0
+        offset: int = 0,
+        include_total: bool = True,
+        cursor: Optional[str] = None
     ) -> FoodSearchResponse:
-        """Buscar alimentos com filtros"""
+        """
+        Buscar alimentos com filtros
+        
+        Com include_total=False o total não é contado (apenas has_more).
+        Para paginar, prefira repassar o next_cursor da resposta anterior
+        (mantendo os demais parâmetros) em vez de incrementar o offset.
+        """
         try:
+            if search_term and await self._ensure_index(self.food_index):
+                result = await self._search_index(
+                    self.food_index, search_term, self._food_predicates(filters or {}), limit, offset, cursor
+                )
+                return FoodSearchResponse(
+                    foods=self._convert_documents(result["documents"], self._document_to_food, "alimento"),
+                    total=result["total"],
+                    limit=limit,
+                    offset=0 if cursor else offset,
+                    has_more=result["has_more"],
+                    next_cursor=result["next_cursor"]
+                )
+            
             # Preparar filtros do Firestore
             firestore_filters = {}
             
@@ -58,7 +243,9 @@ class ContentService:
                 search_fields=["name", "tags"] if search_term else None,
                 limit=limit,
                 offset=offset,
-                order_by="name"
+                order_by="name",
+                include_total=include_total,
+                cursor=cursor
             )
             
             # Converter para modelos Pydantic
@@ -71,21 +258,22 @@ class ContentService:
                     logger.warning("Erro ao converter documento de alimento", doc_id=doc.get("id"), error=str(e))
                     continue
             
-            # Filtrar por busca textual se necessário (fallback)
+            # Filtrar por busca textual se necessário (fallback sem índice)
             if search_term and foods:
-                search_lower = search_term.lower()
+                search_normalized = normalize(search_term)
                 foods = [
                     food for food in foods 
-                    if search_lower in food.name.lower() or 
-                       (food.tags and any(search_lower in tag.lower() for tag in food.tags))
+                    if search_normalized in normalize(food.name) or 
+                       (food.tags and any(search_normalized in normalize(tag) for tag in food.tags))
                 ]
             
             return FoodSearchResponse(
                 foods=foods,
                 total=result["total"],
                 limit=limit,
-                offset=offset,
-                has_more=result["has_more"]
+                offset=result["offset"],
+                has_more=result["has_more"],
+                next_cursor=result["next_cursor"]
             )
             
         except Exception as e:
@@ -104,15 +292,47 @@ class ContentService:
             logger.error("Erro ao obter alimento", food_id=food_id, error=str(e))
             raise
     
+    async def get_foods_by_ids(self, food_ids: List[str]) -> Dict[str, Food]:
+        """Obter vários alimentos por ID (um round-trip; IDs inexistentes ficam de fora)"""
+        try:
+            docs = await self.firebase.get_documents(self.FOODS_COLLECTION, food_ids)
+            foods = self._convert_documents(list(docs.values()), self._document_to_food, "alimento")
+            return {food.id: food for food in foods}
+            
+        except Exception as e:
+            logger.error("Erro ao obter alimentos", count=len(food_ids), error=str(e))
+            raise
+    
     async def search_exercises(
         self,
         search_term: Optional[str] = None,
         filters: Optional[Dict[str, Any]] = None,
         limit: int = 20,
-        offset: int = 0
+        offset: int = 0,
+        include_total: bool = True,
+        cursor: Optional[str] = None
     ) -> ExerciseSearchResponse:
-        """Buscar exercícios com filtros"""
+        """
+        Buscar exercícios com filtros
+        
+        Com include_total=False o total não é contado (apenas has_more).
+        Para paginar, prefira repassar o next_cursor da resposta anterior
+        (mantendo os demais parâmetros) em vez de incrementar o offset.
+        """
         try:
+            if search_term and await self._ensure_index(self.exercise_index):
+                result = await self._search_index(
+                    self.exercise_index, search_term, self._exercise_predicates(filters or {}), limit, offset, cursor
+                )
+                return ExerciseSearchResponse(
+                    exercises=self._convert_documents(result["documents"], self._document_to_exercise, "exercício"),
+                    total=result["total"],
+                    limit=limit,
+                    offset=0 if cursor else offset,
+                    has_more=result["has_more"],
+                    next_cursor=result["next_cursor"]
+                )
+            
             # Preparar filtros do Firestore
             firestore_filters = {}
             
@@ -137,7 +357,9 @@ class ContentService:
                 search_fields=["name", "tags"] if search_term else None,
                 limit=limit,
                 offset=offset,
-                order_by="name"
+                order_by="name",
+                include_total=include_total,
+                cursor=cursor
             )
             
             # Converter para modelos Pydantic
@@ -150,21 +372,22 @@ class ContentService:
                     logger.warning("Erro ao converter documento de exercício", doc_id=doc.get("id"), error=str(e))
                     continue
             
-            # Filtrar por busca textual se necessário (fallback)
+            # Filtrar por busca textual se necessário (fallback sem índice)
             if search_term and exercises:
-                search_lower = search_term.lower()
+                search_normalized = normalize(search_term)
                 exercises = [
                     exercise for exercise in exercises 
-                    if search_lower in exercise.name.lower() or 
-                       (exercise.tags and any(search_lower in tag.lower() for tag in exercise.tags))
+                    if search_normalized in normalize(exercise.name) or 
+                       (exercise.tags and any(search_normalized in normalize(tag) for tag in exercise.tags))
                 ]
             
             return ExerciseSearchResponse(
                 exercises=exercises,
                 total=result["total"],
                 limit=limit,
-                offset=offset,
-                has_more=result["has_more"]
+                offset=result["offset"],
+                has_more=result["has_more"],
+                next_cursor=result["next_cursor"]
             )
             
         except Exception as e:
@@ -183,6 +406,36 @@ class ContentService:
             logger.error("Erro ao obter exercício", exercise_id=exercise_id, error=str(e))
             raise
     
+    async def get_exercises_by_ids(self, exercise_ids: List[str]) -> Dict[str, Exercise]:
+        """Obter vários exercícios por ID (um round-trip; IDs inexistentes ficam de fora)"""
+        try:
+            docs = await self.firebase.get_documents(self.EXERCISES_COLLECTION, exercise_ids)
+            exercises = self._convert_documents(list(docs.values()), self._document_to_exercise, "exercício")
+            return {exercise.id: exercise for exercise in exercises}
+            
+        except Exception as e:
+            logger.error("Erro ao obter exercícios", count=len(exercise_ids), error=str(e))
+            raise
+    
+    async def get_exercise_met_values(self, exercise_ids: List[str]) -> Dict[str, float]:
+        """
+        Obter o valor MET de vários exercícios por ID
+        
+        Exercícios inexistentes ou sem MET ficam de fora; quem chama aplica
+        o valor padrão.
+        """
+        try:
+            docs = await self.firebase.get_documents(self.EXERCISES_COLLECTION, exercise_ids)
+            return {
+                doc_id: float(doc["met_value"])
+                for doc_id, doc in docs.items()
+                if doc.get("met_value") is not None
+            }
+            
+        except Exception as e:
+            logger.error("Erro ao obter valores MET dos exercícios", count=len(exercise_ids), error=str(e))
+            raise
+    
     async def get_met_values(self, exercise_type: Optional[str] = None) -> List[METValue]:
         """Obter valores MET para cálculo calórico"""
         try:
@@ -194,7 +447,8 @@ class ContentService:
                 collection=self.MET_VALUES_COLLECTION,
                 filters=filters,
                 limit=100,  # MET values são limitados
-                order_by="activity"
+                order_by="activity",
+                include_total=False
             )
             
             met_values = []
@@ -215,6 +469,9 @@ class ContentService:
     async def get_food_categories(self) -> List[str]:
         """Obter categorias de alimentos disponíveis"""
         try:
+            if await self._ensure_index(self.food_index):
+                return self._facets[self.FOODS_COLLECTION].values("category")
+            
             categories = await self.firebase.get_distinct_values(
                 self.FOODS_COLLECTION, 
                 "category"
@@ -225,6 +482,30 @@ class ContentService:
             logger.error("Erro ao obter categorias de alimentos", error=str(e))
             raise
     
+    async def get_facet_counts(self, collection: str) -> Dict[str, Dict[str, int]]:
+        """
+        Obter a quantidade de documentos por valor de cada faceta
+        
+        Args:
+            collection: Coleção de catálogo (alimentos ou exercícios)
+        
+        Returns:
+            Dict: {campo: {valor: quantidade}}
+        """
+        try:
+            if collection not in self._facets:
+                raise ValueError(f"Coleção sem facetas: {collection}")
+            
+            if not await self._ensure_index(self._indexes[collection]):
+                raise RuntimeError(f"Índice de facetas indisponível: {collection}")
+            
+            facets = self._facets[collection]
+            return {field: facets.counts(field) for field in facets.fields}
+            
+        except Exception as e:
+            logger.error("Erro ao obter facetas", collection=collection, error=str(e))
+            raise
+    
     async def get_exercise_categories(self) -> Dict[str, List[str]]:
         """Obter categorias de exercícios disponíveis"""
         try:
@@ -244,6 +525,51 @@ class ContentService:
             logger.error("Erro ao obter categorias de exercícios", error=str(e))
             raise
     
+    @staticmethod
+    def _food_predicates(filters: Dict[str, Any]) -> Dict[str, Callable[[Any], bool]]:
+        """Filtros de alimentos como predicados sobre os atributos do índice"""
+        predicates: Dict[str, Callable[[Any], bool]] = {}
+        
+        if "category" in filters:
+            predicates["category"] = lambda value: value == filters["category"]
+        
+        nutrient_filters = []
+        if "min_protein" in filters:
+            nutrient_filters.append(lambda info: (info.get("protein") or 0) >= filters["min_protein"])
+        if "max_calories" in filters:
+            nutrient_filters.append(lambda info: (info.get("calories") or 0) <= filters["max_calories"])
+        if nutrient_filters:
+            predicates["nutritional_info"] = lambda value: all(check(value or {}) for check in nutrient_filters)
+        
+        return predicates
+    
+    @staticmethod
+    def _exercise_predicates(filters: Dict[str, Any]) -> Dict[str, Callable[[Any], bool]]:
+        """Filtros de exercícios como predicados sobre os atributos do índice"""
+        predicates: Dict[str, Callable[[Any], bool]] = {}
+        
+        if "muscle_group" in filters:
+            predicates["primary_muscle_group"] = lambda value: value == filters["muscle_group"]
+        if "equipment" in filters:
+            predicates["equipment"] = lambda value: filters["equipment"] in (value or [])
+        if "difficulty" in filters:
+            predicates["difficulty"] = lambda value: value == filters["difficulty"]
+        if "exercise_type" in filters:
+            predicates["exercise_type"] = lambda value: value == filters["exercise_type"]
+        
+        return predicates
+    
+    @staticmethod
+    def _convert_documents(docs: List[Dict[str, Any]], converter: Callable, label: str) -> List[Any]:
+        """Converter documentos para modelos, ignorando os inválidos"""
+        items = []
+        for doc in docs:
+            try:
+                items.append(converter(doc))
+            except Exception as e:
+                logger.warning(f"Erro ao converter documento de {label}", doc_id=doc.get("id"), error=str(e))
+        return items
+    
     def _document_to_food(self, doc: Dict[str, Any]) -> Food:
         """Converter documento Firestore para modelo Food"""
         try:
@@ -0,0 +1,95 @@
+"""
+Índice de facetas em memória (valores distintos e contagens por campo)
+"""
+
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Tuple
+import structlog
+
+logger = structlog.get_logger()
+
+
+class FacetIndex:
+    """
+    Contagem de documentos por valor de cada campo de faceta
+
+    Mantido incrementalmente a partir das alterações de documentos, de modo
+    que listar categorias custa O(facetas) em vez de ler a coleção inteira.
+    Campos com lista (ex: equipment) contam cada valor uma vez por documento.
+    Como o índice de busca, só vê escritas deste processo: é reconstruído
+    junto com ele quando o snapshot expira (ver ContentService).
+
+    Não é thread-safe; é usado apenas a partir do event loop.
+    """
+
+    def __init__(self, name: str, fields: Iterable[str]):
+        self.name = name
+        self.fields = tuple(fields)
+
+        self._counts: Dict[str, Counter] = {field: Counter() for field in self.fields}
+        self._doc_values: Dict[str, Dict[str, Tuple[Any, ...]]] = {}
+        self.ready = False
+        self.built_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._doc_values)
+
+    def build(self, documents: Iterable[Dict[str, Any]]):
+        """Reconstrói as contagens a partir de um snapshot do catálogo"""
+        for counts in self._counts.values():
+            counts.clear()
+        self._doc_values.clear()
+
+        for doc in documents:
+            if doc.get("id"):
+                self._add(doc["id"], doc)
+
+        self.ready = True
+        self.built_at = time.monotonic()
+        logger.info("Índice de facetas construído", index=self.name, documents=len(self))
+
+    def upsert(self, doc_id: str, data: Dict[str, Any]):
+        """Aplica um documento novo ou uma atualização (parcial)"""
+        if not any(field in data for field in self.fields) and doc_id in self._doc_values:
+            return
+
+        previous = self._doc_values.get(doc_id, {})
+        merged = {field: list(values) for field, values in previous.items()}
+        merged.update({field: data[field] for field in self.fields if field in data})
+        self.remove(doc_id)
+        self._add(doc_id, merged)
+
+    def remove(self, doc_id: str):
+        """Remove a contribuição de um documento"""
+        values = self._doc_values.pop(doc_id, None)
+        if not values:
+            return
+
+        for field, field_values in values.items():
+            counts = self._counts[field]
+            for value in field_values:
+                counts[value] -= 1
+                if counts[value] <= 0:
+                    del counts[value]
+
+    def values(self, field: str) -> List[Any]:
+        """Valores distintos de um campo, ordenados"""
+        return sorted(self._counts[field])
+
+    def counts(self, field: str) -> Dict[Any, int]:
+        """Quantidade de documentos por valor de um campo"""
+        return dict(sorted(self._counts[field].items()))
+
+    def _add(self, doc_id: str, doc: Dict[str, Any]):
+        values: Dict[str, Tuple[Any, ...]] = {}
+        for field in self.fields:
+            value = doc.get(field)
+            raw_values = value if isinstance(value, list) else [value]
+            # Apenas valores hasheáveis e não vazios, sem repetição no documento
+            field_values = tuple(dict.fromkeys(
+                item for item in raw_values if item not in (None, "") and isinstance(item, (str, int, float, bool))
+            ))
+            values[field] = field_values
+            self._counts[field].update(field_values)
+        self._doc_values[doc_id] = values
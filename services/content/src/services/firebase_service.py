@@ -4,10 +4,13 @@ Serviço de conexão e operações com Firebase Firestore
 
 import os
 import asyncio
-from typing import List, Dict, Any, Optional, Union
+import base64
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Union, Callable, Tuple
 import firebase_admin
 from firebase_admin import credentials, firestore
 from google.cloud.firestore_v1.base_query import FieldFilter
+from google.cloud.firestore_v1.field_path import FieldPath
 from google.cloud.firestore_v1 import AsyncClient
 import structlog
 from cachetools import TTLCache
@@ -25,6 +28,7 @@ class FirebaseService:
         self.db: Optional[AsyncClient] = None
         self.app = None
         self._cache = TTLCache(maxsize=1000, ttl=settings.cache_ttl)
+        self._change_listeners: List[Callable[[str, str, Optional[Dict[str, Any]]], None]] = []
         
     async def initialize(self):
         """Inicializar conexão com Firebase"""
@@ -111,6 +115,51 @@ class FirebaseService:
             logger.error("Erro ao obter documento", collection=collection, doc_id=doc_id, error=str(e))
             raise
     
+    async def get_documents(self, collection: str, doc_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Obter vários documentos por ID
+        
+        Consulta o cache primeiro e busca apenas os ausentes, com uma única
+        chamada get_all (um round-trip para todos os IDs).
+        
+        Returns:
+            Dict: ID -> documento (IDs inexistentes ficam de fora)
+        """
+        documents: Dict[str, Dict[str, Any]] = {}
+        missing: List[str] = []
+        for doc_id in dict.fromkeys(doc_ids):
+            cache_key = self._get_cache_key(collection, doc_id)
+            if cache_key in self._cache:
+                documents[doc_id] = self._cache[cache_key]
+            else:
+                missing.append(doc_id)
+        
+        if not missing:
+            return documents
+        
+        try:
+            doc_refs = [self.db.collection(collection).document(doc_id) for doc_id in missing]
+            async for doc in self.db.get_all(doc_refs):
+                if not doc.exists:
+                    continue
+                data = doc.to_dict()
+                data['id'] = doc.id
+                self._cache[self._get_cache_key(collection, doc.id)] = data
+                documents[doc.id] = data
+            
+            logger.debug(
+                "Documentos obtidos",
+                collection=collection,
+                requested=len(doc_ids),
+                cache_hits=len(doc_ids) - len(missing),
+                found=len(documents)
+            )
+            return documents
+            
+        except Exception as e:
+            logger.error("Erro ao obter documentos", collection=collection, count=len(missing), error=str(e))
+            raise
+    
     async def search_documents(
         self,
         collection: str,
@@ -120,11 +169,23 @@ class FirebaseService:
         limit: int = 20,
         offset: int = 0,
         order_by: Optional[str] = None,
-        order_direction: str = "asc"
+        order_direction: str = "asc",
+        include_total: bool = True,
+        cursor: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Buscar documentos com filtros e paginação
         
+        A página é lida com limit + 1 documentos para calcular has_more; o
+        total vem de uma agregação count() do Firestore (cacheada por
+        filtro), sem ler os documentos que casam com a busca.
+        
+        Paginação por cursor: next_cursor codifica o valor de order_by e o ID
+        do último documento da página, e a próxima página começa com
+        start_after, de modo que a página N custa o mesmo que a primeira. O
+        offset continua aceito por compatibilidade (o Firestore lê e cobra
+        os documentos pulados); com cursor, o offset é ignorado.
+        
         Args:
             collection: Nome da coleção
             filters: Filtros a aplicar (campo: valor)
@@ -134,6 +195,11 @@ class FirebaseService:
             offset: Offset para paginação
             order_by: Campo para ordenação
             order_direction: Direção da ordenação (asc/desc)
+            include_total: Se False, não conta os resultados (total = None)
+            cursor: next_cursor de uma busca anterior com os mesmos parâmetros
+        
+        Raises:
+            ValueError: Se o cursor é inválido ou de outra ordenação
         """
         try:
             query = self.db.collection(collection)
@@ -149,43 +215,60 @@ class FirebaseService:
                         # Filtro simples de igualdade
                         query = query.where(filter=FieldFilter(field, "==", value))
             
-            # Busca textual (simulada com array-contains para tags)
+            # Busca textual aproximada por tags (o ContentService usa o índice
+            # em memória; aqui fica o fallback). O Firestore aceita um único
+            # filtro de array por query, com até 10 valores.
             if search_term and search_fields:
-                # Para busca textual real, seria necessário usar Algolia ou similar
-                # Por enquanto, buscar em tags se disponível
                 if "tags" in search_fields:
-                    search_words = search_term.lower().split()
-                    for word in search_words:
-                        query = query.where(filter=FieldFilter("tags", "array_contains", word))
+                    search_words = list(dict.fromkeys(search_term.lower().split()))[:10]
+                    query = query.where(filter=FieldFilter("tags", "array_contains_any", search_words))
             
-            # Ordenação
+            # Ordenação (o ID desempata, para que o cursor seja estável)
+            direction = firestore.Query.DESCENDING if order_direction == "desc" else firestore.Query.ASCENDING
             if order_by:
-                direction = firestore.Query.DESCENDING if order_direction == "desc" else firestore.Query.ASCENDING
                 query = query.order_by(order_by, direction=direction)
+            if order_by or cursor:
+                query = query.order_by(FieldPath.document_id(), direction=direction)
+            
+            count_key = self._get_cache_key(
+                collection,
+                "count",
+                filters=json.dumps(filters or {}, sort_keys=True, default=str),
+                search=search_term if search_fields and "tags" in search_fields else None
+            )
             
-            # Contar total (aproximado)
-            total_query = query
-            total_docs = [doc async for doc in total_query.stream()]
-            total = len(total_docs)
-            
-            # Aplicar paginação
-            if offset > 0:
-                query = query.offset(offset)
-            query = query.limit(limit)
+            # Aplicar paginação (um documento a mais indica se há próxima página)
+            page_query = query
+            if cursor:
+                last_value, last_id = self._decode_search_cursor(cursor, order_by)
+                start_after = {FieldPath.document_id(): self.db.collection(collection).document(last_id)}
+                if order_by:
+                    start_after.update(self._nested_value(order_by, last_value))
+                page_query = page_query.start_after(start_after)
+                offset = 0
+            elif offset > 0:
+                page_query = page_query.offset(offset)
+            page_query = page_query.limit(limit + 1)
+            
+            # Página e contagem em paralelo
+            if include_total:
+                docs, total = await asyncio.gather(
+                    self._fetch_page(page_query),
+                    self._count(query, count_key)
+                )
+            else:
+                docs, total = await self._fetch_page(page_query), None
             
-            # Executar query
-            docs = []
-            async for doc in query.stream():
-                data = doc.to_dict()
-                data['id'] = doc.id
-                docs.append(data)
+            has_more = len(docs) > limit
+            docs = docs[:limit]
             
             result = {
                 "documents": docs,
                 "total": total,
                 "limit": limit,
                 "offset": offset,
-                "has_more": offset + len(docs) < total
+                "has_more": has_more,
+                "next_cursor": self._encode_search_cursor(order_by, docs[-1]) if has_more else None
             }
             
             logger.debug(
@@ -208,6 +291,110 @@ class FirebaseService:
             )
             raise
     
+    @staticmethod
+    def _encode_search_cursor(order_by: Optional[str], doc: Dict[str, Any]) -> str:
+        """Cursor opaco com o campo e o valor de ordenação e o ID de um documento"""
+        value = None
+        if order_by:
+            value = doc
+            for part in order_by.split("."):
+                value = value.get(part) if isinstance(value, dict) else None
+        payload = {
+            "field": order_by,
+            "value": value.isoformat() if isinstance(value, datetime) else value,
+            "datetime": isinstance(value, datetime),
+            "id": doc["id"]
+        }
+        return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")
+    
+    @staticmethod
+    def _decode_search_cursor(cursor: str, order_by: Optional[str]) -> Tuple[Any, str]:
+        """Valor de ordenação e ID codificados em um cursor"""
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            value = payload["value"]
+            if payload.get("datetime"):
+                value = datetime.fromisoformat(value)
+            last_id = payload["id"]
+        except Exception as e:
+            raise ValueError(f"Cursor inválido: {cursor}") from e
+        
+        if payload.get("field") != order_by or not isinstance(last_id, str):
+            raise ValueError(f"Cursor inválido: {cursor}")
+        return value, last_id
+    
+    @staticmethod
+    def _nested_value(field_path: str, value: Any) -> Dict[str, Any]:
+        """Valor de um campo (com ponto) no formato aninhado esperado por start_after"""
+        parts = field_path.split(".")
+        nested: Dict[str, Any] = {parts[-1]: value}
+        for part in reversed(parts[:-1]):
+            nested = {part: nested}
+        return nested
+    
+    async def _fetch_page(self, query) -> List[Dict[str, Any]]:
+        """Executar query de página"""
+        docs = []
+        async for doc in query.stream():
+            data = doc.to_dict()
+            data['id'] = doc.id
+            docs.append(data)
+        return docs
+    
+    async def _count(self, query, cache_key: str) -> int:
+        """Contar resultados com agregação count() do Firestore (cacheada)"""
+        if cache_key in self._cache:
+            return self._cache[cache_key]
+        
+        results = await query.count(alias="total").get()
+        total = int(results[0][0].value) if results and results[0] else 0
+        
+        self._cache[cache_key] = total
+        return total
+    
+    async def stream_collection(
+        self,
+        collection: str,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Ler todos os documentos de uma coleção (snapshot do catálogo)
+        
+        Args:
+            collection: Nome da coleção
+            fields: Campos a ler (projeção); None lê o documento inteiro
+        """
+        try:
+            query = self.db.collection(collection)
+            if fields:
+                query = query.select(fields)
+            
+            docs = await self._fetch_page(query)
+            
+            logger.info("Coleção lida", collection=collection, count=len(docs))
+            return docs
+            
+        except Exception as e:
+            logger.error("Erro ao ler coleção", collection=collection, error=str(e))
+            raise
+    
+    def add_change_listener(self, listener: Callable[[str, str, Optional[Dict[str, Any]]], None]):
+        """
+        Registrar callback para alterações de documentos feitas por este serviço
+        
+        O callback recebe (coleção, ID, dados); dados é None em exclusões e
+        contém apenas os campos alterados em atualizações.
+        """
+        self._change_listeners.append(listener)
+    
+    def _notify_change(self, collection: str, doc_id: str, data: Optional[Dict[str, Any]]):
+        """Notificar os listeners sem interromper a operação em caso de erro"""
+        for listener in self._change_listeners:
+            try:
+                listener(collection, doc_id, data)
+            except Exception as e:
+                logger.warning("Erro em listener de alteração", collection=collection, doc_id=doc_id, error=str(e))
+    
     async def create_document(
         self,
         collection: str,
@@ -233,6 +420,7 @@ class FirebaseService:
             
             # Invalidar cache relacionado
             self._invalidate_cache(collection)
+            self._notify_change(collection, created_id, data)
             
             logger.info("Documento criado", collection=collection, doc_id=created_id)
             return created_id
@@ -256,10 +444,12 @@ class FirebaseService:
             doc_ref = self.db.collection(collection).document(doc_id)
             await doc_ref.update(data)
             
-            # Invalidar cache
+            # Invalidar cache (o documento e as contagens, que podem mudar de filtro)
             cache_key = self._get_cache_key(collection, doc_id)
             if cache_key in self._cache:
                 del self._cache[cache_key]
+            self._invalidate_cache(self._get_cache_key(collection, "count"))
+            self._notify_change(collection, doc_id, data)
             
             logger.info("Documento atualizado", collection=collection, doc_id=doc_id)
             return True
@@ -274,10 +464,12 @@ class FirebaseService:
             doc_ref = self.db.collection(collection).document(doc_id)
             await doc_ref.delete()
             
-            # Invalidar cache
+            # Invalidar cache (o documento e as contagens)
             cache_key = self._get_cache_key(collection, doc_id)
             if cache_key in self._cache:
                 del self._cache[cache_key]
+            self._invalidate_cache(self._get_cache_key(collection, "count"))
+            self._notify_change(collection, doc_id, None)
             
             logger.info("Documento deletado", collection=collection, doc_id=doc_id)
             return True
@@ -310,6 +502,8 @@ class FirebaseService:
             
             # Invalidar cache relacionado
             self._invalidate_cache(collection)
+            for doc_id, data in zip(doc_ids, documents):
+                self._notify_change(collection, doc_id, data)
             
             logger.info("Batch de documentos criado", collection=collection, count=len(doc_ids))
             return doc_ids
@@ -319,7 +513,12 @@ class FirebaseService:
             raise
     
     async def get_distinct_values(self, collection: str, field: str) -> List[str]:
-        """Obter valores únicos de um campo"""
+        """
+        Obter valores únicos de um campo
+        
+        Lê a coleção inteira; o ContentService responde pelas facetas em
+        memória e só usa este método como fallback.
+        """
         try:
             docs = []
             async for doc in self.db.collection(collection).stream():
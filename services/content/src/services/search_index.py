@@ -0,0 +1,283 @@
+"""
+Índice invertido em memória para busca textual em português (alimentos e exercícios)
+"""
+
+import bisect
+import time
+import unicodedata
+import re
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import structlog
+
+logger = structlog.get_logger()
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Palavras sem valor de busca
+_STOPWORDS = {
+    "a", "ao", "aos", "as", "c", "com", "da", "das", "de", "do", "dos", "e",
+    "em", "na", "nas", "no", "nos", "o", "os", "ou", "para", "por", "s", "sem", "um", "uma",
+}
+
+# Sufixos removidos pelo stemmer, do mais longo para o mais curto (RSLP simplificado),
+# com o tamanho mínimo do radical: os plurais em -ões/-ães voltam a -ão mesmo com
+# radical de uma letra, para que "pães" e "pão" tenham o mesmo termo
+_PLURAL_RULES = (
+    ("oes", "ao", 1), ("aes", "ao", 1), ("ais", "al", 3), ("eis", "el", 3), ("ois", "ol", 3),
+    ("is", "il", 3), ("ns", "m", 3), ("res", "r", 3), ("zes", "z", 3), ("ses", "s", 3), ("s", "", 3),
+)
+_SUFFIX_RULES = (
+    "amente", "mente", "issimo", "issima", "inho", "inha", "zinho", "zinha",
+    "cao", "coes", "mento", "ado", "ada", "ido", "ida",
+)
+_FEMININE_RULES = (("ona", "ao"), ("ora", "or"), ("eira", "eiro"), ("a", "o"))
+
+# Peso de cada campo no ranking
+FIELD_WEIGHTS = {"name": 3.0, "tags": 2.0, "category": 1.0}
+
+# Fator do score por tipo de correspondência
+_EXACT, _PREFIX, _TYPO = 1.0, 0.7, 0.5
+
+
+def normalize(text: str) -> str:
+    """Minúsculas e sem acentos"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def stem(token: str) -> str:
+    """
+    Stemmer leve para português: plural, sufixos comuns e feminino
+
+    Tokens curtos (até 3 letras) e números ficam como estão.
+    """
+    if len(token) <= 3 or token.isdigit():
+        return token
+
+    for suffix, replacement, min_stem in _PLURAL_RULES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= min_stem:
+            token = token[: -len(suffix)] + replacement
+            break
+
+    for suffix in _SUFFIX_RULES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            token = token[: -len(suffix)]
+            break
+    else:
+        for suffix, replacement in _FEMININE_RULES:
+            if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+                token = token[: -len(suffix)] + replacement
+                break
+
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Termos de um texto: normalizados, sem stopwords e com stemming"""
+    return [stem(token) for token in _TOKEN_RE.findall(normalize(text)) if token not in _STOPWORDS]
+
+
+def _query_terms(text: str) -> List[Tuple[str, str]]:
+    """Termos da consulta como (stem, token normalizado), sem repetições"""
+    terms = {}
+    for token in _TOKEN_RE.findall(normalize(text)):
+        if token not in _STOPWORDS:
+            terms.setdefault(stem(token), token)
+    return list(terms.items())
+
+
+def _deletions(term: str) -> Set[str]:
+    """Variações do termo com uma letra removida (busca tolerante a erros)"""
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+class SearchIndex:
+    """
+    Índice invertido de um catálogo (nome, tags e categoria)
+
+    - Termos normalizados (sem acento, minúsculos) e com stemming em português.
+    - Correspondência exata, por prefixo (termos ordenados + bisect) e com um
+      erro de digitação (índice de deleções simétricas).
+    - Atualização incremental por documento; cada documento guarda também
+      atributos de filtro para que a busca filtre sem consultar o Firestore.
+
+    Não é thread-safe; é usado apenas a partir do event loop.
+    """
+
+    def __init__(self, name: str, filter_fields: Iterable[str] = ()):
+        self.name = name
+        self.filter_fields = tuple(filter_fields)
+
+        self._postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self._doc_terms: Dict[str, Dict[str, float]] = {}
+        self._sources: Dict[str, Dict[str, Any]] = {}
+        self._sorted_terms: List[str] = []
+        self._terms_dirty = False
+        self._deletes: Dict[str, Set[str]] = defaultdict(set)
+        self.ready = False
+        self.built_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_terms
+
+    def build(self, documents: Iterable[Dict[str, Any]]):
+        """Reconstrói o índice a partir de um snapshot do catálogo"""
+        self._postings.clear()
+        self._doc_terms.clear()
+        self._sources.clear()
+        self._deletes.clear()
+        self._sorted_terms = []
+
+        for doc in documents:
+            if doc.get("id"):
+                self._index(doc["id"], doc)
+
+        self._terms_dirty = True
+        self.ready = True
+        self.built_at = time.monotonic()
+        logger.info("Índice de busca construído", index=self.name, documents=len(self), terms=len(self._postings))
+
+    def upsert(self, doc_id: str, data: Dict[str, Any]):
+        """Indexa um documento novo ou aplica uma atualização (parcial) ao já indexado"""
+        source = {**self._sources.get(doc_id, {}), **data}
+        self.remove(doc_id)
+        self._index(doc_id, source)
+        self._terms_dirty = True
+
+    def remove(self, doc_id: str):
+        """Remove um documento do índice"""
+        terms = self._doc_terms.pop(doc_id, None)
+        self._sources.pop(doc_id, None)
+        if not terms:
+            return
+
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+                for variant in _deletions(term):
+                    self._deletes[variant].discard(term)
+                    if not self._deletes[variant]:
+                        del self._deletes[variant]
+                self._terms_dirty = True
+
+    def search(
+        self,
+        query: str,
+        filters: Optional[Dict[str, Callable[[Any], bool]]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Busca ranqueada
+
+        Todos os termos da consulta precisam casar (exato, prefixo ou com um
+        erro); o score soma, por termo, o melhor peso de campo × fator da
+        correspondência.
+
+        Args:
+            query: Texto da busca
+            filters: Predicados por atributo de filtro (ex: {"category": lambda v: v == "frutas"})
+
+        Returns:
+            List[Tuple[str, float]]: (ID, score), do mais relevante ao menos relevante
+        """
+        query_terms = _query_terms(query)
+        if not query_terms:
+            return []
+
+        scores: Optional[Dict[str, float]] = None
+        for term, raw in query_terms:
+            term_scores = self._match(term, raw)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {doc_id: score + term_scores[doc_id] for doc_id, score in scores.items() if doc_id in term_scores}
+            if not scores:
+                return []
+
+        if filters:
+            scores = {
+                doc_id: score for doc_id, score in scores.items()
+                if all(predicate(self._sources[doc_id].get(field)) for field, predicate in filters.items())
+            }
+
+        return sorted(scores.items(), key=lambda item: self.sort_key(*item))
+
+    def sort_key(self, doc_id: str, score: float) -> Tuple[float, str, str]:
+        """Chave de ordenação dos resultados (score, nome, ID), usada também como cursor"""
+        return (-score, (self._sources.get(doc_id) or {}).get("name") or "", doc_id)
+
+    def _match(self, term: str, raw: str) -> Dict[str, float]:
+        """Melhor score por documento para um termo da consulta (stem e token digitado)"""
+        scores: Dict[str, float] = {}
+
+        def collect(candidate: str, factor: float):
+            for doc_id, weight in self._postings.get(candidate, {}).items():
+                score = weight * factor
+                if score > scores.get(doc_id, 0):
+                    scores[doc_id] = score
+
+        collect(term, _EXACT)
+
+        # Prefixo: termos indexados que começam com o que foi digitado
+        terms = self._terms()
+        for prefix in {term, raw}:
+            if len(prefix) < 2:
+                continue
+            position = bisect.bisect_left(terms, prefix)
+            while position < len(terms) and terms[position].startswith(prefix):
+                if terms[position] != term:
+                    collect(terms[position], _PREFIX)
+                position += 1
+
+        # Palavra incompleta além do stem ("grelhad" -> "grelh")
+        for length in range(len(raw) - 1, 3, -1):
+            if raw[:length] != term and raw[:length] in self._postings:
+                collect(raw[:length], _PREFIX)
+                break
+
+        # Um erro de digitação (inserção, remoção ou troca de letra)
+        if not scores and len(term) >= 4:
+            candidates = set(self._deletes.get(term, ()))
+            for variant in _deletions(term):
+                if variant in self._postings:
+                    candidates.add(variant)
+                candidates.update(self._deletes.get(variant, ()))
+            for candidate in candidates:
+                collect(candidate, _TYPO)
+
+        return scores
+
+    def _terms(self) -> List[str]:
+        """Termos indexados em ordem (recalculados só após alterações)"""
+        if self._terms_dirty:
+            self._sorted_terms = sorted(self._postings)
+            self._terms_dirty = False
+        return self._sorted_terms
+
+    def _index(self, doc_id: str, doc: Dict[str, Any]):
+        source = {field: doc.get(field) for field in ("name", "tags", "category", *self.filter_fields)}
+
+        weights: Dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            value = source.get(field)
+            texts = value if isinstance(value, list) else [value]
+            for text in texts:
+                if not isinstance(text, str):
+                    continue
+                for term in tokenize(text):
+                    weights[term] = max(weights.get(term, 0), weight)
+
+        self._sources[doc_id] = source
+        self._doc_terms[doc_id] = weights
+        for term, weight in weights.items():
+            if term not in self._postings:
+                for variant in _deletions(term):
+                    self._deletes[variant].add(term)
+            self._postings[term][doc_id] = weight
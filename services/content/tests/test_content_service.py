@@ -0,0 +1,111 @@
+"""
+Testes para a atualização dos índices em memória do ContentService
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from src.services.content_service import ContentService
+
+def _food(doc_id, name, category="carnes"):
+    return {"id": doc_id, "name": name, "category": category, "tags": []}
+
+@pytest.fixture
+def catalog():
+    """Coleção de alimentos no "Firestore" (alterável por outra instância)"""
+    return {"foods": [_food("f1", "Frango Grelhado"), _food("f2", "Arroz Branco", "cereais")], "exercises": []}
+
+@pytest.fixture
+def service(catalog):
+    """ContentService com FirebaseService falso"""
+    firebase = Mock()
+    firebase.stream_collection = AsyncMock(side_effect=lambda collection, fields=None: list(catalog[collection]))
+    service = ContentService(firebase)
+    service.index_ttl = 300
+    return service
+
+def _ids(index, query):
+    return [doc_id for doc_id, _ in index.search(query)]
+
+class TestIndexRefresh:
+    """Testes de reconstrução por TTL e de escritas concorrentes"""
+
+    @pytest.mark.asyncio
+    async def test_fresh_index_is_not_rebuilt(self, service):
+        """Testar que o índice dentro do TTL não relê o catálogo"""
+        assert await service._ensure_index(service.food_index)
+        assert await service._ensure_index(service.food_index)
+
+        assert service.firebase.stream_collection.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_index_picks_up_external_writes(self, service, catalog):
+        """Testar que escritas de outra instância aparecem após o TTL"""
+        await service._ensure_index(service.food_index)
+        catalog["foods"].append(_food("f3", "Peito de Peru"))
+        assert _ids(service.food_index, "peru") == []
+
+        service.food_index.built_at -= service.index_ttl
+        assert await service._ensure_index(service.food_index)
+        await service._refresh_tasks["foods"]
+
+        assert _ids(service.food_index, "peru") == ["f3"]
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_keeps_previous_snapshot(self, service):
+        """Testar que uma falha na releitura mantém o índice anterior"""
+        await service._ensure_index(service.food_index)
+        service.firebase.stream_collection.side_effect = RuntimeError("indisponível")
+
+        service.food_index.built_at -= service.index_ttl
+        await service._ensure_index(service.food_index)
+        await service._refresh_tasks["foods"]
+
+        assert _ids(service.food_index, "frango") == ["f1"]
+
+    @pytest.mark.asyncio
+    async def test_local_writes_during_rebuild_are_replayed(self, service, catalog):
+        """Testar que escritas deste processo durante a leitura não se perdem"""
+        snapshot = list(catalog["foods"])
+
+        async def stream_with_concurrent_write(collection, fields=None):
+            service._on_document_change("foods", "f3", _food("f3", "Ovo Cozido", "ovos"))
+            service._on_document_change("foods", "f2", None)
+            await asyncio.sleep(0)
+            return snapshot
+
+        service.firebase.stream_collection.side_effect = stream_with_concurrent_write
+        await service._ensure_index(service.food_index)
+
+        assert _ids(service.food_index, "ovo") == ["f3"]
+        assert _ids(service.food_index, "arroz") == []
+        assert service._pending_changes == {}
+
+class TestFacetRefresh:
+    """Testes de atualização das facetas junto com o índice"""
+
+    @pytest.mark.asyncio
+    async def test_categories_follow_refresh(self, service, catalog):
+        """Testar que categorias e contagens incluem escritas de outra instância"""
+        assert await service.get_food_categories() == ["carnes", "cereais"]
+
+        catalog["foods"] = [_food("f1", "Frango Grelhado"), _food("f3", "Ovo Cozido", "ovos")]
+        service.food_index.built_at -= service.index_ttl
+        await service.get_food_categories()
+        await service._refresh_tasks["foods"]
+
+        assert await service.get_food_categories() == ["carnes", "ovos"]
+        assert await service.get_facet_counts("foods") == {"category": {"carnes": 1, "ovos": 1}}
+
+    @pytest.mark.asyncio
+    async def test_stale_facets_trigger_refresh(self, service):
+        """Testar que facetas expiradas disparam a reconstrução mesmo com o índice novo"""
+        await service._ensure_index(service.food_index)
+
+        service._facets["foods"].built_at -= service.index_ttl
+        await service.get_facet_counts("foods")
+        await service._refresh_tasks["foods"]
+
+        assert service.firebase.stream_collection.await_count == 2
+        assert not service._is_stale(service.food_index)
@@ -0,0 +1,53 @@
+"""
+Testes para o índice de facetas em memória
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services.facet_index import FacetIndex
+
+class TestFacetIndex:
+    """Testes para o FacetIndex"""
+    
+    @pytest.fixture
+    def facets(self):
+        """Fixture com um catálogo pequeno de exercícios"""
+        facets = FacetIndex("exercises", ("primary_muscle_group", "equipment"))
+        facets.build([
+            {"id": "e1", "primary_muscle_group": "peito", "equipment": ["barra", "banco"]},
+            {"id": "e2", "primary_muscle_group": "peito", "equipment": ["halteres"]},
+            {"id": "e3", "primary_muscle_group": "costas", "equipment": []},
+            {"id": "e4", "primary_muscle_group": None, "equipment": ["barra", "barra"]},
+        ])
+        return facets
+    
+    def test_build_counts(self, facets):
+        """Testar valores distintos e contagens após o snapshot"""
+        assert facets.ready
+        assert facets.values("primary_muscle_group") == ["costas", "peito"]
+        assert facets.counts("primary_muscle_group") == {"costas": 1, "peito": 2}
+        assert facets.counts("equipment") == {"banco": 1, "barra": 2, "halteres": 1}
+    
+    def test_create_update_delete(self, facets):
+        """Testar manutenção incremental das contagens"""
+        facets.upsert("e5", {"primary_muscle_group": "pernas", "equipment": ["maquina"]})
+        assert facets.counts("primary_muscle_group")["pernas"] == 1
+        
+        # Atualização parcial mantém os demais campos
+        facets.upsert("e2", {"primary_muscle_group": "ombros"})
+        assert facets.counts("primary_muscle_group") == {"costas": 1, "ombros": 1, "pernas": 1, "peito": 1}
+        assert facets.counts("equipment")["halteres"] == 1
+        
+        facets.remove("e3")
+        facets.remove("e3")
+        assert "costas" not in facets.values("primary_muscle_group")
+        assert len(facets) == 4
+    
+    def test_update_without_facet_fields(self, facets):
+        """Testar atualização que não toca as facetas"""
+        facets.upsert("e1", {"name": "Supino reto"})
+        assert facets.counts("equipment") == {"banco": 1, "barra": 2, "halteres": 1}
@@ -0,0 +1,180 @@
+"""
+Testes para a busca paginada e as leituras em lote do FirebaseService
+"""
+
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from src.services.firebase_service import FirebaseService
+
+async def _async_iter(items):
+    """Iterador assíncrono para simular stream() do Firestore"""
+    for item in items:
+        yield item
+
+@pytest.fixture
+def firebase_service():
+    """FirebaseService com cliente Firestore falso (collection() síncrono)"""
+    service = FirebaseService()
+    service.db = Mock()
+    return service
+
+@pytest.fixture
+def mock_query(firebase_service):
+    """Query encadeável devolvida por db.collection()"""
+    query = Mock()
+    firebase_service.db.collection.return_value = query
+    for method in ("where", "order_by", "offset", "limit", "start_after"):
+        getattr(query, method).return_value = query
+    return query
+
+def _docs(*names):
+    return [Mock(id=f"doc{i}", to_dict=lambda name=name: {"name": name}) for i, name in enumerate(names)]
+
+class TestSearchDocumentsCount:
+    """Testes da contagem por agregação e do documento extra da página"""
+
+    @pytest.mark.asyncio
+    async def test_search_documents_with_filters(self, firebase_service, mock_query):
+        """Testar busca com filtros: total por count(), has_more por limit + 1"""
+        mock_query.stream.side_effect = lambda: _async_iter(_docs("Food 1", "Food 2"))
+        mock_query.count.return_value.get = AsyncMock(return_value=[[Mock(value=2)]])
+
+        result = await firebase_service.search_documents(
+            collection="foods",
+            filters={"category": "fruits"},
+            limit=10,
+            offset=0
+        )
+
+        assert len(result["documents"]) == 2
+        assert result["total"] == 2
+        assert result["has_more"] is False
+        mock_query.limit.assert_called_with(11)
+        mock_query.stream.assert_called_once()
+
+        # A contagem do mesmo filtro vem do cache
+        result = await firebase_service.search_documents(
+            collection="foods",
+            filters={"category": "fruits"},
+            limit=10,
+            offset=0
+        )
+
+        assert result["total"] == 2
+        mock_query.count.return_value.get.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_update_and_delete_invalidate_count_cache(self, firebase_service, mock_query):
+        """Testar que atualizar ou remover um documento descarta as contagens cacheadas"""
+        mock_query.stream.side_effect = lambda: _async_iter(_docs("Food 1"))
+        mock_query.count.return_value.get = AsyncMock(return_value=[[Mock(value=1)]])
+        doc_ref = mock_query.document.return_value
+        doc_ref.update = AsyncMock()
+        doc_ref.delete = AsyncMock()
+
+        def count_keys():
+            return [key for key in firebase_service._cache.keys() if key.startswith("foods:count")]
+
+        for change in (
+            lambda: firebase_service.update_document("foods", "doc0", {"category": "carnes"}),
+            lambda: firebase_service.delete_document("foods", "doc0"),
+        ):
+            await firebase_service.search_documents("foods", filters={"category": "fruits"})
+            await firebase_service.search_documents("foods", filters={"category": "carnes"})
+            firebase_service._cache[firebase_service._get_cache_key("exercises", "count")] = 7
+            assert len(count_keys()) == 2
+
+            await change()
+
+            assert count_keys() == []
+            assert firebase_service._cache[firebase_service._get_cache_key("exercises", "count")] == 7
+
+        assert mock_query.count.return_value.get.await_count == 4
+
+class TestSearchDocumentsCursor:
+    """Testes da paginação por cursor"""
+
+    @pytest.mark.asyncio
+    async def test_search_documents_without_total(self, firebase_service, mock_query):
+        """Testar busca sem contagem: has_more vem do documento extra da página"""
+        mock_query.stream.side_effect = lambda: _async_iter(_docs("Food", "Food", "Food"))
+
+        result = await firebase_service.search_documents(
+            collection="foods",
+            limit=2,
+            include_total=False
+        )
+
+        assert result["total"] is None
+        assert result["has_more"] is True
+        assert [doc["id"] for doc in result["documents"]] == ["doc0", "doc1"]
+        mock_query.limit.assert_called_with(3)
+        mock_query.count.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_search_documents_with_cursor(self, firebase_service, mock_query):
+        """Testar paginação por cursor: next_cursor leva à página seguinte via start_after"""
+        first_page = _docs("Food 0", "Food 1", "Food 2")
+        mock_query.stream.side_effect = lambda: _async_iter(first_page)
+
+        result = await firebase_service.search_documents(
+            collection="foods", limit=2, order_by="name", include_total=False
+        )
+
+        assert result["has_more"] is True
+        assert result["next_cursor"]
+        mock_query.start_after.assert_not_called()
+
+        mock_query.stream.side_effect = lambda: _async_iter(first_page[2:])
+        result = await firebase_service.search_documents(
+            collection="foods", limit=2, offset=40, order_by="name",
+            include_total=False, cursor=result["next_cursor"]
+        )
+
+        assert [doc["id"] for doc in result["documents"]] == ["doc2"]
+        assert result["has_more"] is False
+        assert result["next_cursor"] is None
+        assert result["offset"] == 0
+        mock_query.offset.assert_not_called()
+        start_after = mock_query.start_after.call_args[0][0]
+        assert start_after["name"] == "Food 1"
+        mock_query.document.assert_called_with("doc1")
+        assert mock_query.document.return_value in start_after.values()
+
+    @pytest.mark.asyncio
+    async def test_search_documents_invalid_cursor(self, firebase_service, mock_query):
+        """Testar cursor inválido ou de outra ordenação"""
+        cursor = FirebaseService._encode_search_cursor("name", {"id": "doc1", "name": "Food 1"})
+
+        with pytest.raises(ValueError):
+            await firebase_service.search_documents("foods", order_by="category", cursor=cursor)
+        with pytest.raises(ValueError):
+            await firebase_service.search_documents("foods", order_by="name", cursor="invalido")
+        mock_query.stream.assert_not_called()
+
+class TestGetDocuments:
+    """Testes da leitura em lote"""
+
+    @pytest.mark.asyncio
+    async def test_get_documents_uses_cache_and_single_get_all(self, firebase_service):
+        """Testar leitura em lote: cache primeiro, um get_all só com os ausentes"""
+        mock_db = firebase_service.db
+        firebase_service._cache[firebase_service._get_cache_key("foods", "cached")] = {"id": "cached", "name": "Cached"}
+
+        mock_db.collection.return_value.document.side_effect = lambda doc_id: f"ref:{doc_id}"
+        mock_docs = [
+            Mock(id="doc1", exists=True, to_dict=lambda: {"name": "Food 1"}),
+            Mock(id="missing", exists=False),
+        ]
+        mock_db.get_all.side_effect = lambda refs: _async_iter(mock_docs)
+
+        result = await firebase_service.get_documents("foods", ["cached", "doc1", "missing", "doc1"])
+
+        assert set(result) == {"cached", "doc1"}
+        assert result["doc1"] == {"name": "Food 1", "id": "doc1"}
+        mock_db.get_all.assert_called_once_with(["ref:doc1", "ref:missing"])
+
+        # Segunda leitura vem inteira do cache
+        await firebase_service.get_documents("foods", ["cached", "doc1"])
+        mock_db.get_all.assert_called_once()
@@ -80,42 +80,6 @@ class TestFirebaseService:
         
         assert result is None
     
-    @pytest.mark.asyncio
-    async def test_search_documents_with_filters(self, firebase_service):
-        """Testar busca de documentos com filtros"""
-        mock_db = AsyncMock()
-        firebase_service.db = mock_db
-        
-        # Mock da query
-        mock_query = Mock()
-        mock_db.collection.return_value = mock_query
-        mock_query.where.return_value = mock_query
-        mock_query.order_by.return_value = mock_query
-        mock_query.offset.return_value = mock_query
-        mock_query.limit.return_value = mock_query
-        
-        # Mock dos documentos
-        mock_docs = [
-            Mock(id="doc1", to_dict=lambda: {"name": "Food 1"}),
-            Mock(id="doc2", to_dict=lambda: {"name": "Food 2"})
-        ]
-        
-        # Mock do stream para contagem total
-        mock_query.stream.return_value.__aiter__ = AsyncMock(return_value=iter(mock_docs))
-        
-        filters = {"category": "fruits"}
-        result = await firebase_service.search_documents(
-            collection="foods",
-            filters=filters,
-            limit=10,
-            offset=0
-        )
-        
-        assert "documents" in result
-        assert "total" in result
-        assert "has_more" in result
-        assert len(result["documents"]) == 2
-    
     @pytest.mark.asyncio
     async def test_create_document_success(self, firebase_service):
         """Testar criação de documento"""
@@ -0,0 +1,110 @@
+"""
+Testes para o índice de busca em memória
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services.search_index import SearchIndex, normalize, stem, tokenize
+
+class TestTextProcessing:
+    """Testes para normalização e stemming"""
+
+    def test_normalize_removes_accents_and_case(self):
+        """Testar remoção de acentos e maiúsculas"""
+        assert normalize("Feijão PRETO") == "feijao preto"
+        assert normalize("Maçã") == "maca"
+
+    def test_stem_groups_plural_and_gender(self):
+        """Testar que plural e feminino caem no mesmo termo"""
+        assert stem("feijoes") == stem("feijao")
+        assert stem("grelhada") == stem("grelhado")
+        assert stem("ovos") == stem("ovo")
+        assert stem("paes") == stem("pao")
+
+    def test_tokenize_drops_stopwords(self):
+        """Testar remoção de stopwords"""
+        assert tokenize("Arroz com Feijão") == [stem("arroz"), stem("feijao")]
+
+class TestSearchIndex:
+    """Testes para o SearchIndex"""
+
+    @pytest.fixture
+    def index(self):
+        """Fixture com um catálogo pequeno"""
+        index = SearchIndex("foods", filter_fields=("nutritional_info",))
+        index.build([
+            {"id": "f1", "name": "Frango Grelhado", "category": "carnes", "tags": ["proteína"],
+             "nutritional_info": {"protein": 31, "calories": 165}},
+            {"id": "f2", "name": "Feijão Preto", "category": "leguminosas", "tags": ["fibra"],
+             "nutritional_info": {"protein": 9, "calories": 132}},
+            {"id": "f3", "name": "Arroz Branco", "category": "cereais", "tags": [],
+             "nutritional_info": {"protein": 2.5, "calories": 130}},
+            {"id": "f4", "name": "Peito de Peru", "category": "carnes", "tags": ["frango", "magro"],
+             "nutritional_info": {"protein": 29, "calories": 104}},
+        ])
+        return index
+
+    def test_accent_and_plural_insensitive(self, index):
+        """Testar busca sem acento e no plural"""
+        assert [doc_id for doc_id, _ in index.search("feijoes")] == ["f2"]
+        assert [doc_id for doc_id, _ in index.search("FEIJÃO")] == ["f2"]
+
+    def test_short_plural_in_aes(self):
+        """Testar plural em -ães com radical curto ("pães" e "pão")"""
+        index = SearchIndex("foods")
+        index.build([
+            {"id": "p1", "name": "Pão Francês", "category": "padaria", "tags": []},
+            {"id": "p2", "name": "Pães de queijo", "category": "padaria", "tags": []},
+        ])
+
+        assert sorted(doc_id for doc_id, _ in index.search("pão")) == ["p1", "p2"]
+        assert "p1" in [doc_id for doc_id, _ in index.search("pães")]
+        assert [doc_id for doc_id, _ in index.search("pão de queijo")] == ["p2"]
+
+    def test_prefix_match(self, index):
+        """Testar busca por palavra incompleta"""
+        assert [doc_id for doc_id, _ in index.search("arr")] == ["f3"]
+        assert [doc_id for doc_id, _ in index.search("frango grelhad")] == ["f1"]
+
+    def test_typo_match(self, index):
+        """Testar tolerância a um erro de digitação"""
+        assert [doc_id for doc_id, _ in index.search("fejão")] == ["f2"]
+
+    def test_name_ranks_above_tags(self, index):
+        """Testar que o nome pesa mais que as tags"""
+        assert [doc_id for doc_id, _ in index.search("frango")] == ["f1", "f4"]
+
+    def test_all_terms_must_match(self, index):
+        """Testar que todos os termos da consulta precisam casar"""
+        assert index.search("frango arroz") == []
+
+    def test_filters(self, index):
+        """Testar filtros sobre atributos do documento"""
+        results = index.search("frango", {"nutritional_info": lambda info: info["calories"] <= 120})
+        assert [doc_id for doc_id, _ in results] == ["f4"]
+
+    def test_incremental_updates(self, index):
+        """Testar criação, atualização parcial e remoção"""
+        index.upsert("f5", {"name": "Ovos Cozidos", "category": "ovos", "tags": []})
+        assert [doc_id for doc_id, _ in index.search("ovo")] == ["f5"]
+
+        index.upsert("f5", {"name": "Ovo Mexido"})
+        assert index.search("cozido") == []
+        assert [doc_id for doc_id, _ in index.search("mexido")] == ["f5"]
+        assert [doc_id for doc_id, _ in index.search("ovos")] == ["f5"]
+
+        index.remove("f5")
+        assert "f5" not in index
+        assert index.search("mexido") == []
+        assert len(index) == 4
+
+    def test_sort_key_orders_results(self, index):
+        """Testar que a chave de ordenação segue o ranking (base do cursor)"""
+        results = index.search("frango")
+        keys = [index.sort_key(doc_id, score) for doc_id, score in results]
+        assert keys == sorted(keys)
+        assert keys[0][2] == "f1"
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark do otimizador de quantidades: heurística proporcional vs mínimos quadrados com limites
+
+Gera refeições sintéticas (3-4 alimentos com perfis nutricionais típicos da
+TACO) e compara o erro relativo de calorias/macros e o tempo por refeição.
+
+Uso:
+    python scripts/benchmark_quantity_optimizer.py --meals 5000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Adicionar src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from algorithms.quantity_optimizer import (
+    TARGET_FIELDS, ProportionalSolver, BoundedLeastSquaresSolver
+)
+
+# Faixas de macros por 100g (protein, carbs, fat); calorias derivadas por 4/4/9
+PROFILES = {
+    "proteinas": ([18, 0, 2], [32, 2, 14]),
+    "cereais": ([2, 20, 0.5], [14, 78, 8]),
+    "frutas": ([0.3, 7, 0.1], [1.5, 30, 1]),
+    "vegetais": ([0.8, 2, 0.1], [3, 12, 0.6]),
+    "laticinios": ([3, 4, 0.5], [25, 6, 30]),
+    "oleaginosas": ([14, 10, 45], [25, 25, 65]),
+}
+
+MEAL_TARGETS = [
+    # calories, protein%, carbs%, fat%
+    (500, 0.20, 0.50, 0.30),
+    (200, 0.30, 0.40, 0.30),
+    (650, 0.35, 0.45, 0.20),
+    (200, 0.40, 0.35, 0.25),
+    (450, 0.40, 0.35, 0.25),
+    (120, 0.50, 0.20, 0.30),
+]
+
+# Montagem do gerador: fonte de proteína, carboidrato, gordura e complemento
+MEAL_SLOTS = (
+    ("proteinas", "laticinios"),
+    ("cereais", "frutas"),
+    ("oleaginosas", "laticinios"),
+    ("vegetais", "frutas"),
+)
+
+def random_meal(rng: np.random.Generator):
+    """Gera uma refeição sintética com a mesma estrutura do DietGenerator"""
+    slots = MEAL_SLOTS[:rng.integers(3, len(MEAL_SLOTS) + 1)]
+    categories = [str(rng.choice(options)) for options in slots]
+    macros = np.array([rng.uniform(*map(np.array, PROFILES[category])) for category in categories])
+    calories_per_100g = macros @ np.array([4.0, 4.0, 9.0])
+    per_100g = np.column_stack([calories_per_100g, macros])
+    calories, protein, carbs, fat = MEAL_TARGETS[rng.integers(len(MEAL_TARGETS))]
+    calories *= rng.uniform(0.7, 1.5)
+    targets = np.array([calories, calories * protein / 4, calories * carbs / 4, calories * fat / 9])
+    priorities = rng.uniform(0.3, 1.0, size=len(categories))
+    return per_100g, targets, categories, priorities
+
+def run(solver, meals):
+    """Executa o solver e retorna (erros relativos, microssegundos por refeição)"""
+    errors = []
+    started = time.perf_counter()
+    for per_100g, targets, categories, priorities in meals:
+        quantities = solver.solve(per_100g, targets, categories, priorities)
+        achieved = quantities @ per_100g / 100
+        errors.append(np.abs(achieved - targets) / np.maximum(targets, 1.0))
+    elapsed = time.perf_counter() - started
+    return np.array(errors), elapsed / len(meals) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--meals", type=int, default=2000, help="Número de refeições sintéticas")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    meals = [random_meal(rng) for _ in range(args.meals)]
+
+    print(f"Refeições: {args.meals}")
+    header = f"{'solver':<24}{'us/refeição':>12}" + "".join(f"{f + ' (%)':>16}" for f in TARGET_FIELDS) + f"{'dentro ±10%':>14}"
+    print(header)
+    print("-" * len(header))
+
+    for solver in (ProportionalSolver(), BoundedLeastSquaresSolver()):
+        errors, micros = run(solver, meals)
+        mean_errors = errors.mean(axis=0) * 100
+        within = (errors.max(axis=1) <= 0.10).mean() * 100
+        print(f"{solver.name:<24}{micros:>12.1f}" + "".join(f"{e:>16.1f}" for e in mean_errors) + f"{within:>13.1f}%")
+
+if __name__ == "__main__":
+    main()
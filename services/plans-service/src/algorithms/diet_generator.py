@@ -5,8 +5,10 @@ Algoritmo de Geração de Dieta Personalizada
 import random
 import math
 from datetime import date, datetime, timedelta
+from collections import Counter
 from typing import List, Dict, Optional, Tuple
 import structlog
+import numpy as np
 from dataclasses import dataclass
 
 from models.plan import (
@@ -14,7 +16,9 @@ from models.plan import (
     DietPreferences, AlgorithmConfig
 )
 from config.settings import get_settings
-from adapters.taco_data_adapter import TacoDataAdapter
+from services.content_catalog import get_food_catalog
+from algorithms.nutrient_matrix import CandidatePool
+from algorithms.quantity_optimizer import create_quantity_solver, round_to_practical_quantity
 
 logger = structlog.get_logger(__name__)
 
@@ -42,6 +46,16 @@ class FoodCandidate:
     availability_score: float
     preference_score: float
 
+# Categorias apropriadas para cada tipo de refeição
+MEAL_CATEGORIES = {
+    MealType.CAFE_DA_MANHA: ["frutas", "cereais", "laticínios", "ovos", "pães"],
+    MealType.LANCHE_MANHA: ["frutas", "oleaginosas", "laticínios", "barras"],
+    MealType.ALMOCO: ["carnes", "peixes", "cereais", "vegetais", "leguminosas"],
+    MealType.LANCHE_TARDE: ["frutas", "oleaginosas", "laticínios", "barras"],
+    MealType.JANTAR: ["carnes", "peixes", "vegetais", "leguminosas", "cereais"],
+    MealType.CEIA: ["laticínios", "oleaginosas", "proteínas"]
+}
+
 class DietGenerator:
     """Gerador de planos de dieta personalizados"""
     
@@ -50,7 +64,8 @@ class DietGenerator:
         self.firebase_service = firebase_service
         self.settings = get_settings()
         self.diet_config = self.settings.diet_algorithm_config
-        self.taco_adapter = TacoDataAdapter()
+        self.food_catalog = get_food_catalog()
+        self.quantity_solver = create_quantity_solver(self.diet_config.get("quantity_optimizer"))
         
     async def generate_diet_plan(
         self, 
@@ -81,54 +96,20 @@ class DietGenerator:
             
             # 2. Obter dados do usuário e preferências
             user_data = await self._get_user_data(user_id)
-            diet_preferences = algorithm_config.diet_preferences
-            
-            # 3. Calcular distribuição calórica por refeição
-            meal_targets = self._calculate_meal_targets(algorithm_config)
             
-            # 4. Obter alimentos disponíveis do Content Service
-            available_foods = await self._get_available_foods(diet_preferences)
+            # 3. Obter alimentos disponíveis do catálogo compartilhado
+            available_foods = await self._get_available_foods(algorithm_config.diet_preferences)
             
-            # 5. Gerar refeições
-            meals = []
-            for meal_type, target in meal_targets.items():
-                meal = await self._generate_meal(
-                    meal_type, target, available_foods, 
-                    diet_preferences, user_data
-                )
-                meals.append(meal)
-            
-            # 6. Calcular totais do plano
-            total_calories, total_protein, total_carbs, total_fat = self._calculate_totals(meals)
-            
-            # 7. Ajustar se necessário
-            if self._needs_adjustment(total_calories, algorithm_config.target_calories):
-                meals = await self._adjust_plan(meals, algorithm_config, available_foods)
-                total_calories, total_protein, total_carbs, total_fat = self._calculate_totals(meals)
-            
-            # 8. Criar plano final
-            diet_plan = DietPlan(
-                user_id=user_id,
-                date=target_date,
-                goal=algorithm_config.goal,
-                target_calories=algorithm_config.target_calories,
-                target_protein=algorithm_config.target_protein,
-                target_carbs=algorithm_config.target_carbs,
-                target_fat=algorithm_config.target_fat,
-                meals=meals,
-                total_calories=total_calories,
-                total_protein=total_protein,
-                total_carbs=total_carbs,
-                total_fat=total_fat,
-                water_intake_ml=self._calculate_water_intake(algorithm_config),
-                notes=self._generate_diet_notes(algorithm_config, diet_preferences)
+            # 4. Montar o plano (CPU apenas, sem I/O)
+            diet_plan = self.compose_diet_plan(
+                user_id, target_date, algorithm_config, available_foods, user_data
             )
             
-            # 9. Salvar no Firestore
+            # 5. Salvar no Firestore
             await self._save_diet_plan(diet_plan)
             
             logger.info("Plano de dieta gerado com sucesso", 
-                       user_id=user_id, total_calories=total_calories)
+                       user_id=user_id, total_calories=diet_plan.total_calories)
             
             return diet_plan
             
@@ -137,6 +118,134 @@ class DietGenerator:
                         user_id=user_id, error=str(e))
             raise
     
+    async def generate_weekly_diet_plans(
+        self,
+        user_id: str,
+        week_start: date,
+        algorithm_config: AlgorithmConfig
+    ) -> List[DietPlan]:
+        """
+        Gera os planos de dieta dos 7 dias da semana em uma única passada
+        
+        Dados do usuário, catálogo e planos existentes são carregados uma
+        vez; os dias gerados são persistidos em um único batched write.
+        
+        Args:
+            user_id: ID do usuário
+            week_start: Primeiro dia da semana
+            algorithm_config: Configuração do algoritmo
+            
+        Returns:
+            List[DietPlan]: Planos da semana, em ordem de data
+        """
+        logger.info("Iniciando geração semanal de dieta", user_id=user_id, week_start=week_start)
+        
+        try:
+            dates = [week_start + timedelta(days=offset) for offset in range(7)]
+            preferences = algorithm_config.diet_preferences
+            variation = self.diet_config["variation"]
+            
+            # 1. Planos existentes da semana em uma única leitura
+            existing_plans = await self._get_existing_plans(user_id, dates)
+            
+            # 2. Dados do usuário e alimentos carregados uma vez
+            user_data = await self._get_user_data(user_id)
+            available_foods = await self._get_available_foods(preferences)
+            
+            # 3. Gerar os dias garantindo variedade entre eles
+            usage: Counter = Counter()
+            plans: List[DietPlan] = []
+            generated: List[DietPlan] = []
+            reference_plan: Optional[DietPlan] = None
+            
+            for index, target_date in enumerate(dates):
+                plan = existing_plans.get(target_date)
+                if plan is None or self._should_regenerate_plan(plan, algorithm_config):
+                    if (preferences.style == "consistent" and reference_plan is not None
+                            and index % variation["consistent_days"] != 0):
+                        # Estilo consistente: repetir o cardápio por alguns dias
+                        plan = reference_plan.copy(update={"date": target_date})
+                    else:
+                        pool = available_foods
+                        if preferences.style == "varied" and usage:
+                            pool = available_foods.with_usage_penalty(usage, variation["weekly_usage_penalty"])
+                        plan = self.compose_diet_plan(user_id, target_date, algorithm_config, pool, user_data)
+                    generated.append(plan)
+                
+                usage.update(food.food_id for meal in plan.meals for food in meal.foods)
+                reference_plan = plan
+                plans.append(plan)
+            
+            # 4. Persistir a semana em um único batched write
+            await self._save_diet_plans(generated)
+            
+            logger.info("Planos de dieta semanais gerados", 
+                       user_id=user_id, generated=len(generated), distinct_foods=len(usage))
+            
+            return plans
+            
+        except Exception as e:
+            logger.error("Erro ao gerar planos de dieta semanais", 
+                        user_id=user_id, error=str(e))
+            raise
+    
+    def compose_diet_plan(
+        self,
+        user_id: str,
+        target_date: date,
+        algorithm_config: AlgorithmConfig,
+        available_foods: CandidatePool,
+        user_data: dict
+    ) -> DietPlan:
+        """
+        Monta o plano de dieta a partir de insumos já carregados (sem I/O)
+        
+        Args:
+            user_id: ID do usuário
+            target_date: Data alvo para o plano
+            algorithm_config: Configuração do algoritmo
+            available_foods: Pool de alimentos elegíveis do usuário
+            user_data: Dados do usuário
+            
+        Returns:
+            DietPlan: Plano de dieta completo (não persistido)
+        """
+        diet_preferences = algorithm_config.diet_preferences
+        
+        # Calcular distribuição calórica por refeição
+        meal_targets = self._calculate_meal_targets(algorithm_config)
+        
+        # Gerar refeições
+        meals = [
+            self._generate_meal(meal_type, target, available_foods, diet_preferences, user_data)
+            for meal_type, target in meal_targets.items()
+        ]
+        
+        # Calcular totais do plano
+        total_calories, total_protein, total_carbs, total_fat = self._calculate_totals(meals)
+        
+        # Ajustar se necessário
+        if self._needs_adjustment(total_calories, algorithm_config.target_calories):
+            meals = self._adjust_plan(meals, algorithm_config, available_foods)
+            total_calories, total_protein, total_carbs, total_fat = self._calculate_totals(meals)
+        
+        return DietPlan(
+            user_id=user_id,
+            date=target_date,
+            goal=algorithm_config.goal,
+            target_calories=algorithm_config.target_calories,
+            target_protein=algorithm_config.target_protein,
+            target_carbs=algorithm_config.target_carbs,
+            target_fat=algorithm_config.target_fat,
+            meals=meals,
+            total_calories=total_calories,
+            total_protein=total_protein,
+            total_carbs=total_carbs,
+            total_fat=total_fat,
+            water_intake_ml=self._calculate_water_intake(algorithm_config),
+            notes=self._generate_diet_notes(algorithm_config, diet_preferences)
+        )
+    
     def _calculate_meal_targets(self, config: AlgorithmConfig) -> Dict[MealType, NutritionalTarget]:
         """Calcula alvos nutricionais para cada refeição"""
         meal_distribution = self.diet_config["meal_distribution"]
@@ -171,150 +280,71 @@ class DietGenerator:
         
         return targets
     
-    async def _get_available_foods(self, preferences: DietPreferences) -> List[FoodCandidate]:
-        """Obtém alimentos disponíveis do Content Service usando adaptador TACO"""
+    async def _get_available_foods(self, preferences: DietPreferences) -> CandidatePool:
+        """Filtra o catálogo de alimentos compartilhado pelas preferências do usuário"""
         try:
-            # Buscar todos os alimentos da Base TACO
-            foods_response = await self.content_service.search_foods("")
-            taco_foods = foods_response.get("data", [])
-            
-            logger.info("Alimentos obtidos da Base TACO", count=len(taco_foods))
-            
-            # Converter dados da TACO para formato esperado
-            converted_foods = self.taco_adapter.convert_foods_from_taco(taco_foods)
-            
-            candidates = []
-            for food in converted_foods:
-                # Filtrar por restrições dietéticas
-                if self._food_matches_restrictions(food, preferences):
-                    candidate = FoodCandidate(
-                        food_id=food["id"],
-                        name=food["name"],
-                        calories_per_100g=food["nutrition"]["calories"],
-                        protein_per_100g=food["nutrition"]["protein"],
-                        carbs_per_100g=food["nutrition"]["carbs"],
-                        fat_per_100g=food["nutrition"]["fat"],
-                        category=food.get("category", "outros"),
-                        preparation_time=food.get("preparation_time", 15),
-                        cost_level=food.get("cost_level", "medium"),
-                        availability_score=food.get("availability_score", 0.8),
-                        preference_score=self._calculate_preference_score(food, preferences)
-                    )
-                    candidates.append(candidate)
-            
-            # Ordenar por score de preferência
-            candidates.sort(key=lambda x: x.preference_score, reverse=True)
+            # Snapshot imutável, carregado e convertido uma única vez por versão
+            snapshot = await self.food_catalog.get_snapshot(self.content_service)
+            
+            # Restrições e scores de preferência calculados de forma vetorizada
+            pool = CandidatePool(snapshot.matrix, preferences)
             
             logger.info("Alimentos disponíveis processados", 
-                       taco_count=len(taco_foods),
-                       converted_count=len(converted_foods),
-                       candidates_count=len(candidates))
-            return candidates
+                       catalog_version=snapshot.version,
+                       catalog_count=len(snapshot),
+                       candidates_count=len(pool))
+            return pool
             
         except Exception as e:
             logger.error("Erro ao obter alimentos da Base TACO", error=str(e))
             raise
     
-    def _food_matches_restrictions(self, food: dict, preferences: DietPreferences) -> bool:
-        """Verifica se o alimento atende às restrições dietéticas"""
-        # Verificar alergias
-        for allergy in preferences.allergies:
-            if allergy.lower() in food.get("allergens", []):
-                return False
-        
-        # Verificar restrições dietéticas
-        food_tags = food.get("dietary_tags", [])
-        for restriction in preferences.dietary_restrictions:
-            if restriction == "vegetarian" and "meat" in food_tags:
-                return False
-            elif restriction == "vegan" and ("meat" in food_tags or "dairy" in food_tags):
-                return False
-            elif restriction == "gluten_free" and "gluten" in food_tags:
-                return False
-            elif restriction == "lactose_free" and "lactose" in food_tags:
-                return False
-        
-        # Verificar alimentos não desejados
-        if food["name"].lower() in [disliked.lower() for disliked in preferences.disliked_foods]:
-            return False
-        
-        return True
-    
-    def _calculate_preference_score(self, food: dict, preferences: DietPreferences) -> float:
-        """Calcula score de preferência para um alimento"""
-        score = 0.5  # Score base
-        
-        # Bonus por alimentos preferidos
-        if food["name"].lower() in [preferred.lower() for preferred in preferences.preferred_foods]:
-            score += 0.3
-        
-        # Bonus por tempo de preparo
-        prep_time = food.get("preparation_time", 15)
-        if preferences.cooking_time_preference == "quick" and prep_time <= 15:
-            score += 0.1
-        elif preferences.cooking_time_preference == "medium" and 15 < prep_time <= 45:
-            score += 0.1
-        elif preferences.cooking_time_preference == "elaborate" and prep_time > 45:
-            score += 0.1
-        
-        # Bonus por nível de custo
-        cost_level = food.get("cost_level", "medium")
-        if cost_level == preferences.budget_level:
-            score += 0.1
-        
-        # Penalty por baixa disponibilidade
-        availability = food.get("availability_score", 0.8)
-        score *= availability
-        
-        return min(score, 1.0)
-    
-    async def _generate_meal(
+    def _generate_meal(
         self, 
         meal_type: MealType, 
         target: NutritionalTarget,
-        available_foods: List[FoodCandidate],
+        available_foods: CandidatePool,
         preferences: DietPreferences,
         user_data: dict
     ) -> Meal:
         """Gera uma refeição específica"""
         
         # Filtrar alimentos apropriados para esta refeição
-        suitable_foods = self._filter_foods_for_meal(meal_type, available_foods)
+        suitable = self._filter_foods_for_meal(meal_type, available_foods)
+        selected: List[int] = []
         
         # Algoritmo de montagem da refeição
-        # 1. Priorizar proteína
-        protein_foods = [f for f in suitable_foods if f.protein_per_100g >= 15]
-        selected_foods = []
-        
-        # Selecionar fonte principal de proteína
-        if protein_foods:
-            protein_source = self._select_food_by_priority(protein_foods, target.protein, "protein")
-            if protein_source:
-                selected_foods.append(protein_source)
+        # 1. Priorizar proteína - fonte principal de proteína
+        protein_mask = suitable & (available_foods.nutrient("protein") >= 15)
+        protein_source = self._select_food_by_priority(available_foods, protein_mask, target.protein, "protein")
+        if protein_source is not None:
+            selected.append(protein_source)
         
         # 2. Adicionar carboidratos
-        remaining_carbs = target.carbs - sum(f.carbs for f in selected_foods)
+        remaining_carbs = target.carbs - available_foods.nutrient("carbs")[selected].sum()
         if remaining_carbs > 5:  # Se ainda precisamos de carboidratos significativos
-            carb_foods = [f for f in suitable_foods if f.carbs_per_100g >= 20 and f not in selected_foods]
-            carb_source = self._select_food_by_priority(carb_foods, remaining_carbs, "carbs")
-            if carb_source:
-                selected_foods.append(carb_source)
+            carb_mask = self._exclude(suitable & (available_foods.nutrient("carbs") >= 20), selected)
+            carb_source = self._select_food_by_priority(available_foods, carb_mask, remaining_carbs, "carbs")
+            if carb_source is not None:
+                selected.append(carb_source)
         
         # 3. Adicionar gorduras
-        remaining_fat = target.fat - sum(f.fat for f in selected_foods)
+        remaining_fat = target.fat - available_foods.nutrient("fat")[selected].sum()
         if remaining_fat > 2:  # Se ainda precisamos de gorduras
-            fat_foods = [f for f in suitable_foods if f.fat_per_100g >= 10 and f not in selected_foods]
-            fat_source = self._select_food_by_priority(fat_foods, remaining_fat, "fat")
-            if fat_source:
-                selected_foods.append(fat_source)
+            fat_mask = self._exclude(suitable & (available_foods.nutrient("fat") >= 10), selected)
+            fat_source = self._select_food_by_priority(available_foods, fat_mask, remaining_fat, "fat")
+            if fat_source is not None:
+                selected.append(fat_source)
         
         # 4. Completar com alimentos complementares
-        remaining_calories = target.calories - sum(f.calories_per_100g for f in selected_foods)
+        remaining_calories = target.calories - available_foods.nutrient("calories")[selected].sum()
         if remaining_calories > 50:
-            complementary_foods = [f for f in suitable_foods if f not in selected_foods]
-            complement = self._select_food_by_priority(complementary_foods, remaining_calories, "calories")
-            if complement:
-                selected_foods.append(complement)
+            complement_mask = self._exclude(suitable, selected)
+            complement = self._select_food_by_priority(available_foods, complement_mask, remaining_calories, "calories")
+            if complement is not None:
+                selected.append(complement)
+        
+        selected_foods = [self._to_candidate(available_foods, position) for position in selected]
         
         # Calcular quantidades otimizadas
         food_items = self._optimize_quantities(selected_foods, target)
@@ -343,59 +373,62 @@ class DietGenerator:
             tips=tips
         )
     
-    def _filter_foods_for_meal(self, meal_type: MealType, foods: List[FoodCandidate]) -> List[FoodCandidate]:
-        """Filtra alimentos apropriados para um tipo de refeição"""
-        meal_categories = {
-            MealType.CAFE_DA_MANHA: ["frutas", "cereais", "laticínios", "ovos", "pães"],
-            MealType.LANCHE_MANHA: ["frutas", "oleaginosas", "laticínios", "barras"],
-            MealType.ALMOCO: ["carnes", "peixes", "cereais", "vegetais", "leguminosas"],
-            MealType.LANCHE_TARDE: ["frutas", "oleaginosas", "laticínios", "barras"],
-            MealType.JANTAR: ["carnes", "peixes", "vegetais", "leguminosas", "cereais"],
-            MealType.CEIA: ["laticínios", "oleaginosas", "proteínas"]
-        }
-        
-        appropriate_categories = meal_categories.get(meal_type, [])
-        
-        return [
-            food for food in foods 
-            if food.category in appropriate_categories or "universal" in food.category
-        ]
+    def _filter_foods_for_meal(self, meal_type: MealType, foods: CandidatePool) -> np.ndarray:
+        """Máscara dos alimentos apropriados para um tipo de refeição"""
+        return foods.category_mask(MEAL_CATEGORIES.get(meal_type, []))
+    
+    def _exclude(self, mask: np.ndarray, positions: List[int]) -> np.ndarray:
+        """Remove da máscara alimentos já selecionados"""
+        if positions:
+            mask = mask.copy()
+            mask[positions] = False
+        return mask
     
     def _select_food_by_priority(
         self, 
-        foods: List[FoodCandidate], 
+        foods: CandidatePool, 
+        mask: np.ndarray,
         target_amount: float, 
         nutrient: str
-    ) -> Optional[FoodCandidate]:
+    ) -> Optional[int]:
         """Seleciona alimento baseado na prioridade e adequação nutricional"""
-        if not foods:
+        positions = np.flatnonzero(mask)
+        if positions.size == 0:
             return None
         
-        # Calcular score para cada alimento
-        scored_foods = []
-        for food in foods:
-            nutrient_per_100g = getattr(food, f"{nutrient}_per_100g")
-            
-            # Score baseado na adequação nutricional
-            adequacy_score = min(nutrient_per_100g / max(target_amount, 1), 2.0)
-            
-            # Score final combina adequação e preferência
-            final_score = (adequacy_score * 0.7) + (food.preference_score * 0.3)
-            
-            scored_foods.append((food, final_score))
-        
-        # Ordenar por score e adicionar aleatoriedade para variedade
-        scored_foods.sort(key=lambda x: x[1], reverse=True)
+        # Score final combina adequação nutricional (70%) e preferência (30%)
+        scores = foods.score(nutrient, target_amount)[positions]
         
         # Selecionar entre os top 3 para adicionar variedade
-        top_foods = scored_foods[:3]
-        weights = [food[1] for food in top_foods]
+        top_k = min(3, positions.size)
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        weights = scores[top]
         
-        if weights:
-            selected = random.choices(top_foods, weights=weights, k=1)[0]
-            return selected[0]
+        if weights.sum() <= 0:
+            return int(positions[top[0]])
         
-        return None
+        selected = random.choices(range(top_k), weights=weights.tolist(), k=1)[0]
+        return int(positions[top[selected]])
+    
+    def _to_candidate(self, pool: CandidatePool, position: int) -> FoodCandidate:
+        """Materializa um alimento do pool colunar como FoodCandidate"""
+        matrix = pool.matrix
+        index = pool.indices[position]
+        calories, protein, carbs, fat = pool.nutrients[:, position]
+        return FoodCandidate(
+            food_id=matrix.food_ids[index],
+            name=matrix.names[index],
+            calories_per_100g=float(calories),
+            protein_per_100g=float(protein),
+            carbs_per_100g=float(carbs),
+            fat_per_100g=float(fat),
+            category=matrix.category_names[matrix.category_codes[index]],
+            preparation_time=int(matrix.preparation_time[index]),
+            cost_level=matrix.cost_levels[index],
+            availability_score=float(matrix.availability[index]),
+            preference_score=float(pool.preference[position])
+        )
     
     def _optimize_quantities(
         self, 
@@ -406,55 +439,50 @@ class DietGenerator:
         if not selected_foods:
             return []
         
-        food_items = []
-        
-        # Algoritmo simples de otimização
-        # Para cada alimento, calcular quantidade baseada na contribuição proporcional
-        total_priority_score = sum(food.preference_score for food in selected_foods)
-        
-        for food in selected_foods:
-            # Calcular contribuição proporcional baseada no score
-            proportion = food.preference_score / total_priority_score if total_priority_score > 0 else 1.0 / len(selected_foods)
-            
-            # Calcular quantidade inicial baseada nas calorias alvo
-            target_calories_for_food = target.calories * proportion
-            quantity_grams = (target_calories_for_food / food.calories_per_100g) * 100
-            
-            # Ajustar para quantidades práticas
-            quantity_grams = self._round_to_practical_quantity(quantity_grams, food.category)
-            
-            # Calcular valores nutricionais finais
-            multiplier = quantity_grams / 100
-            
-            food_item = FoodItem(
-                food_id=food.food_id,
-                name=food.name,
-                quantity=quantity_grams,
-                unit="gramas",
-                calories=food.calories_per_100g * multiplier,
-                protein=food.protein_per_100g * multiplier,
-                carbs=food.carbs_per_100g * multiplier,
-                fat=food.fat_per_100g * multiplier
-            )
-            
-            food_items.append(food_item)
+        per_100g = np.array([
+            [food.calories_per_100g, food.protein_per_100g, food.carbs_per_100g, food.fat_per_100g]
+            for food in selected_foods
+        ])
+        targets = np.array([target.calories, target.protein, target.carbs, target.fat])
+        
+        # Ajustar calorias e macros simultaneamente com porções práticas
+        quantities = self.quantity_solver.solve(
+            per_100g,
+            targets,
+            [food.category for food in selected_foods],
+            np.array([food.preference_score for food in selected_foods])
+        )
         
-        return food_items
+        return [
+            self._build_food_item(food.food_id, food.name, "gramas", quantity, nutrients)
+            for food, quantity, nutrients in zip(selected_foods, quantities, per_100g)
+            if quantity > 0
+        ]
+    
+    def _build_food_item(
+        self, 
+        food_id: str, 
+        name: str, 
+        unit: str, 
+        quantity: float, 
+        nutrients_per_100g: np.ndarray
+    ) -> FoodItem:
+        """Cria o FoodItem com valores nutricionais proporcionais à quantidade"""
+        calories, protein, carbs, fat = nutrients_per_100g * (quantity / 100)
+        return FoodItem(
+            food_id=food_id,
+            name=name,
+            quantity=float(quantity),
+            unit=unit,
+            calories=float(calories),
+            protein=float(protein),
+            carbs=float(carbs),
+            fat=float(fat)
+        )
     
     def _round_to_practical_quantity(self, quantity: float, category: str) -> float:
         """Arredonda para quantidades práticas baseadas na categoria"""
-        practical_rounds = {
-            "frutas": 50,      # Múltiplos de 50g
-            "vegetais": 50,    # Múltiplos de 50g
-            "carnes": 25,      # Múltiplos de 25g
-            "cereais": 25,     # Múltiplos de 25g
-            "laticínios": 50,  # Múltiplos de 50g
-            "oleaginosas": 10, # Múltiplos de 10g
-            "default": 25      # Padrão
-        }
-        
-        round_to = practical_rounds.get(category, practical_rounds["default"])
-        return round(quantity / round_to) * round_to
+        return round_to_practical_quantity(quantity, category)
     
     def _calculate_totals(self, meals: List[Meal]) -> Tuple[float, float, float, float]:
         """Calcula totais nutricionais do plano"""
@@ -471,14 +499,14 @@ class DietGenerator:
         difference = abs(actual_calories - target_calories) / target_calories
         return difference > tolerance
     
-    async def _adjust_plan(
+    def _adjust_plan(
         self, 
         meals: List[Meal], 
         config: AlgorithmConfig,
-        available_foods: List[FoodCandidate]
+        available_foods: CandidatePool
     ) -> List[Meal]:
         """Ajusta o plano para atingir os alvos nutricionais"""
-        # Implementação simplificada - ajustar quantidades proporcionalmente
+        # Reotimizar cada refeição para a sua parcela do alvo diário
         current_calories = sum(meal.total_calories for meal in meals)
         target_calories = config.target_calories
         
@@ -486,25 +514,26 @@ class DietGenerator:
         
         adjusted_meals = []
         for meal in meals:
-            adjusted_foods = []
-            for food in meal.foods:
-                # Ajustar quantidade
-                new_quantity = food.quantity * adjustment_factor
-                new_quantity = self._round_to_practical_quantity(new_quantity, "default")
-                
-                # Recalcular valores nutricionais
-                multiplier = new_quantity / 100
-                adjusted_food = FoodItem(
-                    food_id=food.food_id,
-                    name=food.name,
-                    quantity=new_quantity,
-                    unit=food.unit,
-                    calories=food.calories * adjustment_factor,
-                    protein=food.protein * adjustment_factor,
-                    carbs=food.carbs * adjustment_factor,
-                    fat=food.fat * adjustment_factor
-                )
-                adjusted_foods.append(adjusted_food)
+            if not meal.foods:
+                adjusted_meals.append(meal)
+                continue
+            
+            quantities = np.array([food.quantity for food in meal.foods])
+            per_100g = np.array([
+                [food.calories, food.protein, food.carbs, food.fat] for food in meal.foods
+            ]) * (100 / quantities)[:, None]
+            targets = np.array([
+                meal.total_calories, meal.total_protein, meal.total_carbs, meal.total_fat
+            ]) * adjustment_factor
+            
+            # Categoria e preferência reais de cada alimento (limites e arredondamento)
+            categories, priorities = available_foods.food_attributes([food.food_id for food in meal.foods])
+            new_quantities = self.quantity_solver.solve(per_100g, targets, categories, priorities)
+            adjusted_foods = [
+                self._build_food_item(food.food_id, food.name, food.unit, quantity, nutrients)
+                for food, quantity, nutrients in zip(meal.foods, new_quantities, per_100g)
+                if quantity > 0
+            ]
             
             # Recalcular totais da refeição
             total_calories = sum(item.calories for item in adjusted_foods)
@@ -546,6 +575,23 @@ class DietGenerator:
             logger.error("Erro ao buscar plano existente", error=str(e))
             return None
     
+    async def _get_existing_plans(self, user_id: str, dates: List[date]) -> Dict[date, DietPlan]:
+        """Busca planos existentes de várias datas em uma única leitura"""
+        try:
+            collection = self.firebase_service.db.collection("diet_plans")
+            refs = [collection.document(f"{user_id}_{target_date}") for target_date in dates]
+            
+            plans = {}
+            async for doc in self.firebase_service.db.get_all(refs):
+                if doc.exists:
+                    plan = DietPlan(**doc.to_dict())
+                    plans[plan.date] = plan
+            
+            return plans
+        except Exception as e:
+            logger.error("Erro ao buscar planos existentes", error=str(e))
+            return {}
+    
     def _should_regenerate_plan(self, existing_plan: DietPlan, config: AlgorithmConfig) -> bool:
         """Verifica se deve regenerar um plano existente"""
         # Regenerar se as metas calóricas mudaram significativamente
@@ -711,3 +757,28 @@ class DietGenerator:
             logger.error("Erro ao salvar plano de dieta", error=str(e))
             raise
 
+    
+    async def _save_diet_plans(self, diet_plans: List[DietPlan]):
+        """Salva vários planos de dieta em um único batched write"""
+        if not diet_plans:
+            return
+        
+        try:
+            collection = self.firebase_service.db.collection("diet_plans")
+            batch = self.firebase_service.db.batch()
+            now = datetime.utcnow()
+            
+            for diet_plan in diet_plans:
+                plan_data = diet_plan.dict()
+                plan_data["created_at"] = now
+                plan_data["updated_at"] = now
+                batch.set(collection.document(f"{diet_plan.user_id}_{diet_plan.date}"), plan_data)
+            
+            await batch.commit()
+            
+            logger.info("Planos de dieta salvos", 
+                       user_id=diet_plans[0].user_id, count=len(diet_plans))
+            
+        except Exception as e:
+            logger.error("Erro ao salvar planos de dieta", error=str(e))
+            raise
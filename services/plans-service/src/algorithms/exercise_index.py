@@ -0,0 +1,151 @@
+"""
+Índice de exercícios por slot de treino (padrão de movimento, músculo e dificuldade)
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from models.plan import DifficultyLevel
+
+# Ordem dos níveis de dificuldade (bandas do índice)
+DIFFICULTY_ORDER = {
+    DifficultyLevel.BEGINNER: 0,
+    DifficultyLevel.INTERMEDIATE: 1,
+    DifficultyLevel.ADVANCED: 2,
+    DifficultyLevel.EXPERT: 3
+}
+
+# Padrão de movimento curinga usado pelos slots "any"
+ANY_PATTERN = "any"
+
+@dataclass
+class ExerciseCandidate:
+    """Candidato a exercício para o treino"""
+    exercise_id: str
+    name: str
+    muscle_groups: List[str]
+    primary_muscle: str
+    secondary_muscles: List[str]
+    equipment: str
+    difficulty: DifficultyLevel
+    movement_pattern: str  # compound, isolation, cardio
+    safety_rating: float  # 0-1
+    effectiveness_rating: float  # 0-1
+    location_compatibility: List[str]  # gym, home, outdoor
+    time_efficiency: float  # 0-1
+
+    @property
+    def score(self) -> float:
+        """Score de seleção: efetividade x segurança"""
+        return self.effectiveness_rating * self.safety_rating
+
+    @classmethod
+    def from_content(cls, exercise: Dict[str, Any]) -> "ExerciseCandidate":
+        """Converte um exercício no formato do Content Service"""
+        muscle_groups = exercise["muscle_groups"]
+        return cls(
+            exercise_id=exercise["id"],
+            name=exercise["name"],
+            muscle_groups=muscle_groups,
+            primary_muscle=muscle_groups[0] if muscle_groups else "",
+            secondary_muscles=muscle_groups[1:] if len(muscle_groups) > 1 else [],
+            equipment=exercise.get("equipment", "bodyweight"),
+            difficulty=DifficultyLevel(exercise.get("difficulty", "intermediate")),
+            movement_pattern=exercise.get("movement_pattern", "compound"),
+            safety_rating=exercise.get("safety_rating", 0.8),
+            effectiveness_rating=exercise.get("effectiveness_rating", 0.7),
+            location_compatibility=exercise.get("location_compatibility", ["gym"]),
+            time_efficiency=exercise.get("time_efficiency", 0.7)
+        )
+
+class ExerciseSlotIndex:
+    """
+    Catálogo de exercícios indexado por (padrão de movimento, músculo, dificuldade)
+
+    Construído uma única vez por snapshot do catálogo. Os exercícios ficam
+    ordenados por efetividade x segurança (desempate pela ordem do catálogo)
+    e cada bucket guarda apenas posições nessa ordem, de modo que preencher
+    um slot é olhar o início de poucos buckets.
+    """
+
+    def __init__(self, exercises: Sequence[Dict[str, Any]]):
+        candidates = [ExerciseCandidate.from_content(exercise) for exercise in exercises]
+        order = sorted(range(len(candidates)), key=lambda i: -candidates[i].score)
+
+        self.exercises: Tuple[Dict[str, Any], ...] = tuple(exercises[i] for i in order)
+        self.candidates: List[ExerciseCandidate] = [candidates[i] for i in order]
+        self.buckets: Dict[Tuple[str, str, int], List[int]] = {}
+
+        for rank, candidate in enumerate(self.candidates):
+            level = DIFFICULTY_ORDER[candidate.difficulty]
+            for muscle in set(candidate.muscle_groups):
+                for pattern in (candidate.movement_pattern, ANY_PATTERN):
+                    self.buckets.setdefault((pattern, muscle, level), []).append(rank)
+
+    def __len__(self) -> int:
+        return len(self.candidates)
+
+    def select(
+        self,
+        movement_pattern: str,
+        muscle_groups: Sequence[str],
+        max_level: int,
+        excluded: Set[str],
+        allowed: Optional[Sequence[bool]] = None
+    ) -> Optional[ExerciseCandidate]:
+        """
+        Melhor exercício para um slot
+
+        Args:
+            movement_pattern: Padrão de movimento do slot ("any" aceita todos)
+            muscle_groups: Músculos do slot (basta um em comum)
+            max_level: Maior nível de dificuldade aceito
+            excluded: IDs já usados
+            allowed: Máscara por posição dos exercícios permitidos ao usuário
+
+        Returns:
+            ExerciseCandidate: Melhor candidato ou None
+        """
+        best: Optional[int] = None
+        for muscle in muscle_groups:
+            for level in range(min(max_level, len(DIFFICULTY_ORDER) - 1) + 1):
+                for rank in self.buckets.get((movement_pattern, muscle, level), ()):
+                    if best is not None and rank >= best:
+                        break
+                    if allowed is not None and not allowed[rank]:
+                        continue
+                    if self.candidates[rank].exercise_id in excluded:
+                        continue
+                    best = rank
+                    break
+
+        return self.candidates[best] if best is not None else None
+
+class ExercisePool:
+    """
+    Exercícios elegíveis para um usuário sobre o índice compartilhado
+
+    Guarda apenas a máscara de exercícios permitidos pelas preferências;
+    nada do catálogo é copiado por plano.
+    """
+
+    def __init__(self, index: ExerciseSlotIndex, allowed: Sequence[bool]):
+        self.index = index
+        self.allowed = list(allowed)
+
+    def __len__(self) -> int:
+        return sum(self.allowed)
+
+    def __iter__(self) -> Iterator[ExerciseCandidate]:
+        """Candidatos permitidos, ordenados por efetividade e segurança"""
+        return (c for c, ok in zip(self.index.candidates, self.allowed) if ok)
+
+    def select(
+        self,
+        movement_pattern: str,
+        muscle_groups: Sequence[str],
+        max_level: int,
+        excluded: Set[str]
+    ) -> Optional[ExerciseCandidate]:
+        """Melhor exercício permitido para um slot (ver ExerciseSlotIndex.select)"""
+        return self.index.select(movement_pattern, muscle_groups, max_level, excluded, self.allowed)
@@ -0,0 +1,218 @@
+"""
+Matriz nutricional colunar (struct-of-arrays) para pontuação vetorizada de alimentos
+"""
+
+import copy
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+
+from models.plan import DietPreferences
+
+NUTRIENTS = ("calories", "protein", "carbs", "fat")
+
+class NutrientMatrix:
+    """
+    Catálogo de alimentos em formato colunar
+
+    Construída uma única vez por snapshot do catálogo. Cada atributo é um
+    array NumPy alinhado pelo índice do alimento, de modo que filtros e
+    scores de um plano inteiro saem de poucas operações vetorizadas.
+    """
+
+    def __init__(self, foods: Sequence[Dict[str, Any]]):
+        self.size = len(foods)
+        self.food_ids: List[str] = [food["id"] for food in foods]
+        self.index_of: Dict[str, int] = {food_id: index for index, food_id in enumerate(self.food_ids)}
+        self.names: List[str] = [food["name"] for food in foods]
+        self.names_lower = np.array([name.lower() for name in self.names], dtype=object)
+
+        # Nutrientes por 100g: linhas = calories, protein, carbs, fat
+        self.nutrients = np.array(
+            [[food["nutrition"].get(nutrient, 0) or 0 for food in foods] for nutrient in NUTRIENTS],
+            dtype=np.float64
+        ).reshape(len(NUTRIENTS), self.size)
+        self.calories, self.protein, self.carbs, self.fat = self.nutrients
+
+        # Categorias codificadas como inteiros
+        categories = [food.get("category", "outros") for food in foods]
+        self.category_names: List[str] = sorted(set(categories))
+        self.category_lookup = {name: code for code, name in enumerate(self.category_names)}
+        self.category_codes = np.array([self.category_lookup[c] for c in categories], dtype=np.int32)
+        self.universal = np.array(["universal" in c for c in categories], dtype=bool)
+
+        self.preparation_time = np.array([food.get("preparation_time", 15) for food in foods], dtype=np.int32)
+        self.cost_levels = np.array([food.get("cost_level", "medium") for food in foods], dtype=object)
+        self.availability = np.array([food.get("availability_score", 0.8) for food in foods], dtype=np.float64)
+
+        # Índices invertidos de tags e alergênicos -> máscara booleana
+        self.tag_masks = self._build_masks(food.get("dietary_tags", []) for food in foods)
+        self.allergen_masks = self._build_masks(food.get("allergens", []) for food in foods)
+
+    def nutrient(self, nutrient: str) -> np.ndarray:
+        """Coluna de um nutriente (por 100g)"""
+        return self.nutrients[NUTRIENTS.index(nutrient)]
+
+    def category_mask(self, categories: Iterable[str]) -> np.ndarray:
+        """Máscara dos alimentos pertencentes às categorias informadas (ou universais)"""
+        codes = [self.category_lookup[c] for c in categories if c in self.category_lookup]
+        return np.isin(self.category_codes, codes) | self.universal
+
+    def restriction_mask(self, preferences: DietPreferences) -> np.ndarray:
+        """Máscara dos alimentos que atendem às restrições dietéticas do usuário"""
+        mask = np.ones(self.size, dtype=bool)
+
+        # Alergias
+        for allergy in preferences.allergies:
+            mask &= ~self._mask(self.allergen_masks, allergy.lower())
+
+        # Restrições dietéticas
+        for restriction in preferences.dietary_restrictions:
+            if restriction == "vegetarian":
+                mask &= ~self._mask(self.tag_masks, "meat")
+            elif restriction == "vegan":
+                mask &= ~(self._mask(self.tag_masks, "meat") | self._mask(self.tag_masks, "dairy"))
+            elif restriction == "gluten_free":
+                mask &= ~self._mask(self.tag_masks, "gluten")
+            elif restriction == "lactose_free":
+                mask &= ~self._mask(self.tag_masks, "lactose")
+
+        # Alimentos não desejados
+        if preferences.disliked_foods:
+            disliked = [food.lower() for food in preferences.disliked_foods]
+            mask &= ~np.isin(self.names_lower, disliked)
+
+        return mask
+
+    def preference_scores(self, preferences: DietPreferences) -> np.ndarray:
+        """Score de preferência (0 a 1) de todos os alimentos"""
+        scores = np.full(self.size, 0.5)
+
+        # Bonus por alimentos preferidos
+        if preferences.preferred_foods:
+            preferred = [food.lower() for food in preferences.preferred_foods]
+            scores += 0.3 * np.isin(self.names_lower, preferred)
+
+        # Bonus por tempo de preparo
+        prep_time = self.preparation_time
+        if preferences.cooking_time_preference == "quick":
+            scores += 0.1 * (prep_time <= 15)
+        elif preferences.cooking_time_preference == "medium":
+            scores += 0.1 * ((prep_time > 15) & (prep_time <= 45))
+        elif preferences.cooking_time_preference == "elaborate":
+            scores += 0.1 * (prep_time > 45)
+
+        # Bonus por nível de custo
+        scores += 0.1 * (self.cost_levels == preferences.budget_level)
+
+        # Penalty por baixa disponibilidade
+        scores *= self.availability
+
+        return np.minimum(scores, 1.0)
+
+    def _mask(self, masks: Dict[str, np.ndarray], key: str) -> np.ndarray:
+        mask = masks.get(key)
+        return mask if mask is not None else np.zeros(self.size, dtype=bool)
+
+    def _build_masks(self, values_per_food: Iterable[Iterable[str]]) -> Dict[str, np.ndarray]:
+        masks: Dict[str, np.ndarray] = {}
+        for index, values in enumerate(values_per_food):
+            for value in values:
+                if value not in masks:
+                    masks[value] = np.zeros(self.size, dtype=bool)
+                masks[value][index] = True
+        return masks
+
+class CandidatePool:
+    """
+    Alimentos elegíveis para um plano, ordenados por preferência
+
+    Guarda apenas índices para a NutrientMatrix compartilhada e os scores
+    de preferência do usuário; nada do catálogo é copiado por plano.
+    """
+
+    def __init__(self, matrix: NutrientMatrix, preferences: DietPreferences):
+        self.matrix = matrix
+        allowed = np.flatnonzero(matrix.restriction_mask(preferences))
+        scores = matrix.preference_scores(preferences)[allowed]
+
+        # Ordenar por score de preferência (estável, como o sort anterior)
+        order = np.argsort(-scores, kind="stable")
+        self.indices = allowed[order]
+        self.preference = scores[order]
+        self.nutrients = matrix.nutrients[:, self.indices]
+        self.category_codes = matrix.category_codes[self.indices]
+        self.universal = matrix.universal[self.indices]
+        self._positions: Optional[Dict[int, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def nutrient(self, nutrient: str) -> np.ndarray:
+        """Coluna de um nutriente restrita ao pool"""
+        return self.nutrients[NUTRIENTS.index(nutrient)]
+
+    def category_mask(self, categories: Iterable[str]) -> np.ndarray:
+        """Máscara do pool para as categorias informadas (ou universais)"""
+        lookup = self.matrix.category_lookup
+        codes = [lookup[c] for c in categories if c in lookup]
+        return np.isin(self.category_codes, codes) | self.universal
+
+    def food_attributes(self, food_ids: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+        """
+        Categoria e score de preferência de alimentos do pool, por food_id
+
+        Alimentos fora do catálogo ou do pool recebem a categoria "default"
+        (limites e arredondamento padrão) e preferência zero.
+        """
+        if self._positions is None:
+            self._positions = {int(index): position for position, index in enumerate(self.indices)}
+
+        categories: List[str] = []
+        priorities = np.zeros(len(food_ids))
+        for i, food_id in enumerate(food_ids):
+            index = self.matrix.index_of.get(food_id)
+            if index is None:
+                categories.append("default")
+                continue
+            categories.append(self.matrix.category_names[self.matrix.category_codes[index]])
+            position = self._positions.get(index)
+            if position is not None:
+                priorities[i] = self.preference[position]
+        return categories, priorities
+
+    def with_usage_penalty(self, usage: Dict[str, int], factor: float) -> "CandidatePool":
+        """
+        Cria uma cópia do pool penalizando alimentos já usados (variedade entre dias)
+
+        Args:
+            usage: Quantidade de usos por food_id
+            factor: Multiplicador aplicado ao score a cada uso (0 a 1)
+
+        Returns:
+            CandidatePool: Pool com scores de preferência ajustados
+        """
+        counts = np.zeros(self.matrix.size)
+        for food_id, count in usage.items():
+            index = self.matrix.index_of.get(food_id)
+            if index is not None:
+                counts[index] = count
+
+        pool = copy.copy(self)
+        pool.preference = self.preference * np.power(factor, counts[self.indices])
+        return pool
+
+    def score(self, nutrient: str, targets: np.ndarray) -> np.ndarray:
+        """
+        Score de adequação + preferência para um ou mais alvos
+
+        Args:
+            nutrient: Nutriente avaliado
+            targets: Quantidade alvo (escalar ou array de alvos, um por linha)
+
+        Returns:
+            np.ndarray: Scores com shape (len(targets), len(pool)) ou (len(pool),)
+        """
+        targets = np.maximum(np.asarray(targets, dtype=np.float64), 1.0)
+        values = self.nutrient(nutrient)
+        adequacy = np.minimum(values / targets[..., None], 2.0)
+        return adequacy * 0.7 + self.preference * 0.3
@@ -0,0 +1,252 @@
+"""
+Otimizador de quantidades de alimentos por refeição
+
+Ajusta as gramas de cada alimento selecionado para atingir simultaneamente
+calorias e macronutrientes, respeitando porções mínimas/máximas e
+arredondamento prático por categoria.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Sequence, Tuple
+import numpy as np
+
+# Ordem dos alvos: calories, protein, carbs, fat
+TARGET_FIELDS = ("calories", "protein", "carbs", "fat")
+
+# Múltiplos práticos (em gramas) por categoria (chaves do TacoDataAdapter)
+PRACTICAL_ROUNDS = {
+    "frutas": 50,      # Múltiplos de 50g
+    "vegetais": 50,    # Múltiplos de 50g
+    "proteinas": 25,   # Múltiplos de 25g
+    "cereais": 25,     # Múltiplos de 25g
+    "laticinios": 50,  # Múltiplos de 50g
+    "oleaginosas": 10, # Múltiplos de 10g
+    "gorduras": 5,     # Múltiplos de 5g
+    "default": 25      # Padrão
+}
+
+# Porções mínimas e máximas (em gramas) por categoria (mesmas chaves)
+DEFAULT_PORTION_BOUNDS = {
+    "frutas": (50, 300),
+    "vegetais": (50, 300),
+    "proteinas": (50, 250),
+    "cereais": (25, 300),
+    "laticinios": (50, 400),
+    "oleaginosas": (10, 40),
+    "gorduras": (5, 30),
+    "default": (25, 300)
+}
+
+DEFAULT_WEIGHTS = {"calories": 2.0, "protein": 1.0, "carbs": 0.6, "fat": 0.6}
+
+def round_to_practical_quantity(quantity: float, category: str) -> float:
+    """Arredonda para quantidades práticas baseadas na categoria"""
+    round_to = PRACTICAL_ROUNDS.get(category, PRACTICAL_ROUNDS["default"])
+    return round(quantity / round_to) * round_to
+
+class QuantitySolver(ABC):
+    """Interface dos solvers de quantidade"""
+
+    name = "base"
+
+    @abstractmethod
+    def solve(
+        self,
+        per_100g: np.ndarray,
+        targets: np.ndarray,
+        categories: Sequence[str],
+        priorities: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Calcula as quantidades (em gramas) de cada alimento
+
+        Args:
+            per_100g: Matriz (n_alimentos, 4) com calories, protein, carbs, fat por 100g
+            targets: Alvos da refeição na mesma ordem
+            categories: Categoria de cada alimento
+            priorities: Score de preferência de cada alimento
+
+        Returns:
+            np.ndarray: Quantidades em gramas
+        """
+
+class ProportionalSolver(QuantitySolver):
+    """Heurística original: divide as calorias pela proporção do score de preferência"""
+
+    name = "proportional"
+
+    def solve(self, per_100g, targets, categories, priorities=None) -> np.ndarray:
+        count = len(categories)
+        if count == 0:
+            return np.zeros(0)
+
+        if priorities is None or priorities.sum() <= 0:
+            proportions = np.full(count, 1.0 / count)
+        else:
+            proportions = priorities / priorities.sum()
+
+        calories = np.maximum(per_100g[:, 0], 1e-9)
+        quantities = targets[0] * proportions / calories * 100
+        return np.array([
+            round_to_practical_quantity(q, c) for q, c in zip(quantities, categories)
+        ], dtype=np.float64)
+
+class BoundedLeastSquaresSolver(QuantitySolver):
+    """
+    Mínimos quadrados com limites por alimento seguido de arredondamento inteiro
+
+    Minimiza o erro relativo ponderado de calorias e macros com um método de
+    conjunto ativo para limites (BVLS): cada iteração resolve um sistema de no
+    máximo ~6 variáveis, então a convergência é exata em poucas iterações.
+    Depois ajusta os múltiplos práticos com busca local.
+    """
+
+    name = "bounded_least_squares"
+
+    def __init__(
+        self,
+        weights: Optional[Dict[str, float]] = None,
+        portion_bounds: Optional[Dict[str, Tuple[float, float]]] = None,
+        max_iterations: int = 50
+    ):
+        weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.weights = np.array([weights[f] for f in TARGET_FIELDS], dtype=np.float64)
+        self.portion_bounds = {**DEFAULT_PORTION_BOUNDS, **(portion_bounds or {})}
+        self.max_iterations = max_iterations
+
+    def solve(self, per_100g, targets, categories, priorities=None) -> np.ndarray:
+        count = len(categories)
+        if count == 0:
+            return np.zeros(0)
+
+        targets = np.asarray(targets, dtype=np.float64)
+        per_gram = np.asarray(per_100g, dtype=np.float64).T / 100  # (4, n)
+
+        # Erro relativo: normalizar cada linha pelo alvo
+        scale = self.weights / np.maximum(targets, 1.0)
+        design = per_gram * scale[:, None]
+        goal = targets * scale
+
+        steps = np.array([PRACTICAL_ROUNDS.get(c, PRACTICAL_ROUNDS["default"]) for c in categories], dtype=np.float64)
+        lower, upper = self._bounds(categories, steps)
+
+        # O primeiro alimento (fonte principal) é obrigatório; os demais podem
+        # ser descartados (0g) ou entrar com pelo menos a porção mínima
+        optional = np.arange(count) > 0
+        relaxed_lower = np.where(optional, 0.0, lower)
+
+        # Ponto inicial: heurística proporcional dentro dos limites
+        start = ProportionalSolver().solve(per_100g, targets, categories, priorities)
+        quantities = self._bounded_least_squares(
+            design, goal, relaxed_lower, upper, np.clip(start, relaxed_lower, upper)
+        )
+
+        return self._round(quantities, steps, lower, upper, optional, design, goal)
+
+    def _bounded_least_squares(self, design, goal, lower, upper, start) -> np.ndarray:
+        """Resolve min ||design @ x - goal||² com lower <= x <= upper (conjunto ativo)"""
+        x = start.copy()
+        free = (x > lower) & (x < upper)
+
+        for _ in range(self.max_iterations):
+            # Resolver para as variáveis livres, mantendo as demais nos limites
+            while free.any():
+                residual = goal - design[:, ~free] @ x[~free]
+                solution = np.linalg.lstsq(design[:, free], residual, rcond=None)[0]
+                current = x[free]
+                if np.all((solution > lower[free]) & (solution < upper[free])):
+                    x[free] = solution
+                    break
+
+                # Andar até o primeiro limite violado e fixar essa variável
+                direction = solution - current
+                bound = np.where(direction < 0, lower[free], upper[free])
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    ratios = np.where(direction != 0, (bound - current) / direction, np.inf)
+                alpha = float(np.clip(ratios.min(), 0.0, 1.0))
+                x[free] = np.clip(current + alpha * direction, lower[free], upper[free])
+                free &= (x > lower + 1e-9) & (x < upper - 1e-9)
+
+            # Condições de otimalidade para as variáveis presas nos limites
+            gradient = design.T @ (goal - design @ x)
+            releasable = ~free & (
+                ((x <= lower + 1e-9) & (gradient > 1e-12)) |
+                ((x >= upper - 1e-9) & (gradient < -1e-12))
+            )
+            if not releasable.any():
+                break
+            free[np.argmax(np.abs(gradient) * releasable)] = True
+
+        return x
+
+    def _bounds(self, categories: Sequence[str], steps: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Limites de porção alinhados aos múltiplos práticos"""
+        default = self.portion_bounds["default"]
+        bounds = np.array([self.portion_bounds.get(c, default) for c in categories], dtype=np.float64)
+        lower = np.maximum(np.ceil(bounds[:, 0] / steps), 1) * steps
+        upper = np.maximum(np.floor(bounds[:, 1] / steps) * steps, lower)
+        return lower, upper
+
+    def _round(self, quantities, steps, lower, upper, optional, design, goal) -> np.ndarray:
+        """Arredonda para múltiplos práticos e refina com busca local de ±1 passo"""
+        rounded = np.clip(np.round(quantities / steps) * steps, 0.0, upper)
+        below_minimum = rounded < lower
+        drop = below_minimum & optional & (quantities < lower / 2)
+        rounded = np.where(drop, 0.0, np.where(below_minimum, lower, rounded))
+
+        residual = design @ rounded - goal
+        best = residual @ residual
+
+        improved = True
+        while improved:
+            improved = False
+            for j in range(len(rounded)):
+                for direction in (-1.0, 1.0):
+                    candidate = self._neighbor(rounded[j], direction, steps[j], lower[j], upper[j], optional[j])
+                    if candidate is None:
+                        continue
+                    trial = residual + design[:, j] * (candidate - rounded[j])
+                    cost = trial @ trial
+                    if cost < best - 1e-12:
+                        rounded[j] = candidate
+                        residual = trial
+                        best = cost
+                        improved = True
+        return rounded
+
+    def _neighbor(self, value, direction, step, lower, upper, optional) -> Optional[float]:
+        """Próximo valor viável (0 ou entre a porção mínima e máxima) na direção informada"""
+        if direction > 0:
+            candidate = lower if value == 0 else value + step
+            return candidate if candidate <= upper else None
+        candidate = value - step
+        if candidate >= lower:
+            return candidate
+        return 0.0 if optional and value > 0 else None
+
+SOLVERS = {
+    ProportionalSolver.name: ProportionalSolver,
+    BoundedLeastSquaresSolver.name: BoundedLeastSquaresSolver
+}
+
+def create_quantity_solver(config: Optional[Dict] = None) -> QuantitySolver:
+    """
+    Cria o solver configurado em diet_algorithm_config["quantity_optimizer"]
+
+    Args:
+        config: Configuração do otimizador
+
+    Returns:
+        QuantitySolver: Instância do solver
+    """
+    config = dict(config or {})
+    solver_name = config.pop("solver", BoundedLeastSquaresSolver.name)
+    if solver_name not in SOLVERS:
+        raise ValueError(f"Solver de quantidades desconhecido: {solver_name}")
+    if solver_name == ProportionalSolver.name:
+        return ProportionalSolver()
+
+    portion_bounds = {
+        category: tuple(bounds) for category, bounds in config.pop("portion_bounds", {}).items()
+    }
+    return BoundedLeastSquaresSolver(portion_bounds=portion_bounds, **config)
@@ -2,8 +2,10 @@
 Algoritmo de Geração de Treino Personalizado
 """
 
+import asyncio
 import random
 import math
+from collections import defaultdict
 from datetime import date, datetime, timedelta, time
 from typing import List, Dict, Optional, Tuple, Set
 import structlog
@@ -15,6 +17,10 @@ from models.plan import (
     WorkoutType, DifficultyLevel, GoalType, WorkoutPreferences, AlgorithmConfig
 )
 from config.settings import get_settings
+from services.content_catalog import get_exercise_catalog
+from algorithms.exercise_index import (
+    DIFFICULTY_ORDER, ExerciseCandidate, ExercisePool, ExerciseSlotIndex
+)
 
 logger = structlog.get_logger(__name__)
 
@@ -42,22 +48,6 @@ class TrainingSplit(str, Enum):
     PUSH_PULL_LEGS_PUSH_PULL_LEGS = "push_pull_legs_push_pull_legs"
     DAILY_SPECIALIZATION = "daily_specialization"
 
-@dataclass
-class ExerciseCandidate:
-    """Candidato a exercício para o treino"""
-    exercise_id: str
-    name: str
-    muscle_groups: List[str]
-    primary_muscle: str
-    secondary_muscles: List[str]
-    equipment: str
-    difficulty: DifficultyLevel
-    movement_pattern: str  # compound, isolation, cardio
-    safety_rating: float  # 0-1
-    effectiveness_rating: float  # 0-1
-    location_compatibility: List[str]  # gym, home, outdoor
-    time_efficiency: float  # 0-1
-
 @dataclass
 class WorkoutTemplate:
     """Template de treino para um dia específico"""
@@ -72,22 +62,30 @@ class WorkoutTemplate:
 class WorkoutGenerator:
     """Gerador de planos de treino personalizados"""
     
+    # Splits de treino compartilhados por todas as instâncias (somente leitura)
+    _shared_training_splits: Optional[Dict[int, List[WorkoutTemplate]]] = None
+    
     def __init__(self, content_service, firebase_service):
         self.content_service = content_service
         self.firebase_service = firebase_service
         self.settings = get_settings()
         self.workout_config = self.settings.workout_algorithm_config
-        
-        # Definir splits de treino
-        self.training_splits = {
-            1: self._create_full_body_split(),
-            2: self._create_upper_lower_split(),
-            3: self._create_push_pull_legs_split(),
-            4: self._create_upper_lower_push_pull_split(),
-            5: self._create_push_pull_legs_upper_lower_split(),
-            6: self._create_push_pull_legs_x2_split(),
-            7: self._create_daily_specialization_split()
-        }
+        self.exercise_catalog = get_exercise_catalog()
+    
+    @property
+    def training_splits(self) -> Dict[int, List[WorkoutTemplate]]:
+        """Splits de treino por dias disponíveis, construídos uma vez por processo"""
+        if WorkoutGenerator._shared_training_splits is None:
+            WorkoutGenerator._shared_training_splits = {
+                1: self._create_full_body_split(),
+                2: self._create_upper_lower_split(),
+                3: self._create_push_pull_legs_split(),
+                4: self._create_upper_lower_push_pull_split(),
+                5: self._create_push_pull_legs_upper_lower_split(),
+                6: self._create_push_pull_legs_x2_split(),
+                7: self._create_daily_specialization_split()
+            }
+        return WorkoutGenerator._shared_training_splits
     
     async def generate_workout_plan(
         self, 
@@ -120,54 +118,28 @@ class WorkoutGenerator:
             user_data = await self._get_user_data(user_id)
             workout_preferences = algorithm_config.workout_preferences
             
-            # 3. Determinar se é dia de treino ou descanso
-            is_rest_day = self._is_rest_day(target_date, workout_preferences)
-            
-            if is_rest_day:
-                return await self._create_rest_day_plan(user_id, target_date, algorithm_config)
-            
-            # 4. Selecionar split de treino baseado nos dias disponíveis
-            available_days = len(workout_preferences.available_days)
-            split_templates = self.training_splits.get(available_days, self.training_splits[3])
-            
-            # 5. Determinar qual template usar para este dia
-            day_of_week = target_date.strftime("%A").lower()
-            workout_template = self._select_template_for_day(day_of_week, split_templates, workout_preferences)
+            # 3. Dia de descanso não precisa de exercícios
+            if self._is_rest_day(target_date, workout_preferences):
+                return self._create_rest_day_plan(user_id, target_date, algorithm_config)
             
-            # 6. Obter exercícios disponíveis do Content Service
+            # 4. Obter exercícios disponíveis do catálogo compartilhado
             available_exercises = await self._get_available_exercises(workout_preferences)
             
-            # 7. Gerar sessões de treino
-            sessions = []
-            if workout_template:
-                session = await self._generate_workout_session(
-                    workout_template, available_exercises, algorithm_config, user_data
-                )
-                sessions.append(session)
-            
-            # 8. Calcular duração total
-            total_duration = sum(session.estimated_duration_minutes for session in sessions)
-            
-            # 9. Obter dados de performance anterior
+            # 5. Obter dados de performance anterior
+            workout_template = self._get_template_for_date(target_date, workout_preferences)
             last_performance = await self._get_last_performance(user_id, workout_template.name if workout_template else "")
             
-            # 10. Criar plano final
-            workout_plan = WorkoutPlan(
-                user_id=user_id,
-                date=target_date,
-                goal=algorithm_config.goal,
-                sessions=sessions,
-                total_estimated_duration_minutes=total_duration,
-                rest_day=False,
-                last_performance=last_performance,
-                notes=self._generate_workout_notes(algorithm_config, workout_preferences)
+            # 6. Montar o plano (CPU apenas, sem I/O)
+            workout_plan = self.compose_workout_plan(
+                user_id, target_date, algorithm_config, available_exercises,
+                user_data, last_performance
             )
             
-            # 11. Salvar no Firestore
+            # 7. Salvar no Firestore
             await self._save_workout_plan(workout_plan)
             
             logger.info("Plano de treino gerado com sucesso", 
-                       user_id=user_id, total_duration=total_duration)
+                       user_id=user_id, total_duration=workout_plan.total_estimated_duration_minutes)
             
             return workout_plan
             
@@ -176,6 +148,169 @@ class WorkoutGenerator:
                         user_id=user_id, error=str(e))
             raise
     
+    async def generate_weekly_workout_plans(
+        self,
+        user_id: str,
+        week_start: date,
+        algorithm_config: AlgorithmConfig
+    ) -> List[WorkoutPlan]:
+        """
+        Gera os planos de treino dos 7 dias da semana em uma única passada
+        
+        Dados do usuário, exercícios e performances anteriores são carregados
+        uma vez; sessões repetidas do mesmo template evitam os exercícios já
+        usados na semana e os dias de treino são salvos em um único batched write.
+        
+        Args:
+            user_id: ID do usuário
+            week_start: Primeiro dia da semana
+            algorithm_config: Configuração do algoritmo
+            
+        Returns:
+            List[WorkoutPlan]: Planos da semana, em ordem de data
+        """
+        logger.info("Iniciando geração semanal de treino", user_id=user_id, week_start=week_start)
+        
+        try:
+            dates = [week_start + timedelta(days=offset) for offset in range(7)]
+            workout_preferences = algorithm_config.workout_preferences
+            
+            # 1. Planos existentes da semana em uma única leitura
+            existing_plans = await self._get_existing_plans(user_id, dates)
+            pending_dates = [
+                target_date for target_date in dates
+                if target_date not in existing_plans
+                or self._should_regenerate_plan(existing_plans[target_date], algorithm_config)
+            ]
+            training_dates = [
+                target_date for target_date in pending_dates
+                if not self._is_rest_day(target_date, workout_preferences)
+            ]
+            
+            # 2. Insumos carregados uma vez para a semana inteira
+            user_data = await self._get_user_data(user_id)
+            available_exercises: Optional[ExercisePool] = None
+            if training_dates:
+                available_exercises = await self._get_available_exercises(workout_preferences)
+            
+            templates = {
+                target_date: self._get_template_for_date(target_date, workout_preferences)
+                for target_date in training_dates
+            }
+            template_names = sorted({template.name for template in templates.values() if template})
+            performances = await asyncio.gather(
+                *(self._get_last_performance(user_id, name) for name in template_names)
+            )
+            last_performance = dict(zip(template_names, performances))
+            
+            # 3. Gerar os dias evitando repetir exercícios do mesmo template
+            used_by_template: Dict[str, Set[str]] = defaultdict(set)
+            plans: List[WorkoutPlan] = []
+            generated: List[WorkoutPlan] = []
+            
+            for target_date in dates:
+                if target_date not in pending_dates:
+                    plans.append(existing_plans[target_date])
+                    continue
+                
+                template = templates.get(target_date)
+                template_name = template.name if template else ""
+                plan = self.compose_workout_plan(
+                    user_id, target_date, algorithm_config, available_exercises, user_data,
+                    last_performance.get(template_name),
+                    avoid_exercises=used_by_template[template_name]
+                )
+                for session in plan.sessions:
+                    used_by_template[template_name].update(ex.exercise_id for ex in session.exercises)
+                
+                # Dias de descanso não são persistidos (como em generate_workout_plan)
+                if not plan.rest_day:
+                    generated.append(plan)
+                plans.append(plan)
+            
+            # 4. Persistir a semana em um único batched write
+            await self._save_workout_plans(generated)
+            
+            logger.info("Planos de treino semanais gerados", 
+                       user_id=user_id, generated=len(generated))
+            
+            return plans
+            
+        except Exception as e:
+            logger.error("Erro ao gerar planos de treino semanais", 
+                        user_id=user_id, error=str(e))
+            raise
+    
+    def compose_workout_plan(
+        self,
+        user_id: str,
+        target_date: date,
+        algorithm_config: AlgorithmConfig,
+        available_exercises: ExercisePool,
+        user_data: dict,
+        last_performance: Optional[Dict] = None,
+        avoid_exercises: Optional[Set[str]] = None
+    ) -> WorkoutPlan:
+        """
+        Monta o plano de treino a partir de insumos já carregados (sem I/O)
+        
+        Args:
+            user_id: ID do usuário
+            target_date: Data alvo para o plano
+            algorithm_config: Configuração do algoritmo
+            available_exercises: Exercícios elegíveis do usuário
+            user_data: Dados do usuário
+            last_performance: Performance da última sessão similar
+            avoid_exercises: Exercícios a evitar quando houver alternativa
+            
+        Returns:
+            WorkoutPlan: Plano de treino completo (não persistido)
+        """
+        workout_preferences = algorithm_config.workout_preferences
+        
+        # Determinar se é dia de treino ou descanso
+        if self._is_rest_day(target_date, workout_preferences):
+            return self._create_rest_day_plan(user_id, target_date, algorithm_config)
+        
+        # Selecionar template do split para o dia
+        workout_template = self._get_template_for_date(target_date, workout_preferences)
+        
+        # Gerar sessões de treino
+        sessions = []
+        if workout_template:
+            session = self._generate_workout_session(
+                workout_template, available_exercises, algorithm_config, user_data,
+                avoid_exercises
+            )
+            sessions.append(session)
+        
+        # Calcular duração total
+        total_duration = sum(session.estimated_duration_minutes for session in sessions)
+        
+        return WorkoutPlan(
+            user_id=user_id,
+            date=target_date,
+            goal=algorithm_config.goal,
+            sessions=sessions,
+            total_estimated_duration_minutes=total_duration,
+            rest_day=False,
+            last_performance=last_performance,
+            notes=self._generate_workout_notes(algorithm_config, workout_preferences)
+        )
+    
+    def _get_template_for_date(
+        self, 
+        target_date: date, 
+        preferences: WorkoutPreferences
+    ) -> Optional[WorkoutTemplate]:
+        """Seleciona o template do split de treino para a data"""
+        # Split baseado nos dias disponíveis
+        available_days = len(preferences.available_days)
+        split_templates = self.training_splits.get(available_days, self.training_splits[3])
+        
+        day_of_week = target_date.strftime("%A").lower()
+        return self._select_template_for_day(day_of_week, split_templates, preferences)
+    
     def _create_full_body_split(self) -> List[WorkoutTemplate]:
         """Cria split de corpo inteiro (1 dia)"""
         return [
@@ -358,7 +493,7 @@ class WorkoutGenerator:
         
         return day_name not in available_days
     
-    async def _create_rest_day_plan(
+    def _create_rest_day_plan(
         self, 
         user_id: str, 
         target_date: date, 
@@ -410,43 +545,40 @@ class WorkoutGenerator:
         template_index = day_mapping.get(day_of_week, 0) % len(templates)
         return templates[template_index]
     
-    async def _get_available_exercises(self, preferences: WorkoutPreferences) -> List[ExerciseCandidate]:
-        """Obtém exercícios disponíveis do Content Service"""
+    async def _get_available_exercises(self, preferences: WorkoutPreferences) -> ExercisePool:
+        """Obtém exercícios disponíveis do catálogo compartilhado"""
         try:
-            # Buscar exercícios
-            exercises_response = await self.content_service.get_exercises()
-            exercises = exercises_response.get("exercises", [])
-            
-            candidates = []
-            for exercise in exercises:
-                # Filtrar por local e equipamento
-                if self._exercise_matches_preferences(exercise, preferences):
-                    candidate = ExerciseCandidate(
-                        exercise_id=exercise["id"],
-                        name=exercise["name"],
-                        muscle_groups=exercise["muscle_groups"],
-                        primary_muscle=exercise["muscle_groups"][0] if exercise["muscle_groups"] else "",
-                        secondary_muscles=exercise["muscle_groups"][1:] if len(exercise["muscle_groups"]) > 1 else [],
-                        equipment=exercise.get("equipment", "bodyweight"),
-                        difficulty=DifficultyLevel(exercise.get("difficulty", "intermediate")),
-                        movement_pattern=exercise.get("movement_pattern", "compound"),
-                        safety_rating=exercise.get("safety_rating", 0.8),
-                        effectiveness_rating=exercise.get("effectiveness_rating", 0.7),
-                        location_compatibility=exercise.get("location_compatibility", ["gym"]),
-                        time_efficiency=exercise.get("time_efficiency", 0.7)
-                    )
-                    candidates.append(candidate)
-            
-            # Ordenar por efetividade e segurança
-            candidates.sort(key=lambda x: (x.effectiveness_rating * x.safety_rating), reverse=True)
-            
-            logger.info("Exercícios disponíveis obtidos", count=len(candidates))
+            snapshot = await self.exercise_catalog.get_snapshot(self.content_service)
+            candidates = self.build_exercise_pool(snapshot.index, preferences)
+            
+            logger.info("Exercícios disponíveis obtidos", 
+                       catalog_version=snapshot.version, count=len(candidates))
             return candidates
             
         except Exception as e:
             logger.error("Erro ao obter exercícios", error=str(e))
             raise
     
+    def build_exercise_pool(
+        self, 
+        index: ExerciseSlotIndex, 
+        preferences: WorkoutPreferences
+    ) -> ExercisePool:
+        """
+        Filtra o índice de exercícios do catálogo pelas preferências do usuário
+        
+        Args:
+            index: Índice de exercícios do snapshot do catálogo
+            preferences: Preferências de treino do usuário
+            
+        Returns:
+            ExercisePool: Exercícios permitidos ao usuário
+        """
+        return ExercisePool(
+            index,
+            [self._exercise_matches_preferences(exercise, preferences) for exercise in index.exercises]
+        )
+    
     def _exercise_matches_preferences(self, exercise: dict, preferences: WorkoutPreferences) -> bool:
         """Verifica se o exercício atende às preferências"""
         # Verificar local
@@ -461,12 +593,13 @@ class WorkoutGenerator:
         
         return True
     
-    async def _generate_workout_session(
+    def _generate_workout_session(
         self,
         template: WorkoutTemplate,
-        available_exercises: List[ExerciseCandidate],
+        available_exercises: ExercisePool,
         config: AlgorithmConfig,
-        user_data: dict
+        user_data: dict,
+        avoid_exercises: Optional[Set[str]] = None
     ) -> WorkoutSession:
         """Gera uma sessão de treino baseada no template"""
         
@@ -478,9 +611,16 @@ class WorkoutGenerator:
         used_exercises = set()
         
         for slot in template.exercise_slots:
-            exercise = self._select_exercise_for_slot(
-                slot, available_exercises, used_exercises, config
-            )
+            exercise = None
+            if avoid_exercises:
+                # Variedade entre dias: preferir exercícios ainda não usados na semana
+                exercise = self._select_exercise_for_slot(
+                    slot, available_exercises, used_exercises | avoid_exercises, config
+                )
+            if exercise is None:
+                exercise = self._select_exercise_for_slot(
+                    slot, available_exercises, used_exercises, config
+                )
             if exercise:
                 exercises.append(exercise)
                 used_exercises.add(exercise.exercise_id)
@@ -506,39 +646,23 @@ class WorkoutGenerator:
     def _select_exercise_for_slot(
         self,
         slot: Dict,
-        available_exercises: List[ExerciseCandidate],
+        available_exercises: ExercisePool,
         used_exercises: Set[str],
         config: AlgorithmConfig
     ) -> Optional[Exercise]:
         """Seleciona exercício apropriado para um slot específico"""
         
-        # Filtrar exercícios candidatos
-        candidates = []
-        for exercise in available_exercises:
-            if exercise.exercise_id in used_exercises:
-                continue
-            
-            # Verificar tipo de movimento
-            if slot["type"] != "any" and exercise.movement_pattern != slot["type"]:
-                continue
-            
-            # Verificar grupos musculares
-            slot_muscles = slot["muscle_groups"]
-            if not any(muscle in exercise.muscle_groups for muscle in slot_muscles):
-                continue
-            
-            # Verificar dificuldade
-            if not self._is_appropriate_difficulty(exercise.difficulty, config.experience_level):
-                continue
-            
-            candidates.append(exercise)
-        
-        if not candidates:
+        # Buscar nos buckets do índice (padrão de movimento, músculo, dificuldade)
+        # Permitir exercícios até 1 nível acima do usuário
+        selected_candidate = available_exercises.select(
+            slot["type"],
+            slot["muscle_groups"],
+            DIFFICULTY_ORDER[config.experience_level] + 1,
+            used_exercises
+        )
+        if selected_candidate is None:
             return None
         
-        # Selecionar melhor candidato
-        selected_candidate = max(candidates, key=lambda x: x.effectiveness_rating * x.safety_rating)
-        
         # Gerar sets para o exercício
         sets = self._generate_exercise_sets(selected_candidate, slot, config)
         
@@ -617,21 +741,6 @@ class WorkoutGenerator:
             notes="Aquecimento é essencial para prevenir lesões e melhorar performance"
         )
     
-    def _is_appropriate_difficulty(self, exercise_difficulty: DifficultyLevel, user_level: DifficultyLevel) -> bool:
-        """Verifica se a dificuldade do exercício é apropriada"""
-        difficulty_order = {
-            DifficultyLevel.BEGINNER: 0,
-            DifficultyLevel.INTERMEDIATE: 1,
-            DifficultyLevel.ADVANCED: 2,
-            DifficultyLevel.EXPERT: 3
-        }
-        
-        exercise_level = difficulty_order[exercise_difficulty]
-        user_level_num = difficulty_order[user_level]
-        
-        # Permitir exercícios até 1 nível acima do usuário
-        return exercise_level <= user_level_num + 1
-    
     def _calculate_session_duration(self, exercises: List[Exercise], warmup: Warmup) -> int:
         """Calcula duração estimada da sessão"""
         warmup_duration = warmup.total_duration_minutes if warmup else 0
@@ -731,6 +840,23 @@ class WorkoutGenerator:
             logger.error("Erro ao buscar plano de treino existente", error=str(e))
             return None
     
+    async def _get_existing_plans(self, user_id: str, dates: List[date]) -> Dict[date, WorkoutPlan]:
+        """Busca planos existentes de várias datas em uma única leitura"""
+        try:
+            collection = self.firebase_service.db.collection("workout_plans")
+            refs = [collection.document(f"{user_id}_{target_date}") for target_date in dates]
+            
+            plans = {}
+            async for doc in self.firebase_service.db.get_all(refs):
+                if doc.exists:
+                    plan = WorkoutPlan(**doc.to_dict())
+                    plans[plan.date] = plan
+            
+            return plans
+        except Exception as e:
+            logger.error("Erro ao buscar planos de treino existentes", error=str(e))
+            return {}
+    
     def _should_regenerate_plan(self, existing_plan: WorkoutPlan, config: AlgorithmConfig) -> bool:
         """Verifica se deve regenerar um plano existente"""
         # Regenerar se o objetivo mudou
@@ -796,4 +922,28 @@ class WorkoutGenerator:
         except Exception as e:
             logger.error("Erro ao salvar plano de treino", error=str(e))
             raise
-
+    
+    async def _save_workout_plans(self, workout_plans: List[WorkoutPlan]):
+        """Salva vários planos de treino em um único batched write"""
+        if not workout_plans:
+            return
+        
+        try:
+            collection = self.firebase_service.db.collection("workout_plans")
+            batch = self.firebase_service.db.batch()
+            now = datetime.utcnow()
+            
+            for workout_plan in workout_plans:
+                plan_data = workout_plan.dict()
+                plan_data["created_at"] = now
+                plan_data["updated_at"] = now
+                batch.set(collection.document(f"{workout_plan.user_id}_{workout_plan.date}"), plan_data)
+            
+            await batch.commit()
+            
+            logger.info("Planos de treino salvos", 
+                       user_id=workout_plans[0].user_id, count=len(workout_plans))
+            
+        except Exception as e:
+            logger.error("Erro ao salvar planos de treino", error=str(e))
+            raise
@@ -88,7 +88,25 @@ class Settings(BaseSettings):
             "consistent_days": 3,       # Dias para repetir mesmo plano
             "varied_rotation": 7,       # Dias de rotação para planos variados
             "min_food_variety": 15,     # Mínimo de alimentos diferentes por semana
-            "max_repetition": 2         # Máximo de repetições do mesmo alimento por dia
+            "max_repetition": 2,        # Máximo de repetições do mesmo alimento por dia
+            "weekly_usage_penalty": 0.5 # Fator aplicado ao score a cada uso na semana (estilo "varied")
+        },
+        
+        # Otimizador de quantidades por refeição
+        "quantity_optimizer": {
+            "solver": "bounded_least_squares",  # ou "proportional" (heurística anterior)
+            "weights": {"calories": 2.0, "protein": 1.0, "carbs": 0.6, "fat": 0.6},
+            "portion_bounds": {         # gramas (mínimo, máximo) por categoria
+                "frutas": [50, 300],
+                "vegetais": [50, 300],
+                "proteinas": [50, 250],
+                "cereais": [25, 300],
+                "laticinios": [50, 400],
+                "oleaginosas": [10, 40],
+                "gorduras": [5, 30],
+                "default": [25, 300]
+            },
+            "max_iterations": 50
         }
     }
     
@@ -270,9 +288,20 @@ class Settings(BaseSettings):
         "workout_plans_ttl": 604800,    # 7 dias
         "user_preferences_ttl": 3600,   # 1 hora
         "content_data_ttl": 7200,       # 2 horas
+        "catalog_refresh_interval": 300,  # 5 minutos (verificação de versão do conteúdo)
         "presentation_ttl": 1800        # 30 minutos
     }
     
+    # Geração de planos em lote
+    batch_generation_config: Dict = {
+        "max_workers": int(os.getenv("BATCH_MAX_WORKERS", "0")) or None,  # None = os.cpu_count()
+        "in_flight_per_worker": 2,      # Usuários em processamento por worker
+        "user_fetch_chunk_size": 100,   # Usuários por leitura get_all
+        "write_batch_size": 400,        # Operações por batched write (limite Firestore: 500)
+        "max_users": 10000,
+        "max_days": 31
+    }
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -8,12 +8,15 @@ from contextlib import asynccontextmanager
 from datetime import datetime
 from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+import json
 
 # Configurações e dependências
 from config.settings import get_settings
 from services.firebase_service import FirebaseService
 from services.plan_service import PlanService
+from services.content_catalog import get_food_catalog, get_exercise_catalog
+from services.batch_generation import BatchPlanGenerator
 from middleware.logging import setup_logging, LoggingMiddleware
 from middleware.auth import AuthMiddleware
 from middleware.rate_limit import RateLimitMiddleware
@@ -22,7 +25,7 @@ from middleware.rate_limit import RateLimitMiddleware
 from models.plan import (
     DietPlanResponse, WorkoutPlanResponse, 
     PresentationResponse, WeeklyScheduleResponse,
-    ErrorResponse
+    ErrorResponse, BatchGenerationRequest
 )
 
 # Configurar logging estruturado
@@ -62,6 +65,8 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Finalizando Plans Service")
+    await get_food_catalog().close()
+    await get_exercise_catalog().close()
     await firebase_service.close()
     await plan_service.close()
 
@@ -339,6 +344,49 @@ async def regenerate_user_plans(
         logger.error("Erro ao regenerar planos", target_user_id=user_id, error=str(e))
         raise HTTPException(status_code=500, detail="Erro ao regenerar planos")
 
+@app.post("/admin/batch-generate")
+async def batch_generate_plans(
+    request: BatchGenerationRequest,
+    user: dict = Depends(get_current_user),
+    service: PlanService = Depends(get_plan_service)
+):
+    """
+    Gera planos em lote para uma lista de usuários e intervalo de datas (apenas para administradores)
+    
+    A resposta é um stream NDJSON com eventos de progresso e throughput.
+    """
+    if not user.get("is_admin", False):
+        raise HTTPException(status_code=403, detail="Acesso negado")
+    
+    batch_config = get_settings().batch_generation_config
+    days = (request.end_date - request.start_date).days + 1
+    if len(request.user_ids) > batch_config["max_users"]:
+        raise HTTPException(status_code=400, detail=f"Máximo de {batch_config['max_users']} usuários por lote")
+    if days > batch_config["max_days"]:
+        raise HTTPException(status_code=400, detail=f"Máximo de {batch_config['max_days']} dias por lote")
+    
+    logger.info("Geração em lote solicitada", 
+               admin_user=user["user_id"], users=len(request.user_ids), days=days)
+    
+    generator = BatchPlanGenerator(
+        content_service=service.content_service,
+        firebase_service=firebase_service,
+        max_workers=request.max_workers
+    )
+    
+    async def event_stream():
+        try:
+            async for event in generator.run(
+                request.user_ids, request.start_date, request.end_date, request.plan_types,
+                overwrite=request.overwrite
+            ):
+                yield json.dumps(event, default=str) + "\n"
+        except Exception as e:
+            logger.error("Erro na geração em lote", error=str(e))
+            yield json.dumps({"event": "error", "error": "Erro na geração em lote"}) + "\n"
+    
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
 if __name__ == "__main__":
     import uvicorn
     settings = get_settings()
@@ -268,6 +268,29 @@ class AlgorithmConfig(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: Optional[datetime] = None
 
+class BatchGenerationRequest(BaseModel):
+    """Requisição de geração de planos em lote"""
+    user_ids: List[str] = Field(..., min_items=1)
+    start_date: date
+    end_date: date
+    plan_types: List[str] = ["diet", "workout"]
+    max_workers: Optional[int] = Field(None, ge=1, le=64)
+    overwrite: bool = False  # Regerar planos já existentes no intervalo
+    
+    @validator("end_date")
+    def validate_date_range(cls, v, values):
+        start_date = values.get("start_date")
+        if start_date and v < start_date:
+            raise ValueError("end_date deve ser maior ou igual a start_date")
+        return v
+    
+    @validator("plan_types")
+    def validate_plan_types(cls, v):
+        invalid = set(v) - {"diet", "workout"}
+        if invalid or not v:
+            raise ValueError(f"Tipos de plano inválidos: {sorted(invalid)}")
+        return v
+
 # Modelos de Resposta da API
 
 class DietPlanResponse(BaseModel):
@@ -0,0 +1,455 @@
+"""
+Geração de planos em lote para a base de usuários
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+import structlog
+
+from models.plan import (
+    AlgorithmConfig, DietPreferences, WorkoutPreferences,
+    GoalType, DifficultyLevel
+)
+from config.settings import get_settings
+from services.content_catalog import get_food_catalog, get_exercise_catalog
+
+logger = structlog.get_logger(__name__)
+
+PLAN_COLLECTIONS = {
+    "diet": "diet_plans",
+    "workout": "workout_plans"
+}
+
+WEEK_DAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+EXPERIENCE_MAPPING = {
+    "iniciante": DifficultyLevel.BEGINNER,
+    "intermediario": DifficultyLevel.INTERMEDIATE,
+    "avancado": DifficultyLevel.ADVANCED,
+    "expert": DifficultyLevel.EXPERT
+}
+
+def build_algorithm_config(user_id: str, user_data: Dict[str, Any]) -> Optional[AlgorithmConfig]:
+    """
+    Monta a configuração do algoritmo a partir do documento do usuário
+
+    Args:
+        user_id: ID do usuário
+        user_data: Documento do usuário (users/{user_id})
+
+    Returns:
+        AlgorithmConfig: Configuração ou None se o onboarding estiver incompleto
+    """
+    if user_data.get("algorithm_config"):
+        return AlgorithmConfig(**{**user_data["algorithm_config"], "user_id": user_id})
+
+    onboarding = user_data.get("onboarding_data") or {}
+    calories = user_data.get("calorie_calculation") or {}
+    if not onboarding or not calories:
+        return None
+
+    fitness_goals = onboarding.get("fitness_goals", {})
+    lifestyle = onboarding.get("lifestyle_assessment", {})
+    medical = onboarding.get("medical_history", {})
+
+    goal_value = fitness_goals.get("primary_goal", GoalType.MANTER_PESO.value)
+    goal = GoalType(goal_value) if goal_value in GoalType._value2member_map_ else GoalType.MANTER_PESO
+
+    if goal == GoalType.PERDER_PESO:
+        target_calories = calories.get("cutting_calories")
+    elif goal == GoalType.GANHAR_MASSA:
+        target_calories = calories.get("bulking_calories")
+    else:
+        target_calories = calories.get("maintenance_calories")
+
+    days_per_week = int(lifestyle.get("available_days_per_week", 3))
+    equipment = fitness_goals.get("equipment_available", [])
+
+    return AlgorithmConfig(
+        user_id=user_id,
+        goal=goal,
+        experience_level=EXPERIENCE_MAPPING.get(
+            fitness_goals.get("training_experience"), DifficultyLevel.BEGINNER
+        ),
+        diet_preferences=DietPreferences(
+            meal_frequency=min(max(int(lifestyle.get("meals_per_day", 6)), 3), 8),
+            allergies=medical.get("allergies", [])
+        ),
+        workout_preferences=WorkoutPreferences(
+            available_days=WEEK_DAYS[:min(max(days_per_week, 1), 7)],
+            session_duration_preference=int(lifestyle.get("workout_duration_preference", 60)),
+            location="gym" if equipment else "home",
+            equipment_available=equipment
+        ),
+        target_calories=target_calories or calories.get("maintenance_calories"),
+        target_protein=calories.get("protein_grams", 0),
+        target_carbs=calories.get("carbs_grams", 0),
+        target_fat=calories.get("fat_grams", 0)
+    )
+
+# Estado de cada processo worker: catálogos e geradores criados uma única vez
+
+_worker_state: Dict[str, Any] = {}
+
+def _init_worker(food_items: Tuple[Dict, ...], exercise_items: Tuple[Dict, ...]):
+    """Inicializa o processo worker com os catálogos compartilhados do lote"""
+    from algorithms.diet_generator import DietGenerator
+    from algorithms.exercise_index import ExerciseSlotIndex
+    from algorithms.nutrient_matrix import NutrientMatrix
+    from algorithms.workout_generator import WorkoutGenerator
+
+    _worker_state["food_matrix"] = NutrientMatrix(food_items)
+    _worker_state["exercise_index"] = ExerciseSlotIndex(exercise_items)
+    _worker_state["diet_generator"] = DietGenerator(content_service=None, firebase_service=None)
+    _worker_state["workout_generator"] = WorkoutGenerator(content_service=None, firebase_service=None)
+
+def _generate_user_plans(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Gera os planos de um usuário para todas as datas do lote (executa no worker)
+
+    Args:
+        job: user_id, config (dict), user_data, dates (ISO), plan_types e
+            existing (IDs "tipo:data" de planos que já existem e não devem ser gerados)
+
+    Returns:
+        Dict: user_id, plans [(coleção, doc_id, dados)] e erro, se houver
+    """
+    from algorithms.nutrient_matrix import CandidatePool
+
+    user_id = job["user_id"]
+    try:
+        config = AlgorithmConfig(**job["config"])
+        user_data = job["user_data"]
+        existing = set(job.get("existing", ()))
+        plans = []
+
+        diet_dates = [date.fromisoformat(d) for d in job["dates"] if f"diet:{d}" not in existing]
+        if "diet" in job["plan_types"] and diet_dates:
+            generator = _worker_state["diet_generator"]
+            # Pool de alimentos calculado uma vez por usuário
+            pool = CandidatePool(_worker_state["food_matrix"], config.diet_preferences)
+            for target_date in diet_dates:
+                plan = generator.compose_diet_plan(user_id, target_date, config, pool, user_data)
+                plans.append(("diet", f"{user_id}_{target_date}", plan.dict()))
+
+        workout_dates = [date.fromisoformat(d) for d in job["dates"] if f"workout:{d}" not in existing]
+        if "workout" in job["plan_types"] and workout_dates:
+            generator = _worker_state["workout_generator"]
+            exercises = generator.build_exercise_pool(
+                _worker_state["exercise_index"], config.workout_preferences
+            )
+            for target_date in workout_dates:
+                plan = generator.compose_workout_plan(user_id, target_date, config, exercises, user_data)
+                plans.append(("workout", f"{user_id}_{target_date}", plan.dict()))
+
+        return {"user_id": user_id, "plans": plans, "error": None}
+
+    except Exception as e:
+        return {"user_id": user_id, "plans": [], "error": str(e)}
+
+class BatchPlanGenerator:
+    """
+    Orquestra a geração de planos em lote
+
+    Catálogos são carregados uma vez e enviados a cada worker na
+    inicialização do pool; a geração roda em processos separados e os
+    resultados são persistidos com batched writes do Firestore.
+    """
+
+    def __init__(self, content_service, firebase_service, max_workers: Optional[int] = None):
+        self.content_service = content_service
+        self.firebase_service = firebase_service
+        self.config = get_settings().batch_generation_config
+        self.max_workers = max_workers or self.config.get("max_workers") or os.cpu_count() or 1
+        self.write_batch_size = min(self.config.get("write_batch_size", 400), 500)
+
+    async def run(
+        self,
+        user_ids: Sequence[str],
+        start_date: date,
+        end_date: date,
+        plan_types: Sequence[str] = ("diet", "workout"),
+        overwrite: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Gera planos para os usuários no intervalo de datas, emitindo progresso
+
+        Falhas são isoladas: um usuário sem dados, um erro no worker, um pool
+        de processos quebrado ou um batched write com erro viram eventos
+        "failed" e o lote continua. Ao final, users_done = users_total.
+
+        Args:
+            user_ids: IDs dos usuários
+            start_date: Primeira data (inclusive)
+            end_date: Última data (inclusive)
+            plan_types: Tipos de plano ("diet", "workout")
+            overwrite: Regerar planos que já existem (por padrão são mantidos)
+
+        Yields:
+            Dict: Eventos (started, progress, failed, completed)
+        """
+        started = time.perf_counter()
+        user_ids = list(dict.fromkeys(user_ids))
+        dates = [
+            (start_date + timedelta(days=offset)).isoformat()
+            for offset in range((end_date - start_date).days + 1)
+        ]
+        stats = {
+            "users_done": 0, "users_failed": 0, "users_skipped": 0,
+            "plans_written": 0, "plans_skipped": 0, "plans_failed": 0
+        }
+
+        logger.info("Iniciando geração em lote",
+                   users=len(user_ids), days=len(dates), plan_types=list(plan_types),
+                   workers=self.max_workers, overwrite=overwrite)
+
+        yield {
+            "event": "started",
+            "users_total": len(user_ids),
+            "days": len(dates),
+            "plan_types": list(plan_types),
+            "workers": self.max_workers,
+            "overwrite": overwrite
+        }
+
+        # Catálogos compartilhados por todo o lote
+        food_snapshot = await get_food_catalog().get_snapshot(self.content_service)
+        exercise_snapshot = await get_exercise_catalog().get_snapshot(self.content_service)
+        catalogs = (food_snapshot.items, exercise_snapshot.items)
+
+        loop = asyncio.get_running_loop()
+        max_in_flight = self.max_workers * self.config.get("in_flight_per_worker", 2)
+        pending_writes: List[Tuple[str, str, Dict]] = []
+        # Cada future guarda o usuário e o pool em que foi enviado
+        in_flight: Dict[asyncio.Future, Tuple[str, ProcessPoolExecutor]] = {}
+
+        pool = self._create_pool(catalogs)
+        try:
+            async for job in self._iter_jobs(user_ids, dates, plan_types, overwrite, stats):
+                if job.get("error"):
+                    stats["users_done"] += 1
+                    stats["users_failed"] += 1
+                    yield self._failed_event("user", job["error"], user_id=job["user_id"])
+                    yield self._progress_event(stats, len(user_ids), started)
+                    continue
+
+                if job.get("skipped"):
+                    stats["users_done"] += 1
+                    stats["users_skipped"] += 1
+                    yield self._progress_event(stats, len(user_ids), started)
+                    continue
+
+                try:
+                    future = loop.run_in_executor(pool, _generate_user_plans, job)
+                except BrokenProcessPool:
+                    # Pool quebrado antes do envio: recriar e tentar de novo
+                    pool = self._restart_pool(pool, catalogs)
+                    future = loop.run_in_executor(pool, _generate_user_plans, job)
+                in_flight[future] = (job["user_id"], pool)
+                if len(in_flight) < max_in_flight:
+                    continue
+
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                events, broken_pools = await self._collect(done, in_flight, pending_writes, stats)
+                # Futures de um pool já substituído continuam falhando em rodadas
+                # seguintes; só o pool atual quebrado é recriado
+                if pool in broken_pools:
+                    pool = self._restart_pool(pool, catalogs)
+                for event in events:
+                    yield event
+                yield self._progress_event(stats, len(user_ids), started)
+
+            while in_flight:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                events, _ = await self._collect(done, in_flight, pending_writes, stats)
+                for event in events:
+                    yield event
+                yield self._progress_event(stats, len(user_ids), started)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        # Persistir o restante
+        for event in await self._flush(pending_writes, stats, force=True):
+            yield event
+
+        completed = self._progress_event(stats, len(user_ids), started)
+        completed["event"] = "completed"
+
+        logger.info("Geração em lote concluída", **{k: v for k, v in completed.items() if k != "event"})
+        yield completed
+
+    def _create_pool(self, catalogs: Tuple[Tuple[Dict, ...], Tuple[Dict, ...]]) -> ProcessPoolExecutor:
+        """Cria o pool de workers já inicializados com os catálogos do lote"""
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=_init_worker,
+            initargs=catalogs
+        )
+
+    def _restart_pool(self, pool: ProcessPoolExecutor, catalogs) -> ProcessPoolExecutor:
+        """Descarta um pool quebrado (worker morto) e cria outro"""
+        logger.warning("Pool de processos quebrado, recriando", workers=self.max_workers)
+        pool.shutdown(wait=False, cancel_futures=True)
+        return self._create_pool(catalogs)
+
+    async def _iter_jobs(
+        self,
+        user_ids: List[str],
+        dates: List[str],
+        plan_types: Sequence[str],
+        overwrite: bool,
+        stats: Dict[str, int]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Carrega usuários em blocos (get_all) e monta os jobs dos workers
+
+        Sem overwrite, os planos já existentes do bloco são lidos no mesmo
+        get_all e ficam de fora do job; usuários sem nada a gerar saem como
+        "skipped".
+        """
+        chunk_size = self.config.get("user_fetch_chunk_size", 100)
+        db = self.firebase_service.db
+        users_collection = db.collection("users")
+
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            refs = [users_collection.document(user_id) for user_id in chunk]
+            if not overwrite:
+                refs.extend(
+                    db.collection(PLAN_COLLECTIONS[plan_type]).document(f"{user_id}_{target_date}")
+                    for user_id in chunk for plan_type in plan_types for target_date in dates
+                )
+
+            documents = {}
+            existing: Dict[str, List[str]] = {}
+            async for doc in db.get_all(refs):
+                if not doc.exists:
+                    continue
+                collection = doc.reference.parent.id
+                if collection == "users":
+                    documents[doc.id] = doc.to_dict()
+                else:
+                    user_id, target_date = doc.id.rsplit("_", 1)
+                    plan_type = next(t for t, name in PLAN_COLLECTIONS.items() if name == collection)
+                    existing.setdefault(user_id, []).append(f"{plan_type}:{target_date}")
+
+            for user_id in chunk:
+                user_existing = existing.get(user_id, [])
+                stats["plans_skipped"] += len(user_existing)
+                if len(user_existing) == len(plan_types) * len(dates):
+                    yield {"user_id": user_id, "skipped": True}
+                    continue
+
+                user_data = documents.get(user_id)
+                config = build_algorithm_config(user_id, user_data) if user_data else None
+                if config is None:
+                    logger.warning("Usuário sem dados suficientes para geração em lote", user_id=user_id)
+                    yield {"user_id": user_id, "error": "dados_insuficientes"}
+                    continue
+
+                yield {
+                    "user_id": user_id,
+                    "config": config.dict(),
+                    "user_data": user_data,
+                    "dates": dates,
+                    "plan_types": list(plan_types),
+                    "existing": user_existing
+                }
+
+    async def _collect(
+        self,
+        done,
+        in_flight: Dict[asyncio.Future, Tuple[str, ProcessPoolExecutor]],
+        pending_writes: List,
+        stats: Dict[str, int]
+    ) -> Tuple[List[Dict[str, Any]], set]:
+        """
+        Agrega resultados concluídos e persiste quando o batch enche
+
+        Returns:
+            Tuple: eventos de falha e pools de processos que quebraram
+        """
+        events = []
+        broken_pools = set()
+        for future in done:
+            user_id, pool = in_flight.pop(future)
+            stats["users_done"] += 1
+            try:
+                result = future.result()
+            except BrokenProcessPool as e:
+                broken_pools.add(pool)
+                result = {"user_id": user_id, "plans": [], "error": f"pool de processos quebrado: {e}"}
+            except asyncio.CancelledError:
+                # Job cancelado no shutdown de um pool quebrado
+                result = {"user_id": user_id, "plans": [], "error": "job cancelado: pool de processos recriado"}
+            except Exception as e:
+                result = {"user_id": user_id, "plans": [], "error": str(e)}
+
+            if result["error"]:
+                stats["users_failed"] += 1
+                logger.error("Erro na geração em lote", user_id=user_id, error=result["error"])
+                events.append(self._failed_event("user", result["error"], user_id=user_id))
+                continue
+            pending_writes.extend(result["plans"])
+
+        events.extend(await self._flush(pending_writes, stats))
+        return events, broken_pools
+
+    async def _flush(self, pending_writes: List, stats: Dict[str, int], force: bool = False) -> List[Dict[str, Any]]:
+        """
+        Grava planos pendentes com batched writes (máx. 500 operações por batch)
+
+        Um batch com erro é descartado e reportado; os demais seguem.
+        """
+        events = []
+        while len(pending_writes) >= self.write_batch_size or (force and pending_writes):
+            chunk = pending_writes[:self.write_batch_size]
+            del pending_writes[:self.write_batch_size]
+
+            now = datetime.utcnow()
+            batch = self.firebase_service.db.batch()
+            for plan_type, doc_id, plan_data in chunk:
+                plan_data["created_at"] = now
+                plan_data["updated_at"] = now
+                doc_ref = self.firebase_service.db.collection(PLAN_COLLECTIONS[plan_type]).document(doc_id)
+                batch.set(doc_ref, plan_data)
+
+            try:
+                await batch.commit()
+            except Exception as e:
+                stats["plans_failed"] += len(chunk)
+                logger.error("Erro ao gravar batch de planos", plans=len(chunk), error=str(e))
+                events.append(self._failed_event(
+                    "write", str(e),
+                    plans=len(chunk),
+                    user_ids=sorted({doc_id.rsplit("_", 1)[0] for _, doc_id, _ in chunk})
+                ))
+                continue
+            stats["plans_written"] += len(chunk)
+        return events
+
+    def _failed_event(self, stage: str, error: str, **details) -> Dict[str, Any]:
+        """Evento de falha de um usuário (stage=user) ou de um batched write (stage=write)"""
+        return {"event": "failed", "stage": stage, "error": error, **details}
+
+    def _progress_event(self, stats: Dict[str, int], users_total: int, started: float) -> Dict[str, Any]:
+        """Evento de progresso com métricas de throughput"""
+        elapsed = max(time.perf_counter() - started, 1e-6)
+        return {
+            "event": "progress",
+            "users_done": stats["users_done"],
+            "users_total": users_total,
+            "users_failed": stats["users_failed"],
+            "users_skipped": stats["users_skipped"],
+            "plans_written": stats["plans_written"],
+            "plans_skipped": stats["plans_skipped"],
+            "plans_failed": stats["plans_failed"],
+            "elapsed_seconds": round(elapsed, 2),
+            "users_per_second": round(stats["users_done"] / elapsed, 2),
+            "plans_per_second": round(stats["plans_written"] / elapsed, 2)
+        }
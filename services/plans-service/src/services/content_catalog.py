@@ -0,0 +1,263 @@
+"""
+Catálogos de conteúdo (alimentos e exercícios) pré-compilados e compartilhados pelo processo
+"""
+
+import asyncio
+import hashlib
+from abc import ABC, abstractmethod
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+import structlog
+
+from config.settings import get_settings
+from adapters.taco_data_adapter import TacoDataAdapter
+from algorithms.nutrient_matrix import NutrientMatrix
+from algorithms.exercise_index import ExerciseSlotIndex
+
+logger = structlog.get_logger(__name__)
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Snapshot imutável de um catálogo de conteúdo"""
+    version: str
+    items: Tuple[Dict[str, Any], ...]
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+@dataclass(frozen=True)
+class FoodCatalogSnapshot(CatalogSnapshot):
+    """Snapshot do catálogo de alimentos com a matriz nutricional pré-computada"""
+    matrix: Optional[NutrientMatrix] = None
+
+@dataclass(frozen=True)
+class ExerciseCatalogSnapshot(CatalogSnapshot):
+    """Snapshot do catálogo de exercícios com o índice de slots pré-computado"""
+    index: Optional[ExerciseSlotIndex] = None
+
+class ContentCatalog(ABC):
+    """
+    Catálogo versionado de conteúdo mantido em memória
+
+    O conteúdo é baixado e convertido uma única vez por versão. Os geradores
+    leem sempre o snapshot atual (imutável) e um refresh em background troca
+    o snapshot de forma atômica quando a versão do conteúdo muda.
+    """
+
+    name = "content"
+
+    def __init__(self, refresh_interval: Optional[int] = None, max_age: Optional[int] = None):
+        cache_config = get_settings().cache_config
+        self.refresh_interval = refresh_interval or cache_config.get("catalog_refresh_interval", 300)
+        self.max_age = max_age or cache_config.get("content_data_ttl", 7200)
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._content_service = None
+
+    @property
+    def snapshot(self) -> Optional[CatalogSnapshot]:
+        """Snapshot atual (None se ainda não carregado)"""
+        return self._snapshot
+
+    async def get_snapshot(self, content_service) -> CatalogSnapshot:
+        """
+        Retorna o snapshot atual, carregando o catálogo na primeira chamada
+
+        Args:
+            content_service: Cliente do Content Service
+
+        Returns:
+            CatalogSnapshot: Snapshot imutável do catálogo
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            async with self._lock:
+                if self._snapshot is None:
+                    remote_version = await self._fetch_remote_version(content_service)
+                    await self._load(content_service, remote_version)
+                snapshot = self._snapshot
+
+        self._ensure_background_refresh(content_service)
+        return snapshot
+
+    async def refresh(self, content_service, force: bool = False) -> bool:
+        """
+        Recarrega o catálogo se a versão do conteúdo mudou
+
+        Args:
+            content_service: Cliente do Content Service
+            force: Recarregar mesmo sem mudança de versão conhecida
+
+        Returns:
+            bool: True se um novo snapshot foi publicado
+        """
+        async with self._lock:
+            current = self._snapshot
+            remote_version = await self._fetch_remote_version(content_service)
+            if current is not None and not force:
+                if remote_version is not None:
+                    if remote_version == current.version:
+                        return False
+                elif time.monotonic() - current.loaded_at < self.max_age:
+                    # Sem versão remota: recarregar apenas quando o snapshot expira
+                    return False
+
+            return await self._load(content_service, remote_version)
+
+    async def close(self):
+        """Cancela o refresh em background"""
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+        self._refresh_task = None
+
+    async def _load(self, content_service, remote_version: Optional[str]) -> bool:
+        """
+        Baixa, converte e publica um novo snapshot
+
+        Args:
+            content_service: Cliente do Content Service
+            remote_version: Versão já obtida do Content Service (lida antes dos
+                itens; None usa o fingerprint do conteúdo)
+        """
+        started = time.perf_counter()
+        raw_items = await self._fetch_items(content_service)
+        items = tuple(self._convert_items(raw_items))
+
+        version = remote_version or self._fingerprint(items)
+        current = self._snapshot
+        if current is not None and current.version == version:
+            # Conteúdo idêntico: apenas renovar a idade do snapshot
+            self._snapshot = self._build_snapshot(version, current.items)
+            return False
+
+        self._snapshot = self._build_snapshot(version, items)
+
+        logger.info("Catálogo carregado",
+                   catalog=self.name,
+                   version=version,
+                   items=len(items),
+                   duration_ms=round((time.perf_counter() - started) * 1000, 2))
+        return True
+
+    def _build_snapshot(self, version: str, items: Tuple[Dict[str, Any], ...]) -> CatalogSnapshot:
+        """Cria o snapshot publicado (subclasses podem anexar estruturas pré-computadas)"""
+        return CatalogSnapshot(version=version, items=items)
+
+    def _ensure_background_refresh(self, content_service):
+        """Inicia o loop de refresh em background, se ainda não estiver rodando"""
+        self._content_service = content_service
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.get_running_loop().create_task(self._refresh_loop())
+
+    async def _refresh_loop(self):
+        """Verifica periodicamente se o conteúdo mudou"""
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh(self._content_service)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Mantém o snapshot anterior em caso de falha
+                logger.warning("Erro ao atualizar catálogo", catalog=self.name, error=str(e))
+
+    async def _fetch_remote_version(self, content_service) -> Optional[str]:
+        """Obtém a versão do conteúdo no Content Service, se disponível"""
+        get_version = getattr(content_service, "get_content_version", None)
+        if get_version is None:
+            return None
+        try:
+            version = await get_version(self.name)
+            return str(version) if version is not None else None
+        except Exception as e:
+            logger.warning("Erro ao obter versão do conteúdo", catalog=self.name, error=str(e))
+            return None
+
+    def _fingerprint(self, items: Tuple[Dict[str, Any], ...]) -> str:
+        """Calcula uma versão determinística a partir do próprio conteúdo"""
+        digest = hashlib.sha1()
+        for item in items:
+            digest.update(json.dumps(item, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()[:16]
+
+    @abstractmethod
+    async def _fetch_items(self, content_service) -> List[Dict[str, Any]]:
+        """Busca os itens brutos do catálogo no Content Service"""
+
+    def _convert_items(self, raw_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return raw_items
+
+class FoodCatalog(ContentCatalog):
+    """Catálogo de alimentos da Base TACO já convertido para o formato do algoritmo"""
+
+    name = "foods"
+
+    def __init__(self, taco_adapter: Optional[TacoDataAdapter] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.taco_adapter = taco_adapter or TacoDataAdapter()
+
+    async def _fetch_items(self, content_service) -> List[Dict[str, Any]]:
+        """Busca todos os alimentos da Base TACO"""
+        foods_response = await content_service.search_foods("")
+        taco_foods = foods_response.get("data", [])
+        logger.info("Alimentos obtidos da Base TACO", count=len(taco_foods))
+        return taco_foods
+
+    def _convert_items(self, raw_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Converte os dados da TACO uma única vez por versão"""
+        return self.taco_adapter.convert_foods_from_taco(raw_items)
+
+    def _build_snapshot(self, version: str, items: Tuple[Dict[str, Any], ...]) -> FoodCatalogSnapshot:
+        """Anexa a matriz nutricional colunar, reaproveitando-a quando o conteúdo não mudou"""
+        current = self._snapshot
+        if current is not None and current.items is items:
+            matrix = current.matrix
+        else:
+            matrix = NutrientMatrix(items)
+        return FoodCatalogSnapshot(version=version, items=items, matrix=matrix)
+
+class ExerciseCatalog(ContentCatalog):
+    """Catálogo de exercícios do Content Service"""
+
+    name = "exercises"
+
+    async def _fetch_items(self, content_service) -> List[Dict[str, Any]]:
+        """Busca todos os exercícios"""
+        exercises_response = await content_service.get_exercises()
+        exercises = exercises_response.get("exercises", [])
+        logger.info("Exercícios obtidos do Content Service", count=len(exercises))
+        return exercises
+
+    def _build_snapshot(self, version: str, items: Tuple[Dict[str, Any], ...]) -> ExerciseCatalogSnapshot:
+        """Anexa o índice de slots, reaproveitando-o quando o conteúdo não mudou"""
+        current = self._snapshot
+        if current is not None and current.items is items:
+            index = current.index
+        else:
+            index = ExerciseSlotIndex(items)
+        return ExerciseCatalogSnapshot(version=version, items=items, index=index)
+
+_food_catalog: Optional[FoodCatalog] = None
+_exercise_catalog: Optional[ExerciseCatalog] = None
+
+def get_food_catalog() -> FoodCatalog:
+    """Retorna instância singleton do catálogo de alimentos do processo"""
+    global _food_catalog
+    if _food_catalog is None:
+        _food_catalog = FoodCatalog()
+    return _food_catalog
+
+def get_exercise_catalog() -> ExerciseCatalog:
+    """Retorna instância singleton do catálogo de exercícios do processo"""
+    global _exercise_catalog
+    if _exercise_catalog is None:
+        _exercise_catalog = ExerciseCatalog()
+    return _exercise_catalog
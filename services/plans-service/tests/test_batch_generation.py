@@ -0,0 +1,262 @@
+"""
+Testes para a geração de planos em lote
+"""
+
+import asyncio
+import os
+from concurrent.futures import Executor, Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from services import batch_generation
+from services.batch_generation import BatchPlanGenerator
+
+class FakeRef:
+    def __init__(self, collection: str, doc_id: str):
+        self.collection = collection
+        self.id = doc_id
+
+class FakeSnapshot:
+    def __init__(self, ref: FakeRef, data):
+        self.id = ref.id
+        self.exists = data is not None
+        self.reference = Mock()
+        self.reference.parent.id = ref.collection
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+class FakeBatch:
+    def __init__(self, db):
+        self.db = db
+        self.writes = []
+
+    def set(self, ref, data):
+        self.writes.append((ref.collection, ref.id, data))
+
+    async def commit(self):
+        self.db.batch_sizes.append(len(self.writes))
+        if self.db.fail_commits:
+            self.db.fail_commits -= 1
+            raise RuntimeError("commit falhou")
+        for collection, doc_id, data in self.writes:
+            self.db.docs[(collection, doc_id)] = data
+
+class FakeDB:
+    """Firestore mínimo: documento por (coleção, ID), get_all e batched writes"""
+
+    def __init__(self, docs=None):
+        self.docs = dict(docs or {})
+        self.batch_sizes = []
+        self.fail_commits = 0
+
+    def collection(self, name):
+        collection = Mock()
+        collection.document.side_effect = lambda doc_id: FakeRef(name, doc_id)
+        return collection
+
+    async def get_all(self, refs):
+        for ref in refs:
+            yield FakeSnapshot(ref, self.docs.get((ref.collection, ref.id)))
+
+    def batch(self):
+        return FakeBatch(self)
+
+def _noop_init(*catalogs):
+    pass
+
+def _fake_plans(job):
+    """Worker falso: um plano por tipo e data que ainda não existe"""
+    if job["user_id"] == "falha":
+        return {"user_id": job["user_id"], "plans": [], "error": "erro no gerador"}
+    if job["user_id"] == "crash":
+        os._exit(1)
+    existing = set(job.get("existing", ()))
+    plans = [
+        (plan_type, f"{job['user_id']}_{target_date}", {"user_id": job["user_id"]})
+        for plan_type in job["plan_types"] for target_date in job["dates"]
+        if f"{plan_type}:{target_date}" not in existing
+    ]
+    return {"user_id": job["user_id"], "plans": plans, "error": None}
+
+class FakePool(Executor):
+    """
+    Pool síncrono e controlado: o job "crash" quebra o pool, e os demais jobs
+    dele só falham depois, como as notificações atrasadas de um pool real
+    """
+
+    def __init__(self):
+        self.broken = False
+        self.pending = []
+
+    def submit(self, fn, job):
+        if self.broken:
+            raise BrokenProcessPool("pool quebrado")
+        future = Future()
+        self.pending.append(future)
+        delay = 0.001 if job["user_id"] == "crash" else 0.01
+        asyncio.get_running_loop().call_later(delay, self._complete, future, fn, job)
+        return future
+
+    def _complete(self, future, fn, job):
+        if future.done():
+            return
+        if job["user_id"] == "crash":
+            self.broken = True
+        if self.broken:
+            future.set_exception(BrokenProcessPool("worker morto"))
+        else:
+            future.set_result(fn(job))
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        # Num pool quebrado os jobs já falharam; nos demais, a fila é cancelada
+        if cancel_futures and not self.broken:
+            for future in self.pending:
+                future.cancel()
+
+def _users(*user_ids):
+    return {("users", user_id): {"name": user_id} for user_id in user_ids}
+
+@pytest.fixture
+def patched():
+    """Catálogos, configuração e worker substituídos por versões leves"""
+    catalog = Mock()
+    catalog.get_snapshot = AsyncMock(return_value=Mock(items=()))
+    with patch.object(batch_generation, "get_food_catalog", return_value=catalog), \
+            patch.object(batch_generation, "get_exercise_catalog", return_value=catalog), \
+            patch.object(batch_generation, "build_algorithm_config", return_value=Mock(dict=lambda: {})), \
+            patch.object(batch_generation, "_init_worker", _noop_init), \
+            patch.object(batch_generation, "_generate_user_plans", _fake_plans):
+        yield
+
+async def _run(db, user_ids, days=1, plan_types=("diet",), overwrite=False, **config):
+    firebase = Mock()
+    firebase.db = db
+    generator = BatchPlanGenerator(content_service=None, firebase_service=firebase, max_workers=2)
+    generator.config = {**generator.config, **config}
+    generator.write_batch_size = min(config.get("write_batch_size", generator.write_batch_size), 500)
+    events = [
+        event async for event in generator.run(
+            user_ids, date(2024, 1, 1), date(2024, 1, days), plan_types, overwrite=overwrite
+        )
+    ]
+    return events, events[-1]
+
+class TestBatchPlanGenerator:
+    """Testes do orquestrador com Firestore e workers falsos"""
+
+    @pytest.mark.asyncio
+    async def test_skips_existing_plans(self, patched):
+        """Testar que planos existentes não são regerados (sem overwrite)"""
+        db = FakeDB({
+            **_users("u1", "u2"),
+            ("diet_plans", "u1_2024-01-01"): {"antigo": True},
+            ("diet_plans", "u2_2024-01-01"): {"antigo": True},
+            ("diet_plans", "u2_2024-01-02"): {"antigo": True},
+        })
+
+        _, completed = await _run(db, ["u1", "u2"], days=2)
+
+        assert completed["event"] == "completed"
+        assert completed["users_skipped"] == 1
+        assert completed["plans_skipped"] == 3
+        assert completed["plans_written"] == 1
+        assert db.docs[("diet_plans", "u1_2024-01-01")] == {"antigo": True}
+        assert "created_at" in db.docs[("diet_plans", "u1_2024-01-02")]
+
+    @pytest.mark.asyncio
+    async def test_overwrite_regenerates(self, patched):
+        """Testar que overwrite regera os planos existentes"""
+        db = FakeDB({**_users("u1"), ("diet_plans", "u1_2024-01-01"): {"antigo": True}})
+
+        _, completed = await _run(db, ["u1"], overwrite=True)
+
+        assert completed["plans_written"] == 1
+        regenerated = db.docs[("diet_plans", "u1_2024-01-01")]
+        assert regenerated["user_id"] == "u1"
+        assert "antigo" not in regenerated
+
+    @pytest.mark.asyncio
+    async def test_flush_respects_batch_limit(self, patched):
+        """Testar batched writes com no máximo 500 operações"""
+        user_ids = [f"u{i}" for i in range(30)]
+        db = FakeDB(_users(*user_ids))
+
+        _, completed = await _run(db, user_ids, days=31, plan_types=("diet", "workout"), write_batch_size=1000)
+
+        assert completed["plans_written"] == 30 * 31 * 2
+        assert max(db.batch_sizes) <= 500
+        assert sum(db.batch_sizes) == 30 * 31 * 2
+
+    @pytest.mark.asyncio
+    async def test_failed_user_and_commit_are_isolated(self, patched):
+        """Testar que falhas de usuário e de gravação viram eventos e o lote continua"""
+        db = FakeDB(_users("u1", "falha", "u2", "u3"))
+        db.fail_commits = 1
+
+        events, completed = await _run(db, ["u1", "falha", "sem_dados", "u2", "u3"], write_batch_size=1)
+
+        failed = [event for event in events if event["event"] == "failed"]
+        assert {event.get("user_id") for event in failed if event["stage"] == "user"} == {"falha", "sem_dados"}
+        assert sum(1 for event in failed if event["stage"] == "write") == 1
+        assert completed["users_done"] == 5
+        assert completed["users_failed"] == 2
+        assert completed["plans_written"] == 2
+        assert completed["plans_failed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_worker_crash_does_not_abort_stream(self, patched):
+        """Testar que um worker morto (os._exit) é reportado e o lote termina"""
+        user_ids = ["crash"] + [f"u{i}" for i in range(40)]
+        db = FakeDB(_users(*user_ids))
+
+        events, completed = await _run(db, user_ids, in_flight_per_worker=4)
+
+        failed_users = {event["user_id"] for event in events if event["event"] == "failed"}
+        assert completed["event"] == "completed"
+        assert completed["users_done"] == len(user_ids)
+        assert "crash" in failed_users
+        assert completed["users_failed"] == len(failed_users)
+        # Usuários enviados após a recriação do pool são gerados normalmente
+        assert completed["plans_written"] == len(user_ids) - len(failed_users)
+        assert completed["plans_written"] > 0
+
+    @pytest.mark.asyncio
+    async def test_late_failures_from_old_pool_keep_new_pool(self, patched):
+        """Testar que falhas atrasadas do pool antigo não recriam (nem cancelam) o pool novo"""
+        pools = []
+
+        def create_pool(self, catalogs):
+            pools.append(FakePool())
+            return pools[-1]
+
+        user_ids = ["crash"] + [f"u{i}" for i in range(12)]
+        db = FakeDB(_users(*user_ids))
+        with patch.object(BatchPlanGenerator, "_create_pool", create_pool):
+            events, completed = await _run(db, user_ids, in_flight_per_worker=2)
+
+        failed_users = {event["user_id"] for event in events if event["event"] == "failed"}
+        assert len(pools) == 2
+        assert completed["event"] == "completed"
+        assert completed["users_done"] == len(user_ids)
+        # Só o job que matou o worker e os que estavam no pool antigo falham
+        assert failed_users == {"crash", "u0", "u1", "u2"}
+        assert completed["plans_written"] == len(user_ids) - 4
+
+    @pytest.mark.asyncio
+    async def test_cancelled_job_is_reported_as_failed(self):
+        """Testar que um job cancelado vira falha do usuário em vez de abortar o lote"""
+        generator = BatchPlanGenerator(content_service=None, firebase_service=Mock(), max_workers=1)
+        future = asyncio.get_running_loop().create_future()
+        future.cancel()
+        stats = {"users_done": 0, "users_failed": 0, "plans_written": 0, "plans_failed": 0}
+
+        events, broken_pools = await generator._collect({future}, {future: ("u1", None)}, [], stats)
+
+        assert [event["user_id"] for event in events] == ["u1"]
+        assert broken_pools == set()
+        assert stats["users_failed"] == 1
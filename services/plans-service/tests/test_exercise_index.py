@@ -0,0 +1,95 @@
+"""
+Testes para o índice de exercícios por slot
+"""
+
+import random
+
+import pytest
+
+from algorithms.exercise_index import (
+    DIFFICULTY_ORDER, ExerciseCandidate, ExercisePool, ExerciseSlotIndex
+)
+from models.plan import DifficultyLevel
+
+MUSCLES = ["peito", "costas", "pernas", "ombros", "biceps", "triceps", "core"]
+PATTERNS = ["compound", "isolation", "cardio"]
+
+def _random_catalog(rng: random.Random, count: int):
+    return [
+        {
+            "id": f"ex_{i}",
+            "name": f"Exercício {i}",
+            "muscle_groups": rng.sample(MUSCLES, rng.randint(1, 3)),
+            "difficulty": rng.choice(list(DifficultyLevel)).value,
+            "movement_pattern": rng.choice(PATTERNS),
+            # Poucos valores distintos para gerar empates de score
+            "safety_rating": rng.choice([0.6, 0.8, 1.0]),
+            "effectiveness_rating": rng.choice([0.5, 0.7, 0.9]),
+        }
+        for i in range(count)
+    ]
+
+def _naive_select(candidates, movement_pattern, muscle_groups, max_level, excluded, allowed_ids=None):
+    """Varredura linear anterior ao índice (referência)"""
+    matches = [
+        candidate for candidate in candidates
+        if candidate.exercise_id not in excluded
+        and (allowed_ids is None or candidate.exercise_id in allowed_ids)
+        and (movement_pattern == "any" or candidate.movement_pattern == movement_pattern)
+        and any(muscle in candidate.muscle_groups for muscle in muscle_groups)
+        and DIFFICULTY_ORDER[candidate.difficulty] <= max_level
+    ]
+    return max(matches, key=lambda c: c.effectiveness_rating * c.safety_rating) if matches else None
+
+class TestExerciseSlotIndex:
+    """Testes de equivalência com a varredura linear"""
+
+    @pytest.mark.parametrize("seed", range(10))
+    def test_matches_linear_scan(self, seed):
+        """Testar seleção igual à varredura linear, inclusive nos empates"""
+        rng = random.Random(seed)
+        catalog = _random_catalog(rng, 150)
+        candidates = [ExerciseCandidate.from_content(exercise) for exercise in catalog]
+        index = ExerciseSlotIndex(catalog)
+
+        for _ in range(30):
+            movement_pattern = rng.choice(PATTERNS + ["any"])
+            muscle_groups = rng.sample(MUSCLES, rng.randint(1, 3))
+            max_level = rng.randint(0, 4)
+            excluded = {f"ex_{i}" for i in rng.sample(range(150), rng.randint(0, 40))}
+
+            expected = _naive_select(candidates, movement_pattern, muscle_groups, max_level, excluded)
+            selected = index.select(movement_pattern, muscle_groups, max_level, excluded)
+
+            assert (selected.exercise_id if selected else None) == \
+                (expected.exercise_id if expected else None)
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_pool_mask_matches_filtered_scan(self, seed):
+        """Testar a máscara do ExercisePool contra a varredura só dos permitidos"""
+        rng = random.Random(100 + seed)
+        catalog = _random_catalog(rng, 120)
+        candidates = [ExerciseCandidate.from_content(exercise) for exercise in catalog]
+        index = ExerciseSlotIndex(catalog)
+        allowed_ids = {exercise["id"] for exercise in catalog if rng.random() < 0.6}
+        pool = ExercisePool(index, [c.exercise_id in allowed_ids for c in index.candidates])
+
+        assert len(pool) == len(allowed_ids)
+        assert {c.exercise_id for c in pool} == allowed_ids
+
+        for _ in range(30):
+            movement_pattern = rng.choice(PATTERNS + ["any"])
+            muscle_groups = rng.sample(MUSCLES, rng.randint(1, 2))
+            max_level = rng.randint(0, 3)
+            excluded = {f"ex_{i}" for i in rng.sample(range(120), rng.randint(0, 20))}
+
+            expected = _naive_select(candidates, movement_pattern, muscle_groups, max_level, excluded, allowed_ids)
+            selected = pool.select(movement_pattern, muscle_groups, max_level, excluded)
+
+            assert (selected.exercise_id if selected else None) == \
+                (expected.exercise_id if expected else None)
+
+    def test_empty_slot(self):
+        """Testar slot sem candidatos"""
+        index = ExerciseSlotIndex(_random_catalog(random.Random(0), 10))
+        assert index.select("compound", ["inexistente"], 3, set()) is None
@@ -0,0 +1,141 @@
+"""
+Testes para a matriz nutricional colunar
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from algorithms.nutrient_matrix import CandidatePool, NutrientMatrix
+from models.plan import DietPreferences
+
+CATEGORIES = ["proteinas", "cereais", "frutas", "laticinios", "oleaginosas", "vegetais"]
+TAGS = ["meat", "dairy", "gluten", "lactose", "vegan"]
+ALLERGENS = ["amendoim", "leite", "gluten", "ovo"]
+
+def _random_foods(rng: random.Random, count: int):
+    return [
+        {
+            "id": f"food_{i}",
+            "name": f"Alimento {i}",
+            "category": rng.choice(CATEGORIES),
+            "nutrition": {
+                "calories": rng.uniform(20, 600),
+                "protein": rng.uniform(0, 35),
+                "carbs": rng.uniform(0, 80),
+                "fat": rng.uniform(0, 60),
+            },
+            "preparation_time": rng.choice([5, 15, 30, 45, 60, 90]),
+            "cost_level": rng.choice(["low", "medium", "high"]),
+            "availability_score": rng.uniform(0.3, 1.0),
+            "dietary_tags": rng.sample(TAGS, rng.randint(0, 2)),
+            "allergens": rng.sample(ALLERGENS, rng.randint(0, 1)),
+        }
+        for i in range(count)
+    ]
+
+def _random_preferences(rng: random.Random, foods):
+    names = [food["name"] for food in foods]
+    return DietPreferences(
+        dietary_restrictions=rng.sample(["vegetarian", "vegan", "gluten_free", "lactose_free"], rng.randint(0, 2)),
+        allergies=[allergen.upper() for allergen in rng.sample(ALLERGENS, rng.randint(0, 2))],
+        disliked_foods=[name.upper() for name in rng.sample(names, 3)],
+        preferred_foods=rng.sample(names, 5),
+        cooking_time_preference=rng.choice(["quick", "medium", "elaborate"]),
+        budget_level=rng.choice(["low", "medium", "high"]),
+    )
+
+def _naive_matches(food, preferences) -> bool:
+    """Filtro por alimento anterior à matriz (referência)"""
+    for allergy in preferences.allergies:
+        if allergy.lower() in food.get("allergens", []):
+            return False
+    food_tags = food.get("dietary_tags", [])
+    for restriction in preferences.dietary_restrictions:
+        if restriction == "vegetarian" and "meat" in food_tags:
+            return False
+        elif restriction == "vegan" and ("meat" in food_tags or "dairy" in food_tags):
+            return False
+        elif restriction == "gluten_free" and "gluten" in food_tags:
+            return False
+        elif restriction == "lactose_free" and "lactose" in food_tags:
+            return False
+    return food["name"].lower() not in [disliked.lower() for disliked in preferences.disliked_foods]
+
+def _naive_score(food, preferences) -> float:
+    """Score de preferência por alimento anterior à matriz (referência)"""
+    score = 0.5
+    if food["name"].lower() in [preferred.lower() for preferred in preferences.preferred_foods]:
+        score += 0.3
+    prep_time = food.get("preparation_time", 15)
+    if preferences.cooking_time_preference == "quick" and prep_time <= 15:
+        score += 0.1
+    elif preferences.cooking_time_preference == "medium" and 15 < prep_time <= 45:
+        score += 0.1
+    elif preferences.cooking_time_preference == "elaborate" and prep_time > 45:
+        score += 0.1
+    if food.get("cost_level", "medium") == preferences.budget_level:
+        score += 0.1
+    score *= food.get("availability_score", 0.8)
+    return min(score, 1.0)
+
+class TestNutrientMatrix:
+    """Testes de equivalência com o cálculo por alimento"""
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_matches_per_food_computation(self, seed):
+        """Testar máscara de restrições e scores contra a implementação por alimento"""
+        rng = random.Random(seed)
+        foods = _random_foods(rng, 120)
+        preferences = _random_preferences(rng, foods)
+        matrix = NutrientMatrix(foods)
+
+        expected_mask = [_naive_matches(food, preferences) for food in foods]
+        expected_scores = [_naive_score(food, preferences) for food in foods]
+
+        assert matrix.restriction_mask(preferences).tolist() == expected_mask
+        np.testing.assert_allclose(matrix.preference_scores(preferences), expected_scores)
+
+    def test_columns_and_category_mask(self):
+        """Testar colunas de nutrientes e máscara por categoria"""
+        foods = _random_foods(random.Random(1), 30)
+        matrix = NutrientMatrix(foods)
+
+        np.testing.assert_allclose(matrix.nutrient("protein"), [food["nutrition"]["protein"] for food in foods])
+        assert matrix.category_mask(["frutas", "inexistente"]).tolist() == \
+            [food["category"] == "frutas" for food in foods]
+
+class TestCandidatePool:
+    """Testes para o CandidatePool"""
+
+    @pytest.fixture
+    def pool(self):
+        rng = random.Random(7)
+        foods = _random_foods(rng, 80)
+        return CandidatePool(NutrientMatrix(foods), DietPreferences(dietary_restrictions=["vegetarian"]))
+
+    def test_sorted_by_preference_without_restricted_foods(self, pool):
+        """Testar ordenação por preferência e exclusão pelas restrições"""
+        assert np.all(np.diff(pool.preference) <= 0)
+        assert not pool.matrix.tag_masks["meat"][pool.indices].any()
+
+    def test_food_attributes(self, pool):
+        """Testar categoria e preferência por food_id (inclusive fora do pool)"""
+        index = int(pool.indices[3])
+        excluded = int(np.flatnonzero(pool.matrix.tag_masks["meat"])[0])
+        food_ids = [pool.matrix.food_ids[index], pool.matrix.food_ids[excluded], "desconhecido"]
+
+        categories, priorities = pool.food_attributes(food_ids)
+
+        assert categories[0] == pool.matrix.category_names[pool.matrix.category_codes[index]]
+        assert categories[2] == "default"
+        assert priorities.tolist() == [pool.preference[3], 0.0, 0.0]
+
+    def test_usage_penalty(self, pool):
+        """Testar penalidade de uso sem alterar o pool original"""
+        food_id = pool.matrix.food_ids[pool.indices[0]]
+        penalized = pool.with_usage_penalty({food_id: 2}, 0.5)
+
+        assert penalized.preference[0] == pytest.approx(pool.preference[0] * 0.25)
+        np.testing.assert_array_equal(penalized.preference[1:], pool.preference[1:])
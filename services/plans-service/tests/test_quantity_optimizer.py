@@ -0,0 +1,115 @@
+"""
+Testes para o otimizador de quantidades
+"""
+
+import numpy as np
+import pytest
+
+from algorithms.quantity_optimizer import (
+    DEFAULT_PORTION_BOUNDS, PRACTICAL_ROUNDS, BoundedLeastSquaresSolver,
+    ProportionalSolver, QuantitySolver, create_quantity_solver, round_to_practical_quantity
+)
+
+# calories, protein, carbs, fat por 100g
+FRANGO = [165, 31, 0, 3.6]
+ARROZ = [128, 2.5, 28, 0.2]
+CASTANHA = [643, 14.5, 29, 63.5]
+BANANA = [98, 1.3, 26, 0.1]
+
+def _macros(per_100g, quantities):
+    return np.asarray(per_100g).T @ np.asarray(quantities) / 100
+
+class TestRounding:
+    """Testes do arredondamento prático"""
+
+    def test_same_keys_for_rounds_and_bounds(self):
+        """Testar que arredondamento e limites usam as mesmas categorias"""
+        assert set(PRACTICAL_ROUNDS) == set(DEFAULT_PORTION_BOUNDS)
+
+    @pytest.mark.parametrize("quantity, category, expected", [
+        (37, "oleaginosas", 40),
+        (37, "proteinas", 25),
+        (80, "frutas", 100),
+        (80, "laticinios", 100),
+        (12, "categoria_desconhecida", 0),
+    ])
+    def test_round_to_practical_quantity(self, quantity, category, expected):
+        """Testar múltiplos por categoria e fallback para o padrão"""
+        assert round_to_practical_quantity(quantity, category) == expected
+
+class TestBoundedLeastSquaresSolver:
+    """Testes do solver de mínimos quadrados com limites"""
+
+    @pytest.fixture
+    def solver(self):
+        return BoundedLeastSquaresSolver()
+
+    def test_quantities_respect_bounds_and_steps(self, solver):
+        """Testar porções dentro dos limites e em múltiplos práticos"""
+        rng = np.random.default_rng(42)
+        categories = ["proteinas", "cereais", "oleaginosas", "frutas"]
+        per_100g = np.array([FRANGO, ARROZ, CASTANHA, BANANA], dtype=np.float64)
+
+        for _ in range(200):
+            targets = np.array([rng.uniform(150, 1200), rng.uniform(10, 60), rng.uniform(10, 150), rng.uniform(3, 60)])
+            quantities = solver.solve(per_100g, targets, categories, rng.uniform(0.1, 1, 4))
+
+            assert quantities[0] > 0
+            for quantity, category in zip(quantities, categories):
+                step = PRACTICAL_ROUNDS[category]
+                lower, upper = DEFAULT_PORTION_BOUNDS[category]
+                assert quantity % step == 0
+                assert quantity == 0 or lower <= quantity <= upper
+
+    def test_nuts_capped_even_when_fat_target_is_high(self, solver):
+        """Testar que oleaginosas não passam do máximo mesmo com alvo de gordura alto"""
+        quantities = solver.solve(
+            np.array([FRANGO, CASTANHA]), np.array([1500, 40, 60, 120]), ["proteinas", "oleaginosas"]
+        )
+        assert quantities[1] <= DEFAULT_PORTION_BOUNDS["oleaginosas"][1]
+
+    def test_reaches_feasible_target(self, solver):
+        """Testar que um alvo atingível em porções práticas é alcançado"""
+        per_100g = np.array([FRANGO, ARROZ, BANANA])
+        expected = np.array([150, 200, 100])
+        targets = _macros(per_100g, expected)
+
+        quantities = solver.solve(per_100g, targets, ["proteinas", "cereais", "frutas"])
+
+        np.testing.assert_allclose(_macros(per_100g, quantities), targets, rtol=0.05)
+
+    def test_beats_proportional_heuristic(self, solver):
+        """Testar erro de macros menor que o da heurística proporcional"""
+        per_100g = np.array([FRANGO, ARROZ, CASTANHA])
+        targets = np.array([650, 50, 60, 22])
+        categories = ["proteinas", "cereais", "oleaginosas"]
+
+        def error(quantities):
+            return np.abs(_macros(per_100g, quantities) / targets - 1).sum()
+
+        assert error(solver.solve(per_100g, targets, categories)) < \
+            error(ProportionalSolver().solve(per_100g, targets, categories))
+
+    def test_empty_meal(self, solver):
+        """Testar refeição sem alimentos"""
+        assert solver.solve(np.zeros((0, 4)), np.array([500, 30, 50, 15]), []).size == 0
+
+class TestSolverFactory:
+    """Testes da criação do solver"""
+
+    def test_base_class_is_abstract(self):
+        """Testar que a interface não pode ser instanciada"""
+        with pytest.raises(TypeError):
+            QuantitySolver()
+
+    def test_create_from_config(self):
+        """Testar criação pelo nome e limites configurados"""
+        solver = create_quantity_solver({"solver": "bounded_least_squares", "portion_bounds": {"frutas": [100, 200]}})
+        assert isinstance(solver, BoundedLeastSquaresSolver)
+        assert solver.portion_bounds["frutas"] == (100, 200)
+        assert isinstance(create_quantity_solver({"solver": "proportional"}), ProportionalSolver)
+
+    def test_unknown_solver(self):
+        """Testar solver desconhecido"""
+        with pytest.raises(ValueError):
+            create_quantity_solver({"solver": "simplex"})
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Backfill das sequências de check-in (user_streaks) a partir do histórico de daily_logs
+
+Percorre todos os check-ins de refeição uma única vez (apenas user_id e date),
+calcula a sequência atual e a maior sequência de cada usuário e grava os
+estados em lotes.
+
+Uso:
+    python scripts/backfill_streaks.py
+    python scripts/backfill_streaks.py --user-id abc123
+    python scripts/backfill_streaks.py --dry-run
+    python scripts/backfill_streaks.py --user-id abc123 --dry-run
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import defaultdict
+
+# Adicionar src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services.firebase_service import FirebaseService
+from services.streaks import STREAK_COLLECTION, compute_streak
+
+BATCH_SIZE = 400  # Abaixo do limite de 500 operações por lote do Firestore
+
+
+async def backfill(user_id: str = None, dry_run: bool = False) -> None:
+    firebase = FirebaseService()
+    await firebase.initialize()
+
+    try:
+        if user_id:
+            if dry_run:
+                state = compute_streak(user_id, await firebase.get_user_checkin_dates(user_id))
+            else:
+                state = await firebase.rebuild_user_streak(user_id)
+            print(f"{user_id}: atual={state['current_streak']} maior={state['longest_streak']}")
+            return
+
+        started = time.perf_counter()
+        query = (firebase.db.collection('daily_logs')
+                .where('log_type', '==', 'meal_checkin')
+                .select(['user_id', 'date']))
+
+        checkin_dates = defaultdict(set)
+        scanned = 0
+        async for doc in query.stream():
+            data = doc.to_dict()
+            scanned += 1
+            if data.get('user_id') and data.get('date'):
+                checkin_dates[data['user_id']].add(data['date'])
+
+        print(f"{scanned} check-ins lidos de {len(checkin_dates)} usuários "
+              f"em {time.perf_counter() - started:.1f}s")
+
+        if dry_run:
+            return
+
+        batch = firebase.db.batch()
+        pending = 0
+        for streak_user_id, dates in checkin_dates.items():
+            state = compute_streak(streak_user_id, dates)
+            batch.set(firebase.db.collection(STREAK_COLLECTION).document(streak_user_id), state)
+            pending += 1
+            if pending == BATCH_SIZE:
+                await batch.commit()
+                batch = firebase.db.batch()
+                pending = 0
+        if pending:
+            await batch.commit()
+
+        print(f"{len(checkin_dates)} sequências gravadas em {time.perf_counter() - started:.1f}s")
+
+    finally:
+        await firebase.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--user-id", help="Recalcula apenas este usuário")
+    parser.add_argument("--dry-run", action="store_true", help="Apenas lê o histórico, sem gravar")
+    args = parser.parse_args()
+    asyncio.run(backfill(user_id=args.user_id, dry_run=args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
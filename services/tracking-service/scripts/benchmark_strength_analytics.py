@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos analytics de força: cálculo anterior (dicts aninhados) vs StrengthAnalytics
+
+Gera um histórico sintético (padrão: 90 dias × 20 exercícios × 25 séries por exercício/dia),
+confere que os pontos diários coincidem com o cálculo anterior e compara o
+tempo de processamento.
+
+Uso:
+    python scripts/benchmark_strength_analytics.py
+    python scripts/benchmark_strength_analytics.py --days 365 --repeat 5
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+# Adicionar src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services.strength_analytics import StrengthAnalytics
+
+
+def synthetic_history(days: int, exercises: int, sets_per_day: int, seed: int = 42):
+    """Séries no formato de FirebaseService.get_strength_progress"""
+    rng = np.random.default_rng(seed)
+    start = date.today() - timedelta(days=days - 1)
+    base_weight = rng.uniform(20, 120, size=exercises)
+
+    history = []
+    for day_offset in range(days):
+        entry_date = (start + timedelta(days=day_offset)).isoformat()
+        progression = 1 + 0.002 * day_offset
+        for exercise in range(exercises):
+            weights = base_weight[exercise] * progression * rng.uniform(0.85, 1.05, size=sets_per_day)
+            reps = rng.integers(1, 15, size=sets_per_day)
+            for set_number in range(sets_per_day):
+                history.append({
+                    "date": entry_date,
+                    "exercise_id": f"ex_{exercise}",
+                    "exercise_name": f"Exercício {exercise}",
+                    "weight_kg": round(float(weights[set_number]), 1),
+                    "reps_done": int(reps[set_number]),
+                    "set_number": set_number + 1,
+                })
+    return history
+
+
+async def legacy_one_rep_max(weight_kg: float, reps: int) -> float:
+    """Brzycki como em CalorieService.estimate_one_rep_max (awaited por ponto)"""
+    if reps == 1:
+        return weight_kg
+    one_rm = weight_kg / (1.0278 - 0.0278 * reps)
+    return round(max(weight_kg, min(one_rm, weight_kg * 2)), 1)
+
+
+async def legacy_process(history):
+    """
+    Cálculo anterior de progress_routes: data convertida por série, dicts
+    aninhados, 1RM awaited por (exercício, dia) e novas passadas por
+    exercício para métricas e conquistas
+    """
+    grouped = defaultdict(lambda: defaultdict(list))
+    for entry in history:
+        entry_date = datetime.strptime(entry["date"], "%Y-%m-%d").date()
+        if entry["weight_kg"] > 0 and entry["reps_done"] > 0:
+            grouped[entry["exercise_id"]][entry_date].append({
+                "weight_kg": entry["weight_kg"],
+                "reps_done": entry["reps_done"],
+                "volume": entry["weight_kg"] * entry["reps_done"],
+            })
+
+    points = []
+    for exercise_id, daily in grouped.items():
+        for entry_date, sets in daily.items():
+            best_set = max(sets, key=lambda s: s["weight_kg"] * s["reps_done"])
+            points.append({
+                "date": entry_date,
+                "exercise_id": exercise_id,
+                "max_weight_kg": max(s["weight_kg"] for s in sets),
+                "total_volume_kg": sum(s["volume"] for s in sets),
+                "one_rep_max_estimated": await legacy_one_rep_max(best_set["weight_kg"], best_set["reps_done"]),
+            })
+    points.sort(key=lambda p: p["date"])
+
+    # _calculate_key_metrics e _identify_achievements reagrupavam os pontos
+    for _ in range(2):
+        by_exercise = defaultdict(list)
+        for point in points:
+            by_exercise[point["exercise_id"]].append(point["max_weight_kg"])
+        for weights in by_exercise.values():
+            max(weights) - min(weights), weights[-1] - weights[0]
+    return points
+
+
+def vectorized_process(history):
+    analytics = StrengthAnalytics(history)
+    points = analytics.daily_points()
+    analytics.exercise_summary()
+    return points
+
+
+def check_equal(legacy, vectorized):
+    key = lambda p: (str(p["date"]), p["exercise_id"])
+    legacy_by_key = {key(p): p for p in legacy}
+    assert len(legacy_by_key) == len(vectorized), "quantidade de pontos diferente"
+    for point in vectorized:
+        expected = legacy_by_key[key(point)]
+        for field in ("max_weight_kg", "total_volume_kg", "one_rep_max_estimated"):
+            assert abs(expected[field] - point[field]) < 1e-6, (field, expected, point)
+
+
+def best_time(func, history, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(history)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--exercises", type=int, default=20)
+    parser.add_argument("--sets-per-day", type=int, default=25, help="Séries por exercício em cada dia")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    history = synthetic_history(args.days, args.exercises, args.sets_per_day)
+    print(f"{len(history)} séries ({args.days} dias × {args.exercises} exercícios × "
+          f"{args.sets_per_day} séries/dia)")
+
+    check_equal(asyncio.run(legacy_process(history)), vectorized_process(history))
+    print("Pontos diários idênticos ao cálculo anterior")
+
+    legacy_seconds = best_time(lambda h: asyncio.run(legacy_process(h)), history, args.repeat)
+    vectorized_seconds = best_time(vectorized_process, history, args.repeat)
+    print(f"{'dicts aninhados':<18} {legacy_seconds * 1000:8.1f} ms")
+    print(f"{'StrengthAnalytics':<18} {vectorized_seconds * 1000:8.1f} ms "
+          f"({legacy_seconds / vectorized_seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,7 @@ class Settings(BaseSettings):
     # Configurações do Firebase
     firebase_project_id: str = Field(default="evolveyou-23580", env="FIREBASE_PROJECT_ID")
     firebase_credentials_path: Optional[str] = Field(default=None, env="FIREBASE_CREDENTIALS_PATH")
+    firestore_max_concurrency: int = Field(default=64, env="FIRESTORE_MAX_CONCURRENCY")  # Operações simultâneas por instância
     
     # URLs dos outros microserviços
     users_service_url: str = Field(default="http://localhost:8081", env="USERS_SERVICE_URL")
@@ -33,6 +34,15 @@ class Settings(BaseSettings):
     # Configurações de cache
     redis_url: Optional[str] = Field(default=None, env="REDIS_URL")
     cache_ttl_seconds: int = Field(default=300, env="CACHE_TTL_SECONDS")  # 5 minutos
+    cache_lock_enabled: bool = Field(default=True, env="CACHE_LOCK_ENABLED")  # Lock Redis entre instâncias
+    cache_lock_ttl_seconds: int = Field(default=10, env="CACHE_LOCK_TTL_SECONDS")
+    cache_lock_wait_seconds: float = Field(default=5.0, env="CACHE_LOCK_WAIT_SECONDS")
+    cache_memory_max_bytes: int = Field(default=64 * 1024 * 1024, env="CACHE_MEMORY_MAX_BYTES")  # Orçamento do cache em memória
+    cache_memory_max_entries: int = Field(default=10000, env="CACHE_MEMORY_MAX_ENTRIES")
+    cache_user_tag_ttl_seconds: int = Field(default=3600, env="CACHE_USER_TAG_TTL_SECONDS")  # Conjunto de chaves por usuário (Redis)
+    
+    # Configurações de ingestão em lote (sincronização offline)
+    bulk_log_max_items: int = Field(default=1000, env="BULK_LOG_MAX_ITEMS")  # Logs por requisição
     
     # Configurações de logging
     log_level: str = Field(default="INFO", env="LOG_LEVEL")
@@ -69,6 +79,20 @@ class Settings(BaseSettings):
         }
     }
     
+    # Configurações do cliente HTTP para outros serviços
+    service_client_config: Dict[str, Any] = {
+        "max_connections": 100,            # Conexões por serviço
+        "max_keepalive_connections": 20,   # Conexões mantidas abertas por serviço
+        "keepalive_expiry_seconds": 30,
+        "http2": True,
+        "retry_backoff_seconds": 0.1,      # Backoff base entre tentativas (exponencial)
+        "circuit_breaker": {
+            "failure_threshold": 5,        # Falhas consecutivas para abrir o circuito
+            "recovery_timeout_seconds": 30, # Tempo aberto antes de testar novamente
+            "half_open_max_calls": 1
+        }
+    }
+    
     # Configurações de rate limiting
     rate_limit_config: Dict[str, Any] = {
         "requests_per_minute": 60,
@@ -6,6 +6,7 @@ import asyncio
 import logging
 from contextlib import asynccontextmanager
 from datetime import datetime
+from functools import partial
 from typing import Dict, Any
 
 import structlog
@@ -19,6 +20,9 @@ from config.settings import get_settings
 from models.tracking import ErrorResponse, ServiceHealthCheck
 from services.firebase_service import FirebaseService
 from services.cache_service import CacheService
+from services.service_client import ServiceClient
+from services.calorie_service import CalorieService
+from services.log_events import LogEventBus
 from middleware.logging import setup_logging, LoggingMiddleware
 from middleware.auth import AuthMiddleware
 from middleware.rate_limit import RateLimitMiddleware
@@ -31,13 +35,15 @@ logger = structlog.get_logger(__name__)
 # Variáveis globais para serviços
 firebase_service: FirebaseService = None
 cache_service: CacheService = None
+service_client: ServiceClient = None
+log_events: LogEventBus = None
 app_start_time: datetime = None
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Gerencia o ciclo de vida da aplicação"""
-    global firebase_service, cache_service, app_start_time
+    global firebase_service, cache_service, service_client, log_events, app_start_time
     
     settings = get_settings()
     app_start_time = datetime.utcnow()
@@ -55,9 +61,29 @@ async def lifespan(app: FastAPI):
         await cache_service.initialize()
         logger.info("Cache inicializado com sucesso")
         
+        # Cliente HTTP com pool de conexões para os outros serviços
+        service_client = ServiceClient()
+        calorie_service = CalorieService(firebase_service=firebase_service)
+        
+        # Eventos de log: dashboard e progresso em cache acompanham as escritas
+        log_events = LogEventBus()
+        log_events.subscribe(partial(
+            dashboard_routes.refresh_cached_dashboard,
+            cache_service=cache_service,
+            calorie_service=calorie_service,
+            firebase_service=firebase_service
+        ))
+        log_events.subscribe(partial(
+            progress_routes.invalidate_cached_progress,
+            cache_service=cache_service
+        ))
+        
         # Adicionar serviços ao estado da aplicação
         app.state.firebase = firebase_service
         app.state.cache = cache_service
+        app.state.service_client = service_client
+        app.state.calorie_service = calorie_service
+        app.state.log_events = log_events
         
         logger.info("Tracking Service iniciado com sucesso")
         
@@ -70,6 +96,9 @@ async def lifespan(app: FastAPI):
         # Cleanup
         logger.info("Finalizando Tracking Service")
         
+        if service_client:
+            await service_client.close()
+        
         if cache_service:
             await cache_service.close()
         
@@ -229,11 +258,10 @@ async def health_check():
 @app.get("/metrics")
 async def metrics():
     """Endpoint de métricas para monitoramento"""
-    # Implementar métricas customizadas se necessário
     return {
-        "requests_total": "TODO",
-        "request_duration_seconds": "TODO",
-        "active_connections": "TODO"
+        "upstreams": service_client.metrics() if service_client else {},
+        "cache": cache_service.metrics() if cache_service else {},
+        "log_events": log_events.metrics() if log_events else {}
     }
 
 
@@ -68,6 +68,20 @@ class WorkoutSessionEndRequest(BaseModel):
     notes: Optional[str] = Field(None, description="Notas sobre o treino")
 
 
+class BulkLogItem(BaseModel):
+    """Log enfileirado pelo aplicativo durante o uso offline"""
+    idempotency_key: str = Field(..., min_length=1, max_length=128, description="Chave única gerada pelo cliente")
+    log_type: LogType = Field(..., description="Tipo do log (meal_checkin, set ou body_weight)")
+    timestamp: datetime = Field(..., description="Momento do registro no dispositivo")
+    date: Optional[date] = Field(None, description="Data do log (padrão: data do timestamp)")
+    payload: Dict[str, Any] = Field(..., description="Corpo do endpoint individual correspondente")
+
+
+class BulkLogRequest(BaseModel):
+    """Request para ingestão em lote de logs (sincronização offline)"""
+    logs: List[BulkLogItem] = Field(..., description="Logs na ordem em que foram registrados")
+
+
 # Modelos de dados internos
 
 class DailyLog(BaseModel):
@@ -180,6 +194,7 @@ class StrengthDataPoint(BaseModel):
     max_weight_kg: float = Field(..., description="Peso máximo levantado")
     total_volume_kg: float = Field(..., description="Volume total (peso x reps x séries)")
     one_rep_max_estimated: Optional[float] = Field(None, description="1RM estimado")
+    one_rep_max_by_formula: Optional[Dict[str, float]] = Field(None, description="1RM estimado por fórmula (brzycki, epley, lombardi)")
 
 
 class ProgressChart(BaseModel):
@@ -15,6 +15,7 @@ from services.firebase_service import FirebaseService
 from services.service_client import ServiceClient
 from services.calorie_service import CalorieService
 from services.cache_service import CacheService
+from services.streaks import current_streak_on
 from middleware.auth import get_current_user
 
 logger = structlog.get_logger(__name__)
@@ -87,127 +88,120 @@ async def get_dashboard(
                    user_id=user_id,
                    date=date_str)
         
-        # Verificar cache primeiro
-        cached_dashboard = await cache_service.get_dashboard_cache(user_id, date_str)
-        if cached_dashboard:
-            logger.info("Dashboard obtido do cache", user_id=user_id, date=date_str)
-            return DashboardResponse(**cached_dashboard)
-        
-        # Executar chamadas em paralelo para otimizar performance
-        tasks = [
-            # 1. Obter perfil do usuário (nickname, BMR, TDEE)
-            service_client.get_user_profile(user_id),
+        async def compute_dashboard() -> Dict[str, Any]:
+            # Executar chamadas em paralelo para otimizar performance
+            tasks = [
+                # 1-4. Perfil, metas diárias, plano de treino e plano de refeições
+                #      (cache dos serviços lido em um único round-trip)
+                _get_upstream_data(user_id, date_str, service_client, cache_service),
+                
+                # 5. Obter totais do dia (rollup mantido na escrita dos logs)
+                firebase_service.get_daily_rollup(user_id, dashboard_date)
+            ]
             
-            # 2. Obter metas diárias (calorias, macros)
-            service_client.get_daily_targets(user_id, date_str),
+            try:
+                upstream_data, daily_rollup = await asyncio.gather(*tasks, return_exceptions=True)
+                if isinstance(upstream_data, Exception):
+                    upstream_data = [upstream_data] * 4
+                user_profile, daily_targets, workout_plan, meal_plan = upstream_data
+                
+                # Tratar exceções individuais
+                if isinstance(user_profile, Exception):
+                    logger.warning("Erro ao obter perfil do usuário", error=str(user_profile))
+                    user_profile = {"nickname": "Usuário", "weight_kg": 70, "bmr": 1800, "tdee": 2200}
+                
+                if isinstance(daily_targets, Exception):
+                    logger.warning("Erro ao obter metas diárias", error=str(daily_targets))
+                    daily_targets = {"calories": 2000, "protein": 150, "carbs": 200, "fat": 67, "water_ml": 2500}
+                
+                if isinstance(workout_plan, Exception):
+                    logger.warning("Erro ao obter plano de treino", error=str(workout_plan))
+                    workout_plan = {}
+                
+                if isinstance(meal_plan, Exception):
+                    logger.warning("Erro ao obter plano de refeições", error=str(meal_plan))
+                    meal_plan = {}
+                
+                if isinstance(daily_rollup, Exception):
+                    logger.warning("Erro ao obter rollup diário", error=str(daily_rollup))
+                    daily_rollup = {}
+                    
+            except Exception as e:
+                logger.error("Erro nas chamadas paralelas", error=str(e))
+                raise HTTPException(
+                    status_code=500,
+                    detail="Erro ao obter dados dos serviços"
+                )
             
-            # 3. Obter plano de treino do dia
-            service_client.get_workout_plan(user_id, date_str),
+            # Processar dados obtidos
             
-            # 4. Obter plano de refeições do dia
-            service_client.get_meal_plan(user_id, date_str),
+            # 1. Resumo nutricional
+            nutritional_summary = await _build_nutritional_summary(
+                daily_rollup, daily_targets, meal_plan
+            )
             
-            # 5. Obter logs do dia atual
-            firebase_service.get_daily_logs(user_id, dashboard_date)
-        ]
-        
-        try:
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            user_profile, daily_targets, workout_plan, meal_plan, daily_logs = results
+            # 2. Resumo de treino
+            workout_summary = await _build_workout_summary(
+                daily_rollup, workout_plan
+            )
             
-            # Tratar exceções individuais
-            if isinstance(user_profile, Exception):
-                logger.warning("Erro ao obter perfil do usuário", error=str(user_profile))
-                user_profile = {"nickname": "Usuário", "weight_kg": 70, "bmr": 1800, "tdee": 2200}
+            # 3. Balanço energético
+            energy_balance = await calorie_service.calculate_energy_balance_from_totals(
+                user_id=user_id,
+                target_date=dashboard_date,
+                user_bmr=user_profile.get("bmr", 1800),
+                user_tdee=user_profile.get("tdee", 2200),
+                calories_consumed=daily_rollup.get("calories", 0),
+                calories_burned_exercise=daily_rollup.get("calories_burned", 0)
+            )
             
-            if isinstance(daily_targets, Exception):
-                logger.warning("Erro ao obter metas diárias", error=str(daily_targets))
-                daily_targets = {"calories": 2000, "protein": 150, "carbs": 200, "fat": 67, "water_ml": 2500}
+            # 4. Métricas de progresso (últimas medições)
+            progress_highlights = await _build_progress_highlights(
+                firebase_service, user_id
+            )
             
-            if isinstance(workout_plan, Exception):
-                logger.warning("Erro ao obter plano de treino", error=str(workout_plan))
-                workout_plan = {}
+            # 5. Calcular streak
+            daily_streak = await firebase_service.get_user_streak(user_id)
             
-            if isinstance(meal_plan, Exception):
-                logger.warning("Erro ao obter plano de refeições", error=str(meal_plan))
-                meal_plan = {}
+            # 6. Gerar mensagem motivacional
+            motivation_message = _generate_motivation_message(
+                nutritional_summary, workout_summary, daily_streak
+            )
             
-            if isinstance(daily_logs, Exception):
-                logger.warning("Erro ao obter logs diários", error=str(daily_logs))
-                daily_logs = []
-                
-        except Exception as e:
-            logger.error("Erro nas chamadas paralelas", error=str(e))
-            raise HTTPException(
-                status_code=500,
-                detail="Erro ao obter dados dos serviços"
+            # 7. Próximo marco
+            next_milestone = _get_next_milestone(
+                nutritional_summary, workout_summary, progress_highlights
             )
-        
-        # Processar dados obtidos
-        
-        # 1. Resumo nutricional
-        nutritional_summary = await _build_nutritional_summary(
-            daily_logs, daily_targets, meal_plan
-        )
-        
-        # 2. Resumo de treino
-        workout_summary = await _build_workout_summary(
-            daily_logs, workout_plan
-        )
-        
-        # 3. Balanço energético
-        energy_balance = await calorie_service.calculate_daily_energy_balance(
-            user_id=user_id,
-            target_date=dashboard_date,
-            user_bmr=user_profile.get("bmr", 1800),
-            user_tdee=user_profile.get("tdee", 2200),
-            daily_logs=daily_logs
-        )
-        
-        # 4. Métricas de progresso (últimas medições)
-        progress_highlights = await _build_progress_highlights(
-            firebase_service, user_id
-        )
-        
-        # 5. Calcular streak
-        daily_streak = await firebase_service.get_user_streak(user_id)
-        
-        # 6. Gerar mensagem motivacional
-        motivation_message = _generate_motivation_message(
-            nutritional_summary, workout_summary, daily_streak
-        )
-        
-        # 7. Próximo marco
-        next_milestone = _get_next_milestone(
-            nutritional_summary, workout_summary, progress_highlights
-        )
-        
-        # Construir resposta do dashboard
-        dashboard_response = DashboardResponse(
-            user_id=user_id,
-            user_name=user_profile.get("nickname", "Usuário"),
-            date=dashboard_date,
-            nutritional_summary=nutritional_summary,
-            workout_summary=workout_summary,
-            energy_balance=EnergyBalance(**energy_balance),
-            progress_highlights=progress_highlights,
-            daily_streak=daily_streak,
-            motivation_message=motivation_message,
-            next_milestone=next_milestone
-        )
-        
-        # Salvar no cache
-        await cache_service.set_dashboard_cache(
-            user_id, date_str, dashboard_response.dict()
+            
+            # Construir resposta do dashboard
+            dashboard_response = DashboardResponse(
+                user_id=user_id,
+                user_name=user_profile.get("nickname", "Usuário"),
+                date=dashboard_date,
+                nutritional_summary=nutritional_summary,
+                workout_summary=workout_summary,
+                energy_balance=_energy_balance_model(energy_balance),
+                progress_highlights=progress_highlights,
+                daily_streak=daily_streak,
+                motivation_message=motivation_message,
+                next_milestone=next_milestone
+            )
+            
+            logger.info("Dashboard gerado com sucesso", 
+                       user_id=user_id,
+                       date=date_str,
+                       calories_consumed=nutritional_summary.calories_consumed,
+                       workout_completed=workout_summary.workout_completed)
+            
+            # A revisão do rollup permite ignorar eventos de log já incluídos
+            return {**dashboard_response.dict(), "rollup_revision": daily_rollup.get("revision", 0)}
+
+        # Cache com single-flight: requisições simultâneas compartilham o mesmo cálculo
+        dashboard_data = await cache_service.get_or_compute_dashboard(
+            user_id, date_str, compute_dashboard
         )
         
-        logger.info("Dashboard gerado com sucesso", 
-                   user_id=user_id,
-                   date=date_str,
-                   calories_consumed=nutritional_summary.calories_consumed,
-                   workout_completed=workout_summary.workout_completed)
-        
-        return dashboard_response
+        return DashboardResponse(**dashboard_data)
         
     except HTTPException:
         raise
@@ -221,41 +215,54 @@ async def get_dashboard(
         )
 
 
+async def _get_upstream_data(
+    user_id: str,
+    date_str: str,
+    service_client: ServiceClient,
+    cache_service: CacheService
+) -> list:
+    """
+    Obtém perfil, metas e planos do dia, usando o cache dos serviços
+    
+    As quatro chaves são lidas com um único get_many; apenas as ausentes são
+    buscadas nos serviços e gravadas de volta com um único set_many. Falhas
+    são devolvidas como exceções (e não entram no cache).
+    
+    Returns:
+        list: [perfil, metas diárias, plano de treino, plano de refeições]
+    """
+    sources = [
+        (cache_service.service_data_key("users", "profile", user_id),
+         lambda: service_client.get_user_profile(user_id, fallback=False)),
+        (cache_service.service_data_key("plans", f"targets:{date_str}", user_id),
+         lambda: service_client.get_daily_targets(user_id, date_str, fallback=False)),
+        (cache_service.service_data_key("plans", f"workout:{date_str}", user_id),
+         lambda: service_client.get_workout_plan(user_id, date_str, fallback=False)),
+        (cache_service.service_data_key("plans", f"diet:{date_str}", user_id),
+         lambda: service_client.get_meal_plan(user_id, date_str, fallback=False)),
+    ]
+    
+    cached = await cache_service.get_many([key for key, _ in sources])
+    missing = [(key, fetch) for key, fetch in sources if key not in cached]
+    
+    if missing:
+        fetched = await asyncio.gather(*(fetch() for _, fetch in missing), return_exceptions=True)
+        results = dict(zip((key for key, _ in missing), fetched))
+        await cache_service.set_many(
+            {key: value for key, value in results.items() if not isinstance(value, Exception)},
+            user_id=user_id
+        )
+        cached.update(results)
+    
+    return [cached[key] for key, _ in sources]
+
+
 async def _build_nutritional_summary(
-    daily_logs: list,
+    daily_rollup: dict,
     daily_targets: dict,
     meal_plan: dict
 ) -> NutritionalSummary:
-    """Constrói resumo nutricional do dia"""
-    
-    # Inicializar contadores
-    calories_consumed = 0.0
-    protein_consumed = 0.0
-    carbs_consumed = 0.0
-    fat_consumed = 0.0
-    water_consumed_ml = 0.0
-    meals_completed = 0
-    
-    # Processar logs de refeições
-    meal_types_completed = set()
-    
-    for log in daily_logs:
-        if log.get("log_type") == "meal_checkin":
-            nutritional = log.get("value", {}).get("nutritional_summary", {})
-            calories_consumed += nutritional.get("total_calories", 0)
-            protein_consumed += nutritional.get("total_protein", 0)
-            carbs_consumed += nutritional.get("total_carbs", 0)
-            fat_consumed += nutritional.get("total_fat", 0)
-            
-            # Contar refeição como completa
-            meal_type = log.get("value", {}).get("meal_type")
-            if meal_type:
-                meal_types_completed.add(meal_type)
-        
-        elif log.get("log_type") == "water_intake":
-            water_consumed_ml += log.get("value", {}).get("amount_ml", 0)
-    
-    meals_completed = len(meal_types_completed)
+    """Constrói resumo nutricional do dia a partir do rollup diário"""
     
     # Obter metas
     calories_target = daily_targets.get("calories", 2000)
@@ -268,27 +275,38 @@ async def _build_nutritional_summary(
     total_meals = len(meal_plan.get("meals", [])) if meal_plan else 6  # Padrão 6 refeições
     
     return NutritionalSummary(
-        calories_consumed=round(calories_consumed, 1),
         calories_target=round(calories_target, 1),
-        calories_remaining=round(max(0, calories_target - calories_consumed), 1),
-        protein_consumed=round(protein_consumed, 1),
         protein_target=round(protein_target, 1),
-        carbs_consumed=round(carbs_consumed, 1),
         carbs_target=round(carbs_target, 1),
-        fat_consumed=round(fat_consumed, 1),
         fat_target=round(fat_target, 1),
-        water_consumed_ml=round(water_consumed_ml, 1),
         water_target_ml=round(water_target_ml, 1),
-        meals_completed=meals_completed,
-        total_meals=total_meals
+        total_meals=total_meals,
+        **_nutrition_totals(daily_rollup, calories_target)
     )
 
 
+def _nutrition_totals(daily_rollup: dict, calories_target: float) -> Dict[str, Any]:
+    """Campos do resumo nutricional que dependem apenas do rollup do dia"""
+    
+    calories_consumed = daily_rollup.get("calories", 0)
+    
+    return {
+        "calories_consumed": round(calories_consumed, 1),
+        "calories_remaining": round(max(0, calories_target - calories_consumed), 1),
+        "protein_consumed": round(daily_rollup.get("protein", 0), 1),
+        "carbs_consumed": round(daily_rollup.get("carbs", 0), 1),
+        "fat_consumed": round(daily_rollup.get("fat", 0), 1),
+        "water_consumed_ml": round(daily_rollup.get("water_ml", 0), 1),
+        # Cada tipo de refeição registrado conta como uma refeição completa
+        "meals_completed": len(daily_rollup.get("meal_types", {}))
+    }
+
+
 async def _build_workout_summary(
-    daily_logs: list,
+    daily_rollup: dict,
     workout_plan: dict
 ) -> WorkoutSummary:
-    """Constrói resumo de treino do dia"""
+    """Constrói resumo de treino do dia a partir do rollup diário"""
     
     # Verificar se há treino planejado
     workout_planned = bool(workout_plan.get("exercises"))
@@ -296,43 +314,43 @@ async def _build_workout_summary(
     duration_planned_minutes = workout_plan.get("estimated_duration_minutes", 60)
     planned_exercises = workout_plan.get("exercises", [])
     muscle_groups_focus = workout_plan.get("muscle_groups", [])
-    
-    # Processar logs de treino
-    workout_completed = False
-    duration_actual_minutes = 0
-    calories_burned = 0.0
-    exercises_completed = 0
-    completed_exercise_ids = set()
-    
-    for log in daily_logs:
-        if log.get("log_type") == "workout_session":
-            workout_completed = True
-            duration_actual_minutes += log.get("value", {}).get("duration_minutes", 0)
-            calories_burned += log.get("value", {}).get("calories_burned", 0)
-            
-            # Contar exercícios únicos realizados
-            exercises_performed = log.get("value", {}).get("exercises_performed", [])
-            completed_exercise_ids.update(exercises_performed)
-        
-        elif log.get("log_type") == "set":
-            # Contar exercícios por séries realizadas
-            exercise_id = log.get("value", {}).get("exercise_id")
-            if exercise_id:
-                completed_exercise_ids.add(exercise_id)
-    
-    exercises_completed = len(completed_exercise_ids)
     total_exercises = len(planned_exercises)
     
     return WorkoutSummary(
         workout_planned=workout_planned,
-        workout_completed=workout_completed,
         workout_name=workout_name,
         duration_planned_minutes=duration_planned_minutes,
-        duration_actual_minutes=duration_actual_minutes,
-        calories_burned=round(calories_burned, 1),
-        exercises_completed=exercises_completed,
         total_exercises=total_exercises,
-        muscle_groups_focus=muscle_groups_focus
+        muscle_groups_focus=muscle_groups_focus,
+        **_workout_totals(daily_rollup)
+    )
+
+
+def _workout_totals(daily_rollup: dict) -> Dict[str, Any]:
+    """Campos do resumo de treino que dependem apenas do rollup do dia"""
+    
+    # Sessões finalizadas e exercícios com séries registradas
+    return {
+        "workout_completed": daily_rollup.get("workout_sessions", 0) > 0,
+        "duration_actual_minutes": daily_rollup.get("workout_duration_minutes", 0),
+        "calories_burned": round(daily_rollup.get("calories_burned", 0), 1),
+        "exercises_completed": len(daily_rollup.get("exercise_ids", {}))
+    }
+
+
+def _energy_balance_model(energy_balance: Dict[str, Any]) -> EnergyBalance:
+    """Converte o balanço detalhado do CalorieService no modelo do dashboard"""
+    
+    calories_out = energy_balance.get("calories_out", {})
+    
+    return EnergyBalance(
+        calories_in=energy_balance.get("calories_in", 0),
+        calories_out=calories_out.get("total", 0),
+        net_balance=energy_balance.get("net_balance", 0),
+        bmr=calories_out.get("bmr", 0),
+        activity_calories=calories_out.get("activity", 0),
+        exercise_calories=calories_out.get("exercise", 0),
+        balance_status=energy_balance.get("balance_status", "neutral")
     )
 
 
@@ -469,6 +487,89 @@ def _get_next_milestone(
     return "Próximo: Manter consistência amanhã"
 
 
+async def refresh_cached_dashboard(
+    event: Dict[str, Any],
+    cache_service: CacheService,
+    calorie_service: CalorieService,
+    firebase_service: FirebaseService
+):
+    """
+    Atualiza o dashboard em cache do dia de um log recém-gravado
+    
+    Assinante do evento "log_written": os resumos nutricional e de treino, o
+    balanço energético, a sequência e as mensagens são refeitos a partir do
+    rollup que veio no evento e das metas/planos já presentes no cache, sem
+    consultar os outros serviços nem os logs do dia. O TTL da entrada é
+    mantido; sem dashboard em cache não há nada a fazer.
+    
+    Um cálculo do dashboard em andamento pode ter lido o rollup antes desta
+    escrita: ele é aguardado, e a entrada que ele gravar é atualizada aqui.
+    """
+    user_id = event["user_id"]
+    rollup = event["rollup"]
+    key = cache_service.dashboard_key(user_id, event["date"])
+    
+    await cache_service.wait_inflight(key)
+    cached = await cache_service.get(key)
+    if not cached:
+        return
+    
+    # O dashboard em cache já inclui esta escrita (ou uma posterior)
+    revision = rollup.get("revision", 0)
+    if cached.get("rollup_revision", 0) >= revision:
+        return
+    
+    cached_nutrition = cached["nutritional_summary"]
+    nutritional_summary = NutritionalSummary(**{
+        **cached_nutrition,
+        **_nutrition_totals(rollup, cached_nutrition["calories_target"])
+    })
+    workout_summary = WorkoutSummary(**{**cached["workout_summary"], **_workout_totals(rollup)})
+    
+    cached_balance = cached["energy_balance"]
+    energy_balance = await calorie_service.calculate_energy_balance_from_totals(
+        user_id=user_id,
+        target_date=datetime.strptime(event["date"], "%Y-%m-%d").date(),
+        user_bmr=cached_balance["bmr"],
+        user_tdee=cached_balance["bmr"] + cached_balance["activity_calories"],
+        calories_consumed=rollup.get("calories", 0),
+        calories_burned_exercise=rollup.get("calories_burned", 0)
+    )
+    
+    # A sequência só muda com check-ins de refeição
+    daily_streak = cached.get("daily_streak", 0)
+    if "meal_checkin" in event.get("log_types", []):
+        streak = event.get("streak")
+        if streak and not streak.get("stale"):
+            daily_streak = current_streak_on(streak, date.today())
+        else:
+            daily_streak = await firebase_service.get_user_streak(user_id)
+    
+    progress_highlights = cached.get("progress_highlights", [])
+    
+    patched = {
+        **cached,
+        "nutritional_summary": nutritional_summary.dict(),
+        "workout_summary": workout_summary.dict(),
+        "energy_balance": _energy_balance_model(energy_balance).dict(),
+        "daily_streak": daily_streak,
+        "motivation_message": _generate_motivation_message(
+            nutritional_summary, workout_summary, daily_streak
+        ),
+        "next_milestone": _get_next_milestone(
+            nutritional_summary, workout_summary, progress_highlights
+        ),
+        "rollup_revision": revision
+    }
+    
+    if await cache_service.replace(key, patched):
+        logger.debug("Dashboard em cache atualizado pelo log",
+                     user_id=user_id,
+                     date=event["date"],
+                     log_types=event.get("log_types"),
+                     revision=revision)
+
+
 @router.get("/summary")
 async def get_dashboard_summary(
     current_user: Dict[str, Any] = Depends(get_current_user),
@@ -483,35 +584,17 @@ async def get_dashboard_summary(
         user_id = current_user["user_id"]
         today = date.today()
         
-        # Obter logs do dia
-        daily_logs = await firebase_service.get_daily_logs(user_id, today)
-        
-        # Calcular métricas básicas
-        calories_consumed = sum(
-            log.get("value", {}).get("nutritional_summary", {}).get("total_calories", 0)
-            for log in daily_logs
-            if log.get("log_type") == "meal_checkin"
-        )
-        
-        workout_completed = any(
-            log.get("log_type") == "workout_session"
-            for log in daily_logs
-        )
-        
-        meals_completed = len(set(
-            log.get("value", {}).get("meal_type")
-            for log in daily_logs
-            if log.get("log_type") == "meal_checkin" and log.get("value", {}).get("meal_type")
-        ))
+        # Obter totais do dia (um único documento)
+        daily_rollup = await firebase_service.get_daily_rollup(user_id, today)
         
         return {
             "success": True,
             "data": {
                 "date": today.isoformat(),
-                "calories_consumed": round(calories_consumed, 1),
-                "workout_completed": workout_completed,
-                "meals_completed": meals_completed,
-                "logs_count": len(daily_logs)
+                "calories_consumed": round(daily_rollup.get("calories", 0), 1),
+                "workout_completed": daily_rollup.get("workout_sessions", 0) > 0,
+                "meals_completed": len(daily_rollup.get("meal_types", {})),
+                "logs_count": daily_rollup.get("logs_count", 0)
             }
         }
         
@@ -2,20 +2,24 @@
 Rotas para logging de atividades do usuário
 """
 
+import json
 from datetime import datetime, date
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 import structlog
 
-from fastapi import APIRouter, Depends, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError
 
+from config.settings import get_settings
 from models.tracking import (
     MealCheckinRequest, SetRequest, BodyWeightRequest, WorkoutSessionEndRequest,
-    SuccessResponse, LogType, DailyLog
+    BulkLogRequest, SuccessResponse, LogType, DailyLog
 )
 from services.firebase_service import FirebaseService
 from services.calorie_service import CalorieService
 from services.service_client import ServiceClient
+from services.log_events import LogEventBus, log_written_event, logs_written_event
 from middleware.auth import get_current_user
 
 logger = structlog.get_logger(__name__)
@@ -43,11 +47,74 @@ def get_service_client(request: Request) -> ServiceClient:
     return request.app.state.service_client
 
 
+def get_log_events(request: Request) -> LogEventBus:
+    """Dependency para obter o barramento de eventos de log"""
+    return request.app.state.log_events
+
+
+async def _save_and_publish(
+    firebase_service: FirebaseService,
+    log_events: LogEventBus,
+    log_data: Dict[str, Any]
+) -> str:
+    """Salva o log e publica o evento "log_written" com os agregados atualizados"""
+    log_id, rollup, streak = await firebase_service.record_daily_log(log_data)
+    await log_events.publish(log_written_event(log_id, log_data, rollup, streak))
+    return log_id
+
+
+def _meal_checkin_value(meal_data: MealCheckinRequest) -> Dict[str, Any]:
+    """Valor do log de check-in de refeição"""
+    return {
+        "meal_type": meal_data.meal_type,
+        "foods_consumed": meal_data.foods_consumed,
+        "nutritional_summary": {
+            "total_calories": meal_data.total_calories,
+            "total_protein": meal_data.total_protein,
+            "total_carbs": meal_data.total_carbs,
+            "total_fat": meal_data.total_fat
+        },
+        "notes": meal_data.notes
+    }
+
+
+def _set_value(set_data: SetRequest) -> Dict[str, Any]:
+    """Valor do log de série de treino"""
+    return {
+        "exercise_id": set_data.exercise_id,
+        "exercise_name": set_data.exercise_name,
+        "weight_kg": set_data.weight_kg,
+        "reps_done": set_data.reps_done,
+        "set_number": set_data.set_number,
+        "rpe": set_data.rpe,
+        "notes": set_data.notes
+    }
+
+
+def _body_weight_value(weight_data: BodyWeightRequest) -> Dict[str, Any]:
+    """Valor do log de peso corporal"""
+    return {
+        "weight_kg": weight_data.weight_kg,
+        "body_fat_percentage": weight_data.body_fat_percentage,
+        "muscle_mass_kg": weight_data.muscle_mass_kg,
+        "notes": weight_data.notes
+    }
+
+
+# Tipos aceitos na ingestão em lote: modelo do corpo e construtor do valor do log
+_BULK_BUILDERS = {
+    LogType.MEAL_CHECKIN: (MealCheckinRequest, _meal_checkin_value),
+    LogType.SET: (SetRequest, _set_value),
+    LogType.BODY_WEIGHT: (BodyWeightRequest, _body_weight_value),
+}
+
+
 @router.post("/meal-checkin", response_model=SuccessResponse)
 async def log_meal_checkin(
     meal_data: MealCheckinRequest,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    firebase_service: FirebaseService = Depends(get_firebase_service)
+    firebase_service: FirebaseService = Depends(get_firebase_service),
+    log_events: LogEventBus = Depends(get_log_events)
 ):
     """
     Registra o consumo de uma refeição completa
@@ -82,17 +149,7 @@ async def log_meal_checkin(
             log_type=LogType.MEAL_CHECKIN,
             timestamp=datetime.utcnow(),
             date=date.today(),
-            value={
-                "meal_type": meal_data.meal_type,
-                "foods_consumed": meal_data.foods_consumed,
-                "nutritional_summary": {
-                    "total_calories": meal_data.total_calories,
-                    "total_protein": meal_data.total_protein,
-                    "total_carbs": meal_data.total_carbs,
-                    "total_fat": meal_data.total_fat
-                },
-                "notes": meal_data.notes
-            },
+            value=_meal_checkin_value(meal_data),
             metadata={
                 "source": "mobile_app",
                 "version": "1.0"
@@ -100,7 +157,7 @@ async def log_meal_checkin(
         )
         
         # Salvar no Firestore
-        log_id = await firebase_service.save_daily_log(log_data.dict())
+        log_id = await _save_and_publish(firebase_service, log_events, log_data.dict())
         
         logger.info("Refeição registrada com sucesso", 
                    user_id=user_id,
@@ -132,7 +189,8 @@ async def log_meal_checkin(
 async def log_set(
     set_data: SetRequest,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    firebase_service: FirebaseService = Depends(get_firebase_service)
+    firebase_service: FirebaseService = Depends(get_firebase_service),
+    log_events: LogEventBus = Depends(get_log_events)
 ):
     """
     Registra uma série de treino realizada
@@ -167,15 +225,7 @@ async def log_set(
             log_type=LogType.SET,
             timestamp=datetime.utcnow(),
             date=date.today(),
-            value={
-                "exercise_id": set_data.exercise_id,
-                "exercise_name": set_data.exercise_name,
-                "weight_kg": set_data.weight_kg,
-                "reps_done": set_data.reps_done,
-                "set_number": set_data.set_number,
-                "rpe": set_data.rpe,
-                "notes": set_data.notes
-            },
+            value=_set_value(set_data),
             metadata={
                 "source": "mobile_app",
                 "version": "1.0"
@@ -183,7 +233,7 @@ async def log_set(
         )
         
         # Salvar no Firestore
-        log_id = await firebase_service.save_daily_log(log_data.dict())
+        log_id = await _save_and_publish(firebase_service, log_events, log_data.dict())
         
         logger.info("Série registrada com sucesso", 
                    user_id=user_id,
@@ -219,7 +269,8 @@ async def log_set(
 async def log_body_weight(
     weight_data: BodyWeightRequest,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    firebase_service: FirebaseService = Depends(get_firebase_service)
+    firebase_service: FirebaseService = Depends(get_firebase_service),
+    log_events: LogEventBus = Depends(get_log_events)
 ):
     """
     Registra uma nova pesagem do usuário
@@ -255,12 +306,7 @@ async def log_body_weight(
             log_type=LogType.BODY_WEIGHT,
             timestamp=datetime.utcnow(),
             date=date.today(),
-            value={
-                "weight_kg": weight_data.weight_kg,
-                "body_fat_percentage": weight_data.body_fat_percentage,
-                "muscle_mass_kg": weight_data.muscle_mass_kg,
-                "notes": weight_data.notes
-            },
+            value=_body_weight_value(weight_data),
             metadata={
                 "source": "mobile_app",
                 "version": "1.0"
@@ -268,7 +314,7 @@ async def log_body_weight(
         )
         
         # Salvar no Firestore
-        log_id = await firebase_service.save_daily_log(log_data.dict())
+        log_id = await _save_and_publish(firebase_service, log_events, log_data.dict())
         
         logger.info("Peso registrado com sucesso", 
                    user_id=user_id,
@@ -303,7 +349,8 @@ async def log_workout_session_end(
     current_user: Dict[str, Any] = Depends(get_current_user),
     firebase_service: FirebaseService = Depends(get_firebase_service),
     calorie_service: CalorieService = Depends(get_calorie_service),
-    service_client: ServiceClient = Depends(get_service_client)
+    service_client: ServiceClient = Depends(get_service_client),
+    log_events: LogEventBus = Depends(get_log_events)
 ):
     """
     Registra o fim de uma sessão de treino
@@ -385,7 +432,7 @@ async def log_workout_session_end(
         )
         
         # Salvar no Firestore
-        log_id = await firebase_service.save_daily_log(log_data.dict())
+        log_id = await _save_and_publish(firebase_service, log_events, log_data.dict())
         
         logger.info("Sessão de treino registrada com sucesso", 
                    user_id=user_id,
@@ -416,19 +463,158 @@ async def log_workout_session_end(
         )
 
 
+@router.post("/bulk", response_model=SuccessResponse)
+async def log_bulk(
+    bulk_data: BulkLogRequest,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    firebase_service: FirebaseService = Depends(get_firebase_service),
+    log_events: LogEventBus = Depends(get_log_events)
+):
+    """
+    Ingestão em lote dos logs registrados offline
+    
+    Aceita check-ins de refeição, séries e pesagens com o mesmo corpo dos
+    endpoints individuais, cada um com uma chave de idempotência gerada pelo
+    cliente. Todos os itens são validados antes da escrita; os válidos são
+    gravados em lotes do Firestore e reenvios de chaves já gravadas são
+    devolvidos como duplicados. O resultado vem por item, na ordem enviada.
+    """
+    try:
+        user_id = current_user["user_id"]
+        max_items = get_settings().bulk_log_max_items
+        
+        if not bulk_data.logs:
+            raise HTTPException(
+                status_code=400,
+                detail="Lista de logs não pode estar vazia"
+            )
+        
+        if len(bulk_data.logs) > max_items:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Máximo de {max_items} logs por requisição"
+            )
+        
+        logger.info("Iniciando ingestão em lote", 
+                   user_id=user_id,
+                   logs=len(bulk_data.logs))
+        
+        # Validar todos os itens em uma única passada
+        results: Dict[str, Dict[str, Any]] = {}
+        valid_logs = []
+        today = date.today()
+        
+        for item in bulk_data.logs:
+            key = item.idempotency_key
+            if key in results:
+                continue
+            
+            builder = _BULK_BUILDERS.get(item.log_type)
+            if builder is None:
+                results[key] = {"status": "invalid", "error": f"Tipo de log não suportado: {item.log_type.value}"}
+                continue
+            
+            request_model, build_value = builder
+            try:
+                payload = request_model(**item.payload)
+            except ValidationError as e:
+                results[key] = {"status": "invalid", "error": e.errors()}
+                continue
+            
+            if isinstance(payload, MealCheckinRequest) and not payload.foods_consumed:
+                results[key] = {"status": "invalid", "error": "Lista de alimentos não pode estar vazia"}
+                continue
+            
+            log_date = item.date or item.timestamp.date()
+            if log_date > today:
+                results[key] = {"status": "invalid", "error": "Data do log não pode estar no futuro"}
+                continue
+            
+            log_data = DailyLog(
+                user_id=user_id,
+                log_type=item.log_type,
+                timestamp=item.timestamp,
+                date=log_date,
+                value=build_value(payload),
+                metadata={
+                    "source": "mobile_app_offline_sync",
+                    "version": "1.0"
+                }
+            ).dict()
+            log_data["idempotency_key"] = key
+            results[key] = {"status": "pending"}
+            valid_logs.append(log_data)
+        
+        # Gravar os válidos em lotes e atualizar rollups/caches uma vez por dia
+        if valid_logs:
+            written, rollups = await firebase_service.record_daily_logs_bulk(user_id, valid_logs)
+            results.update(written)
+            
+            created_types: Dict[str, List[str]] = {}
+            for log_data in valid_logs:
+                if written[log_data["idempotency_key"]]["status"] == "created":
+                    created_types.setdefault(log_data["date"].isoformat(), []).append(log_data["log_type"])
+            
+            for date_str, log_types in created_types.items():
+                if date_str in rollups:
+                    await log_events.publish(logs_written_event(user_id, log_types, rollups[date_str]))
+        
+        # Um resultado por chave, na ordem de envio
+        item_results = [
+            {"idempotency_key": key, **result}
+            for key, result in results.items()
+        ]
+        
+        counts = {status: 0 for status in ("created", "duplicate", "invalid", "failed")}
+        for result in item_results:
+            counts[result["status"]] += 1
+        
+        logger.info("Ingestão em lote concluída", user_id=user_id, **counts)
+        
+        return SuccessResponse(
+            message="Logs sincronizados",
+            data={
+                "results": item_results,
+                **counts
+            }
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Erro na ingestão em lote", 
+                    user_id=current_user.get("user_id"),
+                    error=str(e))
+        raise HTTPException(
+            status_code=500,
+            detail="Erro interno ao sincronizar logs"
+        )
+
+
 @router.get("/history/{log_type}")
 async def get_log_history(
     log_type: str,
     days: int = 7,
+    limit: int = Query(100, ge=1, le=500, description="Logs por página"),
+    cursor: Optional[str] = Query(None, description="Cursor devolvido pela página anterior"),
+    format: str = Query("json", pattern="^(json|ndjson)$", description="json (paginado) ou ndjson (streaming)"),
     current_user: Dict[str, Any] = Depends(get_current_user),
     firebase_service: FirebaseService = Depends(get_firebase_service)
 ):
     """
     Obtém histórico de logs de um tipo específico
     
+    No formato json a resposta é paginada por cursor: next_cursor é passado
+    em cursor para obter a página seguinte (null na última). No formato
+    ndjson o histórico inteiro do período é enviado em streaming, um log por
+    linha, lendo uma página do Firestore por vez.
+    
     Args:
         log_type: Tipo de log (meal_checkin, set, body_weight, workout_session)
         days: Número de dias para buscar (padrão: 7)
+        limit: Logs por página no formato json (padrão: 100)
+        cursor: Cursor da página anterior (formato json)
+        format: json ou ndjson
     """
     try:
         user_id = current_user["user_id"]
@@ -453,13 +639,39 @@ async def get_log_history(
         end_date = date.today()
         start_date = date.fromordinal(end_date.toordinal() - days + 1)
         
-        # Buscar logs
-        logs = await firebase_service.get_logs_by_date_range(
-            user_id=user_id,
-            start_date=start_date,
-            end_date=end_date,
-            log_types=[log_type]
-        )
+        # Exportação em streaming: uma página em memória por vez
+        if format == "ndjson":
+            async def export_lines():
+                count = 0
+                async for log in firebase_service.iter_logs(
+                    user_id, start_date, end_date, log_types=[log_type]
+                ):
+                    count += 1
+                    yield json.dumps(log, default=str, ensure_ascii=False) + "\n"
+                
+                logger.info("Histórico de logs exportado", 
+                           user_id=user_id,
+                           log_type=log_type,
+                           days=days,
+                           count=count)
+            
+            return StreamingResponse(export_lines(), media_type="application/x-ndjson")
+        
+        # Buscar uma página de logs
+        try:
+            logs, next_cursor = await firebase_service.get_logs_page(
+                user_id=user_id,
+                start_date=start_date,
+                end_date=end_date,
+                log_types=[log_type],
+                limit=limit,
+                cursor=cursor
+            )
+        except ValueError:
+            raise HTTPException(
+                status_code=400,
+                detail="Cursor inválido"
+            )
         
         logger.info("Histórico de logs obtido", 
                    user_id=user_id,
@@ -476,7 +688,8 @@ async def get_log_history(
                     "end_date": end_date.isoformat(),
                     "days": days
                 },
-                "count": len(logs)
+                "count": len(logs),
+                "next_cursor": next_cursor
             }
         }
         
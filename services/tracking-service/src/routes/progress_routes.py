@@ -17,12 +17,15 @@ from models.tracking import (
 )
 from services.firebase_service import FirebaseService
 from services.cache_service import CacheService
-from services.calorie_service import CalorieService
+from services.strength_analytics import StrengthAnalytics
 from middleware.auth import get_current_user
 
 logger = structlog.get_logger(__name__)
 router = APIRouter()
 
+# Tipos de log que entram na análise de progresso
+_PROGRESS_LOG_TYPES = {"body_weight", "set", "workout_session", "meal_checkin"}
+
 
 def get_firebase_service(request: Request) -> FirebaseService:
     """Dependency para obter serviço Firebase"""
@@ -34,22 +37,12 @@ def get_cache_service(request: Request) -> CacheService:
     return request.app.state.cache
 
 
-def get_calorie_service(request: Request) -> CalorieService:
-    """Dependency para obter serviço de cálculo calórico"""
-    if not hasattr(request.app.state, 'calorie_service'):
-        request.app.state.calorie_service = CalorieService(
-            firebase_service=request.app.state.firebase
-        )
-    return request.app.state.calorie_service
-
-
 @router.get("/summary", response_model=ProgressSummaryResponse)
 async def get_progress_summary(
     days: int = Query(30, ge=7, le=365, description="Número de dias para análise (7-365)"),
     current_user: Dict[str, Any] = Depends(get_current_user),
     firebase_service: FirebaseService = Depends(get_firebase_service),
-    cache_service: CacheService = Depends(get_cache_service),
-    calorie_service: CalorieService = Depends(get_calorie_service)
+    cache_service: CacheService = Depends(get_cache_service)
 ):
     """
     Endpoint de analytics de progresso
@@ -69,100 +62,102 @@ async def get_progress_summary(
                    user_id=user_id,
                    days=days)
         
-        # Verificar cache primeiro
-        cached_progress = await cache_service.get_progress_cache(user_id, days)
-        if cached_progress:
-            logger.info("Progresso obtido do cache", user_id=user_id, days=days)
-            return ProgressSummaryResponse(**cached_progress)
-        
-        # Calcular período de análise
-        end_date = date.today()
-        start_date = end_date - timedelta(days=days - 1)
-        
-        # Executar consultas em paralelo para otimizar performance
-        tasks = [
-            # 1. Histórico de peso
-            firebase_service.get_weight_history(user_id, days),
+        async def compute_progress() -> Dict[str, Any]:
+            # Calcular período de análise
+            end_date = date.today()
+            start_date = end_date - timedelta(days=days - 1)
+            
+            # Executar consultas em paralelo para otimizar performance
+            tasks = [
+                # 1. Histórico de peso
+                firebase_service.get_weight_history(user_id, days),
+                
+                # 2. Progresso de força
+                firebase_service.get_strength_progress(user_id, days),
+                
+                # 3. Logs gerais para métricas adicionais
+                firebase_service.get_logs_by_date_range(
+                    user_id, start_date, end_date
+                )
+            ]
+            
+            try:
+                results = await asyncio.gather(*tasks, return_exceptions=True)
+                weight_history, strength_history, all_logs = results
+                
+                # Tratar exceções individuais
+                if isinstance(weight_history, Exception):
+                    logger.warning("Erro ao obter histórico de peso", error=str(weight_history))
+                    weight_history = []
+                
+                if isinstance(strength_history, Exception):
+                    logger.warning("Erro ao obter progresso de força", error=str(strength_history))
+                    strength_history = []
+                
+                if isinstance(all_logs, Exception):
+                    logger.warning("Erro ao obter logs gerais", error=str(all_logs))
+                    all_logs = []
+                    
+            except Exception as e:
+                logger.error("Erro nas consultas paralelas", error=str(e))
+                raise HTTPException(
+                    status_code=500,
+                    detail="Erro ao obter dados históricos"
+                )
+            
+            # Processar dados de peso
+            weight_progress = await _process_weight_data(weight_history)
             
-            # 2. Progresso de força
-            firebase_service.get_strength_progress(user_id, days),
+            # Carregar as séries uma única vez em formato colunar
+            strength = StrengthAnalytics(strength_history)
+            strength_progress = await _process_strength_data(strength)
+            exercise_summary = strength.exercise_summary()
             
-            # 3. Logs gerais para métricas adicionais
-            firebase_service.get_logs_by_date_range(
-                user_id, start_date, end_date
+            # Agregar os logs gerais em uma única passada
+            log_stats = _summarize_logs(all_logs)
+            
+            # Gerar gráficos otimizados
+            charts = await _generate_progress_charts(
+                weight_progress, strength_progress, strength.most_tracked_exercise(), log_stats
             )
-        ]
-        
-        try:
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            weight_history, strength_history, all_logs = results
             
-            # Tratar exceções individuais
-            if isinstance(weight_history, Exception):
-                logger.warning("Erro ao obter histórico de peso", error=str(weight_history))
-                weight_history = []
+            # Calcular métricas principais
+            key_metrics = await _calculate_key_metrics(
+                weight_progress, exercise_summary, log_stats, days
+            )
             
-            if isinstance(strength_history, Exception):
-                logger.warning("Erro ao obter progresso de força", error=str(strength_history))
-                strength_history = []
+            # Identificar conquistas
+            achievements = await _identify_achievements(
+                weight_progress, exercise_summary, log_stats, days
+            )
             
-            if isinstance(all_logs, Exception):
-                logger.warning("Erro ao obter logs gerais", error=str(all_logs))
-                all_logs = []
-                
-        except Exception as e:
-            logger.error("Erro nas consultas paralelas", error=str(e))
-            raise HTTPException(
-                status_code=500,
-                detail="Erro ao obter dados históricos"
+            # Construir resposta
+            progress_response = ProgressSummaryResponse(
+                user_id=user_id,
+                period_start=start_date,
+                period_end=end_date,
+                weight_progress=weight_progress,
+                strength_progress=strength_progress,
+                charts=charts,
+                key_metrics=key_metrics,
+                achievements=achievements
             )
-        
-        # Processar dados de peso
-        weight_progress = await _process_weight_data(weight_history)
-        
-        # Processar dados de força
-        strength_progress = await _process_strength_data(strength_history, calorie_service)
-        
-        # Gerar gráficos otimizados
-        charts = await _generate_progress_charts(
-            weight_progress, strength_progress, all_logs, days
-        )
-        
-        # Calcular métricas principais
-        key_metrics = await _calculate_key_metrics(
-            weight_progress, strength_progress, all_logs, days
-        )
-        
-        # Identificar conquistas
-        achievements = await _identify_achievements(
-            weight_progress, strength_progress, all_logs, days
-        )
-        
-        # Construir resposta
-        progress_response = ProgressSummaryResponse(
-            user_id=user_id,
-            period_start=start_date,
-            period_end=end_date,
-            weight_progress=weight_progress,
-            strength_progress=strength_progress,
-            charts=charts,
-            key_metrics=key_metrics,
-            achievements=achievements
-        )
-        
-        # Salvar no cache
-        await cache_service.set_progress_cache(
-            user_id, days, progress_response.dict()
+            
+            logger.info("Análise de progresso concluída", 
+                       user_id=user_id,
+                       days=days,
+                       weight_points=len(weight_progress),
+                       strength_points=len(strength_progress),
+                       charts_count=len(charts))
+            
+            return progress_response.dict()
+
+        # Cache com single-flight: requisições simultâneas compartilham o mesmo cálculo
+        progress_data = await cache_service.get_or_compute_progress(
+            user_id, days, compute_progress
         )
         
-        logger.info("Análise de progresso concluída", 
-                   user_id=user_id,
-                   days=days,
-                   weight_points=len(weight_progress),
-                   strength_points=len(strength_progress),
-                   charts_count=len(charts))
-        
-        return progress_response
+        return ProgressSummaryResponse(**progress_data)
         
     except HTTPException:
         raise
@@ -176,6 +171,31 @@ async def get_progress_summary(
         )
 
 
+async def invalidate_cached_progress(event: Dict[str, Any], cache_service: CacheService):
+    """
+    Descarta as análises de progresso em cache afetadas por um log recém-gravado
+    
+    Assinante do evento "log_written". Ao contrário do dashboard, a análise
+    de progresso (recordes, conquistas, tendências e volume semanal) não é
+    atualizável a partir do rollup do dia, então as entradas do usuário são
+    removidas e recalculadas na próxima leitura. As chaves vêm do conjunto do
+    usuário, sem varrer o keyspace.
+    """
+    if not _PROGRESS_LOG_TYPES.intersection(event.get("log_types", [])):
+        return
+    
+    user_id = event["user_id"]
+    keys = await cache_service.get_user_keys(user_id, prefix=cache_service.progress_key(user_id, ""))
+    for key in keys:
+        await cache_service.delete(key)
+    
+    if keys:
+        logger.debug("Progresso em cache descartado pelo log",
+                     user_id=user_id,
+                     log_types=event.get("log_types"),
+                     keys=len(keys))
+
+
 async def _process_weight_data(weight_history: List[Dict[str, Any]]) -> List[WeightDataPoint]:
     """Processa dados de peso em pontos de dados estruturados"""
     
@@ -209,86 +229,59 @@ async def _process_weight_data(weight_history: List[Dict[str, Any]]) -> List[Wei
     return weight_points
 
 
-async def _process_strength_data(
-    strength_history: List[Dict[str, Any]], 
-    calorie_service: CalorieService
-) -> List[StrengthDataPoint]:
-    """Processa dados de força em pontos de dados estruturados"""
-    
-    strength_points = []
+async def _process_strength_data(strength: StrengthAnalytics) -> List[StrengthDataPoint]:
+    """Converte os agregados diários de força em pontos de dados estruturados"""
     
-    # Agrupar por exercício e data para calcular máximos diários
-    exercise_daily_max = defaultdict(lambda: defaultdict(list))
+    strength_points = [StrengthDataPoint(**point) for point in strength.daily_points()]
     
-    for entry in strength_history:
-        try:
-            # Converter string de data para objeto date
-            if isinstance(entry["date"], str):
-                entry_date = datetime.strptime(entry["date"], "%Y-%m-%d").date()
-            else:
-                entry_date = entry["date"]
-            
-            exercise_id = entry["exercise_id"]
-            weight_kg = entry.get("weight_kg", 0)
-            reps_done = entry.get("reps_done", 0)
-            
-            if weight_kg > 0 and reps_done > 0:
-                exercise_daily_max[exercise_id][entry_date].append({
-                    "weight_kg": weight_kg,
-                    "reps_done": reps_done,
-                    "exercise_name": entry.get("exercise_name", "Exercício"),
-                    "volume": weight_kg * reps_done
-                })
-                
-        except Exception as e:
-            logger.warning("Erro ao processar entrada de força", 
-                          entry=entry, error=str(e))
-            continue
+    logger.info("Dados de força processados", 
+               sets=strength.size,
+               count=len(strength_points))
+    return strength_points
+
+
+def _summarize_logs(all_logs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Agrega em uma única passada os logs gerais usados por gráficos, métricas e conquistas"""
     
-    # Calcular pontos de dados de força
-    for exercise_id, daily_data in exercise_daily_max.items():
-        for entry_date, sets in daily_data.items():
-            try:
-                # Encontrar peso máximo do dia
-                max_weight_set = max(sets, key=lambda x: x["weight_kg"])
-                max_weight_kg = max_weight_set["weight_kg"]
-                
-                # Calcular volume total do dia
-                total_volume_kg = sum(s["volume"] for s in sets)
-                
-                # Estimar 1RM usando o melhor set do dia
-                best_set = max(sets, key=lambda x: x["weight_kg"] * x["reps_done"])
-                one_rep_max = await calorie_service.estimate_one_rep_max(
-                    best_set["weight_kg"], best_set["reps_done"]
-                )
-                
-                strength_point = StrengthDataPoint(
-                    date=entry_date,
-                    exercise_id=exercise_id,
-                    exercise_name=max_weight_set["exercise_name"],
-                    max_weight_kg=max_weight_kg,
-                    total_volume_kg=total_volume_kg,
-                    one_rep_max_estimated=one_rep_max
-                )
-                strength_points.append(strength_point)
-                
-            except Exception as e:
-                logger.warning("Erro ao calcular ponto de força", 
-                              exercise_id=exercise_id, date=entry_date, error=str(e))
-                continue
+    workout_dates = set()
+    weekly_volume = defaultdict(float)
+    total_sets = 0
+    meal_logs = 0
     
-    # Ordenar por data
-    strength_points.sort(key=lambda x: x.date)
+    for log in all_logs:
+        log_type = log.get("log_type")
+        if not log.get("date"):
+            continue
+        
+        if log_type == "set":
+            total_sets += 1
+            workout_dates.add(log["date"])
+            
+            # Volume por semana (início na segunda-feira)
+            log_date = datetime.strptime(log["date"], "%Y-%m-%d").date()
+            week_start = log_date - timedelta(days=log_date.weekday())
+            value = log.get("value", {})
+            weekly_volume[week_start] += (value.get("weight_kg") or 0) * (value.get("reps_done") or 0)
+        
+        elif log_type == "workout_session":
+            workout_dates.add(log["date"])
+        
+        elif log_type == "meal_checkin":
+            meal_logs += 1
     
-    logger.info("Dados de força processados", count=len(strength_points))
-    return strength_points
+    return {
+        "workout_days": len(workout_dates),
+        "total_sets": total_sets,
+        "meal_logs": meal_logs,
+        "weekly_volume": dict(weekly_volume)
+    }
 
 
 async def _generate_progress_charts(
     weight_progress: List[WeightDataPoint],
     strength_progress: List[StrengthDataPoint],
-    all_logs: List[Dict[str, Any]],
-    days: int
+    chart_exercise_id: Optional[str],
+    log_stats: Dict[str, Any]
 ) -> List[ProgressChart]:
     """Gera gráficos otimizados para visualização"""
     
@@ -333,15 +326,8 @@ async def _generate_progress_charts(
         charts.append(weight_chart)
     
     # 2. Gráfico de força (exercício com mais dados)
-    if strength_progress:
-        # Agrupar por exercício
-        exercise_groups = defaultdict(list)
-        for point in strength_progress:
-            exercise_groups[point.exercise_id].append(point)
-        
-        # Pegar exercício com mais pontos de dados
-        best_exercise = max(exercise_groups.items(), key=lambda x: len(x[1]))
-        exercise_id, exercise_points = best_exercise
+    if chart_exercise_id:
+        exercise_points = [point for point in strength_progress if point.exercise_id == chart_exercise_id]
         
         if len(exercise_points) >= 2:
             strength_data_points = [
@@ -378,7 +364,7 @@ async def _generate_progress_charts(
             charts.append(strength_chart)
     
     # 3. Gráfico de volume de treino semanal
-    workout_volume_chart = await _generate_volume_chart(all_logs, days)
+    workout_volume_chart = await _generate_volume_chart(log_stats["weekly_volume"])
     if workout_volume_chart:
         charts.append(workout_volume_chart)
     
@@ -386,25 +372,10 @@ async def _generate_progress_charts(
     return charts
 
 
-async def _generate_volume_chart(all_logs: List[Dict[str, Any]], days: int) -> Optional[ProgressChart]:
+async def _generate_volume_chart(weekly_volume: Dict[date, float]) -> Optional[ProgressChart]:
     """Gera gráfico de volume de treino"""
     
     try:
-        # Agrupar logs de séries por semana
-        weekly_volume = defaultdict(float)
-        
-        for log in all_logs:
-            if log.get("log_type") == "set":
-                log_date = datetime.strptime(log["date"], "%Y-%m-%d").date()
-                # Calcular início da semana (segunda-feira)
-                week_start = log_date - timedelta(days=log_date.weekday())
-                
-                weight = log.get("value", {}).get("weight_kg", 0)
-                reps = log.get("value", {}).get("reps_done", 0)
-                volume = weight * reps
-                
-                weekly_volume[week_start] += volume
-        
         if not weekly_volume:
             return None
         
@@ -439,8 +410,8 @@ async def _generate_volume_chart(all_logs: List[Dict[str, Any]], days: int) -> O
 
 async def _calculate_key_metrics(
     weight_progress: List[WeightDataPoint],
-    strength_progress: List[StrengthDataPoint],
-    all_logs: List[Dict[str, Any]],
+    exercise_summary: List[Dict[str, Any]],
+    log_stats: Dict[str, Any],
     days: int
 ) -> List[ProgressMetric]:
     """Calcula métricas principais de progresso"""
@@ -469,49 +440,37 @@ async def _calculate_key_metrics(
             ))
         
         # Métrica de força (exercício com maior progresso)
-        if strength_progress:
-            exercise_progress = defaultdict(list)
-            for point in strength_progress:
-                exercise_progress[point.exercise_id].append(point)
-            
-            best_progress = None
-            best_improvement = 0
-            
-            for exercise_id, points in exercise_progress.items():
-                if len(points) >= 2:
-                    points.sort(key=lambda x: x.date)
-                    first_weight = points[0].max_weight_kg
-                    last_weight = points[-1].max_weight_kg
-                    improvement = last_weight - first_weight
-                    
-                    if improvement > best_improvement:
-                        best_improvement = improvement
-                        best_progress = {
-                            "name": points[-1].exercise_name,
-                            "first": first_weight,
-                            "last": last_weight,
-                            "change": improvement
-                        }
+        best_progress = None
+        best_improvement = 0
+        
+        for exercise in exercise_summary:
+            if exercise["points"] >= 2:
+                improvement = exercise["last_max_weight_kg"] - exercise["first_max_weight_kg"]
+                if improvement > best_improvement:
+                    best_improvement = improvement
+                    best_progress = {
+                        "name": exercise["exercise_name"],
+                        "first": exercise["first_max_weight_kg"],
+                        "last": exercise["last_max_weight_kg"],
+                        "change": improvement
+                    }
+        
+        if best_progress:
+            change_percentage = (best_progress["change"] / best_progress["first"] * 100) if best_progress["first"] > 0 else 0
             
-            if best_progress:
-                change_percentage = (best_progress["change"] / best_progress["first"] * 100) if best_progress["first"] > 0 else 0
-                
-                metrics.append(ProgressMetric(
-                    metric_name=f"Força - {best_progress['name']}",
-                    current_value=best_progress["last"],
-                    previous_value=best_progress["first"],
-                    change_value=best_progress["change"],
-                    change_percentage=change_percentage,
-                    trend=TrendDirection.UP if best_progress["change"] > 0 else TrendDirection.STABLE,
-                    unit="kg",
-                    last_updated=datetime.utcnow()
-                ))
+            metrics.append(ProgressMetric(
+                metric_name=f"Força - {best_progress['name']}",
+                current_value=best_progress["last"],
+                previous_value=best_progress["first"],
+                change_value=best_progress["change"],
+                change_percentage=change_percentage,
+                trend=TrendDirection.UP if best_progress["change"] > 0 else TrendDirection.STABLE,
+                unit="kg",
+                last_updated=datetime.utcnow()
+            ))
         
         # Métrica de consistência
-        workout_days = len(set(
-            log["date"] for log in all_logs 
-            if log.get("log_type") in ["set", "workout_session"]
-        ))
+        workout_days = log_stats["workout_days"]
         
         consistency_percentage = (workout_days / days * 100) if days > 0 else 0
         
@@ -535,8 +494,8 @@ async def _calculate_key_metrics(
 
 async def _identify_achievements(
     weight_progress: List[WeightDataPoint],
-    strength_progress: List[StrengthDataPoint],
-    all_logs: List[Dict[str, Any]],
+    exercise_summary: List[Dict[str, Any]],
+    log_stats: Dict[str, Any],
     days: int
 ) -> List[str]:
     """Identifica conquistas do período"""
@@ -554,25 +513,19 @@ async def _identify_achievements(
                     achievements.append(f"💪 Ganhou {weight_change:.1f}kg no período!")
         
         # Conquista de força
-        exercise_improvements = defaultdict(list)
-        for point in strength_progress:
-            exercise_improvements[point.exercise_id].append(point.max_weight_kg)
-        
-        for exercise_id, weights in exercise_improvements.items():
-            if len(weights) >= 2:
-                improvement = max(weights) - min(weights)
+        for exercise in exercise_summary:
+            if exercise["points"] >= 2:
+                improvement = exercise["highest_max_weight_kg"] - exercise["lowest_max_weight_kg"]
                 if improvement >= 5.0:  # Melhoria significativa
-                    exercise_name = next(
-                        (p.exercise_name for p in strength_progress if p.exercise_id == exercise_id),
-                        "Exercício"
-                    )
-                    achievements.append(f"🏋️ Aumentou {improvement:.1f}kg no {exercise_name}!")
+                    achievements.append(f"🏋️ Aumentou {improvement:.1f}kg no {exercise['exercise_name']}!")
+        
+        # Conquista de recordes pessoais
+        personal_records = sum(exercise["personal_records"] for exercise in exercise_summary)
+        if personal_records > 0:
+            achievements.append(f"🏆 Bateu {personal_records} recorde(s) pessoal(is) de carga!")
         
         # Conquista de consistência
-        workout_days = len(set(
-            log["date"] for log in all_logs 
-            if log.get("log_type") in ["set", "workout_session"]
-        ))
+        workout_days = log_stats["workout_days"]
         
         if workout_days >= days * 0.8:  # 80% de consistência
             achievements.append(f"🔥 Treinou {workout_days} de {days} dias - Excelente consistência!")
@@ -580,12 +533,12 @@ async def _identify_achievements(
             achievements.append(f"👏 Treinou {workout_days} de {days} dias - Boa consistência!")
         
         # Conquista de volume
-        total_sets = len([log for log in all_logs if log.get("log_type") == "set"])
+        total_sets = log_stats["total_sets"]
         if total_sets >= 100:
             achievements.append(f"💯 Completou {total_sets} séries no período!")
         
         # Conquista de refeições
-        meal_logs = len([log for log in all_logs if log.get("log_type") == "meal_checkin"])
+        meal_logs = log_stats["meal_logs"]
         if meal_logs >= days * 3:  # Pelo menos 3 refeições por dia em média
             achievements.append("🍽️ Manteve excelente disciplina alimentar!")
         
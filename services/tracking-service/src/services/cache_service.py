@@ -3,9 +3,9 @@ Serviço de cache para otimização de performance
 """
 
 import json
+import uuid
 import asyncio
-from typing import Any, Optional, Dict
-from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Optional, Dict, List
 import structlog
 
 try:
@@ -15,9 +15,33 @@ except ImportError:
     REDIS_AVAILABLE = False
 
 from config.settings import get_settings
+from services.memory_cache import LRUMemoryCache
 
 logger = structlog.get_logger(__name__)
 
+# Libera o lock somente se ainda pertencer a quem o adquiriu
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# Remove as chaves registradas no conjunto do usuário e o próprio conjunto
+_INVALIDATE_TAG_SCRIPT = """
+local keys = redis.call("smembers", KEYS[1])
+for i = 1, #keys, 500 do
+    redis.call("del", unpack(keys, i, math.min(i + 499, #keys)))
+end
+redis.call("del", KEYS[1])
+return #keys
+"""
+
+
+def user_tag_key(user_id: str) -> str:
+    """Conjunto Redis com as chaves de cache de um usuário"""
+    return f"user_keys:{user_id}"
+
 
 class CacheService:
     """Serviço de cache com fallback para cache em memória"""
@@ -25,10 +49,17 @@ class CacheService:
     def __init__(self):
         self.settings = get_settings()
         self.redis_client: Optional[aioredis.Redis] = None
-        self.memory_cache: Dict[str, Dict[str, Any]] = {}
+        self.memory_cache = LRUMemoryCache(
+            max_bytes=self.settings.cache_memory_max_bytes,
+            max_entries=self.settings.cache_memory_max_entries
+        )
         self.use_redis = REDIS_AVAILABLE and self.settings.redis_url is not None
         self.default_ttl = self.settings.cache_ttl_seconds
         
+        # Single-flight: cálculos em andamento por chave neste processo
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.single_flight_stats = {"computed": 0, "coalesced": 0, "lock_waits": 0}
+        
     async def initialize(self):
         """Inicializa o serviço de cache"""
         try:
@@ -91,15 +122,8 @@ class CacheService:
                 if value:
                     return json.loads(value)
             else:
-                # Usar cache em memória
-                cache_entry = self.memory_cache.get(key)
-                if cache_entry:
-                    # Verificar se não expirou
-                    if datetime.utcnow() < cache_entry["expires_at"]:
-                        return cache_entry["value"]
-                    else:
-                        # Remover entrada expirada
-                        del self.memory_cache[key]
+                # Usar cache em memória (LRU com expiração)
+                return self.memory_cache.get(key)
             
             return None
             
@@ -111,7 +135,8 @@ class CacheService:
         self, 
         key: str, 
         value: Any, 
-        ttl_seconds: Optional[int] = None
+        ttl_seconds: Optional[int] = None,
+        user_id: Optional[str] = None
     ) -> bool:
         """
         Armazena valor no cache
@@ -120,6 +145,7 @@ class CacheService:
             key: Chave do cache
             value: Valor a armazenar
             ttl_seconds: Tempo de vida em segundos (opcional)
+            user_id: Usuário dono da chave, para invalidação por usuário (opcional)
             
         Returns:
             bool: True se armazenado com sucesso
@@ -128,23 +154,15 @@ class CacheService:
             ttl = ttl_seconds or self.default_ttl
             
             if self.use_redis and self.redis_client:
-                # Usar Redis
-                await self.redis_client.setex(
-                    key, 
-                    ttl, 
-                    json.dumps(value, default=str)
-                )
+                # Usar Redis (valor e registro no conjunto do usuário em um round-trip)
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.setex(key, ttl, json.dumps(value, default=str))
+                self._tag_key(pipe, key, ttl, user_id)
+                await pipe.execute()
             else:
                 # Usar cache em memória
-                expires_at = datetime.utcnow() + timedelta(seconds=ttl)
-                self.memory_cache[key] = {
-                    "value": value,
-                    "expires_at": expires_at
-                }
-                
-                # Limpar cache em memória se ficar muito grande
-                if len(self.memory_cache) > 1000:
-                    await self._cleanup_memory_cache()
+                if not self.memory_cache.set(key, value, ttl, user_id=user_id):
+                    return False
             
             logger.debug("Valor armazenado no cache", key=key, ttl=ttl)
             return True
@@ -153,6 +171,118 @@ class CacheService:
             logger.error("Erro ao armazenar no cache", key=key, error=str(e))
             return False
     
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        Obtém vários valores em um único round-trip (MGET)
+        
+        Args:
+            keys: Chaves do cache
+            
+        Returns:
+            Dict: Valores encontrados, indexados pela chave (ausentes são omitidos)
+        """
+        if not keys:
+            return {}
+        
+        try:
+            if self.use_redis and self.redis_client:
+                raw_values = await self.redis_client.mget(keys)
+                return {
+                    key: json.loads(raw)
+                    for key, raw in zip(keys, raw_values)
+                    if raw
+                }
+            
+            found = {}
+            for key in keys:
+                value = self.memory_cache.get(key)
+                if value is not None:
+                    found[key] = value
+            return found
+            
+        except Exception as e:
+            logger.error("Erro ao obter múltiplas chaves do cache", keys=len(keys), error=str(e))
+            return {}
+    
+    async def set_many(
+        self,
+        items: Dict[str, Any],
+        ttl_seconds: Optional[int] = None,
+        user_id: Optional[str] = None
+    ) -> bool:
+        """
+        Armazena vários valores em um único round-trip (pipeline)
+        
+        Args:
+            items: Valores indexados pela chave
+            ttl_seconds: Tempo de vida em segundos (opcional)
+            user_id: Usuário dono das chaves (opcional)
+            
+        Returns:
+            bool: True se armazenados com sucesso
+        """
+        if not items:
+            return True
+        
+        try:
+            ttl = ttl_seconds or self.default_ttl
+            
+            if self.use_redis and self.redis_client:
+                pipe = self.redis_client.pipeline(transaction=False)
+                for key, value in items.items():
+                    pipe.setex(key, ttl, json.dumps(value, default=str))
+                self._tag_key(pipe, list(items), ttl, user_id)
+                await pipe.execute()
+            else:
+                for key, value in items.items():
+                    self.memory_cache.set(key, value, ttl, user_id=user_id)
+            
+            logger.debug("Valores armazenados no cache", keys=len(items), ttl=ttl)
+            return True
+            
+        except Exception as e:
+            logger.error("Erro ao armazenar múltiplas chaves no cache", keys=len(items), error=str(e))
+            return False
+    
+    def _tag_key(self, pipe, keys, ttl: int, user_id: Optional[str]):
+        """Registra as chaves no conjunto do usuário (no mesmo pipeline)"""
+        if not user_id:
+            return
+        if isinstance(keys, str):
+            keys = [keys]
+        tag = user_tag_key(user_id)
+        pipe.sadd(tag, *keys)
+        # O conjunto vive ao menos tanto quanto a chave mais longa registrada
+        pipe.expire(tag, max(ttl, self.settings.cache_user_tag_ttl_seconds))
+    
+    async def replace(self, key: str, value: Any) -> bool:
+        """
+        Substitui o valor de uma chave existente, mantendo o TTL restante
+        
+        Usado para atualizar entradas em cache sem estender sua validade nem
+        recriar chaves que já expiraram.
+        
+        Args:
+            key: Chave do cache
+            value: Novo valor
+            
+        Returns:
+            bool: True se a chave existia e foi atualizada
+        """
+        try:
+            if self.use_redis and self.redis_client:
+                # SET XX KEEPTTL: só grava se a chave existe e preserva o prazo
+                replaced = await self.redis_client.set(
+                    key, json.dumps(value, default=str), xx=True, keepttl=True
+                )
+                return bool(replaced)
+            
+            return self.memory_cache.replace(key, value)
+            
+        except Exception as e:
+            logger.error("Erro ao substituir valor no cache", key=key, error=str(e))
+            return False
+    
     async def delete(self, key: str) -> bool:
         """
         Remove valor do cache
@@ -169,7 +299,7 @@ class CacheService:
                 await self.redis_client.delete(key)
             else:
                 # Usar cache em memória
-                self.memory_cache.pop(key, None)
+                self.memory_cache.delete(key)
             
             logger.debug("Valor removido do cache", key=key)
             return True
@@ -192,11 +322,7 @@ class CacheService:
             if self.use_redis and self.redis_client:
                 return bool(await self.redis_client.exists(key))
             else:
-                cache_entry = self.memory_cache.get(key)
-                if cache_entry:
-                    # Verificar se não expirou
-                    return datetime.utcnow() < cache_entry["expires_at"]
-                return False
+                return key in self.memory_cache
                 
         except Exception as e:
             logger.error("Erro ao verificar existência no cache", key=key, error=str(e))
@@ -206,6 +332,9 @@ class CacheService:
         """
         Remove todas as chaves que correspondem ao padrão
         
+        Usa SCAN incremental no Redis (não bloqueia a instância como KEYS),
+        mas ainda percorre todo o keyspace: prefira invalidate_user_cache.
+        
         Args:
             pattern: Padrão de chaves (ex: "user:123:*")
             
@@ -217,19 +346,17 @@ class CacheService:
             
             if self.use_redis and self.redis_client:
                 # Usar Redis
-                keys = await self.redis_client.keys(pattern)
-                if keys:
-                    count = await self.redis_client.delete(*keys)
+                batch = []
+                async for key in self.redis_client.scan_iter(match=pattern, count=500):
+                    batch.append(key)
+                    if len(batch) >= 500:
+                        count += await self.redis_client.delete(*batch)
+                        batch = []
+                if batch:
+                    count += await self.redis_client.delete(*batch)
             else:
                 # Usar cache em memória
-                import fnmatch
-                keys_to_remove = [
-                    key for key in self.memory_cache.keys()
-                    if fnmatch.fnmatch(key, pattern)
-                ]
-                for key in keys_to_remove:
-                    del self.memory_cache[key]
-                count = len(keys_to_remove)
+                count = self.memory_cache.clear_pattern(pattern)
             
             logger.info("Chaves removidas por padrão", pattern=pattern, count=count)
             return count
@@ -238,28 +365,134 @@ class CacheService:
             logger.error("Erro ao limpar por padrão", pattern=pattern, error=str(e))
             return 0
     
-    async def _cleanup_memory_cache(self):
-        """Limpa entradas expiradas do cache em memória"""
-        try:
-            now = datetime.utcnow()
-            expired_keys = [
-                key for key, entry in self.memory_cache.items()
-                if now >= entry["expires_at"]
-            ]
-            
-            for key in expired_keys:
-                del self.memory_cache[key]
-            
-            logger.debug("Cache em memória limpo", expired_count=len(expired_keys))
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        ttl_seconds: Optional[int] = None,
+        user_id: Optional[str] = None
+    ) -> Any:
+        """
+        Obtém valor do cache ou calcula uma única vez para requisições concorrentes
+        
+        Misses simultâneos para a mesma chave aguardam o mesmo cálculo em vez de
+        repetir as consultas. Com Redis, um lock (SET NX) coordena as instâncias:
+        quem não obtém o lock aguarda o valor aparecer no cache.
+        
+        Args:
+            key: Chave do cache
+            compute: Função assíncrona que calcula o valor
+            ttl_seconds: Tempo de vida em segundos (opcional)
+            user_id: Usuário dono da chave (opcional)
             
+        Returns:
+            Any: Valor do cache ou calculado
+        """
+        value = await self.get(key)
+        if value is not None:
+            logger.debug("Valor obtido do cache", key=key)
+            return value
+        
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._compute_and_store(key, compute, ttl_seconds, user_id))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.single_flight_stats["coalesced"] += 1
+            logger.debug("Aguardando cálculo em andamento", key=key)
+        
+        # shield: o cancelamento de uma requisição não cancela o cálculo compartilhado
+        return await asyncio.shield(task)
+    
+    async def wait_inflight(self, key: str):
+        """
+        Aguarda o cálculo em andamento neste processo para a chave, se houver
+    
+        Quem vai atualizar uma entrada chama antes desta: um cálculo que leu os
+        dados antes da escrita gravaria o valor antigo depois da atualização.
+        Falhas do cálculo ficam com quem o iniciou; o cancelamento de quem
+        aguarda não cancela o cálculo.
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            await asyncio.wait({task})
+    
+    async def _compute_and_store(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        ttl_seconds: Optional[int],
+        user_id: Optional[str] = None
+    ) -> Any:
+        """Calcula o valor (sob lock distribuído, se disponível) e armazena no cache"""
+        lock_key = f"lock:{key}"
+        token = None
+        
+        if self.use_redis and self.redis_client and self.settings.cache_lock_enabled:
+            token = uuid.uuid4().hex
+            acquired = await self._acquire_lock(lock_key, token)
+            if not acquired:
+                # Outra instância está calculando: aguardar o resultado
+                self.single_flight_stats["lock_waits"] += 1
+                value = await self._wait_for_value(key)
+                if value is not None:
+                    return value
+                token = None
+        
+        try:
+            value = await compute()
+            self.single_flight_stats["computed"] += 1
+            await self.set(key, value, ttl_seconds=ttl_seconds, user_id=user_id)
+            return value
+        finally:
+            if token:
+                await self._release_lock(lock_key, token)
+    
+    async def _acquire_lock(self, lock_key: str, token: str) -> bool:
+        """Tenta adquirir o lock distribuído (falha aberta se o Redis falhar)"""
+        try:
+            return bool(await self.redis_client.set(
+                lock_key, token, nx=True, ex=self.settings.cache_lock_ttl_seconds
+            ))
+        except Exception as e:
+            logger.warning("Erro ao adquirir lock do cache", key=lock_key, error=str(e))
+            return True
+    
+    async def _release_lock(self, lock_key: str, token: str):
+        """Libera o lock distribuído"""
+        try:
+            await self.redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
         except Exception as e:
-            logger.error("Erro ao limpar cache em memória", error=str(e))
+            logger.warning("Erro ao liberar lock do cache", key=lock_key, error=str(e))
+    
+    async def _wait_for_value(self, key: str) -> Optional[Any]:
+        """Aguarda outra instância gravar o valor, até o tempo máximo de espera"""
+        poll_interval = 0.05
+        waited = 0.0
+        while waited < self.settings.cache_lock_wait_seconds:
+            await asyncio.sleep(poll_interval)
+            waited += poll_interval
+            value = await self.get(key)
+            if value is not None:
+                return value
+        
+        logger.warning("Tempo de espera pelo lock esgotado", key=key)
+        return None
+    
+    def metrics(self) -> Dict[str, Any]:
+        """Estatísticas do cache para /metrics"""
+        return {
+            "backend": "redis" if self.use_redis and self.redis_client else "memory",
+            "memory": self.memory_cache.metrics(),
+            "single_flight": dict(self.single_flight_stats)
+        }
     
     # Métodos específicos para o tracking service
     
     async def get_dashboard_cache(self, user_id: str, date: str) -> Optional[Dict[str, Any]]:
         """Obtém dashboard do cache"""
-        key = f"dashboard:{user_id}:{date}"
+        key = self.dashboard_key(user_id, date)
         return await self.get(key)
     
     async def set_dashboard_cache(
@@ -269,13 +502,23 @@ class CacheService:
         dashboard_data: Dict[str, Any]
     ) -> bool:
         """Armazena dashboard no cache"""
-        key = f"dashboard:{user_id}:{date}"
+        key = self.dashboard_key(user_id, date)
         # Cache de dashboard por 5 minutos
-        return await self.set(key, dashboard_data, ttl_seconds=300)
+        return await self.set(key, dashboard_data, ttl_seconds=300, user_id=user_id)
+    
+    async def get_or_compute_dashboard(
+        self,
+        user_id: str,
+        date: str,
+        compute: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """Obtém dashboard do cache ou calcula uma única vez"""
+        key = self.dashboard_key(user_id, date)
+        return await self.get_or_compute(key, compute, ttl_seconds=300, user_id=user_id)
     
     async def get_progress_cache(self, user_id: str, days: int) -> Optional[Dict[str, Any]]:
         """Obtém dados de progresso do cache"""
-        key = f"progress:{user_id}:{days}"
+        key = self.progress_key(user_id, days)
         return await self.get(key)
     
     async def set_progress_cache(
@@ -285,14 +528,59 @@ class CacheService:
         progress_data: Dict[str, Any]
     ) -> bool:
         """Armazena dados de progresso no cache"""
-        key = f"progress:{user_id}:{days}"
+        key = self.progress_key(user_id, days)
         # Cache de progresso por 15 minutos
-        return await self.set(key, progress_data, ttl_seconds=900)
+        return await self.set(key, progress_data, ttl_seconds=900, user_id=user_id)
+    
+    async def get_or_compute_progress(
+        self,
+        user_id: str,
+        days: int,
+        compute: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """Obtém dados de progresso do cache ou calcula uma única vez"""
+        key = self.progress_key(user_id, days)
+        return await self.get_or_compute(key, compute, ttl_seconds=900, user_id=user_id)
     
     async def invalidate_user_cache(self, user_id: str) -> int:
-        """Invalida todo o cache de um usuário"""
-        pattern = f"*:{user_id}:*"
-        return await self.clear_pattern(pattern)
+        """
+        Invalida todo o cache de um usuário
+        
+        Remove apenas as chaves registradas para o usuário (conjunto Redis
+        user_keys:{user_id} ou índice em memória), sem varrer o keyspace.
+        """
+        try:
+            if self.use_redis and self.redis_client:
+                count = await self.redis_client.eval(
+                    _INVALIDATE_TAG_SCRIPT, 1, user_tag_key(user_id)
+                )
+            else:
+                count = self.memory_cache.invalidate_user(user_id)
+            
+            logger.info("Cache do usuário invalidado", user_id=user_id, count=count)
+            return count
+            
+        except Exception as e:
+            logger.error("Erro ao invalidar cache do usuário", user_id=user_id, error=str(e))
+            return 0
+    
+    async def get_user_keys(self, user_id: str, prefix: str = "") -> List[str]:
+        """
+        Lista as chaves registradas para o usuário, opcionalmente por prefixo
+        
+        Lê o conjunto user_keys:{user_id} (ou o índice em memória); chaves
+        já expiradas podem aparecer no Redis até o conjunto expirar.
+        """
+        try:
+            if self.use_redis and self.redis_client:
+                keys = await self.redis_client.smembers(user_tag_key(user_id))
+                return [key for key in keys if key.startswith(prefix)]
+            
+            return self.memory_cache.user_keys(user_id, prefix)
+            
+        except Exception as e:
+            logger.error("Erro ao listar chaves do usuário", user_id=user_id, error=str(e))
+            return []
     
     async def get_service_data_cache(
         self, 
@@ -301,8 +589,7 @@ class CacheService:
         user_id: str
     ) -> Optional[Dict[str, Any]]:
         """Obtém dados de serviço do cache"""
-        key = f"service:{service}:{endpoint}:{user_id}"
-        return await self.get(key)
+        return await self.get(self.service_data_key(service, endpoint, user_id))
     
     async def set_service_data_cache(
         self,
@@ -313,6 +600,21 @@ class CacheService:
         ttl_seconds: int = 300
     ) -> bool:
         """Armazena dados de serviço no cache"""
-        key = f"service:{service}:{endpoint}:{user_id}"
-        return await self.set(key, data, ttl_seconds=ttl_seconds)
+        key = self.service_data_key(service, endpoint, user_id)
+        return await self.set(key, data, ttl_seconds=ttl_seconds, user_id=user_id)
+    
+    @staticmethod
+    def dashboard_key(user_id: str, date: str) -> str:
+        """Chave de cache do dashboard de um dia"""
+        return f"dashboard:{user_id}:{date}"
+    
+    @staticmethod
+    def progress_key(user_id: str, days: int) -> str:
+        """Chave de cache da análise de progresso de um período"""
+        return f"progress:{user_id}:{days}"
+    
+    @staticmethod
+    def service_data_key(service: str, endpoint: str, user_id: str) -> str:
+        """Chave de cache para dados de outro serviço"""
+        return f"service:{service}:{endpoint}:{user_id}"
 
@@ -105,25 +105,56 @@ class CalorieService:
         Returns:
             Dict: Balanço energético detalhado
         """
-        try:
-            # Inicializar contadores
-            calories_consumed = 0.0
-            calories_burned_exercise = 0.0
-            
-            # Processar logs do dia
-            for log in daily_logs:
-                log_type = log.get("log_type")
-                log_value = log.get("value", {})
-                
-                if log_type == "meal_checkin":
-                    # Somar calorias consumidas
-                    nutritional = log_value.get("nutritional_summary", {})
-                    calories_consumed += nutritional.get("total_calories", 0)
-                
-                elif log_type == "workout_session":
-                    # Somar calorias queimadas em exercícios
-                    calories_burned_exercise += log_value.get("calories_burned", 0)
+        # Processar logs do dia
+        calories_consumed = 0.0
+        calories_burned_exercise = 0.0
+        
+        for log in daily_logs:
+            log_type = log.get("log_type")
+            log_value = log.get("value", {})
+            
+            if log_type == "meal_checkin":
+                # Somar calorias consumidas
+                nutritional = log_value.get("nutritional_summary", {})
+                calories_consumed += nutritional.get("total_calories", 0)
+            
+            elif log_type == "workout_session":
+                # Somar calorias queimadas em exercícios
+                calories_burned_exercise += log_value.get("calories_burned", 0)
+        
+        return await self.calculate_energy_balance_from_totals(
+            user_id=user_id,
+            target_date=target_date,
+            user_bmr=user_bmr,
+            user_tdee=user_tdee,
+            calories_consumed=calories_consumed,
+            calories_burned_exercise=calories_burned_exercise
+        )
+    
+    async def calculate_energy_balance_from_totals(
+        self,
+        user_id: str,
+        target_date: date,
+        user_bmr: float,
+        user_tdee: float,
+        calories_consumed: float,
+        calories_burned_exercise: float
+    ) -> Dict[str, Any]:
+        """
+        Calcula o balanço energético do dia a partir dos totais já agregados
+        
+        Args:
+            user_id: ID do usuário
+            target_date: Data alvo
+            user_bmr: Taxa metabólica basal
+            user_tdee: Gasto energético total diário
+            calories_consumed: Calorias consumidas no dia
+            calories_burned_exercise: Calorias gastas em exercícios no dia
             
+        Returns:
+            Dict: Balanço energético detalhado
+        """
+        try:
             # Calcular gasto total
             calories_out_total = user_tdee + calories_burned_exercise
             
@@ -0,0 +1,120 @@
+"""
+Circuit breaker para chamadas a outros microserviços
+"""
+
+import time
+from typing import Any, Dict
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Circuito aberto: a chamada foi rejeitada sem acessar o serviço"""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker por serviço (closed -> open -> half_open)
+
+    Após failure_threshold falhas consecutivas o circuito abre e as chamadas
+    falham imediatamente. Passado recovery_timeout, uma chamada de teste é
+    liberada (half_open): sucesso fecha o circuito, falha reabre. Uma chamada
+    de teste que termina sem resultado (cancelada, erro inesperado) devolve a
+    vaga com release_call; se ainda assim o half_open durar mais que
+    recovery_timeout, uma nova chamada de teste é liberada.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_since = 0.0
+        self._half_open_calls = 0
+
+        self.opened_total = 0
+        self.rejected_total = 0
+
+    @property
+    def state(self) -> str:
+        """Estado atual, promovendo open -> half_open após o tempo de recuperação"""
+        now = time.monotonic()
+        if self._state == self.OPEN and now - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._half_open_since = now
+            self._half_open_calls = 0
+        elif self._state == self.HALF_OPEN and now - self._half_open_since >= self.recovery_timeout:
+            # Chamada de teste sem resultado há tempo demais: liberar outra
+            self._half_open_since = now
+            self._half_open_calls = 0
+        return self._state
+
+    def before_call(self):
+        """
+        Verifica se a chamada pode prosseguir
+
+        Raises:
+            CircuitOpenError: Se o circuito estiver aberto
+        """
+        state = self.state
+        if state == self.CLOSED:
+            return
+
+        if state == self.HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+            self._half_open_calls += 1
+            return
+
+        self.rejected_total += 1
+        raise CircuitOpenError(f"Circuito aberto para {self.name}")
+
+    def release_call(self):
+        """Devolve a vaga de teste de uma chamada que terminou sem sucesso nem falha"""
+        if self._state == self.HALF_OPEN and self._half_open_calls > 0:
+            self._half_open_calls -= 1
+
+    def record_success(self):
+        """Registra sucesso: fecha o circuito"""
+        if self._state != self.CLOSED:
+            logger.info("Circuito fechado", service=self.name)
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._half_open_calls = 0
+
+    def record_failure(self):
+        """Registra falha: abre o circuito ao atingir o limite (ou em half_open)"""
+        self._consecutive_failures += 1
+
+        if self._state == self.HALF_OPEN or (
+            self._state == self.CLOSED and self._consecutive_failures >= self.failure_threshold
+        ):
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+            self.opened_total += 1
+            logger.warning("Circuito aberto",
+                          service=self.name,
+                          consecutive_failures=self._consecutive_failures,
+                          recovery_timeout=self.recovery_timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado e contadores do circuito"""
+        return {
+            "state": self.state,
+            "consecutive_failures": self._consecutive_failures,
+            "opened_total": self.opened_total,
+            "rejected_total": self.rejected_total
+        }
@@ -0,0 +1,201 @@
+"""
+Rollup diário por usuário (coleção daily_rollups)
+
+Cada documento acumula os totais de um usuário em um dia (calorias, macros,
+água, séries, volume e sessões de treino). Os totais são mantidos na escrita
+pelo FirebaseService, dentro da mesma transação que grava o log, de modo que
+o dashboard lê um único documento em vez de todos os logs do dia.
+"""
+
+from datetime import date
+from typing import Any, Dict, List, Optional, Union
+
+ROLLUP_COLLECTION = "daily_rollups"
+ROLLUP_SCHEMA_VERSION = 1
+
+# Totais numéricos somados diretamente
+_NUMERIC_FIELDS = (
+    "calories",
+    "protein",
+    "carbs",
+    "fat",
+    "water_ml",
+    "sets_count",
+    "volume_kg",
+    "workout_sessions",
+    "workout_duration_minutes",
+    "calories_burned",
+    "logs_count",
+)
+
+# Contadores por chave (permitem desfazer a contribuição de um log removido)
+_COUNTER_FIELDS = ("meal_types", "exercise_ids")
+
+
+def rollup_doc_id(user_id: str, target_date: Union[date, str]) -> str:
+    """ID determinístico do rollup de um usuário em um dia"""
+    date_str = target_date.isoformat() if isinstance(target_date, date) else target_date
+    return f"{user_id}_{date_str}"
+
+
+def empty_rollup(user_id: str, target_date: Union[date, str]) -> Dict[str, Any]:
+    """Cria um rollup zerado"""
+    date_str = target_date.isoformat() if isinstance(target_date, date) else target_date
+    rollup: Dict[str, Any] = {
+        "user_id": user_id,
+        "date": date_str,
+        "schema_version": ROLLUP_SCHEMA_VERSION,
+    }
+    for field in _NUMERIC_FIELDS:
+        rollup[field] = 0
+    for field in _COUNTER_FIELDS:
+        rollup[field] = {}
+    return rollup
+
+
+def log_contribution(log: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Calcula a contribuição de um log para o rollup do seu dia
+
+    Args:
+        log: Documento do log (como salvo em daily_logs)
+
+    Returns:
+        Dict: Deltas numéricos e contadores por chave
+    """
+    contribution: Dict[str, Any] = {"logs_count": 1, "meal_types": {}, "exercise_ids": {}}
+    log_type = log.get("log_type")
+    value = log.get("value") or {}
+
+    if log_type == "meal_checkin":
+        nutritional = value.get("nutritional_summary") or {}
+        contribution["calories"] = nutritional.get("total_calories") or 0
+        contribution["protein"] = nutritional.get("total_protein") or 0
+        contribution["carbs"] = nutritional.get("total_carbs") or 0
+        contribution["fat"] = nutritional.get("total_fat") or 0
+        meal_type = value.get("meal_type")
+        if meal_type:
+            contribution["meal_types"][meal_type] = 1
+
+    elif log_type == "water_intake":
+        contribution["water_ml"] = value.get("amount_ml") or 0
+
+    elif log_type == "set":
+        contribution["sets_count"] = 1
+        contribution["volume_kg"] = (value.get("weight_kg") or 0) * (value.get("reps_done") or 0)
+        exercise_id = value.get("exercise_id")
+        if exercise_id:
+            contribution["exercise_ids"][exercise_id] = 1
+
+    elif log_type == "workout_session":
+        contribution["workout_sessions"] = 1
+        contribution["workout_duration_minutes"] = value.get("duration_minutes") or 0
+        contribution["calories_burned"] = value.get("calories_burned") or 0
+        for exercise_id in value.get("exercises_performed") or []:
+            contribution["exercise_ids"][exercise_id] = contribution["exercise_ids"].get(exercise_id, 0) + 1
+
+    return contribution
+
+
+def apply_contribution(
+    rollup: Dict[str, Any],
+    contribution: Dict[str, Any],
+    sign: int = 1
+) -> Dict[str, Any]:
+    """
+    Soma (sign=1) ou subtrai (sign=-1) a contribuição de um log do rollup
+
+    Contadores que chegam a zero são removidos, e os totais nunca ficam
+    negativos (protege contra logs anteriores ao rollup). A revisão cresce a
+    cada aplicação, o que permite a quem guarda uma cópia saber se ela já
+    inclui uma escrita.
+    """
+    rollup["revision"] = (rollup.get("revision") or 0) + 1
+    for field in _NUMERIC_FIELDS:
+        delta = contribution.get(field, 0)
+        if delta:
+            rollup[field] = max(0, (rollup.get(field) or 0) + sign * delta)
+
+    for field in _COUNTER_FIELDS:
+        counters = dict(rollup.get(field) or {})
+        for key, count in contribution.get(field, {}).items():
+            new_count = counters.get(key, 0) + sign * count
+            if new_count > 0:
+                counters[key] = new_count
+            else:
+                counters.pop(key, None)
+        rollup[field] = counters
+
+    return rollup
+
+
+def sum_contributions(contributions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Soma as contribuições de vários logs em uma só (ex.: um lote de escrita)"""
+    total: Dict[str, Any] = {field: {} for field in _COUNTER_FIELDS}
+    for contribution in contributions:
+        for field in _NUMERIC_FIELDS:
+            delta = contribution.get(field, 0)
+            if delta:
+                total[field] = total.get(field, 0) + delta
+        for field in _COUNTER_FIELDS:
+            counters = total[field]
+            for key, count in contribution.get(field, {}).items():
+                counters[key] = counters.get(key, 0) + count
+    return total
+
+
+def contribution_fields(contribution: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Deltas não nulos de uma contribuição, por campo do rollup
+
+    Contadores viram mapas aninhados ({"meal_types": {"almoco": 1}}), no
+    formato esperado por um set(merge=True) com incrementos do Firestore.
+    """
+    fields: Dict[str, Any] = {}
+    for field in _NUMERIC_FIELDS:
+        delta = contribution.get(field, 0)
+        if delta:
+            fields[field] = delta
+    for field in _COUNTER_FIELDS:
+        counters = {key: count for key, count in contribution.get(field, {}).items() if count}
+        if counters:
+            fields[field] = counters
+    return fields
+
+
+def build_rollup(
+    user_id: str,
+    target_date: Union[date, str],
+    logs: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Reconstrói o rollup de um dia a partir dos seus logs"""
+    rollup = empty_rollup(user_id, target_date)
+    for log in logs:
+        apply_contribution(rollup, log_contribution(log))
+    return rollup
+
+
+def merge_log_updates(log: Dict[str, Any], updates: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Aplica em memória as atualizações de um update() do Firestore
+
+    Suporta caminhos com ponto ("value.weight_kg"), como o Firestore.
+    """
+    merged = dict(log)
+    for path, new_value in updates.items():
+        parts = path.split(".")
+        target = merged
+        for part in parts[:-1]:
+            child = target.get(part)
+            child = dict(child) if isinstance(child, dict) else {}
+            target[part] = child
+            target = child
+        target[parts[-1]] = new_value
+    return merged
+
+
+def rollup_key(log: Optional[Dict[str, Any]]) -> Optional[str]:
+    """ID do rollup afetado por um log (None se o log não tem usuário/data)"""
+    if not log or not log.get("user_id") or not log.get("date"):
+        return None
+    return rollup_doc_id(log["user_id"], log["date"])
@@ -4,26 +4,58 @@ Serviço de integração com Firebase/Firestore
 
 import os
 import json
-from typing import Optional, Dict, Any, List
+import base64
+import asyncio
+import hashlib
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
 from datetime import datetime, date
 import structlog
 
 import firebase_admin
-from firebase_admin import credentials, firestore
-from google.cloud.firestore import Client, DocumentReference, CollectionReference
+from firebase_admin import credentials, firestore, firestore_async
+from google.cloud.firestore import AsyncClient, async_transactional
+from google.cloud.firestore_v1.field_path import FieldPath
 
 from config.settings import get_settings
+from services.daily_rollup import (
+    ROLLUP_COLLECTION,
+    apply_contribution,
+    build_rollup,
+    contribution_fields,
+    log_contribution,
+    merge_log_updates,
+    rollup_doc_id,
+    rollup_key,
+    sum_contributions,
+)
+from services.streaks import (
+    STREAK_COLLECTION,
+    advance_streak,
+    compute_streak,
+    current_streak_on,
+    empty_streak,
+)
 
 logger = structlog.get_logger(__name__)
 
+# Limite de operações por lote de escrita do Firestore
+BATCH_WRITE_LIMIT = 500
+
 
 class FirebaseService:
-    """Serviço para interação com Firebase/Firestore"""
+    """
+    Serviço para interação com Firebase/Firestore
+    
+    Usa o cliente assíncrono do Firestore (gRPC asyncio), então nenhuma
+    chamada bloqueia o event loop. Um semáforo limita as operações em
+    andamento por instância (FIRESTORE_MAX_CONCURRENCY).
+    """
     
     def __init__(self):
-        self.db: Optional[Client] = None
+        self.db: Optional[AsyncClient] = None
         self.app: Optional[firebase_admin.App] = None
         self.settings = get_settings()
+        self._limit = asyncio.Semaphore(self.settings.firestore_max_concurrency)
         
     async def initialize(self):
         """Inicializa a conexão com Firebase"""
@@ -66,8 +98,8 @@ class FirebaseService:
                     'projectId': self.settings.firebase_project_id
                 })
             
-            # Obter cliente Firestore
-            self.db = firestore.client(app=self.app)
+            # Obter cliente Firestore assíncrono
+            self.db = firestore_async.client(app=self.app)
             
             logger.info("Firebase inicializado com sucesso", 
                        project_id=self.settings.firebase_project_id)
@@ -95,7 +127,9 @@ class FirebaseService:
             
             # Fazer uma query simples para testar conectividade
             test_ref = self.db.collection('_health_check').limit(1)
-            list(test_ref.stream())
+            async with self._limit:
+                async for _ in test_ref.stream():
+                    break
             
             return True
         except Exception as e:
@@ -114,6 +148,26 @@ class FirebaseService:
         Returns:
             str: ID do documento criado
         """
+        log_id, _, _ = await self.record_daily_log(log_data)
+        return log_id
+    
+    async def record_daily_log(
+        self,
+        log_data: Dict[str, Any]
+    ) -> Tuple[str, Dict[str, Any], Optional[Dict[str, Any]]]:
+        """
+        Salva um log diário e devolve também os agregados já atualizados
+        
+        O rollup do dia (daily_rollups) e, para check-ins de refeição, a
+        sequência do usuário (user_streaks) são atualizados na mesma transação.
+        
+        Args:
+            log_data: Dados do log
+            
+        Returns:
+            Tuple: ID do documento criado, rollup do dia após a escrita e
+            estado da sequência (None se o log não é um check-in de refeição)
+        """
         try:
             # Preparar dados para salvamento
             save_data = log_data.copy()
@@ -129,21 +183,215 @@ class FirebaseService:
             save_data['created_at'] = datetime.utcnow()
             save_data['updated_at'] = datetime.utcnow()
             
-            # Salvar no Firestore
+            # Salvar o log e atualizar o rollup do dia na mesma transação
             doc_ref = self.db.collection('daily_logs').document()
-            doc_ref.set(save_data)
+            rollup_ref = self._rollup_ref(save_data['user_id'], save_data['date'])
+            
+            is_meal_checkin = save_data.get('log_type') == 'meal_checkin'
+            streak_ref = self._streak_ref(save_data['user_id'])
+            
+            @async_transactional
+            async def _save(transaction):
+                rollup = await self._read_rollup(
+                    transaction, rollup_ref, save_data['user_id'], save_data['date']
+                )
+                apply_contribution(rollup, log_contribution(save_data))
+                
+                streak = None
+                if is_meal_checkin:
+                    streak = await self._read_streak(transaction, save_data['user_id'])
+                    advance_streak(streak, save_data['date'])
+                
+                transaction.set(doc_ref, save_data)
+                transaction.set(rollup_ref, rollup)
+                if streak is not None:
+                    transaction.set(streak_ref, streak)
+                return rollup, streak
+            
+            async with self._limit:
+                rollup, streak = await _save(self.db.transaction())
             
             logger.info("Log salvo com sucesso", 
                        log_id=doc_ref.id,
                        user_id=log_data.get('user_id'),
                        log_type=log_data.get('log_type'))
             
-            return doc_ref.id
+            return doc_ref.id, rollup, streak
             
         except Exception as e:
             logger.error("Erro ao salvar log", error=str(e), log_data=log_data)
             raise
     
+    async def record_daily_logs_bulk(
+        self,
+        user_id: str,
+        logs: List[Dict[str, Any]]
+    ) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+        """
+        Grava um lote de logs de um usuário com escritas em lote do Firestore
+        
+        Cada log traz uma 'idempotency_key' do cliente, da qual deriva o ID do
+        documento: chaves já gravadas são devolvidas como duplicadas, sem nova
+        escrita. Os logs são gravados com batch.create() em lotes de até 500
+        operações; cada lote inclui um único incremento por rollup de dia
+        afetado, de modo que logs e totais são confirmados juntos. Lotes com
+        check-ins de refeição são gravados em transação, que avança a sequência
+        com as datas do lote em ordem (só datas anteriores ao último check-in
+        gravado a marcam para recálculo).
+        
+        Args:
+            user_id: ID do usuário
+            logs: Dados dos logs, cada um com 'idempotency_key'
+            
+        Returns:
+            Tuple: Resultado por chave de idempotência ({'status', 'log_id'} ou
+            {'status': 'failed', 'error'}) e rollups dos dias gravados após a escrita
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        
+        # Preparar documentos com IDs determinísticos
+        pending = []
+        for log_data in logs:
+            save_data = log_data.copy()
+            if isinstance(save_data.get('date'), date):
+                save_data['date'] = save_data['date'].isoformat()
+            save_data['user_id'] = user_id
+            save_data['created_at'] = datetime.utcnow()
+            save_data['updated_at'] = datetime.utcnow()
+            pending.append((self._bulk_log_ref(user_id, save_data['idempotency_key']), save_data))
+        
+        # Chaves já gravadas (reenvios do cliente) em um único round-trip
+        async with self._limit:
+            existing = {snapshot.id async for snapshot in self.db.get_all([ref for ref, _ in pending])
+                        if snapshot.exists}
+        for ref, save_data in pending:
+            if ref.id in existing:
+                results[save_data['idempotency_key']] = {'status': 'duplicate', 'log_id': ref.id}
+        pending = [(ref, save_data) for ref, save_data in pending if ref.id not in existing]
+        
+        dates = sorted({save_data['date'] for _, save_data in pending})
+        await self._ensure_rollups(user_id, dates)
+        
+        # Agrupar em lotes: logs + um incremento por dia (+ marca da sequência)
+        chunks: List[List[Tuple[Any, Dict[str, Any]]]] = []
+        chunk: List[Tuple[Any, Dict[str, Any]]] = []
+        chunk_dates: set = set()
+        for ref, save_data in pending:
+            ops = len(chunk) + len(chunk_dates | {save_data['date']}) + 2
+            if chunk and ops > BATCH_WRITE_LIMIT:
+                chunks.append(chunk)
+                chunk, chunk_dates = [], set()
+            chunk.append((ref, save_data))
+            chunk_dates.add(save_data['date'])
+        if chunk:
+            chunks.append(chunk)
+        
+        written_dates = set()
+        for chunk in chunks:
+            contributions: Dict[str, List[Dict[str, Any]]] = {}
+            for ref, save_data in chunk:
+                contributions.setdefault(save_data['date'], []).append(log_contribution(save_data))
+            increments = {
+                date_str: self._increment_fields(sum_contributions(day_contributions))
+                for date_str, day_contributions in contributions.items()
+            }
+            checkin_dates = sorted({save_data['date'] for _, save_data in chunk
+                                    if save_data.get('log_type') == 'meal_checkin'})
+            
+            def _write(writer, chunk=chunk, increments=increments):
+                for ref, save_data in chunk:
+                    writer.create(ref, save_data)
+                for date_str, fields in increments.items():
+                    writer.set(self._rollup_ref(user_id, date_str), fields, merge=True)
+            
+            @async_transactional
+            async def _commit_with_streak(transaction, checkin_dates=checkin_dates, write=_write):
+                streak = await self._read_streak(transaction, user_id)
+                for checkin_date in checkin_dates:
+                    advance_streak(streak, checkin_date)
+                write(transaction)
+                transaction.set(self._streak_ref(user_id), streak)
+            
+            try:
+                async with self._limit:
+                    if checkin_dates:
+                        await _commit_with_streak(self.db.transaction())
+                    else:
+                        batch = self.db.batch()
+                        _write(batch)
+                        await batch.commit()
+                written_dates.update(contributions)
+                for ref, save_data in chunk:
+                    results[save_data['idempotency_key']] = {'status': 'created', 'log_id': ref.id}
+            except Exception as e:
+                # O lote é atômico: nenhum log nem incremento deste lote foi gravado
+                logger.error("Erro ao gravar lote de logs", 
+                            error=str(e),
+                            user_id=user_id,
+                            logs=len(chunk))
+                for ref, save_data in chunk:
+                    results[save_data['idempotency_key']] = {'status': 'failed', 'error': str(e)}
+        
+        rollups: Dict[str, Dict[str, Any]] = {}
+        if written_dates:
+            refs = [self._rollup_ref(user_id, date_str) for date_str in sorted(written_dates)]
+            async with self._limit:
+                async for snapshot in self.db.get_all(refs):
+                    if snapshot.exists:
+                        rollup = snapshot.to_dict()
+                        rollups[rollup['date']] = rollup
+        
+        logger.info("Lote de logs gravado", 
+                   user_id=user_id,
+                   received=len(logs),
+                   created=sum(1 for result in results.values() if result['status'] == 'created'),
+                   duplicates=len(existing),
+                   batches=len(chunks))
+        
+        return results, rollups
+    
+    def _bulk_log_ref(self, user_id: str, idempotency_key: str):
+        """Referência determinística de um log enviado com chave de idempotência"""
+        digest = hashlib.sha256(f"{user_id}:{idempotency_key}".encode("utf-8")).hexdigest()
+        return self.db.collection('daily_logs').document(digest)
+    
+    async def _ensure_rollups(self, user_id: str, dates: List[str]):
+        """
+        Garante que os rollups dos dias existam antes de receber incrementos
+        
+        Dias sem rollup são semeados (em transação) a partir dos logs já
+        gravados, como em record_daily_log.
+        """
+        if not dates:
+            return
+        
+        refs = [self._rollup_ref(user_id, date_str) for date_str in dates]
+        async with self._limit:
+            found = {snapshot.id async for snapshot in self.db.get_all(refs) if snapshot.exists}
+        
+        for ref, date_str in zip(refs, dates):
+            if ref.id in found:
+                continue
+            
+            @async_transactional
+            async def _seed(transaction, ref=ref, date_str=date_str):
+                rollup = await self._read_rollup(transaction, ref, user_id, date_str)
+                transaction.set(ref, rollup)
+            
+            async with self._limit:
+                await _seed(self.db.transaction())
+    
+    @staticmethod
+    def _increment_fields(contribution: Dict[str, Any]) -> Dict[str, Any]:
+        """Converte uma contribuição em incrementos atômicos do Firestore"""
+        fields = {
+            field: ({key: firestore.Increment(count) for key, count in delta.items()}
+                    if isinstance(delta, dict) else firestore.Increment(delta))
+            for field, delta in contribution_fields(contribution).items()
+        }
+        fields['revision'] = firestore.Increment(1)
+        return fields
+    
     async def get_daily_logs(
         self, 
         user_id: str, 
@@ -175,13 +423,7 @@ class FirebaseService:
             query = query.order_by('timestamp', direction=firestore.Query.DESCENDING)
             
             # Executar query
-            docs = query.stream()
-            
-            logs = []
-            for doc in docs:
-                log_data = doc.to_dict()
-                log_data['log_id'] = doc.id
-                logs.append(log_data)
+            logs = await self._stream(query)
             
             logger.info("Logs obtidos com sucesso", 
                        user_id=user_id,
@@ -231,13 +473,7 @@ class FirebaseService:
             query = query.order_by('date').order_by('timestamp')
             
             # Executar query
-            docs = query.stream()
-            
-            logs = []
-            for doc in docs:
-                log_data = doc.to_dict()
-                log_data['log_id'] = doc.id
-                logs.append(log_data)
+            logs = await self._stream(query)
             
             logger.info("Logs por período obtidos", 
                        user_id=user_id,
@@ -253,6 +489,204 @@ class FirebaseService:
                         user_id=user_id)
             raise
     
+    async def get_logs_page(
+        self,
+        user_id: str,
+        start_date: date,
+        end_date: date,
+        log_types: Optional[List[str]] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Obtém uma página de logs de um período, em ordem de data e timestamp
+        
+        A paginação usa start_after com os valores de ordenação do último log
+        (data, timestamp e ID do documento), então cada página custa apenas
+        os documentos que devolve, independente da posição no histórico.
+        
+        Args:
+            user_id: ID do usuário
+            start_date: Data inicial
+            end_date: Data final
+            log_types: Tipos de log a filtrar (opcional)
+            limit: Tamanho da página
+            cursor: Cursor devolvido pela página anterior (opcional)
+            
+        Returns:
+            Tuple: Logs da página e cursor da próxima (None na última)
+            
+        Raises:
+            ValueError: Cursor inválido
+        """
+        query = (self.db.collection('daily_logs')
+                .where('user_id', '==', user_id)
+                .where('date', '>=', start_date.isoformat())
+                .where('date', '<=', end_date.isoformat()))
+        
+        if log_types:
+            query = query.where('log_type', 'in', log_types)
+        
+        query = (query.order_by('date')
+                .order_by('timestamp')
+                .order_by(FieldPath.document_id()))
+        
+        if cursor:
+            last_date, last_timestamp, last_id = self._decode_log_cursor(cursor)
+            query = query.start_after({
+                'date': last_date,
+                'timestamp': last_timestamp,
+                FieldPath.document_id(): self.db.collection('daily_logs').document(last_id)
+            })
+        
+        # Um documento a mais indica se há próxima página
+        logs = await self._stream(query.limit(limit + 1))
+        
+        next_cursor = None
+        if len(logs) > limit:
+            logs = logs[:limit]
+            next_cursor = self._encode_log_cursor(logs[-1])
+        
+        return logs, next_cursor
+    
+    async def iter_logs(
+        self,
+        user_id: str,
+        start_date: date,
+        end_date: date,
+        log_types: Optional[List[str]] = None,
+        page_size: int = 500
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Percorre os logs de um período página a página
+        
+        Apenas uma página fica em memória por vez; usado pela exportação em
+        streaming do histórico.
+        """
+        cursor = None
+        while True:
+            logs, cursor = await self.get_logs_page(
+                user_id, start_date, end_date, log_types, limit=page_size, cursor=cursor
+            )
+            for log in logs:
+                yield log
+            if cursor is None:
+                return
+    
+    @staticmethod
+    def _encode_log_cursor(log: Dict[str, Any]) -> str:
+        """Cursor opaco com os valores de ordenação de um log"""
+        timestamp = log.get('timestamp')
+        payload = [
+            log.get('date'),
+            timestamp.isoformat() if isinstance(timestamp, datetime) else timestamp,
+            log['log_id']
+        ]
+        return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+    
+    @staticmethod
+    def _decode_log_cursor(cursor: str) -> Tuple[str, Any, str]:
+        """Valores de ordenação codificados em um cursor"""
+        try:
+            last_date, last_timestamp, last_id = json.loads(
+                base64.urlsafe_b64decode(cursor.encode('ascii'))
+            )
+            if isinstance(last_timestamp, str):
+                last_timestamp = datetime.fromisoformat(last_timestamp)
+        except Exception as e:
+            raise ValueError(f"Cursor inválido: {cursor}") from e
+        
+        if not isinstance(last_date, str) or not isinstance(last_id, str):
+            raise ValueError(f"Cursor inválido: {cursor}")
+        return last_date, last_timestamp, last_id
+    
+    # Métodos para rollups diários
+    
+    async def get_daily_rollup(
+        self,
+        user_id: str,
+        target_date: date
+    ) -> Dict[str, Any]:
+        """
+        Obtém os totais do dia de um usuário (um único documento)
+        
+        Dias sem rollup (anteriores à sua introdução) são recalculados a
+        partir dos logs, sem gravar nada.
+        
+        Args:
+            user_id: ID do usuário
+            target_date: Data alvo
+            
+        Returns:
+            Dict: Rollup do dia
+        """
+        try:
+            rollup_ref = self._rollup_ref(user_id, target_date.isoformat())
+            async with self._limit:
+                snapshot = await rollup_ref.get()
+            
+            if snapshot.exists:
+                return snapshot.to_dict()
+            
+            logs = await self._stream(self._day_logs_query(user_id, target_date.isoformat()))
+            return build_rollup(user_id, target_date, logs)
+            
+        except Exception as e:
+            logger.error("Erro ao obter rollup diário", 
+                        error=str(e),
+                        user_id=user_id,
+                        date=target_date.isoformat())
+            raise
+    
+    def _rollup_ref(self, user_id: str, date_str: str):
+        """Referência do documento de rollup de um usuário em um dia"""
+        return self.db.collection(ROLLUP_COLLECTION).document(rollup_doc_id(user_id, date_str))
+    
+    def _day_logs_query(self, user_id: str, date_str: str):
+        """Query dos logs de um usuário em um dia"""
+        return (self.db.collection('daily_logs')
+                .where('user_id', '==', user_id)
+                .where('date', '==', date_str))
+    
+    async def _read_rollup(
+        self,
+        transaction,
+        rollup_ref,
+        user_id: str,
+        date_str: str
+    ) -> Dict[str, Any]:
+        """
+        Lê o rollup dentro da transação
+        
+        Se ainda não existir, parte dos logs já gravados para o dia, de modo
+        que dias anteriores ao rollup não fiquem com totais parciais.
+        """
+        snapshot = await rollup_ref.get(transaction=transaction)
+        if snapshot.exists:
+            return snapshot.to_dict()
+        
+        existing_logs = []
+        async for doc in self._day_logs_query(user_id, date_str).stream():
+            existing_logs.append(doc.to_dict())
+        return build_rollup(user_id, date_str, existing_logs)
+    
+    async def _read_rollups_for(self, transaction, *logs) -> Dict[str, Dict[str, Any]]:
+        """Lê (na transação) os rollups afetados pelos logs, indexados pelo ID"""
+        rollups: Dict[str, Dict[str, Any]] = {}
+        for log in logs:
+            key = rollup_key(log)
+            if key and key not in rollups:
+                log_date = log['date']
+                if isinstance(log_date, date):
+                    log_date = log_date.isoformat()
+                rollups[key] = await self._read_rollup(
+                    transaction,
+                    self.db.collection(ROLLUP_COLLECTION).document(key),
+                    log['user_id'],
+                    log_date
+                )
+        return rollups
+    
     # Métodos para agregações específicas
     
     async def get_weight_history(
@@ -283,11 +717,10 @@ class FirebaseService:
                     .where('date', '<=', end_date.isoformat())
                     .order_by('date'))
             
-            docs = query.stream()
+            docs = await self._stream(query)
             
             weight_data = []
-            for doc in docs:
-                log_data = doc.to_dict()
+            for log_data in docs:
                 weight_entry = {
                     'date': log_data['date'],
                     'weight_kg': log_data['value'].get('weight_kg'),
@@ -339,11 +772,10 @@ class FirebaseService:
                     .where('date', '<=', end_date.isoformat())
                     .order_by('date'))
             
-            docs = query.stream()
+            docs = await self._stream(query)
             
             strength_data = []
-            for doc in docs:
-                log_data = doc.to_dict()
+            for log_data in docs:
                 set_data = log_data['value']
                 
                 # Filtrar por exercício se especificado
@@ -376,9 +808,30 @@ class FirebaseService:
     
     # Métodos auxiliares
     
+    async def _stream(self, query) -> List[Dict[str, Any]]:
+        """
+        Executa uma query com streaming assíncrono
+        
+        Args:
+            query: Query do Firestore
+            
+        Returns:
+            List[Dict]: Documentos com o ID em 'log_id'
+        """
+        results = []
+        async with self._limit:
+            async for doc in query.stream():
+                data = doc.to_dict()
+                data['log_id'] = doc.id
+                results.append(data)
+        return results
+    
     async def get_user_streak(self, user_id: str) -> int:
         """
-        Calcula a sequência atual de dias seguindo o plano
+        Obtém a sequência atual de dias seguindo o plano
+        
+        Lê o estado mantido em user_streaks; o histórico só é percorrido
+        quando o estado não existe ou está marcado como desatualizado.
         
         Args:
             user_id: ID do usuário
@@ -387,41 +840,76 @@ class FirebaseService:
             int: Número de dias consecutivos
         """
         try:
-            # Implementação simplificada - buscar logs dos últimos 30 dias
-            end_date = date.today()
-            start_date = date.fromordinal(end_date.toordinal() - 30)
+            async with self._limit:
+                snapshot = await self._streak_ref(user_id).get()
             
-            # Buscar logs de refeições (indicador de aderência)
-            query = (self.db.collection('daily_logs')
-                    .where('user_id', '==', user_id)
-                    .where('log_type', '==', 'meal_checkin')
-                    .where('date', '>=', start_date.isoformat())
-                    .where('date', '<=', end_date.isoformat())
-                    .order_by('date', direction=firestore.Query.DESCENDING))
-            
-            docs = query.stream()
-            
-            # Agrupar por data
-            dates_with_logs = set()
-            for doc in docs:
-                log_data = doc.to_dict()
-                dates_with_logs.add(log_data['date'])
-            
-            # Calcular sequência consecutiva a partir de hoje
-            streak = 0
-            current_date = end_date
+            state = snapshot.to_dict() if snapshot.exists else None
+            if state is None or state.get('stale'):
+                state = await self.rebuild_user_streak(user_id)
             
-            while current_date.isoformat() in dates_with_logs:
-                streak += 1
-                current_date = date.fromordinal(current_date.toordinal() - 1)
-            
-            logger.info("Streak calculado", user_id=user_id, streak=streak)
+            streak = current_streak_on(state, date.today())
+            logger.info("Streak obtido", user_id=user_id, streak=streak)
             return streak
             
         except Exception as e:
-            logger.error("Erro ao calcular streak", error=str(e), user_id=user_id)
+            logger.error("Erro ao obter streak", error=str(e), user_id=user_id)
             return 0
     
+    async def get_user_checkin_dates(self, user_id: str) -> List[str]:
+        """
+        Datas de todos os check-ins de refeição de um usuário (apenas o campo date)
+        
+        Args:
+            user_id: ID do usuário
+            
+        Returns:
+            List[str]: Datas ISO, com repetição se houver mais de um check-in no dia
+        """
+        query = (self.db.collection('daily_logs')
+                .where('user_id', '==', user_id)
+                .where('log_type', '==', 'meal_checkin')
+                .select(['date']))
+        
+        docs = await self._stream(query)
+        return [doc['date'] for doc in docs if doc.get('date')]
+    
+    async def rebuild_user_streak(self, user_id: str) -> Dict[str, Any]:
+        """
+        Recalcula e grava a sequência de um usuário a partir de todo o histórico
+        
+        Args:
+            user_id: ID do usuário
+            
+        Returns:
+            Dict: Estado da sequência (atual, maior e último check-in)
+        """
+        state = compute_streak(user_id, await self.get_user_checkin_dates(user_id))
+        
+        async with self._limit:
+            await self._streak_ref(user_id).set(state)
+        
+        logger.info("Streak recalculado", 
+                   user_id=user_id,
+                   current_streak=state['current_streak'],
+                   longest_streak=state['longest_streak'])
+        return state
+    
+    def _streak_ref(self, user_id: str):
+        """Referência do documento de sequência de um usuário"""
+        return self.db.collection(STREAK_COLLECTION).document(user_id)
+    
+    async def _read_streak(self, transaction, user_id: str) -> Dict[str, Any]:
+        """Lê a sequência dentro de uma transação (sem estado: marcada para recálculo)"""
+        snapshot = await self._streak_ref(user_id).get(transaction=transaction)
+        if snapshot.exists:
+            return snapshot.to_dict()
+        # Sem estado ainda: o histórico é recalculado na próxima leitura
+        return {**empty_streak(user_id), 'stale': True}
+    
+    def _mark_streak_stale(self, transaction, user_id: str):
+        """Marca a sequência para recálculo na próxima leitura"""
+        transaction.set(self._streak_ref(user_id), {'user_id': user_id, 'stale': True}, merge=True)
+    
     async def update_log(self, log_id: str, updates: Dict[str, Any]) -> bool:
         """
         Atualiza um log existente
@@ -437,9 +925,45 @@ class FirebaseService:
             # Adicionar timestamp de atualização
             updates['updated_at'] = datetime.utcnow()
             
-            # Atualizar documento
+            # Atualizar documento e rollups afetados na mesma transação
             doc_ref = self.db.collection('daily_logs').document(log_id)
-            doc_ref.update(updates)
+            
+            @async_transactional
+            async def _update(transaction) -> bool:
+                snapshot = await doc_ref.get(transaction=transaction)
+                if not snapshot.exists:
+                    return False
+                
+                old_log = snapshot.to_dict()
+                new_log = merge_log_updates(old_log, updates)
+                rollups = await self._read_rollups_for(transaction, old_log, new_log)
+                
+                old_key = rollup_key(old_log)
+                if old_key:
+                    apply_contribution(rollups[old_key], log_contribution(old_log), sign=-1)
+                new_key = rollup_key(new_log)
+                if new_key:
+                    apply_contribution(rollups[new_key], log_contribution(new_log))
+                
+                transaction.update(doc_ref, updates)
+                for rollup_id, rollup in rollups.items():
+                    transaction.set(self.db.collection(ROLLUP_COLLECTION).document(rollup_id), rollup)
+                
+                # Edições de check-in podem mover ou remover um dia da sequência
+                streak_users = {
+                    log['user_id'] for log in (old_log, new_log)
+                    if log.get('log_type') == 'meal_checkin' and log.get('user_id')
+                }
+                for streak_user_id in streak_users:
+                    self._mark_streak_stale(transaction, streak_user_id)
+                return True
+            
+            async with self._limit:
+                updated = await _update(self.db.transaction())
+            
+            if not updated:
+                logger.warning("Log não encontrado para atualização", log_id=log_id)
+                return False
             
             logger.info("Log atualizado", log_id=log_id)
             return True
@@ -460,7 +984,30 @@ class FirebaseService:
         """
         try:
             doc_ref = self.db.collection('daily_logs').document(log_id)
-            doc_ref.delete()
+            
+            # Remover o log e descontar sua contribuição do rollup do dia
+            @async_transactional
+            async def _delete(transaction):
+                snapshot = await doc_ref.get(transaction=transaction)
+                if not snapshot.exists:
+                    return
+                
+                log = snapshot.to_dict()
+                rollups = await self._read_rollups_for(transaction, log)
+                key = rollup_key(log)
+                if key:
+                    apply_contribution(rollups[key], log_contribution(log), sign=-1)
+                
+                transaction.delete(doc_ref)
+                for rollup_id, rollup in rollups.items():
+                    transaction.set(self.db.collection(ROLLUP_COLLECTION).document(rollup_id), rollup)
+                
+                # Sem check-ins restantes no dia, a sequência precisa ser recalculada
+                if key and log.get('log_type') == 'meal_checkin' and not rollups[key]['meal_types']:
+                    self._mark_streak_stale(transaction, log['user_id'])
+            
+            async with self._limit:
+                await _delete(self.db.transaction())
             
             logger.info("Log removido", log_id=log_id)
             return True
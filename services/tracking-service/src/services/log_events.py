@@ -0,0 +1,108 @@
+"""
+Eventos internos de escrita de logs
+
+As rotas de logging publicam um evento "log_written" depois de gravar um log;
+os assinantes (dashboard e progresso) atualizam o que têm em cache a partir
+do rollup já atualizado, em vez de esperar o TTL ou recalcular tudo.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+LOG_WRITTEN = "log_written"
+
+LogEventHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+def log_written_event(
+    log_id: str,
+    log_data: Dict[str, Any],
+    rollup: Dict[str, Any],
+    streak: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Monta o evento de um log gravado
+
+    Args:
+        log_id: ID do log criado
+        log_data: Dados do log, como enviados para save_daily_log
+        rollup: Rollup do dia após a escrita (ver FirebaseService.record_daily_log)
+        streak: Estado da sequência após a escrita (apenas check-ins de refeição)
+    """
+    return {
+        "type": LOG_WRITTEN,
+        "log_id": log_id,
+        "user_id": rollup.get("user_id") or log_data.get("user_id"),
+        "date": rollup.get("date"),
+        "log_types": [log_data.get("log_type")],
+        "log": log_data,
+        "rollup": rollup,
+        "streak": streak,
+    }
+
+
+def logs_written_event(
+    user_id: str,
+    log_types: List[str],
+    rollup: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Monta o evento de vários logs gravados de uma vez para o mesmo dia
+
+    Usado pela ingestão em lote: um evento por dia afetado, com o rollup
+    após o lote. Não traz a sequência (o lote a marca para recálculo).
+    """
+    return {
+        "type": LOG_WRITTEN,
+        "log_id": None,
+        "user_id": user_id,
+        "date": rollup.get("date"),
+        "log_types": sorted(set(log_types)),
+        "log": None,
+        "rollup": rollup,
+        "streak": None,
+    }
+
+
+class LogEventBus:
+    """
+    Barramento em processo para eventos de log
+
+    publish() aguarda os assinantes na ordem de inscrição, de modo que a
+    resposta da rota só sai depois que o cache já reflete o log. Falhas de um
+    assinante são registradas e não afetam a gravação nem os demais.
+    """
+
+    def __init__(self):
+        self._handlers: List[LogEventHandler] = []
+        self.stats = {"published": 0, "handler_errors": 0}
+
+    def subscribe(self, handler: LogEventHandler):
+        """Inscreve um assinante"""
+        self._handlers.append(handler)
+
+    async def publish(self, event: Dict[str, Any]):
+        """Entrega o evento a todos os assinantes"""
+        self.stats["published"] += 1
+        for handler in self._handlers:
+            try:
+                await handler(event)
+            except Exception as e:
+                self.stats["handler_errors"] += 1
+                logger.error("Erro ao processar evento de log",
+                             event_type=event.get("type"),
+                             user_id=event.get("user_id"),
+                             handler=_handler_name(handler),
+                             error=str(e))
+
+    def metrics(self) -> Dict[str, Any]:
+        """Estatísticas para /metrics"""
+        return {**self.stats, "handlers": len(self._handlers)}
+
+
+def _handler_name(handler: LogEventHandler) -> str:
+    """Nome do assinante para logs (desembrulha functools.partial)"""
+    target = getattr(handler, "func", handler)
+    return getattr(target, "__name__", repr(target))
@@ -0,0 +1,197 @@
+"""
+Cache LRU em memória com orçamento em bytes, expiração por heap e índice por usuário
+"""
+
+import fnmatch
+import heapq
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "size", "user_id")
+
+    def __init__(self, value: Any, expires_at: float, size: int, user_id: Optional[str]):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+        self.user_id = user_id
+
+
+class LRUMemoryCache:
+    """
+    Fallback em memória do CacheService
+
+    - LRU (OrderedDict): leituras movem a chave para o fim; a eviction
+      remove do início até caber no orçamento de bytes e de entradas.
+    - Expiração: heap de (expires_at, key) consultado a cada operação, de
+      modo que entradas vencidas saem em O(log n) sem varrer o cache.
+    - Índice user_id -> chaves: invalidar um usuário custa O(chaves do usuário).
+
+    Não é thread-safe; é usado apenas a partir do event loop.
+    """
+
+    def __init__(self, max_bytes: int, max_entries: int):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._user_keys: Dict[str, Set[str]] = {}
+        self._bytes = 0
+
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        self._expire()
+        return key in self._entries
+
+    def get(self, key: str) -> Optional[Any]:
+        """Obtém um valor (None se ausente ou expirado)"""
+        self._expire()
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry.value
+
+    def set(self, key: str, value: Any, ttl_seconds: float, user_id: Optional[str] = None) -> bool:
+        """
+        Armazena um valor
+
+        Returns:
+            bool: False se o valor sozinho excede o orçamento de bytes
+        """
+        size = self._size_of(key, value)
+        if size > self.max_bytes:
+            logger.warning("Valor maior que o orçamento do cache em memória", key=key, size=size)
+            self.delete(key)
+            return False
+
+        self._remove(key)
+        expires_at = time.monotonic() + ttl_seconds
+        self._entries[key] = _Entry(value, expires_at, size, user_id)
+        self._bytes += size
+        heapq.heappush(self._expiry_heap, (expires_at, key))
+        if user_id:
+            self._user_keys.setdefault(user_id, set()).add(key)
+
+        self._expire()
+        self._evict()
+        return True
+
+    def replace(self, key: str, value: Any) -> bool:
+        """
+        Substitui o valor de uma chave existente mantendo o prazo e o dono
+
+        Returns:
+            bool: False se a chave não existe (ou expirou) ou o novo valor
+            excede o orçamento de bytes
+        """
+        self._expire()
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+
+        size = self._size_of(key, value)
+        if size > self.max_bytes:
+            self._remove(key)
+            return False
+
+        self._bytes += size - entry.size
+        entry.value = value
+        entry.size = size
+        self._entries.move_to_end(key)
+        self._evict()
+        return True
+
+    def user_keys(self, user_id: str, prefix: str = "") -> List[str]:
+        """Chaves associadas ao usuário, opcionalmente filtradas por prefixo"""
+        self._expire()
+        return [key for key in self._user_keys.get(user_id, ()) if key.startswith(prefix)]
+
+    def delete(self, key: str) -> bool:
+        """Remove uma chave; retorna se ela existia"""
+        return self._remove(key)
+
+    def invalidate_user(self, user_id: str) -> int:
+        """Remove todas as chaves associadas ao usuário"""
+        keys = self._user_keys.pop(user_id, set())
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def clear_pattern(self, pattern: str) -> int:
+        """Remove as chaves que correspondem a um padrão glob (varre as chaves)"""
+        keys = [key for key in self._entries if fnmatch.fnmatchcase(key, pattern)]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Estatísticas de uso para /metrics"""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_ratio": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "max_entries": self.max_entries,
+            "users_indexed": len(self._user_keys),
+        }
+
+    def _remove(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+
+        self._bytes -= entry.size
+        if entry.user_id:
+            keys = self._user_keys.get(entry.user_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._user_keys[entry.user_id]
+        # A entrada correspondente no heap é descartada preguiçosamente em _expire
+        return True
+
+    def _expire(self):
+        """Remove entradas vencidas a partir do topo do heap"""
+        now = time.monotonic()
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, key = heapq.heappop(heap)
+            entry = self._entries.get(key)
+            # Ignorar registros de chaves removidas ou regravadas com outro prazo
+            if entry is not None and entry.expires_at == expires_at:
+                self._remove(key)
+                self.stats["expirations"] += 1
+
+        # Compactar o heap se acumular muitos registros obsoletos
+        if len(heap) > 2 * len(self._entries) + 64:
+            self._expiry_heap = [(entry.expires_at, key) for key, entry in self._entries.items()]
+            heapq.heapify(self._expiry_heap)
+
+    def _evict(self):
+        """Remove as entradas menos usadas até caber nos limites"""
+        while self._entries and (self._bytes > self.max_bytes or len(self._entries) > self.max_entries):
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.stats["evictions"] += 1
+
+    @staticmethod
+    def _size_of(key: str, value: Any) -> int:
+        """Tamanho aproximado da entrada (valor serializado como no Redis)"""
+        return len(key) + len(json.dumps(value, default=str))
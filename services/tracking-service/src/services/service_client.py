@@ -6,37 +6,89 @@ import asyncio
 from typing import Dict, Any, List, Optional
 import structlog
 import httpx
-from datetime import datetime, timedelta
 
 from config.settings import get_settings
+from services.circuit_breaker import CircuitBreaker
 
 logger = structlog.get_logger(__name__)
 
 
 class ServiceClient:
-    """Cliente para comunicação com outros microserviços"""
+    """
+    Cliente para comunicação com outros microserviços
+    
+    Mantém um pool de conexões HTTP/2 de longa duração por serviço (criado no
+    lifespan da aplicação) e um circuit breaker por serviço: com o serviço
+    fora do ar, as chamadas falham imediatamente e o dashboard usa os
+    valores padrão sem esperar timeouts e retries.
+    """
     
     def __init__(self):
         self.settings = get_settings()
-        self.timeout = httpx.Timeout(
-            timeout=self.settings.tracking_config["dashboard_config"]["timeout_seconds"]
+        dashboard_config = self.settings.tracking_config["dashboard_config"]
+        client_config = self.settings.service_client_config
+        breaker_config = client_config["circuit_breaker"]
+        
+        self.timeout = httpx.Timeout(timeout=dashboard_config["timeout_seconds"])
+        self.max_retries = dashboard_config["max_retries"]
+        self.retry_backoff_seconds = client_config["retry_backoff_seconds"]
+        self.limits = httpx.Limits(
+            max_connections=client_config["max_connections"],
+            max_keepalive_connections=client_config["max_keepalive_connections"],
+            keepalive_expiry=client_config["keepalive_expiry_seconds"]
         )
-        self.max_retries = self.settings.tracking_config["dashboard_config"]["max_retries"]
         
+        self.upstreams = {
+            "users": self.settings.users_service_url,
+            "plans": self.settings.plans_service_url,
+            "content": self.settings.content_service_url
+        }
+        
+        # Um pool de conexões e um circuit breaker por serviço
+        self._clients: Dict[str, httpx.AsyncClient] = {
+            name: httpx.AsyncClient(
+                base_url=base_url,
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=client_config["http2"]
+            )
+            for name, base_url in self.upstreams.items()
+        }
+        self._breakers: Dict[str, CircuitBreaker] = {
+            name: CircuitBreaker(
+                name,
+                failure_threshold=breaker_config["failure_threshold"],
+                recovery_timeout=breaker_config["recovery_timeout_seconds"],
+                half_open_max_calls=breaker_config["half_open_max_calls"]
+            )
+            for name in self.upstreams
+        }
+        self._stats: Dict[str, Dict[str, int]] = {
+            name: {"in_flight": 0, "requests_total": 0, "errors_total": 0}
+            for name in self.upstreams
+        }
+    
+    async def close(self):
+        """Fecha os pools de conexão"""
+        await asyncio.gather(*(client.aclose() for client in self._clients.values()))
+        logger.info("Pools de conexão HTTP fechados")
+    
     async def _make_request(
         self, 
+        upstream: str,
         method: str, 
-        url: str, 
+        path: str, 
         headers: Optional[Dict[str, str]] = None,
         json_data: Optional[Dict[str, Any]] = None,
         params: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
-        Faz uma requisição HTTP com retry automático
+        Faz uma requisição HTTP pelo pool do serviço, com circuit breaker e retry
         
         Args:
+            upstream: Nome do serviço (users, plans, content)
             method: Método HTTP (GET, POST, etc.)
-            url: URL completa
+            path: Caminho relativo à URL do serviço
             headers: Headers da requisição
             json_data: Dados JSON para POST/PUT
             params: Parâmetros de query
@@ -45,73 +97,128 @@ class ServiceClient:
             Dict: Resposta JSON
             
         Raises:
+            CircuitOpenError: Se o circuito do serviço estiver aberto
             Exception: Se todas as tentativas falharem
         """
+        client = self._clients[upstream]
+        breaker = self._breakers[upstream]
+        stats = self._stats[upstream]
         last_exception = None
         
         for attempt in range(self.max_retries + 1):
+            # Falhar rápido se o serviço estiver indisponível
+            breaker.before_call()
+            
+            stats["in_flight"] += 1
+            stats["requests_total"] += 1
+            outcome_recorded = False
             try:
-                async with httpx.AsyncClient(timeout=self.timeout) as client:
-                    response = await client.request(
-                        method=method,
-                        url=url,
-                        headers=headers,
-                        json=json_data,
-                        params=params
-                    )
-                    
-                    # Log da requisição
-                    logger.info("Requisição para serviço", 
-                               method=method,
-                               url=url,
-                               status_code=response.status_code,
-                               attempt=attempt + 1)
+                response = await client.request(
+                    method=method,
+                    url=path,
+                    headers=headers,
+                    json=json_data,
+                    params=params
+                )
+                
+                # Log da requisição
+                logger.info("Requisição para serviço", 
+                           upstream=upstream,
+                           method=method,
+                           path=path,
+                           status_code=response.status_code,
+                           http_version=response.http_version,
+                           attempt=attempt + 1)
+                
+                # Erros do servidor contam como falha do serviço
+                if response.status_code >= 500:
+                    response.raise_for_status()
+                
+                breaker.record_success()
+                outcome_recorded = True
+                
+                # Verificar se a resposta foi bem-sucedida
+                if response.status_code == 200:
+                    return response.json()
+                elif response.status_code == 404:
+                    logger.warning("Recurso não encontrado", upstream=upstream, path=path)
+                    return {}
+                else:
+                    # Erros do cliente (4xx) não são repetidos
+                    response.raise_for_status()
                     
-                    # Verificar se a resposta foi bem-sucedida
-                    if response.status_code == 200:
-                        return response.json()
-                    elif response.status_code == 404:
-                        logger.warning("Recurso não encontrado", url=url)
-                        return {}
-                    else:
-                        response.raise_for_status()
-                        
-            except Exception as e:
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code < 500:
+                    raise
                 last_exception = e
-                logger.warning("Falha na requisição", 
-                              method=method,
-                              url=url,
-                              attempt=attempt + 1,
-                              error=str(e))
-                
-                # Se não é a última tentativa, aguardar antes de tentar novamente
-                if attempt < self.max_retries:
-                    await asyncio.sleep(2 ** attempt)  # Backoff exponencial
+                stats["errors_total"] += 1
+                breaker.record_failure()
+                outcome_recorded = True
+            except httpx.HTTPError as e:
+                last_exception = e
+                stats["errors_total"] += 1
+                breaker.record_failure()
+                outcome_recorded = True
+            finally:
+                stats["in_flight"] -= 1
+                # Cancelamento ou erro inesperado: não prender a vaga de teste do half_open
+                if not outcome_recorded:
+                    breaker.release_call()
+            
+            logger.warning("Falha na requisição", 
+                          upstream=upstream,
+                          method=method,
+                          path=path,
+                          attempt=attempt + 1,
+                          error=str(last_exception))
+            
+            # Se não é a última tentativa, aguardar brevemente antes de tentar novamente
+            if attempt < self.max_retries:
+                await asyncio.sleep(self.retry_backoff_seconds * (2 ** attempt))
         
         # Se chegou aqui, todas as tentativas falharam
         logger.error("Todas as tentativas falharam", 
+                    upstream=upstream,
                     method=method,
-                    url=url,
+                    path=path,
                     error=str(last_exception))
         raise last_exception
     
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Estado dos circuit breakers e utilização dos pools por serviço
+        
+        Returns:
+            Dict: Métricas por serviço
+        """
+        max_connections = self.limits.max_connections
+        return {
+            name: {
+                **self._breakers[name].stats(),
+                **self._stats[name],
+                "max_connections": max_connections,
+                "pool_utilization": round(self._stats[name]["in_flight"] / max_connections, 4)
+            }
+            for name in self.upstreams
+        }
+    
     # Métodos para Users Service
     
-    async def get_user_profile(self, user_id: str) -> Dict[str, Any]:
+    async def get_user_profile(self, user_id: str, fallback: bool = True) -> Dict[str, Any]:
         """
         Obtém perfil do usuário do Users Service
         
         Args:
             user_id: ID do usuário
+            fallback: Retornar valores padrão em caso de falha (False propaga o erro)
             
         Returns:
             Dict: Dados do perfil do usuário
         """
         try:
-            url = f"{self.settings.users_service_url}/user/profile-summary"
             headers = {"X-User-ID": user_id}
             
-            response = await self._make_request("GET", url, headers=headers)
+            response = await self._make_request("users", "GET", "/user/profile-summary", headers=headers)
             
             logger.info("Perfil do usuário obtido", user_id=user_id)
             return response.get("data", {})
@@ -120,6 +227,8 @@ class ServiceClient:
             logger.error("Erro ao obter perfil do usuário", 
                         user_id=user_id,
                         error=str(e))
+            if not fallback:
+                raise
             # Retornar dados padrão em caso de falha
             return {
                 "nickname": "Usuário",
@@ -139,10 +248,9 @@ class ServiceClient:
             Dict: Objetivos do usuário
         """
         try:
-            url = f"{self.settings.users_service_url}/user/goals"
             headers = {"X-User-ID": user_id}
             
-            response = await self._make_request("GET", url, headers=headers)
+            response = await self._make_request("users", "GET", "/user/goals", headers=headers)
             
             logger.info("Objetivos do usuário obtidos", user_id=user_id)
             return response.get("data", {})
@@ -155,23 +263,23 @@ class ServiceClient:
     
     # Métodos para Plans Service
     
-    async def get_daily_targets(self, user_id: str, date: str = None) -> Dict[str, Any]:
+    async def get_daily_targets(self, user_id: str, date: str = None, fallback: bool = True) -> Dict[str, Any]:
         """
         Obtém metas diárias do Plans Service
         
         Args:
             user_id: ID do usuário
             date: Data no formato YYYY-MM-DD (opcional, padrão hoje)
+            fallback: Retornar valores padrão em caso de falha (False propaga o erro)
             
         Returns:
             Dict: Metas diárias de calorias e macros
         """
         try:
-            url = f"{self.settings.plans_service_url}/plan/targets"
             headers = {"X-User-ID": user_id}
             params = {"date": date} if date else {}
             
-            response = await self._make_request("GET", url, headers=headers, params=params)
+            response = await self._make_request("plans", "GET", "/plan/targets", headers=headers, params=params)
             
             logger.info("Metas diárias obtidas", user_id=user_id, date=date)
             return response.get("data", {})
@@ -181,6 +289,8 @@ class ServiceClient:
                         user_id=user_id,
                         date=date,
                         error=str(e))
+            if not fallback:
+                raise
             # Retornar metas padrão em caso de falha
             return {
                 "calories": 2000,
@@ -190,23 +300,23 @@ class ServiceClient:
                 "water_ml": 2500
             }
     
-    async def get_workout_plan(self, user_id: str, date: str = None) -> Dict[str, Any]:
+    async def get_workout_plan(self, user_id: str, date: str = None, fallback: bool = True) -> Dict[str, Any]:
         """
         Obtém plano de treino do dia
         
         Args:
             user_id: ID do usuário
             date: Data no formato YYYY-MM-DD (opcional, padrão hoje)
+            fallback: Retornar valores padrão em caso de falha (False propaga o erro)
             
         Returns:
             Dict: Plano de treino do dia
         """
         try:
-            url = f"{self.settings.plans_service_url}/plan/workout"
             headers = {"X-User-ID": user_id}
             params = {"date": date} if date else {}
             
-            response = await self._make_request("GET", url, headers=headers, params=params)
+            response = await self._make_request("plans", "GET", "/plan/workout", headers=headers, params=params)
             
             logger.info("Plano de treino obtido", user_id=user_id, date=date)
             return response.get("data", {})
@@ -216,25 +326,27 @@ class ServiceClient:
                         user_id=user_id,
                         date=date,
                         error=str(e))
+            if not fallback:
+                raise
             return {}
     
-    async def get_meal_plan(self, user_id: str, date: str = None) -> Dict[str, Any]:
+    async def get_meal_plan(self, user_id: str, date: str = None, fallback: bool = True) -> Dict[str, Any]:
         """
         Obtém plano de refeições do dia
         
         Args:
             user_id: ID do usuário
             date: Data no formato YYYY-MM-DD (opcional, padrão hoje)
+            fallback: Retornar valores padrão em caso de falha (False propaga o erro)
             
         Returns:
             Dict: Plano de refeições do dia
         """
         try:
-            url = f"{self.settings.plans_service_url}/plan/diet"
             headers = {"X-User-ID": user_id}
             params = {"date": date} if date else {}
             
-            response = await self._make_request("GET", url, headers=headers, params=params)
+            response = await self._make_request("plans", "GET", "/plan/diet", headers=headers, params=params)
             
             logger.info("Plano de refeições obtido", user_id=user_id, date=date)
             return response.get("data", {})
@@ -244,6 +356,8 @@ class ServiceClient:
                         user_id=user_id,
                         date=date,
                         error=str(e))
+            if not fallback:
+                raise
             return {}
     
     # Métodos para Content Service
@@ -252,19 +366,25 @@ class ServiceClient:
         """
         Obtém valores MET dos exercícios do Content Service
         
+        Todos os IDs (sem repetição) vão em uma única requisição, resolvida
+        pelo Content Service com uma leitura em lote.
+        
         Args:
             exercise_ids: Lista de IDs dos exercícios
             
         Returns:
             Dict: Mapeamento exercise_id -> valor MET
         """
+        exercise_ids = list(dict.fromkeys(exercise_ids))
+        if not exercise_ids:
+            return {}
+        
         try:
-            url = f"{self.settings.content_service_url}/exercises/met-values"
             params = {"exercise_ids": ",".join(exercise_ids)}
             
-            response = await self._make_request("GET", url, params=params)
+            response = await self._make_request("content", "GET", "/exercises/met-values", params=params)
             
-            met_values = response.get("data", {}).get("met_values", {})
+            met_values = dict(response.get("data", {}).get("met_values") or {})
             
             logger.info("Valores MET obtidos", 
                        exercise_count=len(exercise_ids),
@@ -293,17 +413,23 @@ class ServiceClient:
         """
         Obtém detalhes dos alimentos do Content Service
         
+        Todos os IDs (sem repetição) vão em uma única requisição, resolvida
+        pelo Content Service com uma leitura em lote.
+        
         Args:
             food_ids: Lista de IDs dos alimentos
             
         Returns:
             Dict: Mapeamento food_id -> detalhes do alimento
         """
+        food_ids = list(dict.fromkeys(food_ids))
+        if not food_ids:
+            return {}
+        
         try:
-            url = f"{self.settings.content_service_url}/foods/details"
             params = {"food_ids": ",".join(food_ids)}
             
-            response = await self._make_request("GET", url, params=params)
+            response = await self._make_request("content", "GET", "/foods/details", params=params)
             
             food_details = response.get("data", {}).get("foods", {})
             
@@ -321,31 +447,28 @@ class ServiceClient:
     
     # Métodos de health check
     
-    async def check_service_health(self, service_name: str, service_url: str) -> bool:
+    async def check_service_health(self, service_name: str, upstream: str) -> bool:
         """
         Verifica se um serviço está saudável
         
         Args:
             service_name: Nome do serviço
-            service_url: URL base do serviço
+            upstream: Pool do serviço (users, plans, content)
             
         Returns:
             bool: True se o serviço está saudável
         """
         try:
-            url = f"{service_url}/health"
+            response = await self._clients[upstream].get("/health", timeout=httpx.Timeout(5.0))
             
-            async with httpx.AsyncClient(timeout=httpx.Timeout(5.0)) as client:
-                response = await client.get(url)
-                
-                is_healthy = response.status_code == 200
-                
-                logger.info("Health check do serviço", 
-                           service=service_name,
-                           healthy=is_healthy,
-                           status_code=response.status_code)
-                
-                return is_healthy
+            is_healthy = response.status_code == 200
+            
+            logger.info("Health check do serviço", 
+                       service=service_name,
+                       healthy=is_healthy,
+                       status_code=response.status_code)
+            
+            return is_healthy
                 
         except Exception as e:
             logger.warning("Falha no health check", 
@@ -361,17 +484,17 @@ class ServiceClient:
             Dict: Status de saúde de cada serviço
         """
         services = {
-            "users_service": self.settings.users_service_url,
-            "content_service": self.settings.content_service_url,
-            "plans_service": self.settings.plans_service_url
+            "users_service": "users",
+            "content_service": "content",
+            "plans_service": "plans"
         }
         
         health_status = {}
         
         # Verificar todos os serviços em paralelo
         tasks = [
-            self.check_service_health(name, url) 
-            for name, url in services.items()
+            self.check_service_health(name, upstream) 
+            for name, upstream in services.items()
         ]
         
         results = await asyncio.gather(*tasks, return_exceptions=True)
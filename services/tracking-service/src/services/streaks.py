@@ -0,0 +1,79 @@
+"""
+Estado de sequência (streak) de check-ins de refeição por usuário (coleção user_streaks)
+
+O documento guarda a sequência atual, a maior sequência e a data do último
+check-in. Ele é avançado em O(1) a cada check-in de refeição e recalculado
+a partir do histórico apenas quando marcado como desatualizado (stale), por
+exemplo após um check-in retroativo ou a remoção do último check-in de um dia.
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, Optional, Union
+
+STREAK_COLLECTION = "user_streaks"
+
+
+def _as_date(value: Union[date, str]) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def empty_streak(user_id: str) -> Dict[str, Any]:
+    """Estado inicial (nenhum check-in)"""
+    return {
+        "user_id": user_id,
+        "current_streak": 0,
+        "longest_streak": 0,
+        "last_checkin_date": None,
+        "stale": False,
+    }
+
+
+def advance_streak(state: Dict[str, Any], checkin_date: Union[date, str]) -> Dict[str, Any]:
+    """
+    Avança o estado com um novo check-in
+
+    Um segundo check-in no mesmo dia não altera nada; um check-in no dia
+    seguinte ao último estende a sequência; após um intervalo ela recomeça
+    em 1. Check-ins anteriores ao último marcam o estado como stale, pois
+    podem fechar uma lacuna que só o histórico completo resolve.
+    """
+    checkin_day = _as_date(checkin_date)
+    last = state.get("last_checkin_date")
+
+    if last is not None:
+        last_day = _as_date(last)
+        if checkin_day == last_day:
+            return state
+        if checkin_day < last_day:
+            state["stale"] = True
+            return state
+
+    if last is not None and checkin_day - _as_date(last) == timedelta(days=1):
+        state["current_streak"] = (state.get("current_streak") or 0) + 1
+    else:
+        state["current_streak"] = 1
+
+    state["last_checkin_date"] = checkin_day.isoformat()
+    state["longest_streak"] = max(state.get("longest_streak") or 0, state["current_streak"])
+    return state
+
+
+def compute_streak(user_id: str, checkin_dates: Iterable[Union[date, str]]) -> Dict[str, Any]:
+    """Recalcula o estado a partir de todas as datas com check-in"""
+    state = empty_streak(user_id)
+    for checkin_day in sorted({_as_date(d) for d in checkin_dates}):
+        advance_streak(state, checkin_day)
+    return state
+
+
+def current_streak_on(state: Optional[Dict[str, Any]], today: date) -> int:
+    """
+    Sequência vigente em uma data
+
+    Como antes, a sequência conta somente se houver check-in na própria data.
+    """
+    if not state or not state.get("last_checkin_date"):
+        return 0
+    if _as_date(state["last_checkin_date"]) != today:
+        return 0
+    return state.get("current_streak") or 0
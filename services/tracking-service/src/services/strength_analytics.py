@@ -0,0 +1,228 @@
+"""
+Analytics de força vetorizados sobre séries em formato colunar
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+
+ONE_REP_MAX_FORMULAS = ("brzycki", "epley", "lombardi")
+DEFAULT_FORMULA = "brzycki"
+
+_EPOCH = date(1970, 1, 1)
+
+
+def one_rep_max(weight_kg: np.ndarray, reps: np.ndarray, formula: str = DEFAULT_FORMULA) -> np.ndarray:
+    """
+    Estima 1RM para arrays de peso e repetições
+
+    Mesmas regras de CalorieService.estimate_one_rep_max: uma repetição
+    devolve o próprio peso e o resultado fica limitado a [peso, 2 × peso].
+    """
+    weight_kg = np.asarray(weight_kg, dtype=np.float64)
+    reps = np.asarray(reps, dtype=np.float64)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if formula == "epley":
+            # Epley: 1RM = peso × (1 + reps/30)
+            estimate = weight_kg * (1 + reps / 30)
+        elif formula == "lombardi":
+            # Lombardi: 1RM = peso × reps^0.10
+            estimate = weight_kg * np.power(reps, 0.10)
+        else:
+            # Brzycki: 1RM = peso / (1.0278 - 0.0278 × reps)
+            estimate = weight_kg / (1.0278 - 0.0278 * reps)
+
+    # Denominador não positivo (Brzycki com muitas reps) cai no limite inferior
+    estimate = np.where(np.isfinite(estimate), estimate, weight_kg)
+    estimate = np.clip(estimate, weight_kg, weight_kg * 2)
+    estimate = np.where(reps == 1, weight_kg, estimate)
+    return np.round(estimate, 1)
+
+
+class StrengthAnalytics:
+    """
+    Séries de força de um período em arrays alinhados (data, exercício, peso, reps)
+
+    As séries são carregadas uma única vez; máximos diários, volume, 1RM e
+    recordes saem de operações agrupadas sobre arrays ordenados por
+    (exercício, dia), sem laços por exercício ou por dia.
+    """
+
+    def __init__(self, sets: Iterable[Dict[str, Any]]):
+        sets = list(sets)
+
+        # Colunas brutas; séries sem carga, reps, exercício ou data são descartadas
+        weight_kg = np.array([entry.get("weight_kg") or 0 for entry in sets], dtype=np.float64)
+        reps = np.array([entry.get("reps_done") or 0 for entry in sets], dtype=np.int64)
+        exercise_ids = np.array([entry.get("exercise_id") or "" for entry in sets], dtype=object)
+        dates = [entry.get("date") for entry in sets]
+        dates = [d.isoformat() if isinstance(d, date) else (d or "") for d in dates]
+
+        valid = (weight_kg > 0) & (reps > 0) & (exercise_ids != "") & (np.array(dates, dtype=object) != "")
+        valid_index = np.flatnonzero(valid)
+
+        # Datas ISO convertidas em lote para dias desde a época
+        self.day = np.array(dates, dtype="datetime64[D]")[valid_index].astype(np.int64) if len(valid_index) \
+            else np.empty(0, dtype=np.int64)
+        self.weight_kg = weight_kg[valid_index]
+        self.reps = reps[valid_index]
+        self.volume_kg = self.weight_kg * self.reps
+
+        # Exercícios codificados como inteiros na ordem em que aparecem
+        unique_ids, first_seen, inverse = np.unique(
+            exercise_ids[valid_index].astype(str), return_index=True, return_inverse=True
+        )
+        appearance = np.argsort(first_seen, kind="stable")
+        code_of_unique = np.empty(len(unique_ids), dtype=np.int64)
+        code_of_unique[appearance] = np.arange(len(unique_ids))
+        self.exercise = code_of_unique[inverse.reshape(-1)].astype(np.int64)
+        self.exercise_ids: List[str] = [str(unique_ids[i]) for i in appearance]
+        self.exercise_names: List[str] = [
+            sets[valid_index[first_seen[i]]].get("exercise_name") or "Exercício" for i in appearance
+        ]
+
+        self._build_daily()
+
+    @property
+    def size(self) -> int:
+        return len(self.day)
+
+    def _build_daily(self):
+        """Agrega as séries por (exercício, dia)"""
+        # Ordena por exercício, dia e carga (peso × reps): o último set de
+        # cada grupo é o melhor set do dia, como no cálculo anterior de 1RM.
+        # Em empate de carga vale o primeiro set registrado, como o max() anterior
+        first_wins = -np.arange(len(self.day), dtype=np.int64)
+        order = np.lexsort((first_wins, self.volume_kg, self.day, self.exercise))
+        exercise = self.exercise[order]
+        day = self.day[order]
+        weight_kg = self.weight_kg[order]
+        reps = self.reps[order]
+        volume_kg = self.volume_kg[order]
+
+        if len(order) == 0:
+            starts = np.empty(0, dtype=np.int64)
+        else:
+            boundary = np.empty(len(order), dtype=bool)
+            boundary[0] = True
+            boundary[1:] = (exercise[1:] != exercise[:-1]) | (day[1:] != day[:-1])
+            starts = np.flatnonzero(boundary)
+        ends = np.append(starts[1:], len(order)) if len(starts) else starts
+        best = ends - 1
+
+        self.daily_exercise = exercise[starts]
+        self.daily_day = day[starts]
+        self.daily_max_weight_kg = np.maximum.reduceat(weight_kg, starts) if len(starts) else weight_kg
+        self.daily_volume_kg = np.add.reduceat(volume_kg, starts) if len(starts) else volume_kg
+        self.daily_sets = ends - starts
+        self.daily_best_weight_kg = weight_kg[best]
+        self.daily_best_reps = reps[best]
+
+        # Fronteiras de cada exercício dentro dos pontos diários
+        if len(starts):
+            exercise_boundary = np.empty(len(starts), dtype=bool)
+            exercise_boundary[0] = True
+            exercise_boundary[1:] = self.daily_exercise[1:] != self.daily_exercise[:-1]
+            self.exercise_starts = np.flatnonzero(exercise_boundary)
+        else:
+            self.exercise_starts = np.empty(0, dtype=np.int64)
+        self.exercise_ends = (
+            np.append(self.exercise_starts[1:], len(starts)) if len(starts) else self.exercise_starts
+        )
+
+    def daily_one_rep_max(self, formula: str = DEFAULT_FORMULA) -> np.ndarray:
+        """1RM estimado do melhor set de cada (exercício, dia)"""
+        return one_rep_max(self.daily_best_weight_kg, self.daily_best_reps, formula)
+
+    def daily_points(self) -> List[Dict[str, Any]]:
+        """
+        Pontos diários por exercício, ordenados por data
+
+        Returns:
+            List[Dict]: Campos de StrengthDataPoint mais o 1RM por fórmula
+        """
+        estimates = {formula: self.daily_one_rep_max(formula) for formula in ONE_REP_MAX_FORMULAS}
+        order = np.argsort(self.daily_day, kind="stable")
+
+        points = []
+        for index in order.tolist():
+            code = int(self.daily_exercise[index])
+            by_formula = {formula: float(values[index]) for formula, values in estimates.items()}
+            points.append({
+                "date": _EPOCH + timedelta(days=int(self.daily_day[index])),
+                "exercise_id": self.exercise_ids[code],
+                "exercise_name": self.exercise_names[code],
+                "max_weight_kg": float(self.daily_max_weight_kg[index]),
+                "total_volume_kg": float(self.daily_volume_kg[index]),
+                "one_rep_max_estimated": by_formula[DEFAULT_FORMULA],
+                "one_rep_max_by_formula": by_formula,
+            })
+        return points
+
+    def personal_records(self) -> np.ndarray:
+        """
+        Máscara dos pontos diários que superam o maior peso anterior do exercício
+
+        O primeiro dia de cada exercício é a referência e não conta como recorde.
+        """
+        values = self.daily_max_weight_kg
+        if len(values) == 0:
+            return np.zeros(0, dtype=bool)
+
+        # Máximo acumulado por exercício: deslocar cada grupo acima do anterior
+        # permite um único np.maximum.accumulate sobre todos os exercícios
+        group = np.repeat(np.arange(len(self.exercise_starts)), self.exercise_ends - self.exercise_starts)
+        span = values.max() - values.min() + 1
+        running_max = np.maximum.accumulate(values + group * span) - group * span
+
+        records = np.zeros(len(values), dtype=bool)
+        records[1:] = values[1:] > running_max[:-1] + 1e-9
+        records[self.exercise_starts] = False
+        return records
+
+    def exercise_summary(self) -> List[Dict[str, Any]]:
+        """
+        Resumo por exercício no período
+
+        Returns:
+            List[Dict]: Pontos, primeiro/último/máx/mín do máximo diário,
+            volume total e número de recordes
+        """
+        if len(self.exercise_starts) == 0:
+            return []
+
+        starts, ends = self.exercise_starts, self.exercise_ends
+        values = self.daily_max_weight_kg
+        first = values[starts]
+        last = values[ends - 1]
+        highest = np.maximum.reduceat(values, starts)
+        lowest = np.minimum.reduceat(values, starts)
+        volume = np.add.reduceat(self.daily_volume_kg, starts)
+        records = np.add.reduceat(self.personal_records().astype(np.int64), starts)
+
+        summary = []
+        for position, start in enumerate(starts.tolist()):
+            code = int(self.daily_exercise[start])
+            summary.append({
+                "exercise_id": self.exercise_ids[code],
+                "exercise_name": self.exercise_names[code],
+                "points": int(ends[position] - start),
+                "first_max_weight_kg": float(first[position]),
+                "last_max_weight_kg": float(last[position]),
+                "highest_max_weight_kg": float(highest[position]),
+                "lowest_max_weight_kg": float(lowest[position]),
+                "total_volume_kg": float(volume[position]),
+                "personal_records": int(records[position]),
+            })
+        return summary
+
+    def most_tracked_exercise(self) -> Optional[str]:
+        """Exercício com mais dias registrados (empate: o primeiro registrado)"""
+        if len(self.exercise_starts) == 0:
+            return None
+        counts = self.exercise_ends - self.exercise_starts
+        codes = self.daily_exercise[self.exercise_starts]
+        # Entre exercícios com a mesma contagem, preferir o de menor código
+        best = np.lexsort((codes, -counts))[0]
+        return self.exercise_ids[int(codes[best])]
@@ -0,0 +1,9 @@
+"""
+Configuração global para testes do Tracking Service
+"""
+
+import os
+import sys
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
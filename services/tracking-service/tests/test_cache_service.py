@@ -0,0 +1,205 @@
+"""
+Testes para o single-flight do CacheService (backend em memória)
+"""
+
+import asyncio
+
+import pytest
+
+from services.cache_service import CacheService
+
+@pytest.fixture
+def cache():
+    """CacheService sem Redis (cache LRU em memória)"""
+    service = CacheService()
+    service.use_redis = False
+    service.redis_client = None
+    return service
+
+class TestWaitInflight:
+    """Testes da espera por cálculos em andamento antes de atualizar uma entrada"""
+
+    @pytest.mark.asyncio
+    async def test_waits_for_value_stored_by_inflight_compute(self, cache):
+        """Testar que a atualização enxerga o valor gravado por um cálculo que já estava em andamento"""
+        release = asyncio.Event()
+
+        async def compute():
+            revision = 1  # lido antes da escrita
+            await release.wait()
+            return {"rollup_revision": revision}
+
+        request = asyncio.ensure_future(cache.get_or_compute("dashboard:u1", compute))
+        await asyncio.sleep(0)
+        assert await cache.get("dashboard:u1") is None
+
+        waiter = asyncio.ensure_future(cache.wait_inflight("dashboard:u1"))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        release.set()
+        await waiter
+        assert await cache.get("dashboard:u1") == {"rollup_revision": 1}
+        assert await request == {"rollup_revision": 1}
+
+    @pytest.mark.asyncio
+    async def test_without_inflight_compute_returns_immediately(self, cache):
+        """Testar que sem cálculo em andamento não há espera"""
+        await asyncio.wait_for(cache.wait_inflight("dashboard:u1"), timeout=0.1)
+
+    @pytest.mark.asyncio
+    async def test_compute_failure_is_not_raised_to_waiter(self, cache):
+        """Testar que a falha do cálculo fica com quem o iniciou"""
+        release = asyncio.Event()
+
+        async def compute():
+            await release.wait()
+            raise RuntimeError("falha no cálculo")
+
+        request = asyncio.ensure_future(cache.get_or_compute("dashboard:u1", compute))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(cache.wait_inflight("dashboard:u1"))
+        await asyncio.sleep(0)
+
+        release.set()
+        await waiter
+        with pytest.raises(RuntimeError):
+            await request
+        assert await cache.get("dashboard:u1") is None
+
+class TestSingleFlight:
+    """Testes do get_or_compute com misses concorrentes"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_compute_once(self, cache):
+        """Testar que N misses simultâneos para a mesma chave calculam uma vez só"""
+        calls = []
+        release = asyncio.Event()
+
+        async def compute():
+            calls.append(1)
+            await release.wait()
+            return {"total": 42}
+
+        requests = [asyncio.ensure_future(cache.get_or_compute("progress:u1", compute)) for _ in range(20)]
+        await asyncio.sleep(0)
+        assert list(cache._inflight) == ["progress:u1"]
+
+        release.set()
+        results = await asyncio.gather(*requests)
+
+        assert results == [{"total": 42}] * 20
+        assert len(calls) == 1
+        assert cache.single_flight_stats["computed"] == 1
+        assert cache.single_flight_stats["coalesced"] == 19
+        assert cache._inflight == {}
+
+        # Próximas leituras vêm do cache
+        assert await cache.get_or_compute("progress:u1", compute) == {"total": 42}
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_cancel_shared_compute(self, cache):
+        """Testar que cancelar uma requisição não cancela o cálculo dos demais"""
+        release = asyncio.Event()
+
+        async def compute():
+            await release.wait()
+            return "valor"
+
+        first = asyncio.ensure_future(cache.get_or_compute("progress:u1", compute))
+        second = asyncio.ensure_future(cache.get_or_compute("progress:u1", compute))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert not cache._inflight["progress:u1"].cancelled()
+
+        release.set()
+        assert await second == "valor"
+        assert await cache.get("progress:u1") == "valor"
+
+    @pytest.mark.asyncio
+    async def test_exception_reaches_all_waiters_and_clears_inflight(self, cache):
+        """Testar que a falha do cálculo chega a todos e permite um novo cálculo"""
+        release = asyncio.Event()
+        calls = []
+
+        async def failing():
+            calls.append(1)
+            await release.wait()
+            raise RuntimeError("falha no cálculo")
+
+        requests = [asyncio.ensure_future(cache.get_or_compute("progress:u1", failing)) for _ in range(5)]
+        await asyncio.sleep(0)
+
+        release.set()
+        results = await asyncio.gather(*requests, return_exceptions=True)
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert len(calls) == 1
+        assert cache._inflight == {}
+        assert await cache.get("progress:u1") is None
+
+        async def compute():
+            return "recalculado"
+
+        assert await cache.get_or_compute("progress:u1", compute) == "recalculado"
+
+class TestDistributedLock:
+    """Testes do lock entre instâncias com o valor gravado no backend em memória"""
+
+    @pytest.mark.asyncio
+    async def test_wait_for_value_returns_value_written_by_other_instance(self, cache):
+        """Testar que quem não obteve o lock recebe o valor gravado pela outra instância"""
+        async def other_instance():
+            await asyncio.sleep(0.06)
+            await cache.set("progress:u1", "da outra instância")
+
+        writer = asyncio.ensure_future(other_instance())
+        assert await cache._wait_for_value("progress:u1") == "da outra instância"
+        await writer
+
+    @pytest.mark.asyncio
+    async def test_wait_for_value_gives_up_after_timeout(self, cache, monkeypatch):
+        """Testar que a espera termina em None após cache_lock_wait_seconds"""
+        monkeypatch.setattr(cache.settings, "cache_lock_wait_seconds", 0.1)
+
+        assert await cache._wait_for_value("progress:u1") is None
+
+    @pytest.mark.asyncio
+    async def test_lock_not_acquired_uses_value_from_other_instance(self, cache, monkeypatch):
+        """Testar que sem o lock o valor vem da outra instância, sem calcular"""
+        cache.use_redis = True
+        cache.redis_client = object()
+        monkeypatch.setattr(cache.settings, "cache_lock_enabled", True)
+        calls = []
+
+        async def lock_held(lock_key, token):
+            return False
+
+        async def wait_for_value(key):
+            return "da outra instância"
+
+        async def compute():
+            calls.append(1)
+            return "local"
+
+        cache._acquire_lock = lock_held
+        cache._wait_for_value = wait_for_value
+
+        assert await cache._compute_and_store("progress:u1", compute, None) == "da outra instância"
+        assert calls == []
+        assert cache.single_flight_stats["lock_waits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_acquire_lock_fails_open(self, cache):
+        """Testar que um erro do Redis ao adquirir o lock não impede o cálculo"""
+        class BrokenRedis:
+            async def set(self, *args, **kwargs):
+                raise ConnectionError("redis fora do ar")
+
+        cache.redis_client = BrokenRedis()
+
+        assert await cache._acquire_lock("lock:progress:u1", "token") is True
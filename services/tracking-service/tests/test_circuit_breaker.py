@@ -0,0 +1,80 @@
+"""
+Testes para o circuit breaker e seu uso no ServiceClient
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from services.service_client import ServiceClient
+
+def _half_open_breaker(clock):
+    """Breaker aberto por uma falha e já promovido a half_open"""
+    breaker = CircuitBreaker("users", failure_threshold=1, recovery_timeout=30.0)
+    with patch("services.circuit_breaker.time.monotonic", return_value=clock):
+        breaker.record_failure()
+    with patch("services.circuit_breaker.time.monotonic", return_value=clock + 30.0):
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+    return breaker
+
+class TestCircuitBreaker:
+    """Testes das transições de estado"""
+
+    def test_opens_after_threshold_and_closes_on_probe_success(self):
+        """Testar closed -> open -> half_open -> closed"""
+        breaker = _half_open_breaker(100.0)
+
+        with patch("services.circuit_breaker.time.monotonic", return_value=131.0):
+            breaker.before_call()
+            with pytest.raises(CircuitOpenError):
+                breaker.before_call()
+            breaker.record_success()
+
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.stats()["rejected_total"] == 1
+
+    def test_release_call_frees_probe_slot(self):
+        """Testar que uma chamada de teste sem resultado devolve a vaga"""
+        breaker = _half_open_breaker(100.0)
+
+        with patch("services.circuit_breaker.time.monotonic", return_value=131.0):
+            breaker.before_call()
+            breaker.release_call()
+            breaker.before_call()
+
+    def test_stuck_half_open_allows_new_probe_after_timeout(self):
+        """Testar nova chamada de teste quando a anterior nunca registrou resultado"""
+        breaker = _half_open_breaker(100.0)
+
+        with patch("services.circuit_breaker.time.monotonic", return_value=131.0):
+            breaker.before_call()
+            with pytest.raises(CircuitOpenError):
+                breaker.before_call()
+
+        with patch("services.circuit_breaker.time.monotonic", return_value=161.0):
+            breaker.before_call()
+
+class TestServiceClientBreaker:
+    """Testes da vaga de half_open nas requisições do ServiceClient"""
+
+    @pytest.fixture
+    def client(self):
+        client = ServiceClient()
+        client.max_retries = 0
+        client._breakers["users"] = _half_open_breaker(100.0)
+        return client
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("error", [asyncio.CancelledError(), ValueError("resposta inválida")])
+    async def test_probe_slot_released_on_unexpected_error(self, client, error):
+        """Testar que cancelamento ou erro fora do httpx não prende o circuito"""
+        client._clients["users"].request = AsyncMock(side_effect=error)
+
+        with patch("services.circuit_breaker.time.monotonic", return_value=131.0):
+            with pytest.raises(type(error)):
+                await client._make_request("users", "GET", "/users/1")
+
+            assert client._breakers["users"].state == CircuitBreaker.HALF_OPEN
+            client._breakers["users"].before_call()
@@ -0,0 +1,142 @@
+"""
+Testes para o rollup diário
+"""
+
+import random
+from datetime import date
+
+import pytest
+
+from services.daily_rollup import (
+    apply_contribution, build_rollup, contribution_fields, empty_rollup,
+    log_contribution, merge_log_updates, rollup_doc_id, rollup_key, sum_contributions
+)
+
+MEAL_TYPES = ["cafe_da_manha", "almoco", "lanche", "jantar"]
+EXERCISES = ["supino", "agachamento", "remada", "terra"]
+
+def _random_log(rng: random.Random):
+    log_type = rng.choice(["meal_checkin", "water_intake", "set", "workout_session", "weight"])
+    if log_type == "meal_checkin":
+        value = {
+            "meal_type": rng.choice(MEAL_TYPES),
+            "nutritional_summary": {
+                "total_calories": rng.randint(100, 900),
+                "total_protein": rng.randint(0, 60),
+                "total_carbs": rng.randint(0, 120),
+                "total_fat": rng.randint(0, 40),
+            },
+        }
+    elif log_type == "water_intake":
+        value = {"amount_ml": rng.choice([200, 250, 500])}
+    elif log_type == "set":
+        value = {"exercise_id": rng.choice(EXERCISES), "weight_kg": rng.randint(10, 120), "reps_done": rng.randint(1, 12)}
+    elif log_type == "workout_session":
+        value = {
+            "duration_minutes": rng.randint(20, 90),
+            "calories_burned": rng.randint(100, 600),
+            "exercises_performed": rng.sample(EXERCISES, rng.randint(1, 3)),
+        }
+    else:
+        value = {"weight_kg": 80}
+    return {"user_id": "user1", "date": "2024-03-10", "log_type": log_type, "value": value}
+
+def _naive_totals(logs):
+    """Totais do dia somados log a log, como o dashboard fazia sem rollup"""
+    totals = {"calories": 0, "protein": 0, "water_ml": 0, "sets_count": 0, "volume_kg": 0, "workout_sessions": 0}
+    meal_types = set()
+    for log in logs:
+        value = log["value"]
+        if log["log_type"] == "meal_checkin":
+            totals["calories"] += value["nutritional_summary"]["total_calories"]
+            totals["protein"] += value["nutritional_summary"]["total_protein"]
+            meal_types.add(value["meal_type"])
+        elif log["log_type"] == "water_intake":
+            totals["water_ml"] += value["amount_ml"]
+        elif log["log_type"] == "set":
+            totals["sets_count"] += 1
+            totals["volume_kg"] += value["weight_kg"] * value["reps_done"]
+        elif log["log_type"] == "workout_session":
+            totals["workout_sessions"] += 1
+    return totals, meal_types
+
+def _comparable(rollup):
+    """Rollup sem o contador de revisões"""
+    return {key: value for key, value in rollup.items() if key != "revision"}
+
+class TestDailyRollup:
+    """Testes de equivalência com a soma dos logs do dia"""
+
+    @pytest.mark.parametrize("seed", range(10))
+    def test_build_matches_naive_totals(self, seed):
+        """Testar totais do rollup contra a soma log a log"""
+        rng = random.Random(seed)
+        logs = [_random_log(rng) for _ in range(40)]
+
+        rollup = build_rollup("user1", date(2024, 3, 10), logs)
+        totals, meal_types = _naive_totals(logs)
+
+        for field, expected in totals.items():
+            assert rollup[field] == expected
+        assert set(rollup["meal_types"]) == meal_types
+        assert rollup["logs_count"] == len(logs)
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_removing_logs_matches_rebuild(self, seed):
+        """Testar que subtrair a contribuição equivale a reconstruir sem o log"""
+        rng = random.Random(seed)
+        logs = [_random_log(rng) for _ in range(30)]
+        rollup = build_rollup("user1", "2024-03-10", logs)
+
+        removed = rng.sample(range(len(logs)), 10)
+        for index in removed:
+            apply_contribution(rollup, log_contribution(logs[index]), sign=-1)
+
+        remaining = [log for index, log in enumerate(logs) if index not in removed]
+        assert _comparable(rollup) == _comparable(build_rollup("user1", "2024-03-10", remaining))
+
+    def test_update_is_remove_then_add(self):
+        """Testar atualização de log com caminho pontuado"""
+        log = {"user_id": "user1", "date": "2024-03-10", "log_type": "set",
+               "value": {"exercise_id": "supino", "weight_kg": 60, "reps_done": 10}}
+        rollup = build_rollup("user1", "2024-03-10", [log])
+
+        updated = merge_log_updates(log, {"value.weight_kg": 70})
+        apply_contribution(rollup, log_contribution(log), sign=-1)
+        apply_contribution(rollup, log_contribution(updated))
+
+        assert updated["value"] == {"exercise_id": "supino", "weight_kg": 70, "reps_done": 10}
+        assert log["value"]["weight_kg"] == 60
+        assert rollup["volume_kg"] == 700
+        assert rollup["revision"] == 3
+
+    def test_totals_never_negative(self):
+        """Testar remoção de log anterior ao rollup"""
+        rollup = empty_rollup("user1", "2024-03-10")
+        apply_contribution(rollup, log_contribution(_random_log(random.Random(1))), sign=-1)
+
+        assert all(rollup[field] >= 0 for field in ("calories", "water_ml", "sets_count", "volume_kg"))
+        assert rollup["meal_types"] == {} and rollup["exercise_ids"] == {}
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_sum_contributions_matches_sequential_apply(self, seed):
+        """Testar a soma de um lote contra aplicar log a log"""
+        rng = random.Random(seed)
+        logs = [_random_log(rng) for _ in range(20)]
+
+        batch = empty_rollup("user1", "2024-03-10")
+        apply_contribution(batch, sum_contributions([log_contribution(log) for log in logs]))
+
+        assert _comparable(batch) == _comparable(build_rollup("user1", "2024-03-10", logs))
+
+    def test_contribution_fields_skips_zero_deltas(self):
+        """Testar formato dos deltas para o merge do Firestore"""
+        contribution = log_contribution({"log_type": "water_intake", "value": {"amount_ml": 250}})
+
+        assert contribution_fields(contribution) == {"water_ml": 250, "logs_count": 1}
+
+    def test_ids(self):
+        """Testar ID determinístico do rollup"""
+        assert rollup_doc_id("user1", date(2024, 3, 10)) == "user1_2024-03-10"
+        assert rollup_key({"user_id": "user1", "date": "2024-03-10"}) == "user1_2024-03-10"
+        assert rollup_key({"user_id": "user1"}) is None
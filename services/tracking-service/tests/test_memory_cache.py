@@ -0,0 +1,135 @@
+"""
+Testes para o cache LRU em memória
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from services.memory_cache import LRUMemoryCache
+
+def _size(key, value):
+    return LRUMemoryCache._size_of(key, value)
+
+@pytest.fixture
+def clock():
+    """Relógio controlado para o time.monotonic do cache"""
+    now = [1000.0]
+    with patch("services.memory_cache.time.monotonic", side_effect=lambda: now[0]):
+        yield now
+
+class TestLRUMemoryCache:
+    """Testes de orçamento, expiração e invalidação por usuário"""
+
+    def test_byte_budget_evicts_least_recently_used(self, clock):
+        """Testar eviction LRU pelo orçamento de bytes"""
+        value = "x" * 90
+        cache = LRUMemoryCache(max_bytes=3 * _size("k1", value), max_entries=100)
+        for key in ("k1", "k2", "k3"):
+            cache.set(key, value, ttl_seconds=60)
+
+        cache.get("k1")
+        cache.set("k4", value, ttl_seconds=60)
+
+        assert "k2" not in cache
+        assert all(key in cache for key in ("k1", "k3", "k4"))
+        assert cache.metrics()["bytes"] == 3 * _size("k1", value)
+        assert cache.stats["evictions"] == 1
+
+    def test_large_value_evicts_several_entries(self, clock):
+        """Testar que um valor grande remove quantas entradas forem necessárias"""
+        cache = LRUMemoryCache(max_bytes=200, max_entries=100)
+        for index in range(5):
+            cache.set(f"k{index}", "x" * 20, ttl_seconds=60)
+
+        cache.set("big", "y" * 150, ttl_seconds=60)
+
+        assert "big" in cache
+        assert cache.metrics()["bytes"] <= 200
+        assert len(cache) < 6
+
+    def test_value_over_budget_is_rejected(self, clock):
+        """Testar valor maior que o orçamento inteiro (e remoção do valor antigo)"""
+        cache = LRUMemoryCache(max_bytes=50, max_entries=10)
+        cache.set("k1", "pequeno", ttl_seconds=60)
+
+        assert cache.set("k1", "x" * 100, ttl_seconds=60) is False
+        assert "k1" not in cache
+        assert cache.metrics()["bytes"] == 0
+
+    def test_entry_limit(self, clock):
+        """Testar limite de entradas"""
+        cache = LRUMemoryCache(max_bytes=10_000, max_entries=2)
+        for key in ("k1", "k2", "k3"):
+            cache.set(key, 1, ttl_seconds=60)
+
+        assert len(cache) == 2
+        assert "k1" not in cache
+
+    def test_expiration(self, clock):
+        """Testar expiração pelo heap, inclusive de chave regravada com outro prazo"""
+        cache = LRUMemoryCache(max_bytes=10_000, max_entries=100)
+        cache.set("curta", 1, ttl_seconds=10)
+        cache.set("longa", 2, ttl_seconds=100)
+        cache.set("regravada", 3, ttl_seconds=10)
+        cache.set("regravada", 4, ttl_seconds=100)
+
+        clock[0] += 10
+        assert cache.get("curta") is None
+        assert cache.get("regravada") == 4
+        assert cache.stats["expirations"] == 1
+
+        clock[0] += 90
+        assert cache.get("longa") is None
+        assert len(cache) == 0
+        assert cache.metrics()["bytes"] == 0
+
+    def test_replace_keeps_deadline_and_owner(self, clock):
+        """Testar replace sem renovar o prazo nem perder o usuário"""
+        cache = LRUMemoryCache(max_bytes=10_000, max_entries=100)
+        cache.set("dashboard:user1", {"v": 1}, ttl_seconds=10, user_id="user1")
+
+        clock[0] += 5
+        assert cache.replace("dashboard:user1", {"v": 2, "extra": "abc"}) is True
+        assert cache.get("dashboard:user1") == {"v": 2, "extra": "abc"}
+        assert cache.metrics()["bytes"] == _size("dashboard:user1", {"v": 2, "extra": "abc"})
+        assert cache.user_keys("user1") == ["dashboard:user1"]
+
+        clock[0] += 5
+        assert cache.replace("dashboard:user1", {"v": 3}) is False
+        assert cache.user_keys("user1") == []
+
+    def test_invalidate_user(self, clock):
+        """Testar invalidação por usuário sem afetar outros usuários"""
+        cache = LRUMemoryCache(max_bytes=10_000, max_entries=100)
+        cache.set("dashboard:user1", 1, ttl_seconds=60, user_id="user1")
+        cache.set("progress:user1:7", 2, ttl_seconds=60, user_id="user1")
+        cache.set("dashboard:user2", 3, ttl_seconds=60, user_id="user2")
+        cache.set("global", 4, ttl_seconds=60)
+
+        assert sorted(cache.user_keys("user1", prefix="progress:")) == ["progress:user1:7"]
+        assert cache.invalidate_user("user1") == 2
+
+        assert cache.user_keys("user1") == []
+        assert cache.get("dashboard:user2") == 3
+        assert cache.get("global") == 4
+        assert cache.metrics()["users_indexed"] == 1
+
+    def test_evicted_key_leaves_user_index(self, clock):
+        """Testar que eviction e delete também limpam o índice por usuário"""
+        cache = LRUMemoryCache(max_bytes=10_000, max_entries=1)
+        cache.set("a:user1", 1, ttl_seconds=60, user_id="user1")
+        cache.set("b:user2", 2, ttl_seconds=60, user_id="user2")
+
+        assert cache.user_keys("user1") == []
+        assert cache.delete("b:user2") is True
+        assert cache.metrics()["users_indexed"] == 0
+
+    def test_clear_pattern(self, clock):
+        """Testar remoção por padrão glob"""
+        cache = LRUMemoryCache(max_bytes=10_000, max_entries=100)
+        for key in ("dashboard:user1", "dashboard:user2", "progress:user1"):
+            cache.set(key, 1, ttl_seconds=60)
+
+        assert cache.clear_pattern("dashboard:*") == 2
+        assert list(cache._entries) == ["progress:user1"]
@@ -0,0 +1,88 @@
+"""
+Testes para o estado de sequência de check-ins
+"""
+
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from services.streaks import advance_streak, compute_streak, current_streak_on, empty_streak
+
+START = date(2024, 1, 1)
+
+def _random_dates(rng: random.Random, days: int = 60):
+    """Dias com check-in (com lacunas), podendo repetir o mesmo dia"""
+    dates = [START + timedelta(days=offset) for offset in range(days) if rng.random() < 0.7]
+    return dates + rng.sample(dates, min(5, len(dates)))
+
+def _naive_streaks(dates):
+    """Sequência atual e maior, contando dias consecutivos no histórico ordenado"""
+    days = sorted(set(dates))
+    longest = current = 0
+    previous = None
+    for day in days:
+        current = current + 1 if previous is not None and day - previous == timedelta(days=1) else 1
+        longest = max(longest, current)
+        previous = day
+    return current, longest
+
+class TestStreaks:
+    """Testes de avanço incremental e recálculo"""
+
+    @pytest.mark.parametrize("seed", range(10))
+    def test_incremental_matches_naive(self, seed):
+        """Testar avanço em ordem contra a contagem no histórico"""
+        dates = sorted(_random_dates(random.Random(seed)))
+        state = empty_streak("user1")
+        for day in dates:
+            advance_streak(state, day)
+
+        assert (state["current_streak"], state["longest_streak"]) == _naive_streaks(dates)
+        assert state["last_checkin_date"] == max(dates).isoformat()
+        assert state["stale"] is False
+
+    @pytest.mark.parametrize("seed", range(10))
+    def test_compute_ignores_input_order(self, seed):
+        """Testar recálculo com datas fora de ordem e como string"""
+        rng = random.Random(seed)
+        dates = _random_dates(rng)
+        shuffled = [day.isoformat() if rng.random() < 0.5 else day for day in dates]
+        rng.shuffle(shuffled)
+
+        state = compute_streak("user1", shuffled)
+
+        assert (state["current_streak"], state["longest_streak"]) == _naive_streaks(dates)
+        assert state["stale"] is False
+
+    def test_out_of_order_checkin_marks_stale(self):
+        """Testar que um check-in retroativo marca o estado para recálculo"""
+        state = empty_streak("user1")
+        for day in ("2024-01-01", "2024-01-03", "2024-01-04"):
+            advance_streak(state, day)
+        assert state["current_streak"] == 2
+
+        # 02/01 fecha a lacuna: só o histórico completo resolve
+        advance_streak(state, "2024-01-02")
+
+        assert state["stale"] is True
+        assert state["current_streak"] == 2
+        assert state["last_checkin_date"] == "2024-01-04"
+        assert compute_streak("user1", ["2024-01-01", "2024-01-03", "2024-01-04", "2024-01-02"])["current_streak"] == 4
+
+    def test_same_day_and_gap(self):
+        """Testar check-in repetido no dia e recomeço após lacuna"""
+        state = empty_streak("user1")
+        for day in ("2024-01-01", "2024-01-02", "2024-01-02", "2024-01-05"):
+            advance_streak(state, day)
+
+        assert state["current_streak"] == 1
+        assert state["longest_streak"] == 2
+
+    def test_current_streak_on(self):
+        """Testar que a sequência só conta com check-in na própria data"""
+        state = compute_streak("user1", ["2024-01-01", "2024-01-02"])
+
+        assert current_streak_on(state, date(2024, 1, 2)) == 2
+        assert current_streak_on(state, date(2024, 1, 3)) == 0
+        assert current_streak_on(None, date(2024, 1, 2)) == 0
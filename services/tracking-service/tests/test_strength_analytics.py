@@ -0,0 +1,131 @@
+"""
+Testes para os analytics de força vetorizados
+"""
+
+import random
+from collections import defaultdict
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from services.strength_analytics import StrengthAnalytics, one_rep_max
+
+START = date(2024, 1, 1)
+
+def _random_history(rng: random.Random, days: int = 30, exercises: int = 5):
+    """Séries com pesos inteiros (empates de carga) e algumas séries inválidas"""
+    history = []
+    for day_offset in range(days):
+        for exercise in range(exercises):
+            if rng.random() < 0.4:
+                continue
+            for set_number in range(rng.randint(1, 5)):
+                history.append({
+                    "date": (START + timedelta(days=day_offset)).isoformat(),
+                    "exercise_id": f"ex_{exercise}",
+                    "exercise_name": f"Exercício {exercise}",
+                    "weight_kg": rng.choice([0, 20, 40, 50, 60, 80, 100]),
+                    "reps_done": rng.choice([0, 1, 2, 4, 5, 8, 10, 12]),
+                    "set_number": set_number + 1,
+                })
+    rng.shuffle(history)
+    return history
+
+def _legacy_one_rep_max(weight_kg: float, reps: int) -> float:
+    """Brzycki como em CalorieService.estimate_one_rep_max"""
+    if reps == 1:
+        return weight_kg
+    one_rm = weight_kg / (1.0278 - 0.0278 * reps)
+    return round(max(weight_kg, min(one_rm, weight_kg * 2)), 1)
+
+def _legacy_points(history):
+    """Cálculo anterior por (exercício, dia) com dicts aninhados"""
+    grouped = defaultdict(lambda: defaultdict(list))
+    for entry in history:
+        if entry["weight_kg"] > 0 and entry["reps_done"] > 0:
+            grouped[entry["exercise_id"]][date.fromisoformat(entry["date"])].append(entry)
+
+    points = {}
+    for exercise_id, daily in grouped.items():
+        for entry_date, sets in daily.items():
+            best_set = max(sets, key=lambda s: s["weight_kg"] * s["reps_done"])
+            points[(entry_date, exercise_id)] = {
+                "max_weight_kg": max(s["weight_kg"] for s in sets),
+                "total_volume_kg": sum(s["weight_kg"] * s["reps_done"] for s in sets),
+                "one_rep_max_estimated": _legacy_one_rep_max(best_set["weight_kg"], best_set["reps_done"]),
+            }
+    return points
+
+class TestStrengthAnalytics:
+    """Testes de equivalência com o cálculo por exercício e dia"""
+
+    @pytest.mark.parametrize("seed", range(10))
+    def test_daily_points_match_legacy(self, seed):
+        """Testar máximos, volume e 1RM diários contra o cálculo anterior"""
+        history = _random_history(random.Random(seed))
+        expected = _legacy_points(history)
+
+        points = StrengthAnalytics(history).daily_points()
+
+        assert len(points) == len(expected)
+        assert [point["date"] for point in points] == sorted(point["date"] for point in points)
+        for point in points:
+            legacy = expected[(point["date"], point["exercise_id"])]
+            for field, value in legacy.items():
+                assert point[field] == pytest.approx(value), field
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_records_and_summary_match_per_exercise_loop(self, seed):
+        """Testar recordes e resumo contra um laço por exercício"""
+        analytics = StrengthAnalytics(_random_history(random.Random(seed)))
+        points = analytics.daily_points()
+        summary = {item["exercise_id"]: item for item in analytics.exercise_summary()}
+
+        by_exercise = defaultdict(list)
+        for point in points:
+            by_exercise[point["exercise_id"]].append(point)
+
+        assert set(summary) == set(by_exercise)
+        for exercise_id, series in by_exercise.items():
+            weights = [point["max_weight_kg"] for point in series]
+            records = sum(1 for i in range(1, len(weights)) if weights[i] > max(weights[:i]))
+
+            item = summary[exercise_id]
+            assert item["points"] == len(series)
+            assert (item["first_max_weight_kg"], item["last_max_weight_kg"]) == (weights[0], weights[-1])
+            assert (item["highest_max_weight_kg"], item["lowest_max_weight_kg"]) == (max(weights), min(weights))
+            assert item["total_volume_kg"] == pytest.approx(sum(point["total_volume_kg"] for point in series))
+            assert item["personal_records"] == records
+
+    def test_best_set_tie_keeps_first_set(self):
+        """Testar empate de carga: vale o primeiro set, como no max() anterior"""
+        history = [
+            {"date": "2024-01-01", "exercise_id": "supino", "weight_kg": 100, "reps_done": 2},
+            {"date": "2024-01-01", "exercise_id": "supino", "weight_kg": 200, "reps_done": 1},
+        ]
+
+        point = StrengthAnalytics(history).daily_points()[0]
+
+        assert point["one_rep_max_estimated"] == _legacy_one_rep_max(100, 2)
+
+    def test_one_rep_max_bounds(self):
+        """Testar 1 repetição e limite [peso, 2 × peso] da fórmula"""
+        weights = np.array([100.0, 100.0, 100.0, 100.0])
+        reps = np.array([1, 5, 36, 40])
+
+        estimates = one_rep_max(weights, reps)
+
+        assert estimates.tolist() == [_legacy_one_rep_max(w, r) for w, r in zip(weights, reps)]
+
+    def test_empty_and_most_tracked(self):
+        """Testar histórico vazio e exercício com mais dias"""
+        assert StrengthAnalytics([]).daily_points() == []
+        assert StrengthAnalytics([]).most_tracked_exercise() is None
+
+        history = [
+            {"date": "2024-01-01", "exercise_id": "b", "weight_kg": 50, "reps_done": 5},
+            {"date": "2024-01-01", "exercise_id": "a", "weight_kg": 50, "reps_done": 5},
+            {"date": "2024-01-02", "exercise_id": "a", "weight_kg": 50, "reps_done": 5},
+        ]
+        assert StrengthAnalytics(history).most_tracked_exercise() == "a"
@@ -23,6 +23,7 @@ class Settings(BaseSettings):
     # Firebase
     firebase_project_id: str = os.getenv("FIREBASE_PROJECT_ID", "evolveyou-23580")
     firebase_credentials_path: Optional[str] = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+    firebase_auth_max_workers: int = int(os.getenv("FIREBASE_AUTH_MAX_WORKERS", "8"))  # Threads para chamadas bloqueantes do Firebase Auth
     
     # JWT
     jwt_secret_key: str = os.getenv("JWT_SECRET_KEY", "your-super-secret-jwt-key-change-in-production")
@@ -36,6 +37,8 @@ class Settings(BaseSettings):
     password_require_lowercase: bool = True
     password_require_numbers: bool = True
     password_require_special: bool = True
+    password_hash_max_workers: int = int(os.getenv("PASSWORD_HASH_MAX_WORKERS", "4"))  # Threads dedicadas ao bcrypt
+    password_hash_max_queue: int = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))  # Acima disso responde 429
     
     # Rate Limiting
     rate_limit_requests: int = int(os.getenv("RATE_LIMIT_REQUESTS", "100"))
@@ -43,6 +46,8 @@ class Settings(BaseSettings):
     
     # Cache
     cache_ttl: int = int(os.getenv("CACHE_TTL", "3600"))  # 1 hora
+    user_cache_ttl: int = int(os.getenv("USER_CACHE_TTL", "30"))  # segundos
+    user_cache_max_size: int = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
     redis_url: Optional[str] = os.getenv("REDIS_URL")
     
     # Logging
@@ -20,12 +20,14 @@ from services.auth_service import AuthService
 from services.user_service import UserService
 from services.calorie_service import CalorieService
 from services.communication_service import CommunicationService
+from services.user_cache import UserProfileCache
+from services.password_hasher import PasswordHasherBusy
 from models.user import (
     UserRegistration, SocialLogin, OnboardingData, 
     AuthResponse, UserResponse, AuthTokens
 )
 from middleware.auth import verify_token, get_current_user
-from middleware.logging import setup_logging
+from middleware.logging import setup_logging, LoggingMiddleware
 from middleware.rate_limit import rate_limit
 
 # Configurar logging estruturado
@@ -40,21 +42,26 @@ async def lifespan(app: FastAPI):
     logger.info("Iniciando Users Service", version=settings.version)
     
     # Inicializar serviços
-    firebase_service = FirebaseService()
+    user_cache = UserProfileCache()
+    firebase_service = FirebaseService(user_cache)
     await firebase_service.initialize()
     
     # Armazenar serviços no estado da aplicação
     app.state.firebase_service = firebase_service
+    app.state.user_cache = user_cache
     app.state.auth_service = AuthService(firebase_service)
     app.state.user_service = UserService(firebase_service)
     app.state.calorie_service = CalorieService()
     app.state.communication_service = CommunicationService()
+    await app.state.communication_service.set_firebase_service(firebase_service)
     
     logger.info("Users Service iniciado com sucesso")
     
     yield
     
     logger.info("Finalizando Users Service")
+    app.state.auth_service.password_hasher.close()
+    await firebase_service.close()
 
 # Criar aplicação FastAPI
 app = FastAPI(
@@ -75,6 +82,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Logging de requests com tempo de I/O
+app.add_middleware(LoggingMiddleware)
+
 # Security scheme
 security = HTTPBearer()
 
@@ -98,7 +108,7 @@ async def health_check():
         # Verificar conexão com Firebase
         firebase_status = "healthy"
         try:
-            app.state.firebase_service.db.collection("health_check").limit(1).get()
+            await app.state.firebase_service.db.collection("health_check").limit(1).get()
         except Exception as e:
             firebase_status = "unhealthy"
             logger.error("Firebase health check failed", error=str(e))
@@ -112,7 +122,9 @@ async def health_check():
                 "auth": "healthy",
                 "users": "healthy",
                 "calories": "healthy"
-            }
+            },
+            "user_cache": app.state.user_cache.stats(),
+            "password_hasher": app.state.auth_service.password_hasher.stats()
         }
     except Exception as e:
         logger.error("Health check failed", error=str(e))
@@ -160,6 +172,12 @@ async def register_user(
         
     except HTTPException:
         raise
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Serviço ocupado. Tente novamente em instantes.",
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         logger.error("Erro no registro", error=str(e))
         raise HTTPException(
@@ -202,6 +220,12 @@ async def login_user(
         
     except HTTPException:
         raise
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Serviço ocupado. Tente novamente em instantes.",
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         logger.error("Erro no login", error=str(e))
         raise HTTPException(
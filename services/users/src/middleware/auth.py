@@ -3,13 +3,14 @@ Middleware de autenticação
 """
 
 from typing import Optional, Dict, Any
-from fastapi import HTTPException, Depends, status
+from fastapi import HTTPException, Depends, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import jwt
 import structlog
 
 from config.settings import get_settings
 from services.firebase_service import FirebaseService
+from services.user_cache import UserProfileCache
 
 logger = structlog.get_logger()
 settings = get_settings()
@@ -54,7 +55,23 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
             detail="Erro na autenticação"
         )
 
-async def get_current_user(token_payload: Dict[str, Any] = Depends(verify_token)) -> Dict[str, Any]:
+async def load_user(request: Request, user_id: str) -> Optional[Dict[str, Any]]:
+    """Buscar usuário pelo cache de perfis, consultando o Firestore apenas em miss"""
+    user_cache: UserProfileCache = request.app.state.user_cache
+    
+    user_data = user_cache.get(user_id)
+    if user_data is None:
+        firebase_service: FirebaseService = request.app.state.firebase_service
+        user_data = await firebase_service.get_user_by_id(user_id)
+        if user_data:
+            user_cache.set(user_id, user_data)
+    
+    return user_data
+
+async def get_current_user(
+    request: Request,
+    token_payload: Dict[str, Any] = Depends(verify_token)
+) -> Dict[str, Any]:
     """Obter usuário atual a partir do token"""
     try:
         user_id = token_payload.get("sub")
@@ -65,11 +82,8 @@ async def get_current_user(token_payload: Dict[str, Any] = Depends(verify_token)
                 detail="Token inválido"
             )
         
-        # Buscar usuário no banco (usando o app state)
-        from main import app
-        firebase_service: FirebaseService = app.state.firebase_service
-        
-        user_data = await firebase_service.get_user_by_id(user_id)
+        # Buscar usuário (cache de perfis -> Firestore)
+        user_data = await load_user(request, user_id)
         
         if not user_data:
             raise HTTPException(
@@ -151,7 +165,10 @@ class OptionalAuth:
 
 optional_auth = OptionalAuth()
 
-async def get_current_user_optional(token_payload: Optional[Dict[str, Any]] = Depends(optional_auth)) -> Optional[Dict[str, Any]]:
+async def get_current_user_optional(
+    request: Request,
+    token_payload: Optional[Dict[str, Any]] = Depends(optional_auth)
+) -> Optional[Dict[str, Any]]:
     """Obter usuário atual (opcional)"""
     if not token_payload:
         return None
@@ -162,11 +179,8 @@ async def get_current_user_optional(token_payload: Optional[Dict[str, Any]] = De
         if not user_id:
             return None
         
-        # Buscar usuário no banco
-        from main import app
-        firebase_service: FirebaseService = app.state.firebase_service
-        
-        user_data = await firebase_service.get_user_by_id(user_id)
+        # Buscar usuário (cache de perfis -> Firestore)
+        user_data = await load_user(request, user_id)
         
         if not user_data or not user_data.get("is_active", True):
             return None
@@ -3,12 +3,14 @@ Middleware de logging estruturado
 """
 
 import sys
+import time
 import logging
 from typing import Dict, Any
 import structlog
 from structlog.stdlib import LoggerFactory
 
 from config.settings import get_settings
+from services.io_timing import start_request_io, end_request_io
 
 settings = get_settings()
 
@@ -60,7 +62,7 @@ def get_request_logger(request_id: str = None, user_id: str = None) -> structlog
     return logger.bind(**context)
 
 class LoggingMiddleware:
-    """Middleware para logging de requests"""
+    """Middleware para logging de requests com o tempo de I/O de cada um"""
     
     def __init__(self, app):
         self.app = app
@@ -89,9 +91,30 @@ class LoggingMiddleware:
             client=scope.get("client", ["unknown", 0])[0]
         )
         
-        # Processar request
-        await self.app(scope, receive, send)
+        status_code = 500
         
-        # Log do fim do request seria feito em um middleware de response
-        # mas para simplicidade, vamos deixar assim
-
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        # Processar request contabilizando o I/O (Firestore, Firebase Auth, HTTP)
+        started = time.perf_counter()
+        io_token = start_request_io()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            io = end_request_io(io_token)
+            duration_ms = (time.perf_counter() - started) * 1000
+            io_ms = sum(entry["ms"] for entry in io.values())
+            
+            logger.info(
+                "Request finalizado",
+                method=scope["method"],
+                path=scope["path"],
+                status_code=status_code,
+                duration_ms=round(duration_ms, 2),
+                io_ms=round(io_ms, 2),
+                io=io
+            )
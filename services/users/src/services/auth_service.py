@@ -15,6 +15,7 @@ import structlog
 from config.settings import get_settings
 from models.user import UserRegistration, SocialLogin, UserProfile, AuthTokens
 from services.firebase_service import FirebaseService
+from services.password_hasher import PasswordHasher
 
 logger = structlog.get_logger()
 settings = get_settings()
@@ -22,10 +23,15 @@ settings = get_settings()
 class AuthService:
     """Serviço de autenticação"""
     
-    def __init__(self, firebase_service: FirebaseService):
+    def __init__(
+        self,
+        firebase_service: FirebaseService,
+        password_hasher: Optional[PasswordHasher] = None
+    ):
         self.firebase_service = firebase_service
         self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-        
+        self.password_hasher = password_hasher or PasswordHasher(self.pwd_context)
+    
     def hash_password(self, password: str) -> str:
         """Criptografar senha"""
         return self.pwd_context.hash(password)
@@ -34,6 +40,14 @@ class AuthService:
         """Verificar senha"""
         return self.pwd_context.verify(plain_password, hashed_password)
     
+    async def hash_password_async(self, password: str) -> str:
+        """Criptografar senha no pool de hashing (não bloqueia o event loop)"""
+        return await self.password_hasher.hash(password)
+    
+    async def verify_password_async(self, plain_password: str, hashed_password: str) -> bool:
+        """Verificar senha no pool de hashing (não bloqueia o event loop)"""
+        return await self.password_hasher.verify(plain_password, hashed_password)
+    
     def generate_jwt_token(self, user_id: str, token_type: str = "access") -> str:
         """Gerar token JWT"""
         now = datetime.utcnow()
@@ -71,7 +85,7 @@ class AuthService:
         """Registrar novo usuário"""
         try:
             # Criptografar senha
-            hashed_password = self.hash_password(user_data.password)
+            hashed_password = await self.hash_password_async(user_data.password)
             
             # Preparar dados do usuário
             user_dict = {
@@ -137,7 +151,7 @@ class AuthService:
                 return None
             
             # Verificar senha
-            if not self.verify_password(password, user_data.get("password_hash", "")):
+            if not await self.verify_password_async(password, user_data.get("password_hash", "")):
                 return None
             
             # Registrar evento de login
@@ -421,11 +435,11 @@ class AuthService:
                 raise ValueError("Usuário não encontrado")
             
             # Verificar senha atual
-            if not self.verify_password(old_password, user_data.get("password_hash", "")):
+            if not await self.verify_password_async(old_password, user_data.get("password_hash", "")):
                 raise ValueError("Senha atual incorreta")
             
             # Criptografar nova senha
-            new_password_hash = self.hash_password(new_password)
+            new_password_hash = await self.hash_password_async(new_password)
             
             # Atualizar no banco
             await self.firebase_service.update_user(
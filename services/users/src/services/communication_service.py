@@ -11,6 +11,7 @@ import structlog
 from config.settings import get_settings
 from models.user import FitnessGoals, CalorieCalculation
 from services.firebase_service import FirebaseService
+from services.io_timing import track_io
 
 logger = structlog.get_logger()
 settings = get_settings()
@@ -92,7 +93,8 @@ class CommunicationService:
             
             doc_ref = self.firebase_service.db.collection('system_events').document()
             event_data['id'] = doc_ref.id
-            doc_ref.set(event_data)
+            async with track_io("firestore"):
+                await doc_ref.set(event_data)
             
             logger.info("Evento salvo no Firestore", event_id=doc_ref.id)
             return True
@@ -120,15 +122,16 @@ class CommunicationService:
             }
             
             # Fazer chamada HTTP para o serviço de planos
-            response = await self.http_client.post(
-                f"{plans_service_url}/events/onboarding-completed",
-                json=payload,
-                headers={
-                    "Content-Type": "application/json",
-                    "X-Service-Name": "users-service",
-                    "X-Event-Type": "onboarding_completed"
-                }
-            )
+            async with track_io("http"):
+                response = await self.http_client.post(
+                    f"{plans_service_url}/events/onboarding-completed",
+                    json=payload,
+                    headers={
+                        "Content-Type": "application/json",
+                        "X-Service-Name": "users-service",
+                        "X-Event-Type": "onboarding_completed"
+                    }
+                )
             
             if response.status_code == 200:
                 logger.info("Serviço de planos notificado com sucesso", user_id=event_data["user_id"])
@@ -175,14 +178,15 @@ class CommunicationService:
                 "timestamp": event_data["timestamp"]
             }
             
-            response = await self.http_client.post(
-                f"{notifications_service_url}/events/user-onboarded",
-                json=payload,
-                headers={
-                    "Content-Type": "application/json",
-                    "X-Service-Name": "users-service"
-                }
-            )
+            async with track_io("http"):
+                response = await self.http_client.post(
+                    f"{notifications_service_url}/events/user-onboarded",
+                    json=payload,
+                    headers={
+                        "Content-Type": "application/json",
+                        "X-Service-Name": "users-service"
+                    }
+                )
             
             if response.status_code == 200:
                 logger.info("Serviço de notificações configurado", user_id=event_data["user_id"])
@@ -219,14 +223,15 @@ class CommunicationService:
                 "timestamp": event_data["timestamp"]
             }
             
-            response = await self.http_client.post(
-                f"{analytics_service_url}/events/track",
-                json=payload,
-                headers={
-                    "Content-Type": "application/json",
-                    "X-Service-Name": "users-service"
-                }
-            )
+            async with track_io("http"):
+                response = await self.http_client.post(
+                    f"{analytics_service_url}/events/track",
+                    json=payload,
+                    headers={
+                        "Content-Type": "application/json",
+                        "X-Service-Name": "users-service"
+                    }
+                )
             
             if response.status_code == 200:
                 logger.info("Evento enviado para analytics", user_id=event_data["user_id"])
@@ -328,10 +333,11 @@ class CommunicationService:
             # Verificar serviço de planos
             if settings.plans_service_url:
                 try:
-                    response = await self.http_client.get(
-                        f"{settings.plans_service_url}/health",
-                        timeout=5.0
-                    )
+                    async with track_io("http"):
+                        response = await self.http_client.get(
+                            f"{settings.plans_service_url}/health",
+                            timeout=5.0
+                        )
                     services_status["plans_service"] = response.status_code == 200
                 except:
                     services_status["plans_service"] = False
@@ -341,10 +347,11 @@ class CommunicationService:
             # Verificar serviço de notificações
             if settings.notifications_service_url:
                 try:
-                    response = await self.http_client.get(
-                        f"{settings.notifications_service_url}/health",
-                        timeout=5.0
-                    )
+                    async with track_io("http"):
+                        response = await self.http_client.get(
+                            f"{settings.notifications_service_url}/health",
+                            timeout=5.0
+                        )
                     services_status["notifications_service"] = response.status_code == 200
                 except:
                     services_status["notifications_service"] = False
@@ -354,10 +361,11 @@ class CommunicationService:
             # Verificar serviço de analytics
             if settings.analytics_service_url:
                 try:
-                    response = await self.http_client.get(
-                        f"{settings.analytics_service_url}/health",
-                        timeout=5.0
-                    )
+                    async with track_io("http"):
+                        response = await self.http_client.get(
+                            f"{settings.analytics_service_url}/health",
+                            timeout=5.0
+                        )
                     services_status["analytics_service"] = response.status_code == 200
                 except:
                     services_status["analytics_service"] = False
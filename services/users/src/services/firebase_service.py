@@ -4,24 +4,37 @@ Serviço de integração com Firebase
 
 import os
 import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import Optional, Dict, Any, List
 import firebase_admin
-from firebase_admin import credentials, firestore, auth
+from firebase_admin import credentials, firestore, firestore_async, auth
 from google.cloud.firestore_v1.base_query import FieldFilter
 import structlog
 
 from config.settings import get_settings
+from services.io_timing import track_io
+from services.user_cache import UserProfileCache
 
 logger = structlog.get_logger()
 settings = get_settings()
 
 class FirebaseService:
-    """Serviço para interação com Firebase"""
+    """
+    Serviço para interação com Firebase
     
-    def __init__(self):
+    O Firestore usa o cliente assíncrono; o SDK do Firebase Auth é
+    bloqueante e roda em um pool de threads limitado, fora do event loop.
+    Escritas no documento do usuário invalidam o cache de perfis, se houver.
+    """
+    
+    def __init__(self, user_cache: Optional[UserProfileCache] = None):
         self.app = None
         self.db = None
         self.auth = None
+        self.user_cache = user_cache
+        self._auth_executor: Optional[ThreadPoolExecutor] = None
         
     async def initialize(self):
         """Inicializar conexão com Firebase"""
@@ -42,8 +55,12 @@ class FirebaseService:
                 self.app = firebase_admin.get_app()
             
             # Inicializar serviços
-            self.db = firestore.client()
+            self.db = firestore_async.client(app=self.app)
             self.auth = auth
+            self._auth_executor = ThreadPoolExecutor(
+                max_workers=settings.firebase_auth_max_workers,
+                thread_name_prefix="firebase-auth"
+            )
             
             logger.info("Firebase inicializado com sucesso", project_id=settings.firebase_project_id)
             
@@ -51,13 +68,31 @@ class FirebaseService:
             logger.error("Erro ao inicializar Firebase", error=str(e))
             raise
     
+    async def close(self):
+        """Liberar o pool de threads do Firebase Auth"""
+        if self._auth_executor:
+            self._auth_executor.shutdown(wait=False)
+            self._auth_executor = None
+    
+    async def _run_auth(self, func, *args, **kwargs):
+        """Executar chamada bloqueante do Firebase Auth no pool de threads"""
+        loop = asyncio.get_running_loop()
+        async with track_io("firebase_auth"):
+            return await loop.run_in_executor(self._auth_executor, partial(func, *args, **kwargs))
+    
+    def _invalidate_user(self, user_id: str):
+        """Remover o usuário do cache de perfis após uma escrita"""
+        if self.user_cache is not None:
+            self.user_cache.invalidate(user_id)
+    
     # Métodos para usuários
     async def create_user(self, user_data: Dict[str, Any]) -> str:
         """Criar usuário no Firestore"""
         try:
             doc_ref = self.db.collection('users').document()
             user_data['id'] = doc_ref.id
-            doc_ref.set(user_data)
+            async with track_io("firestore"):
+                await doc_ref.set(user_data)
             
             logger.info("Usuário criado no Firestore", user_id=doc_ref.id)
             return doc_ref.id
@@ -70,7 +105,8 @@ class FirebaseService:
         """Buscar usuário por ID"""
         try:
             doc_ref = self.db.collection('users').document(user_id)
-            doc = doc_ref.get()
+            async with track_io("firestore"):
+                doc = await doc_ref.get()
             
             if doc.exists:
                 return doc.to_dict()
@@ -87,7 +123,8 @@ class FirebaseService:
                 filter=FieldFilter('email', '==', email)
             ).limit(1)
             
-            docs = query.get()
+            async with track_io("firestore"):
+                docs = await query.get()
             
             if docs:
                 return docs[0].to_dict()
@@ -101,7 +138,9 @@ class FirebaseService:
         """Atualizar dados do usuário"""
         try:
             doc_ref = self.db.collection('users').document(user_id)
-            doc_ref.update(data)
+            async with track_io("firestore"):
+                await doc_ref.update(data)
+            self._invalidate_user(user_id)
             
             logger.info("Usuário atualizado", user_id=user_id)
             return True
@@ -114,10 +153,12 @@ class FirebaseService:
         """Deletar usuário (soft delete)"""
         try:
             doc_ref = self.db.collection('users').document(user_id)
-            doc_ref.update({
-                'is_active': False,
-                'deleted_at': firestore.SERVER_TIMESTAMP
-            })
+            async with track_io("firestore"):
+                await doc_ref.update({
+                    'is_active': False,
+                    'deleted_at': firestore.SERVER_TIMESTAMP
+                })
+            self._invalidate_user(user_id)
             
             logger.info("Usuário deletado", user_id=user_id)
             return True
@@ -130,7 +171,8 @@ class FirebaseService:
     async def create_firebase_user(self, email: str, password: str, name: str) -> str:
         """Criar usuário no Firebase Auth"""
         try:
-            user_record = self.auth.create_user(
+            user_record = await self._run_auth(
+                self.auth.create_user,
                 email=email,
                 password=password,
                 display_name=name,
@@ -147,7 +189,7 @@ class FirebaseService:
     async def verify_firebase_token(self, token: str) -> Dict[str, Any]:
         """Verificar token do Firebase"""
         try:
-            decoded_token = self.auth.verify_id_token(token)
+            decoded_token = await self._run_auth(self.auth.verify_id_token, token)
             return decoded_token
             
         except Exception as e:
@@ -157,7 +199,7 @@ class FirebaseService:
     async def get_firebase_user(self, uid: str) -> Dict[str, Any]:
         """Obter usuário do Firebase Auth"""
         try:
-            user_record = self.auth.get_user(uid)
+            user_record = await self._run_auth(self.auth.get_user, uid)
             return {
                 'uid': user_record.uid,
                 'email': user_record.email,
@@ -180,7 +222,7 @@ class FirebaseService:
     async def update_firebase_user(self, uid: str, **kwargs) -> bool:
         """Atualizar usuário no Firebase Auth"""
         try:
-            self.auth.update_user(uid, **kwargs)
+            await self._run_auth(self.auth.update_user, uid, **kwargs)
             logger.info("Usuário Firebase atualizado", uid=uid)
             return True
             
@@ -193,13 +235,14 @@ class FirebaseService:
         """Salvar refresh token"""
         try:
             doc_ref = self.db.collection('refresh_tokens').document()
-            doc_ref.set({
-                'user_id': user_id,
-                'token': token,
-                'expires_at': expires_at,
-                'created_at': firestore.SERVER_TIMESTAMP,
-                'is_active': True
-            })
+            async with track_io("firestore"):
+                await doc_ref.set({
+                    'user_id': user_id,
+                    'token': token,
+                    'expires_at': expires_at,
+                    'created_at': firestore.SERVER_TIMESTAMP,
+                    'is_active': True
+                })
             
             return True
             
@@ -216,7 +259,8 @@ class FirebaseService:
                 filter=FieldFilter('is_active', '==', True)
             ).limit(1)
             
-            docs = query.get()
+            async with track_io("firestore"):
+                docs = await query.get()
             
             if docs:
                 return docs[0].to_dict()
@@ -233,10 +277,15 @@ class FirebaseService:
                 filter=FieldFilter('token', '==', token)
             )
             
-            docs = query.get()
+            async with track_io("firestore"):
+                docs = await query.get()
             
-            for doc in docs:
-                doc.reference.update({'is_active': False})
+            if docs:
+                batch = self.db.batch()
+                for doc in docs:
+                    batch.update(doc.reference, {'is_active': False})
+                async with track_io("firestore"):
+                    await batch.commit()
             
             return True
             
@@ -255,7 +304,8 @@ class FirebaseService:
                 'created_at': firestore.SERVER_TIMESTAMP,
                 'is_active': True
             })
-            doc_ref.set(session_data)
+            async with track_io("firestore"):
+                await doc_ref.set(session_data)
             
             return doc_ref.id
             
@@ -272,7 +322,8 @@ class FirebaseService:
                 filter=FieldFilter('is_active', '==', True)
             )
             
-            docs = query.get()
+            async with track_io("firestore"):
+                docs = await query.get()
             return [doc.to_dict() for doc in docs]
             
         except Exception as e:
@@ -283,10 +334,11 @@ class FirebaseService:
         """Finalizar sessão"""
         try:
             doc_ref = self.db.collection('user_sessions').document(session_id)
-            doc_ref.update({
-                'is_active': False,
-                'ended_at': firestore.SERVER_TIMESTAMP
-            })
+            async with track_io("firestore"):
+                await doc_ref.update({
+                    'is_active': False,
+                    'ended_at': firestore.SERVER_TIMESTAMP
+                })
             
             return True
             
@@ -299,14 +351,15 @@ class FirebaseService:
         """Registrar evento de autenticação"""
         try:
             doc_ref = self.db.collection('auth_logs').document()
-            doc_ref.set({
-                'user_id': user_id,
-                'event_type': event_type,
-                'details': details,
-                'timestamp': firestore.SERVER_TIMESTAMP,
-                'ip_address': details.get('ip_address'),
-                'user_agent': details.get('user_agent')
-            })
+            async with track_io("firestore"):
+                await doc_ref.set({
+                    'user_id': user_id,
+                    'event_type': event_type,
+                    'details': details,
+                    'timestamp': firestore.SERVER_TIMESTAMP,
+                    'ip_address': details.get('ip_address'),
+                    'user_agent': details.get('user_agent')
+                })
             
             return True
             
@@ -319,13 +372,14 @@ class FirebaseService:
         """Criar token de verificação de email"""
         try:
             doc_ref = self.db.collection('email_verifications').document()
-            doc_ref.set({
-                'user_id': user_id,
-                'token': token,
-                'created_at': firestore.SERVER_TIMESTAMP,
-                'expires_at': firestore.SERVER_TIMESTAMP,  # + 24 horas
-                'is_used': False
-            })
+            async with track_io("firestore"):
+                await doc_ref.set({
+                    'user_id': user_id,
+                    'token': token,
+                    'created_at': firestore.SERVER_TIMESTAMP,
+                    'expires_at': firestore.SERVER_TIMESTAMP,  # + 24 horas
+                    'is_used': False
+                })
             
             return True
             
@@ -342,12 +396,14 @@ class FirebaseService:
                 filter=FieldFilter('is_used', '==', False)
             ).limit(1)
             
-            docs = query.get()
+            async with track_io("firestore"):
+                docs = await query.get()
             
             if docs:
                 doc = docs[0]
                 # Marcar como usado
-                doc.reference.update({'is_used': True})
+                async with track_io("firestore"):
+                    await doc.reference.update({'is_used': True})
                 return doc.to_dict()
             
             return None
@@ -0,0 +1,55 @@
+"""
+Medição de tempo de I/O por request (Firestore, Firebase Auth, HTTP)
+"""
+
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, Optional
+
+# Tempos acumulados do request atual: {categoria: {"calls": n, "ms": total}}
+_request_io: ContextVar[Optional[Dict[str, Dict[str, float]]]] = ContextVar("request_io", default=None)
+
+def start_request_io() -> Token:
+    """Inicia a contabilização de I/O para o request atual"""
+    return _request_io.set({})
+
+def end_request_io(token: Token) -> Dict[str, Dict[str, float]]:
+    """
+    Finaliza a contabilização e retorna o resumo do request
+
+    Args:
+        token: Token retornado por start_request_io
+
+    Returns:
+        Dict: Chamadas e milissegundos por categoria de I/O
+    """
+    summary = get_request_io()
+    _request_io.reset(token)
+    return summary
+
+def get_request_io() -> Dict[str, Dict[str, float]]:
+    """Resumo de I/O do request atual (vazio fora de um request)"""
+    timings = _request_io.get() or {}
+    return {
+        category: {"calls": int(values["calls"]), "ms": round(values["ms"], 2)}
+        for category, values in timings.items()
+    }
+
+@asynccontextmanager
+async def track_io(category: str):
+    """
+    Mede o tempo de uma operação de I/O e acumula no request atual
+
+    Args:
+        category: Categoria da operação (firestore, firebase_auth, http)
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = _request_io.get()
+        if timings is not None:
+            entry = timings.setdefault(category, {"calls": 0, "ms": 0.0})
+            entry["calls"] += 1
+            entry["ms"] += (time.perf_counter() - started) * 1000
@@ -0,0 +1,141 @@
+"""
+Hash e verificação de senhas (bcrypt) fora do event loop, com limite de concorrência
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Deque, Dict, Optional
+from passlib.context import CryptContext
+import structlog
+
+from config.settings import get_settings
+
+logger = structlog.get_logger()
+settings = get_settings()
+
+class PasswordHasherBusy(Exception):
+    """Fila de hashing cheia: a requisição deve ser rejeitada (429)"""
+
+class PasswordHasher:
+    """
+    Executa bcrypt em um pool de threads dedicado e limitado
+
+    A biblioteca bcrypt libera o GIL durante o hash, então o pool processa
+    hashes em paralelo sem travar o event loop. Operações além de
+    max_workers + max_queue são rejeitadas com PasswordHasherBusy em vez de
+    se acumularem indefinidamente.
+    """
+
+    def __init__(
+        self,
+        pwd_context: CryptContext,
+        max_workers: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        latency_window: int = 1000
+    ):
+        self.pwd_context = pwd_context
+        self.max_workers = max_workers or settings.password_hash_max_workers
+        self.max_queue = max_queue if max_queue is not None else settings.password_hash_max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self.completed = 0
+        self.rejected = 0
+        self._wait_ms: Deque[float] = deque(maxlen=latency_window)
+        self._run_ms: Deque[float] = deque(maxlen=latency_window)
+
+    @property
+    def queue_depth(self) -> int:
+        """Operações aguardando uma thread livre"""
+        return self._pending - self._running
+
+    async def hash(self, password: str) -> str:
+        """Criptografar senha no pool"""
+        return await self._submit(self.pwd_context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verificar senha no pool"""
+        return await self._submit(self.pwd_context.verify, plain_password, hashed_password)
+
+    async def _submit(self, func, *args) -> Any:
+        """Enfileirar operação respeitando o limite de concorrência"""
+        if self._pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            logger.warning("Fila de hashing de senha cheia",
+                          pending=self._pending, max_workers=self.max_workers, max_queue=self.max_queue)
+            raise PasswordHasherBusy("Fila de hashing de senha cheia")
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="password-hasher"
+            )
+
+        submitted = time.perf_counter()
+        with self._lock:
+            self._pending += 1
+        try:
+            future = self._executor.submit(self._run, func, args, submitted)
+        except BaseException:
+            self._release()
+            raise
+        # Liberar a vaga quando o trabalho termina de fato na thread, mesmo
+        # que a coroutine que aguarda seja cancelada antes disso
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, future=None):
+        """Decrementa as operações pendentes (chamado pela thread do pool)"""
+        with self._lock:
+            self._pending -= 1
+
+    def _run(self, func, args, submitted: float) -> Any:
+        """Executa na thread do pool, medindo espera e duração"""
+        started = time.perf_counter()
+        with self._lock:
+            self._running += 1
+        try:
+            return func(*args)
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self._running -= 1
+                self.completed += 1
+                self._wait_ms.append((started - submitted) * 1000)
+                self._run_ms.append((finished - started) * 1000)
+
+    def stats(self) -> Dict[str, Any]:
+        """Profundidade da fila, rejeições e latências recentes"""
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._running,
+            "queue_depth": max(self.queue_depth, 0),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "queue_wait_ms": self._latency_summary(self._wait_ms),
+            "hash_ms": self._latency_summary(self._run_ms)
+        }
+
+    def close(self):
+        """Liberar o pool de threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    @staticmethod
+    def _latency_summary(samples: Deque[float]) -> Dict[str, float]:
+        """Média, p95 e máximo da janela recente"""
+        if not samples:
+            return {"avg": 0.0, "p95": 0.0, "max": 0.0}
+        ordered = sorted(list(samples))
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return {
+            "avg": round(sum(ordered) / len(ordered), 2),
+            "p95": round(p95, 2),
+            "max": round(ordered[-1], 2)
+        }
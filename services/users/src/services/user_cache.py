@@ -0,0 +1,86 @@
+"""
+Cache em memória de perfis de usuário para a autenticação
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import structlog
+
+from config.settings import get_settings
+
+logger = structlog.get_logger()
+settings = get_settings()
+
+class UserProfileCache:
+    """
+    Cache LRU com TTL curto dos documentos de usuário, por ID
+
+    Usado por get_current_user para evitar uma leitura do Firestore a cada
+    request autenticado. O FirebaseService invalida a entrada do usuário
+    a cada escrita no documento (update_user/delete_user).
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_size: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.user_cache_ttl
+        self.max_size = max_size if max_size is not None else settings.user_cache_max_size
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Buscar usuário no cache (None se ausente ou expirado)"""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, user_data = entry
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return dict(user_data)
+
+    def set(self, user_id: str, user_data: Dict[str, Any]):
+        """Armazenar usuário no cache"""
+        if self.max_size <= 0 or self.ttl_seconds <= 0:
+            return
+
+        self._entries[user_id] = (time.monotonic() + self.ttl_seconds, dict(user_data))
+        self._entries.move_to_end(user_id)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, user_id: str):
+        """Remover usuário do cache após uma escrita"""
+        if self._entries.pop(user_id, None) is not None:
+            self.invalidations += 1
+
+    def clear(self):
+        """Limpar o cache"""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores do cache"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
@@ -0,0 +1,63 @@
+"""
+Testes para a medição de tempo de I/O por request
+"""
+
+import asyncio
+import pytest
+
+from src.services.io_timing import start_request_io, end_request_io, get_request_io, track_io
+
+class TestIOTiming:
+    """Testes do acumulador de I/O por request"""
+
+    @pytest.mark.asyncio
+    async def test_track_io_accumulates_per_category(self):
+        """Testar acúmulo de chamadas e tempo por categoria"""
+        token = start_request_io()
+
+        async with track_io("firestore"):
+            await asyncio.sleep(0.01)
+        async with track_io("firestore"):
+            pass
+        async with track_io("firebase_auth"):
+            pass
+
+        summary = end_request_io(token)
+
+        assert summary["firestore"]["calls"] == 2
+        assert summary["firestore"]["ms"] >= 10
+        assert summary["firebase_auth"]["calls"] == 1
+
+    @pytest.mark.asyncio
+    async def test_track_io_records_failed_operations(self):
+        """Testar que operações com erro também são contabilizadas"""
+        token = start_request_io()
+
+        with pytest.raises(ValueError):
+            async with track_io("firestore"):
+                raise ValueError("falha")
+
+        assert end_request_io(token)["firestore"]["calls"] == 1
+
+    @pytest.mark.asyncio
+    async def test_track_io_outside_request(self):
+        """Testar que fora de um request nada é registrado"""
+        async with track_io("firestore"):
+            pass
+
+        assert get_request_io() == {}
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_are_isolated(self):
+        """Testar isolamento entre requests concorrentes"""
+        async def handle_request(calls: int):
+            token = start_request_io()
+            for _ in range(calls):
+                async with track_io("firestore"):
+                    await asyncio.sleep(0)
+            return end_request_io(token)
+
+        first, second = await asyncio.gather(handle_request(1), handle_request(3))
+
+        assert first["firestore"]["calls"] == 1
+        assert second["firestore"]["calls"] == 3
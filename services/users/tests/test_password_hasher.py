@@ -0,0 +1,102 @@
+"""
+Testes para o pool de hashing de senhas
+"""
+
+import asyncio
+import threading
+import pytest
+from unittest.mock import Mock
+from passlib.context import CryptContext
+
+from src.services.password_hasher import PasswordHasher, PasswordHasherBusy
+
+@pytest.fixture
+def pwd_context():
+    """Contexto bcrypt real"""
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+@pytest.fixture
+def blocking_context():
+    """Contexto falso cujo hash bloqueia até ser liberado"""
+    release = threading.Event()
+    context = Mock()
+    context.hash.side_effect = lambda password: release.wait(5) and f"hash:{password}"
+    context.release = release
+    return context
+
+class TestPasswordHasher:
+    """Testes para PasswordHasher"""
+
+    @pytest.mark.asyncio
+    async def test_hash_and_verify(self, pwd_context):
+        """Testar hash e verificação no pool"""
+        hasher = PasswordHasher(pwd_context, max_workers=2, max_queue=4)
+
+        hashed = await hasher.hash("MinhaSenh@123")
+
+        assert hashed.startswith("$2b$")
+        assert await hasher.verify("MinhaSenh@123", hashed) is True
+        assert await hasher.verify("SenhaErrada", hashed) is False
+
+        stats = hasher.stats()
+        assert stats["completed"] == 3
+        assert stats["rejected"] == 0
+        assert stats["hash_ms"]["max"] > 0
+        hasher.close()
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_queue_is_full(self, blocking_context):
+        """Testar rejeição (429) quando workers e fila estão ocupados"""
+        hasher = PasswordHasher(blocking_context, max_workers=1, max_queue=1)
+
+        running = asyncio.ensure_future(hasher.hash("a"))
+        queued = asyncio.ensure_future(hasher.hash("b"))
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(PasswordHasherBusy):
+            await hasher.hash("c")
+
+        stats = hasher.stats()
+        assert stats["rejected"] == 1
+        assert stats["in_flight"] == 1
+        assert stats["queue_depth"] == 1
+
+        blocking_context.release.set()
+        assert await running == "hash:a"
+        assert await queued == "hash:b"
+        assert hasher.stats()["queue_depth"] == 0
+        hasher.close()
+
+    @pytest.mark.asyncio
+    async def test_event_loop_stays_responsive(self, blocking_context):
+        """Testar que o hash não bloqueia o event loop"""
+        hasher = PasswordHasher(blocking_context, max_workers=1, max_queue=0)
+
+        pending = asyncio.ensure_future(hasher.hash("a"))
+        await asyncio.sleep(0.01)
+
+        # O event loop continua atendendo outras corrotinas
+        assert await asyncio.wait_for(asyncio.sleep(0, result="ok"), timeout=0.5) == "ok"
+
+        blocking_context.release.set()
+        await pending
+        hasher.close()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_wait_keeps_slot_until_work_finishes(self, blocking_context):
+        """Testar que cancelar a espera não libera a vaga antes do hash terminar"""
+        hasher = PasswordHasher(blocking_context, max_workers=1, max_queue=0)
+
+        waiting = asyncio.ensure_future(hasher.hash("a"))
+        await asyncio.sleep(0.05)
+        waiting.cancel()
+        await asyncio.sleep(0.01)
+
+        # O hash continua rodando na thread: a vaga segue ocupada
+        with pytest.raises(PasswordHasherBusy):
+            await hasher.hash("b")
+
+        blocking_context.release.set()
+        await asyncio.sleep(0.05)
+        assert await hasher.hash("c") == "hash:c"
+        hasher.close()
@@ -0,0 +1,103 @@
+"""
+Testes para o cache de perfis de usuário
+"""
+
+import pytest
+from unittest.mock import Mock, AsyncMock, patch
+
+from src.services.user_cache import UserProfileCache
+from src.services.user_service import UserService
+from src.services.firebase_service import FirebaseService
+
+@pytest.fixture
+def user_cache():
+    """Cache com TTL e tamanho pequenos"""
+    return UserProfileCache(ttl_seconds=30, max_size=2)
+
+class TestUserProfileCache:
+    """Testes do cache LRU com TTL"""
+
+    def test_get_counts_hits_and_misses(self, user_cache):
+        """Testar contadores de hit e miss"""
+        assert user_cache.get("user1") is None
+
+        user_cache.set("user1", {"id": "user1", "is_active": True})
+        assert user_cache.get("user1") == {"id": "user1", "is_active": True}
+
+        stats = user_cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_entries_expire_after_ttl(self, user_cache):
+        """Testar expiração pelo TTL"""
+        with patch("src.services.user_cache.time.monotonic", return_value=100.0):
+            user_cache.set("user1", {"id": "user1"})
+
+        with patch("src.services.user_cache.time.monotonic", return_value=131.0):
+            assert user_cache.get("user1") is None
+
+        assert len(user_cache) == 0
+
+    def test_size_bound_evicts_least_recently_used(self, user_cache):
+        """Testar limite de tamanho com remoção LRU"""
+        user_cache.set("user1", {"id": "user1"})
+        user_cache.set("user2", {"id": "user2"})
+        user_cache.get("user1")
+        user_cache.set("user3", {"id": "user3"})
+
+        assert user_cache.get("user2") is None
+        assert user_cache.get("user1") is not None
+        assert user_cache.stats()["evictions"] == 1
+
+    def test_returned_data_is_a_copy(self, user_cache):
+        """Testar que alterações no retorno não afetam o cache"""
+        user_cache.set("user1", {"id": "user1", "is_active": True})
+
+        user_data = user_cache.get("user1")
+        user_data["is_active"] = False
+
+        assert user_cache.get("user1")["is_active"] is True
+
+class TestUserServiceInvalidation:
+    """Testes de invalidação do cache nas escritas do usuário"""
+
+    @pytest.fixture
+    def firebase_service(self, user_cache):
+        """FirebaseService real com o Firestore mockado"""
+        service = FirebaseService(user_cache)
+        service.db = Mock()
+        service.db.collection.return_value.document.return_value.update = AsyncMock()
+        service.log_auth_event = AsyncMock(return_value=True)
+        return service
+
+    @pytest.mark.asyncio
+    async def test_update_user_profile_invalidates(self, user_cache, firebase_service):
+        """Testar invalidação ao atualizar o perfil"""
+        user_service = UserService(firebase_service)
+        user_cache.set("user1", {"id": "user1", "name": "Antigo"})
+
+        await user_service.update_user_profile("user1", {"name": "Novo"})
+
+        assert user_cache.get("user1") is None
+        assert user_cache.stats()["invalidations"] == 1
+
+    @pytest.mark.asyncio
+    async def test_deactivate_user_invalidates(self, user_cache, firebase_service):
+        """Testar invalidação ao desativar o usuário"""
+        user_service = UserService(firebase_service)
+        user_cache.set("user1", {"id": "user1", "is_active": True})
+
+        await user_service.deactivate_user("user1")
+
+        assert user_cache.get("user1") is None
+        firebase_service.db.collection.return_value.document.return_value.update.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_delete_user_invalidates(self, user_cache, firebase_service):
+        """Testar invalidação no soft delete"""
+        user_cache.set("user1", {"id": "user1", "is_active": True})
+
+        await firebase_service.delete_user("user1")
+
+        assert user_cache.get("user1") is None
@@ -0,0 +1,72 @@
+import http from 'k6/http';
+import { check } from 'k6';
+import { Rate, Trend } from 'k6/metrics';
+
+// Load test of the tracking dashboard against the Firestore emulator.
+//
+// Start the tracking service with FIRESTORE_EMULATOR_HOST pointing at the
+// emulator, then run:
+//
+//   k6 run -e TRACKING_URL=http://localhost:8080 -e AUTH_TOKEN=<jwt> \
+//     tests/performance/tracking-dashboard-load-test.js
+//
+// Compare p(99) of dashboard_duration between builds (e.g. before/after a
+// change to the Firestore access layer). DATE_SPREAD controls how many
+// distinct dates are requested so that most requests miss the dashboard cache.
+
+const errorRate = new Rate('error_rate');
+const dashboardDuration = new Trend('dashboard_duration', true);
+
+const TRACKING_URL = __ENV.TRACKING_URL || 'http://localhost:8080';
+const AUTH_TOKEN = __ENV.AUTH_TOKEN || '';
+const DATE_SPREAD = parseInt(__ENV.DATE_SPREAD || '60', 10);
+const VUS = parseInt(__ENV.VUS || '200', 10);
+
+export const options = {
+  scenarios: {
+    dashboard: {
+      executor: 'constant-vus',
+      vus: VUS,
+      duration: __ENV.DURATION || '2m',
+    },
+  },
+  summaryTrendStats: ['avg', 'med', 'p(90)', 'p(95)', 'p(99)', 'max'],
+  thresholds: {
+    http_req_failed: ['rate<0.01'],
+    dashboard_duration: ['p(99)<1500'],
+  },
+};
+
+function randomDate() {
+  const day = new Date();
+  day.setUTCDate(day.getUTCDate() - Math.floor(Math.random() * DATE_SPREAD));
+  return day.toISOString().slice(0, 10);
+}
+
+export default function () {
+  const response = http.get(`${TRACKING_URL}/dashboard/?target_date=${randomDate()}`, {
+    headers: {
+      'Authorization': `Bearer ${AUTH_TOKEN}`,
+      'Content-Type': 'application/json'
+    },
+    timeout: '30s',
+    tags: { name: 'tracking_dashboard' }
+  });
+
+  dashboardDuration.add(response.timings.duration);
+
+  const success = check(response, {
+    'Dashboard status is 200': (r) => r.status === 200,
+  });
+
+  errorRate.add(!success);
+}
+
+export function handleSummary(data) {
+  const duration = data.metrics.dashboard_duration.values;
+  return {
+    'tracking-dashboard-results.json': JSON.stringify(data, null, 2),
+    stdout: `Dashboard (${VUS} VUs): p50=${duration.med.toFixed(1)}ms ` +
+      `p95=${duration['p(95)'].toFixed(1)}ms p99=${duration['p(99)'].toFixed(1)}ms\n`,
+  };
+}